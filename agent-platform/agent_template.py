@@ -2,18 +2,39 @@ import asyncio
 import mcp_client
 from pydantic_ai import Agent
 
+# Shared across calls so MCP servers are only started once per process
+_CLIENT = None
+_AGENT = None
+_INIT_LOCK = asyncio.Lock()
+
 async def get_pydantic_ai_agent():
-    client = mcp_client.MCPClient()
-    client.load_servers("mcp_config.json")
-    tools = await client.start()
-    return client, Agent(model='gpt-4o', tools=tools)
+    global _CLIENT, _AGENT
+    async with _INIT_LOCK:
+        if _CLIENT is None:
+            client = mcp_client.MCPClient()
+            client.load_servers("mcp_config.json")
+            tools = await client.start()
+            _CLIENT, _AGENT = client, Agent(model='gpt-4o', tools=tools)
+    return _CLIENT, _AGENT
+
+async def close_pydantic_ai_agent():
+    global _CLIENT, _AGENT
+    async with _INIT_LOCK:
+        if _CLIENT is not None:
+            await _CLIENT.cleanup()
+            _CLIENT, _AGENT = None, None
 
 async def main():
     client, agent = await get_pydantic_ai_agent()
-    while True:
-        user_input = input("User: ")
-        response = await agent.achat(user_input)
-        print("AI:", response.content)
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            # Read input on a worker thread so MCP I/O keeps running while we wait
+            user_input = await loop.run_in_executor(None, input, "User: ")
+            response = await agent.achat(user_input)
+            print("AI:", response.content)
+    finally:
+        await close_pydantic_ai_agent()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -7,16 +7,62 @@ Simple environment variable control: USE_SIMPLIFIED_AGENT=true/false
 from __future__ import annotations as _annotations
 
 import os
+import asyncio
 import logging
-from typing import Union, Optional, Dict, Any
+from functools import lru_cache
+from dataclasses import dataclass
+from datetime import datetime
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any
 from enum import Enum
 
-from services.database import DatabaseService
-from agents.order_agent import StreamlinedOrderProcessor
-from agents.simplified_autonomous_agent import SimplifiedAutonomousAgent
+from dotenv import load_dotenv
+
+if TYPE_CHECKING:
+    from services.database import DatabaseService
+    from agents.order_agent import StreamlinedOrderProcessor
+    from agents.simplified_autonomous_agent import SimplifiedAutonomousAgent
+
+# The agent modules are imported lazily, so load .env here before caching flags
+load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+_TRUTHY_VALUES = ('true', '1', 'yes')
+
+
+def _env_flag(name: str, default: str) -> bool:
+    """Parse a boolean environment variable using the factory's truthy values."""
+    return os.getenv(name, default).lower() in _TRUTHY_VALUES
+
+
+# Reason: the environment is effectively immutable for the life of the process,
+# so parse it once instead of on every message.
+_SIMPLIFIED_AGENT_SETTING = 'false'
+_USE_SIMPLIFIED = False
+_FALLBACK_ENABLED = True
+_OPENAI_CONFIGURED = False
+_SUPABASE_CONFIGURED = False
+
+
+def reset_env_cache() -> None:
+    """Re-read the cached environment configuration (useful for testing)."""
+    global _SIMPLIFIED_AGENT_SETTING, _USE_SIMPLIFIED, _FALLBACK_ENABLED
+    global _OPENAI_CONFIGURED, _SUPABASE_CONFIGURED
+    _SIMPLIFIED_AGENT_SETTING = os.getenv('USE_SIMPLIFIED_AGENT', 'false')
+    _USE_SIMPLIFIED = _SIMPLIFIED_AGENT_SETTING.lower() in _TRUTHY_VALUES
+    _FALLBACK_ENABLED = _env_flag('AUTONOMOUS_FALLBACK_ENABLED', 'true')
+    _OPENAI_CONFIGURED = bool(os.getenv('OPENAI_API_KEY'))
+    _SUPABASE_CONFIGURED = bool(os.getenv('NEXT_PUBLIC_SUPABASE_URL'))
+
+
+reset_env_cache()
+
+# Usage records are queued per message and written out in batches
+_USAGE_QUEUE_MAXSIZE = 1000
+_USAGE_BATCH_SIZE = 100
+
 
 class AgentType(str, Enum):
     """Types of agents available."""
@@ -25,6 +71,82 @@ class AgentType(str, Enum):
     FALLBACK = "fallback"
 
 
+# Plain-string labels for usage records, avoiding Enum.value lookups per message
+_AUTONOMOUS_STR = AgentType.AUTONOMOUS.value
+_STREAMLINED_STR = AgentType.STREAMLINED.value
+_AUTONOMOUS_FALLBACK_STR = f"{_AUTONOMOUS_STR}_fallback"
+_EMERGENCY_FALLBACK_STR = "emergency_fallback"
+_FAILED_STR = "failed"
+
+
+# Static capability descriptions, shared read-only by every caller
+_CAPABILITIES: Mapping[AgentType, Mapping[str, Any]] = MappingProxyType({
+    AgentType.AUTONOMOUS: MappingProxyType({
+        "name": "Autonomous Order Agent",
+        "description": "AI agent with goal-oriented decision making",
+        "features": (
+            "Goal-based action evaluation",
+            "Customer preference learning",
+            "Autonomous order creation",
+            "Intelligent clarification requests",
+            "Product suggestions",
+            "Context-aware decisions"
+        ),
+        "confidence_thresholds": MappingProxyType({
+            "order_creation": 0.85,
+            "product_suggestions": 0.7,
+            "clarification": 0.6
+        })
+    }),
+    AgentType.STREAMLINED: MappingProxyType({
+        "name": "Streamlined Order Processor",
+        "description": "Reliable rule-based order processing",
+        "features": (
+            "Intent classification",
+            "Product extraction",
+            "Catalog matching",
+            "Order creation",
+            "Basic clarification"
+        ),
+        "confidence_thresholds": MappingProxyType({
+            "order_creation": 0.8,
+            "processing": 0.6
+        })
+    })
+})
+_NO_CAPABILITIES: Mapping[str, Any] = MappingProxyType({})
+
+
+@lru_cache(maxsize=None)
+def _get_capabilities(agent_type: AgentType) -> Mapping[str, Any]:
+    """Look up the read-only capabilities for an agent type, memoized per type."""
+    return _CAPABILITIES.get(agent_type, _NO_CAPABILITIES)
+
+
+@dataclass(frozen=True, slots=True)
+class UsageRecord:
+    """Agent usage record queued per processed message."""
+    message_id: str
+    distributor_id: str
+    customer_id: str | None
+    agent_type: str
+    success: bool
+    timestamp: str
+    environment_config: Mapping[str, Any]
+    
+    def to_dict(self) -> dict[str, Any]:
+        """Convert to a plain dict for logging or storage."""
+        return {
+            'message_id': self.message_id,
+            'distributor_id': self.distributor_id,
+            'customer_id': self.customer_id,
+            'agent_type': self.agent_type,
+            'success': self.success,
+            'timestamp': self.timestamp,
+            'environment_config': dict(self.environment_config)
+        }
+
+
 class AgentFactory:
     """
     Factory for creating and selecting appropriate order processing agents.
@@ -45,14 +167,40 @@ class AgentFactory:
         self.distributor_id = distributor_id
         self._autonomous_agent = None
         self._streamlined_agent = None
+        self._usage_queue: asyncio.Queue = asyncio.Queue(maxsize=_USAGE_QUEUE_MAXSIZE)
+        self._usage_flusher_task: asyncio.Task | None = None
+        # Shared by every usage record; records are never mutated after queueing
+        self._env_snapshot = {
+            'simplified_agent_enabled': _SIMPLIFIED_AGENT_SETTING,
+            'openai_api_configured': _OPENAI_CONFIGURED
+        }
+        
+        # Static part of the health status; only agent state changes per call
+        self._health_base = {
+            "factory_status": "healthy",
+            "distributor_id": distributor_id,
+            "configuration": {
+                "simplified_agent_enabled": _SIMPLIFIED_AGENT_SETTING,
+                "openai_api_key_configured": _OPENAI_CONFIGURED,
+                "supabase_configured": _SUPABASE_CONFIGURED
+            }
+        }
+        
+        # Simple environment variable check, resolved once per factory
+        if _USE_SIMPLIFIED:
+            logger.info("✅ SimplifiedAutonomousAgent SELECTED (USE_SIMPLIFIED_AGENT=true)")
+            self._default_agent_type = AgentType.AUTONOMOUS
+        else:
+            logger.info("📝 StreamlinedOrderProcessor SELECTED (USE_SIMPLIFIED_AGENT=false)")
+            self._default_agent_type = AgentType.STREAMLINED
         
-        logger.info(f"Initialized AgentFactory for distributor {distributor_id}")
+        logger.info("Initialized AgentFactory for distributor %s", distributor_id)
     
     async def create_agent(
         self, 
-        customer_id: Optional[str] = None,
-        force_agent_type: Optional[AgentType] = None
-    ) -> Union[SimplifiedAutonomousAgent, StreamlinedOrderProcessor]:
+        customer_id: str | None = None,
+        force_agent_type: AgentType | None = None
+    ) -> SimplifiedAutonomousAgent | StreamlinedOrderProcessor:
         """
         Create appropriate agent based on feature flags and context.
         
@@ -61,27 +209,43 @@ class AgentFactory:
             force_agent_type: Force specific agent type (for testing)
             
         Returns:
-            Union[SimplifiedAutonomousAgent, StreamlinedOrderProcessor]: Selected agent
+            SimplifiedAutonomousAgent | StreamlinedOrderProcessor: Selected agent
+        """
+        agent, _ = self._select_agent(force_agent_type)
+        return agent
+    
+    def _select_agent(
+        self,
+        force_agent_type: AgentType | None = None
+    ) -> tuple[SimplifiedAutonomousAgent | StreamlinedOrderProcessor, AgentType]:
+        """
+        Select the agent to use along with its type.
+        
+        Args:
+            force_agent_type: Force specific agent type (for testing)
+            
+        Returns:
+            tuple: Selected agent and the AgentType it was created for
         """
         try:
-            # Determine which agent to use
-            agent_type = await self._determine_agent_type(customer_id, force_agent_type)
+            # Determine which agent to use (forced type is for testing)
+            agent_type = force_agent_type or self._determine_agent_type()
             
             # Create and return appropriate agent
-            if agent_type == AgentType.AUTONOMOUS:
-                return await self._get_autonomous_agent()
+            if agent_type is AgentType.AUTONOMOUS:
+                return self._get_autonomous_agent(), agent_type
             else:
-                return await self._get_streamlined_agent()
+                return self._get_streamlined_agent(), AgentType.STREAMLINED
                 
         except Exception as e:
-            logger.error(f"Failed to create agent: {e}")
+            logger.error("Failed to create agent: %s", e)
             # Always fallback to streamlined agent on error
-            return await self._get_streamlined_agent()
+            return self._get_streamlined_agent(), AgentType.STREAMLINED
     
     async def process_message_with_best_agent(
         self, 
-        message_data: Dict[str, Any]
-    ) -> Optional[Any]:
+        message_data: dict[str, Any]
+    ) -> Any | None:
         """
         Process message with the most appropriate agent.
         
@@ -89,118 +253,108 @@ class AgentFactory:
             message_data: Message data from webhook
             
         Returns:
-            Optional[Any]: Processing result (type depends on agent used)
+            Any | None: Processing result (type depends on agent used)
         """
         customer_id = message_data.get('customer_id')
         message_id = message_data.get('id', 'unknown')
         
-        try:
-            # Create appropriate agent
-            agent = await self.create_agent(customer_id)
-            agent_type = type(agent).__name__
-            
-            logger.info(f"Processing message {message_id} with {agent_type}")
-            
-            # Process message
-            result = await agent.process_message(message_data)
+        # Create appropriate agent
+        agent, agent_type_enum = self._select_agent()
+        is_autonomous = agent_type_enum is AgentType.AUTONOMOUS
+        label = _AUTONOMOUS_STR if is_autonomous else _STREAMLINED_STR
+        failure_label = label
+        
+        logger.info("Processing message %s with %s", message_id, label)
+        
+        # Reason: at most two attempts - the selected agent, then the
+        # streamlined agent as fallback (after None) or emergency (after error)
+        for attempt in range(2):
+            failed_with_error = False
+            try:
+                if agent is None:
+                    agent = self._get_streamlined_agent()
+                result = await agent.process_message(message_data)
+            except Exception as e:
+                logger.error("Failed to process message %s with %s: %s", message_id, label, e)
+                result = None
+                failed_with_error = True
             
             if result:
-                logger.info(f"✅ Message {message_id} processed successfully by {agent_type}")
+                logger.info("✅ Message %s processed successfully by %s", message_id, label)
                 
                 # Log agent selection for monitoring
-                await self._log_agent_usage(message_id, agent_type, customer_id, True)
-                
+                self._log_agent_usage(message_id, label, customer_id, True)
                 return result
-            else:
-                logger.warning(f"⚠️ Message {message_id} processing returned None from {agent_type}")
-                
-                # If autonomous agent failed, try fallback
-                fallback_enabled = os.getenv('AUTONOMOUS_FALLBACK_ENABLED', 'true').lower() in ['true', '1', 'yes']
-                if isinstance(agent, SimplifiedAutonomousAgent) and fallback_enabled:
-                    logger.info(f"🔄 Attempting fallback for message {message_id}")
-                    fallback_agent = await self._get_streamlined_agent()
-                    fallback_result = await fallback_agent.process_message(message_data)
-                    
-                    if fallback_result:
-                        logger.info(f"✅ Fallback successful for message {message_id}")
-                        await self._log_agent_usage(message_id, f"{agent_type}_fallback", customer_id, True)
-                        return fallback_result
-                
-                await self._log_agent_usage(message_id, agent_type, customer_id, False)
-                return None
-                
-        except Exception as e:
-            logger.error(f"Failed to process message {message_id}: {e}")
             
-            # Emergency fallback to streamlined agent
-            try:
-                logger.info(f"🚨 Emergency fallback for message {message_id}")
-                emergency_agent = await self._get_streamlined_agent()
-                emergency_result = await emergency_agent.process_message(message_data)
-                
-                if emergency_result:
-                    await self._log_agent_usage(message_id, "emergency_fallback", customer_id, True)
-                    return emergency_result
-                
-            except Exception as fallback_error:
-                logger.error(f"Emergency fallback also failed for message {message_id}: {fallback_error}")
+            if attempt:
+                break
+            
+            if failed_with_error:
+                logger.info("🚨 Emergency fallback for message %s", message_id)
+                label = _EMERGENCY_FALLBACK_STR
+                failure_label = _FAILED_STR
+            elif is_autonomous and _FALLBACK_ENABLED:
+                logger.warning("⚠️ Message %s processing returned None from %s", message_id, label)
+                logger.info("🔄 Attempting fallback for message %s", message_id)
+                label = _AUTONOMOUS_FALLBACK_STR
+            else:
+                logger.warning("⚠️ Message %s processing returned None from %s", message_id, label)
+                break
             
-            await self._log_agent_usage(message_id, "failed", customer_id, False)
-            return None
+            agent = None
+        
+        self._log_agent_usage(message_id, failure_label, customer_id, False)
+        return None
     
-    async def _determine_agent_type(
-        self, 
-        customer_id: Optional[str], 
-        force_agent_type: Optional[AgentType]
-    ) -> AgentType:
+    def _determine_agent_type(self) -> AgentType:
         """
         Determine which agent type to use - simple environment variable control.
         
-        Args:
-            customer_id: Customer ID (not used in simple mode)
-            force_agent_type: Forced agent type (for testing)
-            
         Returns:
-            AgentType: Type of agent to use
+            AgentType: Type of agent resolved from USE_SIMPLIFIED_AGENT at init
         """
-        # Handle forced agent type (for testing)
-        if force_agent_type:
-            logger.debug(f"Using forced agent type: {force_agent_type}")
-            return force_agent_type
-        
-        # Simple environment variable check
-        use_simplified = os.getenv('USE_SIMPLIFIED_AGENT', 'false').lower() in ['true', '1', 'yes']
-        
-        if use_simplified:
-            logger.info(f"✅ SimplifiedAutonomousAgent SELECTED (USE_SIMPLIFIED_AGENT=true)")
-            return AgentType.AUTONOMOUS
-        else:
-            logger.info(f"📝 StreamlinedOrderProcessor SELECTED (USE_SIMPLIFIED_AGENT=false)")
-            return AgentType.STREAMLINED
+        return self._default_agent_type
     
-    async def _get_autonomous_agent(self) -> SimplifiedAutonomousAgent:
+    def _get_autonomous_agent(self) -> SimplifiedAutonomousAgent:
         """Get or create simplified autonomous agent instance."""
         if self._autonomous_agent is None:
+            # Reason: imported on first use so deployments that only run one
+            # agent never load the other agent's module tree
+            from agents.simplified_autonomous_agent import SimplifiedAutonomousAgent
             logger.debug("Creating new SimplifiedAutonomousAgent instance")
             self._autonomous_agent = SimplifiedAutonomousAgent(self.database, self.distributor_id)
         return self._autonomous_agent
     
-    async def _get_streamlined_agent(self) -> StreamlinedOrderProcessor:
+    def _get_streamlined_agent(self) -> StreamlinedOrderProcessor:
         """Get or create streamlined agent instance."""
         if self._streamlined_agent is None:
+            from agents.order_agent import StreamlinedOrderProcessor
             logger.debug("Creating new StreamlinedOrderProcessor instance")
             self._streamlined_agent = StreamlinedOrderProcessor(self.database, self.distributor_id)
         return self._streamlined_agent
     
-    async def _log_agent_usage(
+    def warmup(self):
+        """
+        Create the agents this configuration can route to ahead of the first message.
+        
+        The streamlined agent is always created since it is either the primary
+        agent or the fallback target; the autonomous agent only when enabled.
+        """
+        if self._default_agent_type is AgentType.AUTONOMOUS:
+            self._get_autonomous_agent()
+        self._get_streamlined_agent()
+    
+    def _log_agent_usage(
         self, 
         message_id: str, 
         agent_type: str, 
-        customer_id: Optional[str], 
+        customer_id: str | None, 
         success: bool
     ):
         """
-        Log agent usage for monitoring and analytics.
+        Queue an agent usage record for monitoring and analytics.
+        
+        Records are written out in batches by the background usage flusher.
         
         Args:
             message_id: Message ID
@@ -209,33 +363,83 @@ class AgentFactory:
             success: Whether processing was successful
         """
         try:
-            usage_data = {
-                'message_id': message_id,
-                'distributor_id': self.distributor_id,
-                'customer_id': customer_id,
-                'agent_type': agent_type,
-                'success': success,
-                'timestamp': __import__('datetime').datetime.now().isoformat(),
-                'environment_config': {
-                    'simplified_agent_enabled': os.getenv('USE_SIMPLIFIED_AGENT', 'false'),
-                    'openai_api_configured': bool(os.getenv('OPENAI_API_KEY'))
-                }
-            }
+            usage_record = UsageRecord(
+                message_id=message_id,
+                distributor_id=self.distributor_id,
+                customer_id=customer_id,
+                agent_type=agent_type,
+                success=success,
+                timestamp=datetime.now().isoformat(),
+                environment_config=self._env_snapshot
+            )
+            
+            self._usage_queue.put_nowait(usage_record)
+            self._ensure_usage_flusher()
+            
+        except asyncio.QueueFull:
+            logger.warning("Agent usage queue full, dropping record for message %s", message_id)
+        except Exception as e:
+            logger.warning("Failed to log agent usage: %s", e)
+    
+    def _ensure_usage_flusher(self):
+        """Start the background usage flusher if it is not already running."""
+        if self._usage_flusher_task is None or self._usage_flusher_task.done():
+            try:
+                self._usage_flusher_task = asyncio.get_running_loop().create_task(
+                    self._usage_flusher()
+                )
+            except RuntimeError:
+                # No running event loop - write out synchronously instead
+                self._flush_usage_batch(self._drain_usage_queue())
+    
+    async def _usage_flusher(self):
+        """Write queued usage records in batches until cancelled."""
+        while True:
+            batch = [await self._usage_queue.get()]
+            # Reason: take everything already queued rather than waiting for a
+            # full batch, so records are never held back under light load.
+            batch.extend(self._drain_usage_queue(_USAGE_BATCH_SIZE - 1))
+            self._flush_usage_batch(batch)
+    
+    def _drain_usage_queue(self, limit: int | None = None) -> list[UsageRecord]:
+        """Pop up to ``limit`` records currently in the usage queue without waiting."""
+        records = []
+        while limit is None or len(records) < limit:
+            try:
+                records.append(self._usage_queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return records
+    
+    def _flush_usage_batch(self, batch: list[UsageRecord]):
+        """
+        Write a batch of usage records.
+        
+        Args:
+            batch: Usage records to write
+        """
+        if not batch:
+            return
+        
+        try:
+            usage_data = [record.to_dict() for record in batch]
             
             # Store usage data (could be in a separate analytics table)
             # For now, just log it
-            logger.info(f"Agent usage logged: {usage_data}")
+            logger.info("Agent usage logged (%d records): %s", len(usage_data), usage_data)
             
-            # In production, you might want to store this in a dedicated table:
-            # await self.database.insert_single(
+            # In production, you might want to store this in a dedicated table
+            # with a single insert per batch:
+            # await self.database.execute_query(
             #     table='agent_usage_logs',
+            #     operation='insert',
             #     data=usage_data
             # )
             
         except Exception as e:
-            logger.warning(f"Failed to log agent usage: {e}")
+            logger.warning("Failed to log agent usage: %s", e)
     
-    def get_agent_capabilities(self, agent_type: AgentType) -> Dict[str, Any]:
+    def get_agent_capabilities(self, agent_type: AgentType) -> Mapping[str, Any]:
         """
         Get capabilities description for an agent type.
         
@@ -243,89 +447,59 @@ class AgentFactory:
             agent_type: Type of agent
             
         Returns:
-            Dict: Agent capabilities and features
+            Mapping: Read-only agent capabilities and features
         """
-        capabilities = {
-            AgentType.AUTONOMOUS: {
-                "name": "Autonomous Order Agent",
-                "description": "AI agent with goal-oriented decision making",
-                "features": [
-                    "Goal-based action evaluation",
-                    "Customer preference learning",
-                    "Autonomous order creation",
-                    "Intelligent clarification requests",
-                    "Product suggestions",
-                    "Context-aware decisions"
-                ],
-                "confidence_thresholds": {
-                    "order_creation": 0.85,
-                    "product_suggestions": 0.7,
-                    "clarification": 0.6
-                }
-            },
-            AgentType.STREAMLINED: {
-                "name": "Streamlined Order Processor",
-                "description": "Reliable rule-based order processing",
-                "features": [
-                    "Intent classification",
-                    "Product extraction",
-                    "Catalog matching",
-                    "Order creation",
-                    "Basic clarification"
-                ],
-                "confidence_thresholds": {
-                    "order_creation": 0.8,
-                    "processing": 0.6
-                }
-            }
-        }
-        
-        return capabilities.get(agent_type, {})
+        return _get_capabilities(agent_type)
     
-    async def get_agent_health_status(self) -> Dict[str, Any]:
+    def get_agent_health_status(self) -> dict[str, Any]:
         """
         Get health status of agent factory and available agents.
         
         Returns:
-            Dict: Health status information
+            dict: Health status information
         """
-        try:
-            status = {
-                "factory_status": "healthy",
-                "distributor_id": self.distributor_id,
-                "configuration": {
-                    "simplified_agent_enabled": os.getenv('USE_SIMPLIFIED_AGENT', 'false'),
-                    "openai_api_key_configured": bool(os.getenv('OPENAI_API_KEY')),
-                    "supabase_configured": bool(os.getenv('NEXT_PUBLIC_SUPABASE_URL'))
-                },
-                "agents": {
-                    "autonomous": {
-                        "available": True,
-                        "initialized": self._autonomous_agent is not None
-                    },
-                    "streamlined": {
-                        "available": True,
-                        "initialized": self._streamlined_agent is not None
-                    }
+        return {
+            **self._health_base,
+            "agents": {
+                "autonomous": {
+                    "available": True,
+                    "initialized": self._autonomous_agent is not None
                 },
-                "database_status": "connected" if self.database else "disconnected"
-            }
-            
-            return status
-            
-        except Exception as e:
-            logger.error(f"Failed to get agent health status: {e}")
-            return {
-                "factory_status": "error",
-                "error": str(e),
-                "distributor_id": self.distributor_id
-            }
+                "streamlined": {
+                    "available": True,
+                    "initialized": self._streamlined_agent is not None
+                }
+            },
+            "database_status": "connected" if self.database else "disconnected"
+        }
     
     def reset_agents(self):
         """Reset agent instances (useful for testing or configuration changes)."""
         logger.info("Resetting agent instances")
         self._autonomous_agent = None
         self._streamlined_agent = None
+    
+    async def close(self):
+        """Drain agents' background writes and usage records, release agents and drop this factory from the shared cache."""
+        for agent in (self._autonomous_agent, self._streamlined_agent):
+            # Reason: only agents with queued background writes define close()
+            close = getattr(agent, 'close', None)
+            if close is not None:
+                await close()
+        if self._usage_flusher_task is not None:
+            self._usage_flusher_task.cancel()
+            self._usage_flusher_task = None
+        self._flush_usage_batch(self._drain_usage_queue())
+        self.reset_agents()
+        key = (id(self.database), self.distributor_id)
+        if _FACTORY_CACHE.get(key) is self:
+            del _FACTORY_CACHE[key]
+
+
+# Shared factories keyed by (id(database), distributor_id) so agent instances
+# survive across requests made through the convenience functions below.
+# Cached factories hold the database, so its id() stays valid until close().
+_FACTORY_CACHE: dict[tuple[int, str], AgentFactory] = {}
 
 
 def create_agent_factory(database: DatabaseService, distributor_id: str) -> AgentFactory:
@@ -342,12 +516,33 @@ def create_agent_factory(database: DatabaseService, distributor_id: str) -> Agen
     return AgentFactory(database, distributor_id)
 
 
+def get_cached_agent_factory(database: DatabaseService, distributor_id: str) -> AgentFactory:
+    """
+    Get a shared agent factory for the database/distributor pair, creating it on first use.
+    
+    Args:
+        database: Database service instance
+        distributor_id: Distributor ID
+        
+    Returns:
+        AgentFactory: Cached agent factory
+    """
+    key = (id(database), distributor_id)
+    factory = _FACTORY_CACHE.get(key)
+    if factory is None:
+        # Reason: lookup and insert happen without an await in between, so no
+        # lock is needed to keep concurrent requests from building duplicates.
+        factory = create_agent_factory(database, distributor_id)
+        _FACTORY_CACHE[key] = factory
+    return factory
+
+
 # Convenience functions for direct agent creation
 async def create_best_agent(
     database: DatabaseService, 
     distributor_id: str, 
-    customer_id: Optional[str] = None
-) -> Union[SimplifiedAutonomousAgent, StreamlinedOrderProcessor]:
+    customer_id: str | None = None
+) -> SimplifiedAutonomousAgent | StreamlinedOrderProcessor:
     """
     Create the best available agent for the given context.
     
@@ -357,17 +552,17 @@ async def create_best_agent(
         customer_id: Customer ID (optional)
         
     Returns:
-        Union[SimplifiedAutonomousAgent, StreamlinedOrderProcessor]: Best available agent
+        SimplifiedAutonomousAgent | StreamlinedOrderProcessor: Best available agent
     """
-    factory = create_agent_factory(database, distributor_id)
+    factory = get_cached_agent_factory(database, distributor_id)
     return await factory.create_agent(customer_id)
 
 
 async def process_message_intelligently(
     database: DatabaseService,
     distributor_id: str,
-    message_data: Dict[str, Any]
-) -> Optional[Any]:
+    message_data: dict[str, Any]
+) -> Any | None:
     """
     Process message with intelligent agent selection.
     
@@ -377,7 +572,7 @@ async def process_message_intelligently(
         message_data: Message data
         
     Returns:
-        Optional[Any]: Processing result
+        Any | None: Processing result
     """
-    factory = create_agent_factory(database, distributor_id)
+    factory = get_cached_agent_factory(database, distributor_id)
     return await factory.process_message_with_best_agent(message_data)
\ No newline at end of file
@@ -8,44 +8,296 @@ examples/example_pydantic_ai.py.
 
 from __future__ import annotations as _annotations
 
+import asyncio
+import hashlib
 import logging
+import re
 import time
 import json
 import os
-from typing import Dict, List, Optional, Any
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import islice
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional, Any, Sequence, Set, Tuple
 from dataclasses import dataclass
-
-from pydantic_ai import Agent, RunContext
-from pydantic_ai.models.openai import OpenAIModel
+from datetime import datetime, timezone
 
 from config.settings import settings
 from config.feature_flags import (
     feature_flags, AutonomousAgentFeature, get_autonomous_confidence_threshold
 )
+from services.catalog_cache import catalog_cache
 from services.database import DatabaseService
+from services.openai_client import get_openai_client
 from services.goal_evaluator import GoalEvaluator
 from services.conversation_memory import ConversationMemory
-from services.intent_classifier import intent_classifier, MessageIntent
-from services.product_matcher import ProductMatcher
+from services.intent_classifier import (
+    intent_batch_scheduler, IntentClassificationResult, MessageIntent
+)
 from services.smart_order_consolidator import SmartOrderConsolidator, ConsolidationDecision
 from services.enhanced_product_validator import EnhancedProductValidator
 from services.autonomous_order_creator import AutonomousOrderCreator
-from schemas.message import MessageAnalysis, MessageIntent as MessageIntentEnum, ExtractedProduct
+from schemas.message import ExtractedProduct
 from schemas.order import OrderCreation, OrderProduct
 from tools.supabase_tools import (
-    create_order, fetch_product_catalog, update_message_ai_data
+    create_order, update_message_ai_data
 )
-from schemas.goals import BusinessGoal, create_default_goal_configuration
+from schemas.goals import ActionEvaluation, BusinessGoal, create_default_goal_configuration
 from schemas.autonomous_agent import (
     AutonomousAction, AutonomousActionType, AutonomousAgentContext,
     AutonomousDecision, AutonomousResult, create_simple_action
 )
-from schemas.message import MessageAnalysis, MessageIntent, ExtractedProduct
 from tools.autonomous_actions import execute_autonomous_action
-from tools.supabase_tools import update_message_ai_data
+
+if TYPE_CHECKING:
+    from pydantic_ai import Agent, RunContext
+    from agents.order_agent import StreamlinedOrderProcessor
 
 logger = logging.getLogger(__name__)
 
+# Basic Spanish product keywords and quantities for simple extraction
+_BASIC_PRODUCTS = {
+    'aceite': 'aceite',
+    'agua': 'agua embotellada',
+    'leche': 'leche',
+    'cerveza': 'cerveza',
+    'coca cola': 'coca cola',
+    'queso': 'queso',
+    'pan': 'pan',
+    'arroz': 'arroz'
+}
+
+_SPANISH_NUMBERS = {
+    'un': 1, 'una': 1, 'uno': 1,
+    'dos': 2, 'tres': 3, 'cuatro': 4, 'cinco': 5
+}
+
+# Reason: a single alternation scans the message once instead of one
+# substring search per keyword; longest keywords first so they win ties
+_PRODUCT_KEYWORD_RE = re.compile(
+    '|'.join(re.escape(k) for k in sorted(_BASIC_PRODUCTS, key=len, reverse=True))
+)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Keywords that pick the action for an order-related message, by category
+_ACTION_KEYWORDS = {
+    'buy': ("quiero", "necesito", "pedido", "comprar", "me das", "dame", "ponme"),
+    'pricing': ("precio", "cuesta", "cuanto", "vale"),
+    'availability': ("tienes", "disponible", "stock", "hay"),
+    'catalog': ("productos", "que tienen", "catalogo", "lista"),
+}
+_KEYWORD_CATEGORY = {
+    keyword: category
+    for category, keywords in _ACTION_KEYWORDS.items()
+    for keyword in keywords
+}
+# Reason: a zero-width lookahead reports every (possibly overlapping) keyword in
+# one pass over the message; no keyword is a prefix of one in another category,
+# so trying one alternative per position never hides a category
+_ACTION_KEYWORD_RE = re.compile(
+    '(?=(' + '|'.join(re.escape(k) for k in sorted(_KEYWORD_CATEGORY, key=len, reverse=True)) + '))'
+)
+_DIGIT_RE = re.compile(r"\d")
+# Buy words recognised by the analyze_customer_message tool
+_ANALYSIS_BUY_RE = re.compile("quiero|necesito|pedido")
+
+
+def match_action_keywords(message_lower: str) -> frozenset:
+    """
+    Find which action keyword categories appear in a lowercased message.
+    
+    Args:
+        message_lower: Lowercased message content
+        
+    Returns:
+        frozenset: Matched categories ('buy', 'pricing', 'availability', 'catalog')
+    """
+    return frozenset(_KEYWORD_CATEGORY[m.group(1)] for m in _ACTION_KEYWORD_RE.finditer(message_lower))
+
+
+def _has_variance(scores: Dict[str, float]) -> bool:
+    """Check whether any score differs from the first, stopping at the first difference."""
+    values = iter(scores.values())
+    first = next(values, None)
+    return any(value != first for value in values)
+
+# Message updates are queued per message and written out in batches
+_MESSAGE_UPDATE_QUEUE_MAXSIZE = 1000
+_MESSAGE_UPDATE_BATCH_SIZE = 256
+# How long the flusher waits after the first queued update so others can join its batch
+_MESSAGE_UPDATE_LINGER_SECONDS = 0.05
+
+# Per-distributor feature state, resolved once into a bitmap by resolve_feature_flags
+FLAG_AUTONOMOUS = 1 << 0
+FLAG_FALLBACK = 1 << 1
+# Autonomous agent is in a percentage rollout, so it must be checked per customer
+FLAG_AUTONOMOUS_ROLLOUT = 1 << 2
+
+
+def resolve_feature_flags(distributor_id: str) -> int:
+    """
+    Fold the feature flags the message path reads into one bitmap.
+    
+    Args:
+        distributor_id: Distributor ID to resolve flags for
+        
+    Returns:
+        int: Combination of the FLAG_* bits
+    """
+    autonomous = AutonomousAgentFeature.AUTONOMOUS_AGENT_ENABLED
+    flags = FLAG_FALLBACK if feature_flags.fallback_enabled else 0
+    if feature_flags.varies_by_customer(autonomous, distributor_id):
+        flags |= FLAG_AUTONOMOUS_ROLLOUT
+    elif feature_flags.is_feature_enabled(autonomous, distributor_id):
+        flags |= FLAG_AUTONOMOUS
+    return flags
+
+
+@dataclass(frozen=True, slots=True)
+class NormalizedMessage:
+    """
+    A message normalized once and shared by every matcher on the processing path.
+    
+    Uses casefold() rather than lower() so Spanish accents and special letters
+    compare consistently.
+    """
+    raw: str
+    lower: str
+    tokens: tuple
+    token_starts: tuple
+    
+    @classmethod
+    def from_content(cls, content: str) -> NormalizedMessage:
+        """
+        Strip, casefold and tokenize message content.
+        
+        Args:
+            content: Raw message content
+            
+        Returns:
+            NormalizedMessage: Normalized forms of the content
+        """
+        raw = content.strip()
+        lower = raw.casefold()
+        token_matches = list(_TOKEN_RE.finditer(lower))
+        return cls(
+            raw=raw,
+            lower=lower,
+            tokens=tuple(m.group(0) for m in token_matches),
+            token_starts=tuple(m.start() for m in token_matches)
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class IncomingMessage:
+    """
+    The webhook fields the order capture path reads, unpacked once per message.
+    """
+    id: str = ''
+    customer_id: str = ''
+    conversation_id: str = ''
+    channel: str = 'WHATSAPP'
+    
+    @classmethod
+    def from_dict(cls, message_data: Dict[str, Any]) -> IncomingMessage:
+        """
+        Unpack the webhook message dict.
+        
+        Args:
+            message_data: Message from webhook with id, customer_id, etc.
+            
+        Returns:
+            IncomingMessage: Typed view of the message fields
+        """
+        get = message_data.get
+        return cls(
+            id=get('id') or '',
+            customer_id=get('customer_id') or '',
+            conversation_id=get('conversation_id') or '',
+            channel=get('channel') or 'WHATSAPP'
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class FallbackContext:
+    """
+    Work the autonomous path already did, handed to the fallback agent.
+    
+    Lets the streamlined agent skip re-normalizing the content and, for
+    confident non-order messages, its own OpenAI analysis.
+    """
+    message: Optional[NormalizedMessage] = None
+    intent_result: Optional[IntentClassificationResult] = None
+
+
+@dataclass(frozen=True, slots=True)
+class CatalogIndex:
+    """
+    Catalog product names tokenized once per catalog load.
+    
+    Messages are scanned token by token: each token is looked up in
+    by_first_token and only the products starting with it are compared,
+    so a scan costs O(message tokens) instead of O(catalog size).
+    """
+    catalog: Sequence[Dict[str, Any]]
+    products: tuple
+    names: tuple
+    by_first_token: Dict[str, tuple]
+    
+    @classmethod
+    def build(cls, catalog_dicts: Sequence[Dict[str, Any]]) -> CatalogIndex:
+        """
+        Tokenize catalog names and index them by their first token.
+        
+        Args:
+            catalog_dicts: Catalog products from the shared catalog cache
+            
+        Returns:
+            CatalogIndex: Index ready for scanning messages
+        """
+        products, names, by_first_token = [], [], {}
+        for product in catalog_dicts:
+            name_tokens = tuple(_TOKEN_RE.findall((product.get('name') or '').lower()))
+            if not name_tokens:
+                continue
+            by_first_token.setdefault(name_tokens[0], []).append(len(products))
+            products.append(product)
+            names.append(name_tokens)
+        
+        return cls(
+            catalog=catalog_dicts,
+            products=tuple(products),
+            names=tuple(names),
+            by_first_token={token: tuple(ids) for token, ids in by_first_token.items()}
+        )
+    
+    def scan(self, tokens: Sequence[str]) -> List[tuple]:
+        """
+        Find catalog products whose full name appears in a tokenized message.
+        
+        Args:
+            tokens: Lowercased message tokens
+            
+        Returns:
+            List of (token_position, product_dict), longest name first at each position
+        """
+        matches = []
+        for position, token in enumerate(tokens):
+            candidates = self.by_first_token.get(token)
+            if not candidates:
+                continue
+            best = None
+            for product_id in candidates:
+                name = self.names[product_id]
+                if tuple(tokens[position:position + len(name)]) == name:
+                    if best is None or len(name) > len(self.names[best]):
+                        best = product_id
+            if best is not None:
+                matches.append((position, self.products[best]))
+        return matches
+
 
 @dataclass
 class AutonomousAgentDeps:
@@ -103,16 +355,6 @@ DECISION PROCESS:
 Remember: When in doubt, DO NOTHING. Let the humans handle their relationship.
 """
 
-# Initialize the autonomous agent with OpenAI model
-autonomous_agent = Agent(
-    model=OpenAIModel(settings.openai_model),
-    system_prompt=AUTONOMOUS_SYSTEM_PROMPT,
-    deps_type=AutonomousAgentDeps,
-    retries=2
-)
-
-
-@autonomous_agent.tool
 async def analyze_customer_message(
     ctx: RunContext[AutonomousAgentDeps],
     message_content: str,
@@ -132,14 +374,13 @@ async def analyze_customer_message(
     # This would use the existing message analysis logic
     # For now, return a simplified analysis
     return {
-        "intent": "BUY" if any(word in message_content.lower() for word in ["quiero", "necesito", "pedido"]) else "QUESTION",
+        "intent": "BUY" if _ANALYSIS_BUY_RE.search(message_content.lower()) else "QUESTION",
         "confidence": 0.8,
         "products": [],
         "reasoning": "Simplified message analysis for autonomous agent"
     }
 
 
-@autonomous_agent.tool
 async def generate_possible_actions(
     ctx: RunContext[AutonomousAgentDeps],
     message_analysis: Dict[str, Any],
@@ -233,6 +474,51 @@ async def generate_possible_actions(
     return actions
 
 
+@lru_cache(maxsize=1)
+def get_autonomous_agent() -> Agent:
+    """
+    Build the autonomous Pydantic AI agent on first use.
+    
+    Returns:
+        Agent: Shared agent with the autonomous tools registered
+    """
+    # Reason: pydantic_ai and the OpenAI model client are only loaded by processes that run the agent.
+    # RunContext is bound at module level because tool registration resolves the
+    # tools' string annotations against this module's globals
+    global RunContext
+    from pydantic_ai import Agent, RunContext
+    from pydantic_ai.models.openai import OpenAIModel
+    
+    agent = Agent(
+        model=OpenAIModel(settings.openai_model, openai_client=get_openai_client()),
+        system_prompt=AUTONOMOUS_SYSTEM_PROMPT,
+        deps_type=AutonomousAgentDeps,
+        retries=2
+    )
+    agent.tool(analyze_customer_message)
+    agent.tool(generate_possible_actions)
+    return agent
+
+
+def _wait_for_more_messages(consolidation_analysis: Any, products: Sequence[ExtractedProduct]) -> Dict[str, Any]:
+    """Hold off on creating an order until the customer's follow-up messages arrive."""
+    return {
+        'success': True,
+        'action': 'waiting_for_more_messages',
+        'wait_duration_minutes': consolidation_analysis.wait_duration_minutes,
+        'reasoning': consolidation_analysis.reasoning,
+        'products_extracted': len(products)
+    }
+
+
+# Consolidation decisions that end order capture early, mapped to the handler that
+# builds their response. NEW_ORDER, CONSOLIDATE and ORDER_COMPLETE go on to create
+# the order from this message's products (consolidation is handled by the session manager).
+_DECISION_DISPATCH: Dict[ConsolidationDecision, Callable[[Any, Sequence[ExtractedProduct]], Dict[str, Any]]] = {
+    ConsolidationDecision.WAIT_MORE: _wait_for_more_messages,
+}
+
+
 class AutonomousOrderAgent:
     """
     Autonomous order processing agent with goal-oriented decision making.
@@ -241,6 +527,11 @@ class AutonomousOrderAgent:
     for intelligent order processing without fixed rules.
     """
     
+    # Scan index of the last loaded catalog; None until the first load
+    _catalog_index: Optional[CatalogIndex] = None
+    # Streamlined processor used for fallbacks, created on first use
+    _fallback_processor: Optional[StreamlinedOrderProcessor] = None
+    
     def __init__(self, database: DatabaseService, distributor_id: str):
         """
         Initialize the autonomous order agent.
@@ -251,6 +542,13 @@ class AutonomousOrderAgent:
         """
         self.database = database
         self.distributor_id = distributor_id
+        self._pending_writes: Set[asyncio.Future] = set()
+        self._msg_update_queue: asyncio.Queue = asyncio.Queue(maxsize=_MESSAGE_UPDATE_QUEUE_MAXSIZE)
+        self._msg_flusher_task: Optional[asyncio.Task] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Reason: the flag configuration is loaded once at startup, so per-message
+        # lookups would only ever recompute the same answer
+        self._flags = resolve_feature_flags(distributor_id)
         
         # Initialize core services
         self.goal_evaluator = GoalEvaluator()
@@ -262,6 +560,17 @@ class AutonomousOrderAgent:
         self.business_goals = goal_config.goals
         self.confidence_threshold = goal_config.confidence_threshold
         self.score_threshold = goal_config.score_threshold
+        # Fixed goal scores for escalation decisions, built once instead of on every failure
+        self._safe_goal_scores = MappingProxyType({goal.name: 0.5 for goal in self.business_goals})
+        self._error_goal_scores = MappingProxyType({goal.name: 0.3 for goal in self.business_goals})
+        # Shared evaluation for a lone DO_NOTHING action, which is never goal-scored
+        self._do_nothing_evaluation = ActionEvaluation(
+            action_name=AutonomousActionType.DO_NOTHING,
+            goal_scores=self._safe_goal_scores,
+            overall_score=0.5,
+            reasoning="No action needed for a non-order message",
+            confidence=0.9
+        )
         
         logger.info(f"Loaded {goal_type} goal configuration for distributor {distributor_id}")
         logger.info(f"Goal weights: {[(g.name, g.weight) for g in self.business_goals]}")
@@ -278,6 +587,36 @@ class AutonomousOrderAgent:
         logger.info(f"Initialized AutonomousOrderAgent for distributor {distributor_id} with {len(self.business_goals)} business goals")
     
     async def process_message(self, message_data: Dict[str, Any]) -> Optional[AutonomousResult]:
+        """
+        Process a message, sharing work with an identical message already in flight.
+        
+        Duplicate webhook deliveries (same message id, or same customer and
+        content when there is no id) await the first delivery's result instead
+        of running the pipeline again.
+        
+        Args:
+            message_data: Message from webhook with id, content, customer_id, etc.
+            
+        Returns:
+            AutonomousResult: Complete processing result or None if failed
+        """
+        key = message_data.get('id') or hashlib.blake2b(
+            f"{message_data.get('customer_id', '')}:{message_data.get('content', '')}".encode(),
+            digest_size=16
+        ).hexdigest()
+        
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._process_message_inner(message_data))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            logger.info("🔁 Message %s already in flight, awaiting its result", key)
+        
+        # Reason: one caller being cancelled must not cancel the shared work
+        return await asyncio.shield(task)
+    
+    async def _process_message_inner(self, message_data: Dict[str, Any]) -> Optional[AutonomousResult]:
         """
         Simplified autonomous agent focused ONLY on ORDER CAPTURE.
         
@@ -293,32 +632,48 @@ class AutonomousOrderAgent:
             AutonomousResult: Complete processing result or None if failed
         """
         start_time = time.time()
-        message_id = message_data.get('id', '')
-        customer_id = message_data.get('customer_id', '')
-        content = message_data.get('content', '').strip()
+        incoming = IncomingMessage.from_dict(message_data)
+        message_id = incoming.id
+        customer_id = incoming.customer_id
+        message = NormalizedMessage.from_content(message_data.get('content', ''))
+        content = message.raw
         
-        logger.info(f"🤖 Processing message {message_id} with SIMPLIFIED autonomous agent")
-        logger.info(f"📝 Message content: '{content[:100]}...'")
+        logger.info("🤖 Processing message %s with SIMPLIFIED autonomous agent", message_id)
+        logger.info("📝 Message content: '%.100s...'", content)
+        # Reason: one snapshot per message so every step sees the same flags
+        flags = self._flags
         
         try:
             # STEP 1: Check feature flags
-            if not self._check_feature_flags(customer_id):
-                logger.info(f"⚠️ Autonomous agent disabled for customer {customer_id}, using fallback")
-                return await self._fallback_to_existing_agent(message_data)
+            if not (flags & FLAG_AUTONOMOUS or (
+                flags & FLAG_AUTONOMOUS_ROLLOUT and self._check_feature_flags(customer_id)
+            )):
+                logger.info("⚠️ Autonomous agent disabled for customer %s, using fallback", customer_id)
+                return await self._fallback_to_existing_agent(
+                    message_data, precomputed=FallbackContext(message=message)
+                )
             
             # STEP 2: Intent Classification - Is this ORDER_RELATED?
-            intent_result = await self.intent_classifier.classify_intent(content)
-            logger.info(f"🧠 Intent classification: {intent_result.intent} (confidence: {intent_result.confidence:.2f})")
+            intent_result = await intent_batch_scheduler.classify(content)
+            logger.info(
+                "🧠 Intent classification: %s (confidence: %.2f)",
+                intent_result.intent, intent_result.confidence
+            )
             
             # STEP 3: Decision Logic - SIMPLIFIED
             if intent_result.intent != MessageIntent.ORDER_RELATED:
-                logger.info(f"📝 Not order-related, falling back to existing agent")
-                return await self._fallback_to_existing_agent(message_data)
+                logger.info("📝 Not order-related, falling back to existing agent")
+                return await self._fallback_to_existing_agent(
+                    message_data, "Not order-related",
+                    precomputed=FallbackContext(message=message, intent_result=intent_result)
+                )
             
             # STEP 4: ORDER CAPTURE - Use exact same mechanism as order_agent.py
-            logger.info(f"🎯 ORDER_RELATED detected - proceeding with order capture")
+            logger.info("🎯 ORDER_RELATED detected - proceeding with order capture")
             
-            order_result = await self._capture_order_autonomous(message_data, intent_result)
+            order_result = await self._capture_order_autonomous(
+                message_data, intent_result, message, incoming
+            )
             
             # STEP 5: Create result
             processing_time_ms = int((time.time() - start_time) * 1000)
@@ -327,7 +682,10 @@ class AutonomousOrderAgent:
             # If order capture failed, fallback to existing agent
             if not order_result.get('success'):
                 logger.warning(f"⚠️ Autonomous order capture failed, falling back to existing agent")
-                return await self._fallback_to_existing_agent(message_data, order_result.get('error'))
+                return await self._fallback_to_existing_agent(
+                    message_data, order_result.get('error'),
+                    precomputed=FallbackContext(message=message, intent_result=intent_result)
+                )
             
             result = AutonomousResult(
                 message_id=message_id,
@@ -340,11 +698,16 @@ class AutonomousOrderAgent:
                 customer_response_sent=None  # No automatic responses
             )
             
-            # Update message with simple autonomous processing signature
-            await self._update_message_with_simple_autonomous_data(message_id, result, intent_result)
+            # Update message with simple autonomous processing signature.
+            # Reason: the caller never reads this write, so it is queued and batched
+            # off the critical path
+            self._update_message_with_simple_autonomous_data(message_id, result, intent_result)
             
-            logger.info(f"✅ Autonomous order capture completed for message {message_id} in {processing_time_ms}ms")
-            logger.info(f"🎯 Created order: {order_result.get('order_id', 'N/A')}")
+            logger.info(
+                "✅ Autonomous order capture completed for message %s in %dms",
+                message_id, processing_time_ms
+            )
+            logger.info("🎯 Created order: %s", order_result.get('order_id', 'N/A'))
             
             return result
             
@@ -352,13 +715,111 @@ class AutonomousOrderAgent:
             logger.error(f"❌ Autonomous processing failed for message {message_id}: {e}")
             
             # Fallback to existing agent on any error
-            if feature_flags.fallback_enabled:
+            if flags & FLAG_FALLBACK:
                 logger.info(f"🔄 Falling back to existing agent due to error")
-                return await self._fallback_to_existing_agent(message_data, str(e))
+                return await self._fallback_to_existing_agent(
+                    message_data, str(e), precomputed=FallbackContext(message=message)
+                )
             else:
                 return None
     
-    async def _capture_order_autonomous(self, message_data: Dict[str, Any], intent_result) -> Dict[str, Any]:
+    def _spawn_write(self, write: Awaitable[None]) -> None:
+        """
+        Run a database write in the background, keeping a reference until it finishes.
+        
+        Args:
+            write: Coroutine performing the write (expected to log its own errors)
+        """
+        task = asyncio.ensure_future(write)
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+    
+    def _queue_message_update(self, message_id: str, data: Dict[str, Any]) -> None:
+        """
+        Queue a message update for the background batch flusher.
+        
+        Args:
+            message_id: Message to update
+            data: Columns to set on the message
+        """
+        try:
+            self._msg_update_queue.put_nowait((message_id, data))
+        except asyncio.QueueFull:
+            logger.warning("Message update queue full, writing message %s directly", message_id)
+            self._spawn_write(
+                self.database.update_single(table='messages', filters={'id': message_id}, data=data)
+            )
+            return
+        
+        if self._msg_flusher_task is None or self._msg_flusher_task.done():
+            self._msg_flusher_task = asyncio.get_running_loop().create_task(
+                self._message_update_flusher()
+            )
+    
+    async def _message_update_flusher(self) -> None:
+        """Write queued message updates in batches until cancelled."""
+        while True:
+            batch = [await self._msg_update_queue.get()]
+            await asyncio.sleep(_MESSAGE_UPDATE_LINGER_SECONDS)
+            batch.extend(self._drain_message_updates(_MESSAGE_UPDATE_BATCH_SIZE - 1))
+            try:
+                await self._flush_message_updates(batch)
+            finally:
+                for _ in batch:
+                    self._msg_update_queue.task_done()
+    
+    def _drain_message_updates(self, limit: Optional[int] = None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Pop up to ``limit`` queued message updates without waiting."""
+        updates = []
+        while limit is None or len(updates) < limit:
+            try:
+                updates.append(self._msg_update_queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return updates
+    
+    async def _flush_message_updates(self, batch: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """
+        Write a batch of message updates.
+        
+        Args:
+            batch: (message_id, data) pairs in the order they were queued
+        """
+        if not batch:
+            return
+        
+        # Later updates to the same message win, as they would have sequentially
+        merged: Dict[str, Dict[str, Any]] = {}
+        for message_id, data in batch:
+            merged.setdefault(message_id, {}).update(data)
+        
+        try:
+            updated = await self.database.update_many('messages', list(merged.items()))
+            logger.info("✅ Flushed %d message updates (%d rows updated)", len(merged), updated)
+        except Exception as e:
+            logger.error(f"Failed to flush message updates: {e}")
+    
+    async def close(self) -> None:
+        """Wait for background message updates and learning events to finish before shutdown."""
+        task = self._msg_flusher_task
+        if task is not None and not task.done():
+            await self._msg_update_queue.join()
+            task.cancel()
+        self._msg_flusher_task = None
+        await self._flush_message_updates(self._drain_message_updates())
+        
+        if self._pending_writes:
+            await asyncio.gather(*self._pending_writes, return_exceptions=True)
+        
+        await self.memory_service.close()
+    
+    async def _capture_order_autonomous(
+        self,
+        message_data: Dict[str, Any],
+        intent_result,
+        message: Optional[NormalizedMessage] = None,
+        incoming: Optional[IncomingMessage] = None
+    ) -> Dict[str, Any]:
         """
         SIMPLIFIED autonomous order capture using new integrated services.
         
@@ -370,20 +831,24 @@ class AutonomousOrderAgent:
         Args:
             message_data: Message data from webhook
             intent_result: Intent classification result
+            message: Normalized content, computed from message_data if not given
+            incoming: Unpacked message fields, computed from message_data if not given
             
         Returns:
             Dict with success status, order_id, error message, etc.
         """
         try:
-            content = message_data.get('content', '').strip()
-            customer_id = message_data.get('customer_id', '')
-            conversation_id = message_data.get('conversation_id', '')
-            message_id = message_data.get('id', '')
+            if message is None:
+                message = NormalizedMessage.from_content(message_data.get('content', ''))
+            if incoming is None:
+                incoming = IncomingMessage.from_dict(message_data)
+            content = message.raw
+            conversation_id = incoming.conversation_id
             
             logger.info(f"🎯 SIMPLIFIED autonomous order capture for: '{content[:50]}...'")
             
             # STEP 1: Extract products using simplified OpenAI call
-            products = await self._extract_products_simple(content, message_data)
+            products = await self._extract_products_simple(content, message_data, message)
             if not products:
                 return {
                     'success': False,
@@ -393,50 +858,35 @@ class AutonomousOrderAgent:
             
             logger.info(f"📦 Extracted {len(products)} products")
             
-            # STEP 2: Smart consolidation analysis - should we consolidate with existing session?
-            consolidation_analysis = await self.consolidator.analyze_for_consolidation(
-                message_data, products, intent_result
+            # STEP 2+3: Consolidation analysis and product validation run concurrently.
+            # Reason: both are independent database round-trips over the same products,
+            # so overlapping them removes one round-trip from every order message
+            consolidation_analysis, validation_result = await asyncio.gather(
+                self.consolidator.analyze_for_consolidation(
+                    message_data, products, intent_result
+                ),
+                self.validator.validate_products_with_flags(
+                    products, content, conversation_id
+                )
             )
             
             logger.info(f"🔍 Consolidation decision: {consolidation_analysis.decision.value} (confidence: {consolidation_analysis.confidence:.2f})")
             
             # Handle consolidation decision
-            if consolidation_analysis.decision == ConsolidationDecision.WAIT_MORE:
-                # Wait for more messages - don't create order yet
-                return {
-                    'success': True,
-                    'action': 'waiting_for_more_messages',
-                    'wait_duration_minutes': consolidation_analysis.wait_duration_minutes,
-                    'reasoning': consolidation_analysis.reasoning,
-                    'products_extracted': len(products)
-                }
-            
-            elif consolidation_analysis.decision == ConsolidationDecision.NEW_ORDER:
-                # Create new separate order
-                final_products = products
-                
-            elif consolidation_analysis.decision in [ConsolidationDecision.CONSOLIDATE, ConsolidationDecision.ORDER_COMPLETE]:
-                # Use products from this message (consolidation handled by session manager)
-                final_products = products
-            
-            else:
-                final_products = products
-            
-            # STEP 3: Enhanced product validation with human flags
-            validation_result = await self.validator.validate_products_with_flags(
-                final_products, content, conversation_id
-            )
+            handler = _DECISION_DISPATCH.get(consolidation_analysis.decision)
+            if handler is not None:
+                return handler(consolidation_analysis, products)
             
             logger.info(f"✅ Product validation: {validation_result.confidence_score:.0%} confidence, human validation needed: {validation_result.requires_human_validation}")
             
             # STEP 4: Create order using exact same mechanism as order_agent.py
             order_result = await self.order_creator.create_autonomous_order(
-                customer_id=customer_id,
+                customer_id=incoming.customer_id,
                 conversation_id=conversation_id,
                 validated_products=validation_result.validated_products,
                 validation_result=validation_result,
-                source_message_ids=[message_id],
-                channel=message_data.get('channel', 'WHATSAPP')
+                source_message_ids=[incoming.id],
+                channel=incoming.channel
             )
             
             if order_result.success:
@@ -476,7 +926,12 @@ class AutonomousOrderAgent:
                 'products_extracted': 0
             }
     
-    async def _extract_products_simple(self, content: str, message_data: Dict[str, Any]) -> List[ExtractedProduct]:
+    async def _extract_products_simple(
+        self,
+        content: str,
+        message_data: Dict[str, Any],
+        message: Optional[NormalizedMessage] = None
+    ) -> List[ExtractedProduct]:
         """
         Simplified product extraction using same OpenAI mechanism as order_agent.py.
         
@@ -487,54 +942,51 @@ class AutonomousOrderAgent:
             # Use simple OpenAI extraction (can be enhanced later)
             # For now, use basic keyword extraction as fallback
             products = []
-            content_lower = content.lower()
-            
-            # Basic Spanish product keywords and quantities
-            basic_products = {
-                'aceite': 'aceite',
-                'agua': 'agua embotellada', 
-                'leche': 'leche',
-                'cerveza': 'cerveza',
-                'coca cola': 'coca cola',
-                'queso': 'queso',
-                'pan': 'pan',
-                'arroz': 'arroz'
-            }
-            
-            spanish_numbers = {
-                'un': 1, 'una': 1, 'uno': 1,
-                'dos': 2, 'tres': 3, 'cuatro': 4, 'cinco': 5
-            }
-            
-            # Simple extraction
-            for keyword, product_name in basic_products.items():
-                if keyword in content_lower:
-                    quantity = 1
-                    
-                    # Look for quantity
-                    words = content_lower.split()
-                    for i, word in enumerate(words):
-                        if keyword in word:
-                            # Check previous words for quantity
-                            for j in range(max(0, i-3), i):
-                                if words[j] in spanish_numbers:
-                                    quantity = spanish_numbers[words[j]]
-                                    break
-                                try:
-                                    quantity = int(words[j])
-                                    break
-                                except ValueError:
-                                    continue
-                            break
-                    
-                    products.append(ExtractedProduct(
-                        product_name=product_name,
-                        quantity=quantity,
-                        unit=None,
-                        original_text=content,
-                        confidence=0.7
-                    ))
-                    break  # Only extract first match for simplicity
+            if message is None:
+                message = NormalizedMessage.from_content(content)
+            content_lower = message.lower
+            # token_starts maps a character offset back to its token
+            tokens = message.tokens
+            token_starts = message.token_starts
+            
+            # Simple extraction - one regex pass finds every product keyword
+            found = [
+                (bisect_right(token_starts, match.start()) - 1, _BASIC_PRODUCTS[match.group(0)])
+                for match in _PRODUCT_KEYWORD_RE.finditer(content_lower)
+            ]
+            if not found:
+                # Reason: fall back to the catalog for products outside the basic keywords;
+                # _get_catalog rebuilds the scan index only when a new catalog is loaded
+                await self._get_catalog()
+                found = [
+                    (position, product['name'])
+                    for position, product in self._catalog_index.scan(tokens)
+                ]
+            
+            seen = set()
+            for position, product_name in found:
+                if product_name in seen:
+                    continue
+                seen.add(product_name)
+                
+                # Walk back up to three tokens to the nearest quantity
+                quantity = 1
+                for j in range(position - 1, max(-1, position - 4), -1):
+                    word = tokens[j]
+                    if word.isdecimal():
+                        quantity = int(word) or 1
+                        break
+                    if word in _SPANISH_NUMBERS:
+                        quantity = _SPANISH_NUMBERS[word]
+                        break
+                
+                products.append(ExtractedProduct(
+                    product_name=product_name,
+                    quantity=quantity,
+                    unit=None,
+                    original_text=content,
+                    confidence=0.7
+                ))
             
             return products
             
@@ -583,99 +1035,17 @@ class AutonomousOrderAgent:
             logger.error(f"Product extraction failed: {e}")
             return []
     
-    async def _validate_products_autonomous(
-        self, products: List[ExtractedProduct], original_message: str, conversation_id: str
-    ) -> Dict[str, Any]:
+    async def _get_catalog(self) -> Tuple[Dict[str, Any], ...]:
         """
-        Validate products using exact same mechanism as order_agent.py _intelligent_product_validation.
+        Get the distributor catalog from the shared cache and index it for scanning.
+        
+        Returns:
+            Tuple of catalog product dictionaries shared by all callers
         """
-        try:
-            # Get product catalog (same as order_agent.py)
-            catalog_models = await fetch_product_catalog(
-                self.database, self.distributor_id, active_only=True
-            )
-            
-            if not catalog_models:
-                logger.warning("No catalog available for validation")
-                return {
-                    'validated_products': products,
-                    'requires_clarification': False,
-                    'suggested_question': None
-                }
-            
-            # Initialize product matcher (same as order_agent.py)  
-            product_matcher = ProductMatcher()
-            
-            # Convert catalog models to dictionaries (same as order_agent.py)
-            catalog_dicts = []
-            for product in catalog_models:
-                catalog_dicts.append({
-                    'id': product.id,
-                    'name': product.name,
-                    'sku': product.sku,
-                    'unit': product.unit,
-                    'unit_price': float(product.unit_price),
-                    'stock_quantity': product.stock_quantity,
-                    'in_stock': product.in_stock,
-                    'minimum_order_quantity': product.minimum_order_quantity,
-                    'active': product.active,
-                    'brand': product.brand,
-                    'category': product.category
-                })
-            
-            validated_products = []
-            
-            # Process each extracted product (same logic as order_agent.py)
-            for extracted_product in products:
-                match_result = product_matcher.match_products(
-                    extracted_product.product_name, 
-                    catalog_dicts
-                )
-                
-                logger.info(
-                    f"Product matching result for '{extracted_product.product_name}': "
-                    f"confidence_level={match_result.confidence_level}, "
-                    f"matches={len(match_result.matches)}"
-                )
-                
-                if match_result.confidence_level == "HIGH":
-                    # High confidence - mark as confirmed (same as order_agent.py)
-                    best_match = match_result.best_match
-                    extracted_product.status = "confirmed"
-                    extracted_product.matched_product_id = best_match.product_id
-                    extracted_product.matched_product_name = best_match.product_name
-                    extracted_product.validation_notes = f"Matched with {best_match.confidence:.0%} confidence"
-                    if best_match.unit and not extracted_product.unit:
-                        extracted_product.unit = best_match.unit
-                        
-                elif match_result.confidence_level in ["MEDIUM", "LOW"]:
-                    # Medium/Low confidence - mark as pending with HUMAN VALIDATION flag
-                    extracted_product.status = "pending"
-                    extracted_product.validation_notes = "HUMAN VALIDATION REQUESTED - Uncertain product match"
-                    if match_result.best_match:
-                        extracted_product.matched_product_id = match_result.best_match.product_id
-                        extracted_product.matched_product_name = match_result.best_match.product_name
-                        
-                else:  # NONE
-                    # No matches found - mark as pending with HUMAN VALIDATION flag
-                    extracted_product.status = "pending"
-                    extracted_product.validation_notes = "HUMAN VALIDATION REQUESTED - No catalog match found"
-                
-                validated_products.append(extracted_product)
-            
-            return {
-                'validated_products': validated_products,
-                'requires_clarification': False,  # No clarification in autonomous mode
-                'suggested_question': None
-            }
-            
-        except Exception as e:
-            logger.error(f"Product validation failed: {e}")
-            return {
-                'validated_products': products,
-                'requires_clarification': False,
-                'suggested_question': None
-            }
+        catalog_dicts = await catalog_cache.get(self.database, self.distributor_id)
+        if self._catalog_index is None or self._catalog_index.catalog is not catalog_dicts:
+            self._catalog_index = CatalogIndex.build(catalog_dicts)
+        return catalog_dicts
     
     async def _create_order_autonomous(
         self, message_data: Dict[str, Any], confirmed_products: List[ExtractedProduct], ai_confidence: float
@@ -684,40 +1054,49 @@ class AutonomousOrderAgent:
         Create order using exact same mechanism as order_agent.py _create_simple_order.
         """
         try:
-            customer_id = message_data.get('customer_id')
+            incoming = IncomingMessage.from_dict(message_data)
+            customer_id = incoming.customer_id
             if not customer_id or not confirmed_products:
                 return {
                     'success': False,
                     'error': 'Missing customer_id or no products to process'
                 }
             
-            # Convert ExtractedProduct to OrderProduct (same as order_agent.py)
+            # Convert ExtractedProduct to OrderProduct (same as order_agent.py),
+            # counting statuses in the same pass
             order_products = []
+            confirmed_count = pending_count = 0
             for extracted in confirmed_products:
-                order_product = OrderProduct(
-                    product_name=extracted.matched_product_name or extracted.product_name,
+                status = extracted.status
+                if status == "confirmed":
+                    confirmed_count += 1
+                elif status == "pending":
+                    pending_count += 1
+                
+                # Reason: every field comes from an already validated ExtractedProduct with
+                # the same constraints and cleaning, so the OrderProduct validators are skipped;
+                # unit_price/line_price keep their None defaults (pricing handled by create_order)
+                order_products.append(OrderProduct.model_construct(
+                    product_name=(extracted.matched_product_name or extracted.product_name).strip(),
                     quantity=extracted.quantity,
                     unit=extracted.unit,
-                    unit_price=None,  # Pricing handled by create_order function
-                    line_price=None,
                     ai_confidence=extracted.confidence,
                     original_text=extracted.original_text,
                     matched_product_id=extracted.matched_product_id,
                     matching_confidence=extracted.confidence
-                )
-                order_products.append(order_product)
+                ))
             
             # Create order using exact same OrderCreation schema (same as order_agent.py)
             order_creation = OrderCreation(
                 customer_id=customer_id,
                 distributor_id=self.distributor_id,
-                conversation_id=message_data.get('conversation_id'),
-                channel=message_data.get('channel', 'WHATSAPP'),
+                conversation_id=incoming.conversation_id or None,
+                channel=incoming.channel,
                 products=order_products,
                 delivery_date=None,
                 additional_comment=None,
                 ai_confidence=ai_confidence,
-                source_message_ids=[message_data.get('id', '')]
+                source_message_ids=[incoming.id]
             )
             
             # Create order using same function as order_agent.py
@@ -729,8 +1108,8 @@ class AutonomousOrderAgent:
                     'success': True,
                     'order_id': order_id,
                     'products_processed': len(order_products),
-                    'products_confirmed': len([p for p in confirmed_products if p.status == "confirmed"]),
-                    'products_pending_human_review': len([p for p in confirmed_products if p.status == "pending"])
+                    'products_confirmed': confirmed_count,
+                    'products_pending_human_review': pending_count
                 }
             else:
                 return {
@@ -747,11 +1126,11 @@ class AutonomousOrderAgent:
                 'products_processed': len(confirmed_products) if confirmed_products else 0
             }
     
-    async def _update_message_with_simple_autonomous_data(
+    def _update_message_with_simple_autonomous_data(
         self, message_id: str, result: AutonomousResult, intent_result
     ) -> None:
         """
-        Update message with simplified autonomous processing data.
+        Queue an update of the message with simplified autonomous processing data.
         
         Uses "AUTONOMOUS_PROCESSED" as the ai_extracted_intent to distinguish
         from the existing agent's "BUY"/"OTHER" classifications.
@@ -763,7 +1142,7 @@ class AutonomousOrderAgent:
                 'ai_confidence': intent_result.confidence,
                 'ai_extracted_intent': 'AUTONOMOUS_PROCESSED',  # Signature of autonomous agent
                 'ai_processing_time_ms': result.processing_time_ms,
-                'updated_at': __import__('datetime').datetime.now().isoformat()
+                'updated_at': datetime.now(timezone.utc).isoformat()
             }
             
             # If we have order result, add basic product info
@@ -776,14 +1155,8 @@ class AutonomousOrderAgent:
                     'order_id': result.created_order_id
                 }]
             
-            # Update message in database
-            await self.database.update_single(
-                table='messages',
-                filters={'id': message_id},
-                data=analysis_data
-            )
-            
-            logger.info(f"✅ Updated message {message_id} with autonomous processing signature")
+            # Written by the background flusher in a batch with other messages
+            self._queue_message_update(message_id, analysis_data)
             
         except Exception as e:
             logger.error(f"Failed to update message with autonomous data: {e}")
@@ -802,7 +1175,23 @@ class AutonomousOrderAgent:
             # Generate possible actions using our simplified order-detection logic
             possible_actions = await self._generate_simple_actions(context)
             
-            # Evaluate each action against business goals
+            # Reason: non-order messages (and failed classifications) yield a single
+            # DO_NOTHING action; with nothing to rank it against, goal scoring cannot
+            # change the outcome, so the evaluation pipeline is skipped
+            if (
+                len(possible_actions) == 1
+                and possible_actions[0].action_type == AutonomousActionType.DO_NOTHING
+            ):
+                return AutonomousDecision(
+                    chosen_action=possible_actions[0],
+                    action_evaluation=self._do_nothing_evaluation,
+                    decision_reasoning=f"No action needed: {possible_actions[0].reasoning}"
+                )
+            
+            # Evaluate each action against business goals.
+            # Reason: evaluate_action is deterministic in-process scoring with no I/O
+            # and returns a fallback evaluation on error, so asyncio.gather would only
+            # add task overhead without overlapping anything
             action_evaluations = []
             for action in possible_actions:
                 evaluation = await self.goal_evaluator.evaluate_action(
@@ -812,15 +1201,20 @@ class AutonomousOrderAgent:
             
             # Choose the best action
             if action_evaluations:
-                best_evaluation = max(action_evaluations, key=lambda e: e.overall_score)
-                best_action = possible_actions[action_evaluations.index(best_evaluation)]
+                # Reason: one scan that keeps the index, instead of max() followed by
+                # list.index() comparing every evaluation field by field
+                best_idx, best_evaluation = max(
+                    enumerate(action_evaluations), key=lambda pair: pair[1].overall_score
+                )
+                best_action = possible_actions[best_idx]
                 
                 # Create decision
                 decision = AutonomousDecision(
                     chosen_action=best_action,
                     action_evaluation=best_evaluation,
-                    alternative_actions=possible_actions[1:],  # Other actions considered
-                    alternative_evaluations=action_evaluations[1:],
+                    # Other actions considered (everything except the chosen one)
+                    alternative_actions=[a for i, a in enumerate(possible_actions) if i != best_idx],
+                    alternative_evaluations=[e for i, e in enumerate(action_evaluations) if i != best_idx],
                     decision_reasoning=f"Chose {best_action.action_type} with score {best_evaluation.overall_score:.3f} and confidence {best_evaluation.confidence:.3f}",
                     confidence_factors=[
                         f"Goal alignment score: {best_evaluation.overall_score:.3f}",
@@ -829,7 +1223,7 @@ class AutonomousOrderAgent:
                     ],
                     uncertainty_factors=[
                         f"Alternative actions available: {len(possible_actions) - 1}",
-                        f"Goal score variance present" if len(set(best_evaluation.goal_scores.values())) > 1 else "Goal scores consistent"
+                        f"Goal score variance present" if _has_variance(best_evaluation.goal_scores) else "Goal scores consistent"
                     ]
                 )
                 
@@ -844,10 +1238,9 @@ class AutonomousOrderAgent:
                 )
                 
                 # Create minimal evaluation for escalation
-                from schemas.goals import ActionEvaluation
                 escalation_evaluation = ActionEvaluation(
                     action_name=escalation_action.action_type,
-                    goal_scores={goal.name: 0.5 for goal in self.business_goals},
+                    goal_scores=self._safe_goal_scores,
                     overall_score=0.5,
                     reasoning="Escalation due to inability to generate viable actions",
                     confidence=0.8
@@ -870,10 +1263,9 @@ class AutonomousOrderAgent:
                 confidence=0.9
             )
             
-            from schemas.goals import ActionEvaluation
             error_evaluation = ActionEvaluation(
                 action_name=escalation_action.action_type,
-                goal_scores={goal.name: 0.3 for goal in self.business_goals},
+                goal_scores=self._error_goal_scores,
                 overall_score=0.3,
                 reasoning=f"Escalation due to error: {str(e)}",
                 confidence=0.9
@@ -892,7 +1284,7 @@ class AutonomousOrderAgent:
         
         try:
             # Use AI to classify message intent
-            classification = await intent_classifier.classify_message_intent(message_content)
+            classification = await intent_batch_scheduler.classify(message_content)
             
             logger.info(f"AI classified message as: {classification.intent} (confidence: {classification.confidence})")
             
@@ -907,12 +1299,11 @@ class AutonomousOrderAgent:
                 return actions
             
             # Message is ORDER_RELATED - determine specific action needed
-            message_lower = message_content.lower()
+            matched = match_action_keywords(message_content.lower())
             
             # Check for direct ordering (buy intent with quantities)
-            buy_words = ["quiero", "necesito", "pedido", "comprar", "me das", "dame", "ponme"]
-            has_buy_intent = any(word in message_lower for word in buy_words)
-            has_quantities = any(char.isdigit() for char in message_content)
+            has_buy_intent = 'buy' in matched
+            has_quantities = _DIGIT_RE.search(message_content) is not None
             
             if has_buy_intent and has_quantities and context.has_extracted_products:
                 # Clear order with products
@@ -940,7 +1331,7 @@ class AutonomousOrderAgent:
                 ))
                 
             # Check for pricing questions
-            elif any(word in message_lower for word in ["precio", "cuesta", "cuanto", "vale"]):
+            elif 'pricing' in matched:
                 actions.append(create_simple_action(
                     AutonomousActionType.PROVIDE_PRICING,
                     {
@@ -952,7 +1343,7 @@ class AutonomousOrderAgent:
                 ))
                 
             # Check for availability questions
-            elif any(word in message_lower for word in ["tienes", "disponible", "stock", "hay"]):
+            elif 'availability' in matched:
                 actions.append(create_simple_action(
                     AutonomousActionType.CHECK_AVAILABILITY,
                     {
@@ -964,7 +1355,7 @@ class AutonomousOrderAgent:
                 ))
                 
             # Check for product information requests
-            elif any(word in message_lower for word in ["productos", "que tienen", "catalogo", "lista"]):
+            elif 'catalog' in matched:
                 actions.append(create_simple_action(
                     AutonomousActionType.SUGGEST_PRODUCTS,
                     {
@@ -1009,6 +1400,12 @@ class AutonomousOrderAgent:
             # Check feature flags for specific action types
             action_type = decision.chosen_action.action_type
             
+            # Doing nothing needs no feature flag checks and teaches nothing worth recording
+            if action_type == AutonomousActionType.DO_NOTHING:
+                return await execute_autonomous_action(
+                    decision.chosen_action, context, self.database, self.memory_service
+                )
+            
             if action_type == AutonomousActionType.CREATE_ORDER:
                 if not feature_flags.is_feature_enabled(
                     AutonomousAgentFeature.AUTONOMOUS_ORDER_CREATION,
@@ -1072,8 +1469,12 @@ class AutonomousOrderAgent:
                 'message': 'Escalation failed'
             }
     
+    def refresh_feature_flags(self) -> None:
+        """Re-resolve the feature flag bitmap after the flag configuration changes."""
+        self._flags = resolve_feature_flags(self.distributor_id)
+    
     def _check_feature_flags(self, customer_id: str) -> bool:
-        """Check if autonomous agent is enabled for this customer."""
+        """Check if autonomous agent is enabled for this customer (percentage rollouts only)."""
         return feature_flags.is_feature_enabled(
             AutonomousAgentFeature.AUTONOMOUS_AGENT_ENABLED,
             self.distributor_id,
@@ -1081,15 +1482,34 @@ class AutonomousOrderAgent:
         )
     
     async def _fallback_to_existing_agent(
-        self, message_data: Dict[str, Any], fallback_reason: str = "Autonomous agent not enabled"
+        self,
+        message_data: Dict[str, Any],
+        fallback_reason: str = "Autonomous agent not enabled",
+        *,
+        precomputed: Optional[FallbackContext] = None
     ) -> Optional[AutonomousResult]:
-        """Fallback to existing streamlined agent."""
-        try:
-            # Import here to avoid circular imports
-            from agents.order_agent import StreamlinedOrderProcessor
+        """
+        Fallback to existing streamlined agent.
+        
+        Args:
+            message_data: Message from webhook with id, content, customer_id, etc.
+            fallback_reason: Why the autonomous path was not used
+            precomputed: Normalized message and intent already computed, if any
             
-            existing_agent = StreamlinedOrderProcessor(self.database, self.distributor_id)
-            analysis = await existing_agent.process_message(message_data)
+        Returns:
+            AutonomousResult: Fallback result or None if the fallback failed
+        """
+        try:
+            if self._fallback_processor is None:
+                # Reason: no await between the check and the assignment, so concurrent
+                # fallbacks on the event loop cannot build a second processor; no lock needed
+                # Import here to avoid circular imports
+                from agents.order_agent import StreamlinedOrderProcessor
+                self._fallback_processor = StreamlinedOrderProcessor(self.database, self.distributor_id)
+            
+            analysis = await self._fallback_processor.process_message(
+                message_data, precomputed=precomputed
+            )
             
             if analysis:
                 # Create autonomous result indicating fallback was used
@@ -1116,16 +1536,21 @@ class AutonomousOrderAgent:
     def _summarize_conversation_context(self, context: AutonomousAgentContext) -> str:
         """Create a summary of conversation context for AI agent."""
         summary_parts = []
+        preferences = context.customer_preferences
+        recent_orders = context.recent_orders
+        history = context.conversation_history
         
-        if context.customer_preferences:
-            prefs = [f"{p.preference_type}: {p.value}" for p in context.customer_preferences[:3]]
-            summary_parts.append(f"Customer preferences: {', '.join(prefs)}")
+        if preferences:
+            # Reason: islice avoids copying the first three preferences into a new list;
+            # join gets a list comprehension because it would materialize a generator anyway
+            prefs = ', '.join([f"{p.preference_type}: {p.value}" for p in islice(preferences, 3)])
+            summary_parts.append(f"Customer preferences: {prefs}")
         
-        if context.recent_orders:
-            summary_parts.append(f"Recent orders: {len(context.recent_orders)} orders")
+        if recent_orders:
+            summary_parts.append(f"Recent orders: {len(recent_orders)} orders")
         
-        if context.conversation_history:
-            summary_parts.append(f"Conversation history: {len(context.conversation_history)} messages")
+        if history:
+            summary_parts.append(f"Conversation history: {len(history)} messages")
         
         if context.time_context.business_hours:
             summary_parts.append("During business hours")
@@ -1160,7 +1585,9 @@ class AutonomousOrderAgent:
                     distributor_id=context.distributor_id
                 )
                 
-                await self.memory_service.record_learning_event(learning_event)
+                # Reason: learning events are best-effort, so they are batched off the
+                # critical path instead of costing one insert per successful message
+                self.memory_service.queue_learning_event(learning_event)
                 
         except Exception as e:
             logger.warning(f"Failed to record learning event: {e}")
@@ -15,16 +15,24 @@ Added: Simple OpenAI calls, linear workflow, easier debugging.
 
 from __future__ import annotations as _annotations
 
+import asyncio
 import logging
+import re
 import time
-from typing import Dict, Any, Optional, List
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Callable, Dict, Any, Literal, Optional, List, Tuple, Union
 from dataclasses import dataclass
 
-from pydantic_ai import Agent
+from pydantic import BaseModel, Field, ValidationError
+from pydantic_ai import Agent, UnexpectedModelBehavior
 from pydantic_ai.models.openai import OpenAIModel
 
 from config.settings import settings
+from services.catalog_cache import catalog_cache
 from services.database import DatabaseService
+from services.openai_client import get_openai_client
+from services.request_batcher import RequestBatcher
 from services.product_matcher import ProductMatcher, ProductMatch, MatchResult
 from schemas.message import MessageAnalysis, MessageIntent, ExtractedProduct
 from schemas.order import OrderCreation, OrderProduct
@@ -32,14 +40,203 @@ from tools.supabase_tools import (
     get_recent_messages_for_context,
     get_recent_orders,
     update_message_ai_data,
-    create_order,
-    fetch_product_catalog
+    create_order
 )
 
 logger = logging.getLogger(__name__)
 
+# Keywords for the rule-based intent fallback, by intent category
+_INTENT_KEYWORDS = {
+    'greeting': (
+        "hola", "buenos días", "buenas tardes", "buenas noches",
+        "buen día", "hi", "hello", "hey", "saludos", "que tal",
+        "como estas", "como está", "good morning", "good afternoon",
+        "buendia", "buenosdias"
+    ),
+    'buy': ("quiero", "necesito", "pedido", "order", "comprar", "me das", "vendeme"),
+    'question': ("precio", "catalogo", "cuanto", "cuesta", "tienes", "hay", "menu", "lista"),
+    'complaint': ("problema", "queja", "mal", "error", "equivocado", "reclamo"),
+}
+# Reason: one case-insensitive lookahead scan finds every category's whole-word
+# keywords, and lastgroup names the category without a reverse lookup. Keywords
+# also match their plurals ("precios", "catalogos"); two-letter ones don't, so
+# "his" is not read as "hi"
+_INTENT_RE = re.compile(
+    '(?=' + '|'.join(
+        f"(?P<{category}>\\b(?:"
+        + '|'.join(
+            re.escape(k) + ('(?:s|es)?' if len(k) > 2 else '')
+            for k in sorted(keywords, key=len, reverse=True)
+        )
+        + ")\\b)"
+        for category, keywords in _INTENT_KEYWORDS.items()
+    ) + ')',
+    re.IGNORECASE
+)
+
+# Basic product keywords for the fallback parser (just essentials)
+_BASIC_PRODUCTS = {
+    'aceite': 'aceite',
+    'agua': 'agua embotellada',
+    'leche': 'leche',
+    'cerveza': 'cerveza',
+    'coca cola': 'coca cola',
+    'queso': 'queso',
+    'pan': 'pan',
+    'arroz': 'arroz',
+    'frijoles': 'frijoles',
+    'huevos': 'huevos'
+}
+# Reason: same lookahead scan as the intent keywords, so one pass finds every product
+_PRODUCT_RE = re.compile(
+    '(?=(' + '|'.join(re.escape(k) for k in sorted(_BASIC_PRODUCTS, key=len, reverse=True)) + '))'
+)
+# Position of each product keyword in _BASIC_PRODUCTS, the order products are reported in
+_PRODUCT_RANK = {keyword: rank for rank, keyword in enumerate(_BASIC_PRODUCTS)}
+# Simple Spanish numbers
+_SPANISH_NUMBERS = {
+    'un': 1, 'una': 1, 'uno': 1,
+    'dos': 2, 'tres': 3, 'cuatro': 4, 'cinco': 5,
+    'seis': 6, 'siete': 7, 'ocho': 8, 'nueve': 9, 'diez': 10,
+    'media docena': 6, 'docena': 12
+}
+# Simple units, mapped to their singular form
+_UNITS = {
+    unit: unit.rstrip('s')
+    for unit in ('litro', 'litros', 'botella', 'botellas', 'kilo', 'kilos', 'paquete', 'paquetes')
+}
+_WORD_RE = re.compile(r'\S+')
+
+
+@lru_cache(maxsize=4096)
+def _word_quantity(word: str) -> Optional[int]:
+    """
+    Quantity a message word stands for in the fallback parser.
+    
+    Args:
+        word: Lowercased message word
+        
+    Returns:
+        Spanish number or numeric value of the word, or None
+    """
+    quantity = _SPANISH_NUMBERS.get(word)
+    if quantity is not None:
+        return quantity
+    try:
+        return int(word)
+    except ValueError:
+        return None
+
+
+def _normalize_content(content: str) -> str:
+    """Lowercase a message and collapse its whitespace, the key of the parse caches."""
+    return " ".join(content.lower().split())
+
+
+# Reason: the same short messages ("hola", "precio?") arrive from many customers,
+# so repeats of the keyword parses become cache hits. Both return immutable tuples;
+# the processor builds fresh models from them on every call
+@lru_cache(maxsize=4096)
+def _parse_products_cached(content_norm: str) -> Tuple[Tuple[str, int, Optional[str]], ...]:
+    """
+    Find fallback products in a normalized message.
+    
+    Args:
+        content_norm: Message content from _normalize_content
+        
+    Returns:
+        Tuple of (product name, quantity, unit) per product found
+    """
+    # First position of each product keyword in the message, from a single scan
+    hits: Dict[str, int] = {}
+    for match in _PRODUCT_RE.finditer(content_norm):
+        hits.setdefault(match.group(1), match.start())
+    if not hits:
+        return ()
+    
+    # Tokenize once; word_starts maps a hit position back to its word index
+    word_matches = list(_WORD_RE.finditer(content_norm))
+    words = [m.group() for m in word_matches]
+    word_starts = [m.start() for m in word_matches]
+    
+    products = []
+    # Only the keywords the scan hit are visited, in _BASIC_PRODUCTS order
+    for keyword in sorted(hits, key=_PRODUCT_RANK.__getitem__):
+        product_name = _BASIC_PRODUCTS[keyword]
+        quantity = 1
+        unit = None
+        i = bisect_right(word_starts, hits[keyword]) - 1
+        
+        # Check up to 3 words before for quantity (Spanish or numeric), nearest first
+        for j in range(i - 1, max(0, i-3) - 1, -1):
+            word_quantity = _word_quantity(words[j])
+            if word_quantity is not None:
+                quantity = word_quantity
+                break
+        
+        # Check for unit after product
+        for j in range(i+1, min(i+3, len(words))):
+            unit = _UNITS.get(words[j])
+            if unit is not None:
+                break
+        
+        products.append((product_name, quantity, unit))
+    
+    return tuple(products)
+
+
+@lru_cache(maxsize=4096)
+def _parse_intent_cached(content_norm: str) -> Tuple[str, float, str]:
+    """
+    Classify a normalized message with the keyword rules.
+    
+    Args:
+        content_norm: Message content from _normalize_content
+        
+    Returns:
+        Tuple of (intent, confidence, reasoning)
+    """
+    matched = set()
+    for match in _INTENT_RE.finditer(content_norm):
+        matched.add(match.lastgroup)
+        # Greetings win over every other category, so the scan can stop here
+        if match.lastgroup == 'greeting':
+            break
+    
+    # FIRST: Check for greetings (most common case)
+    if 'greeting' in matched:
+        return "OTHER", 0.75, "Customer greeting or general conversation"
+    
+    # SECOND: Check for clear purchase intent
+    if 'buy' in matched:
+        return "BUY", 0.85, "Customer expressing purchase intent"
+    
+    # THIRD: Check for questions about products/prices
+    if 'question' in matched or content_norm.endswith('?'):
+        return "QUESTION", 0.8, "Customer asking about products/services"
+    
+    # FOURTH: Check for complaints
+    if 'complaint' in matched:
+        return "COMPLAINT", 0.8, "Customer expressing dissatisfaction"
+    
+    # DEFAULT: General conversation
+    return "OTHER", 0.6, "General conversation or unclear intent"
 
-@dataclass
+
+# Keyword-rule confidence at which the fast path skips OpenAI (settings.enable_fastpath_intent)
+_FAST_PATH_MIN_CONFIDENCE = 0.75
+_FAST_PATH_INTENTS = frozenset(("OTHER", "QUESTION", "COMPLAINT"))
+
+# Extracted products matched against the catalog at once
+_MATCH_CHUNK_SIZE = 5
+# Message analyses queued within this window share one OpenAI request
+_ANALYSIS_BATCH_SIZE = 8
+_ANALYSIS_BATCH_WAIT_SECONDS = 0.1
+# How often a streamed analysis is re-validated for newly completed products
+_ANALYSIS_STREAM_DEBOUNCE_SECONDS = 0.05
+
+
+@dataclass(frozen=True, slots=True)
 class StreamlinedAgentDeps:
     """Enhanced dependencies with intelligent product matching."""
     database: DatabaseService
@@ -47,6 +244,52 @@ class StreamlinedAgentDeps:
     product_matcher: ProductMatcher
 
 
+@lru_cache(maxsize=64)
+def _get_agent_deps(database: DatabaseService, distributor_id: str) -> StreamlinedAgentDeps:
+    """
+    Get the agent dependencies shared by every processor of a distributor.
+    
+    Args:
+        database: Database service instance
+        distributor_id: Distributor ID
+        
+    Returns:
+        StreamlinedAgentDeps: Deps with one product matcher (and its prepared catalog) per distributor
+    """
+    return StreamlinedAgentDeps(
+        database=database,
+        distributor_id=distributor_id,
+        product_matcher=ProductMatcher()
+    )
+
+
+class AnalyzedProduct(BaseModel):
+    """Product extracted by OpenAI, as returned in the structured analysis."""
+    name: str = Field(..., min_length=1, description="Product name as mentioned by the customer")
+    quantity: int = Field(1, ge=1, description="Quantity requested")
+    unit: Optional[str] = Field(None, description="Unit mentioned (litro, botella, kilo, etc)")
+    original_text: Optional[str] = Field(None, description="Text the product was extracted from")
+    confidence: Optional[float] = Field(None, ge=0.0, le=1.0, description="Extraction confidence")
+
+
+class StreamlinedAnalysis(BaseModel):
+    """Structured result of the OpenAI message analysis."""
+    intent: Literal["BUY", "MODIFY", "CONFIRM", "QUESTION", "COMPLAINT", "FOLLOW_UP", "OTHER"]
+    confidence: float = Field(..., ge=0.0, le=1.0)
+    reasoning: str = Field(..., min_length=10)
+    products: List[AnalyzedProduct] = Field(default_factory=list)
+
+
+class StreamlinedBatchRow(StreamlinedAnalysis):
+    """One message's analysis within a batched request, tagged with its MESSAGE block number."""
+    message: int = Field(..., ge=1, description="Number of the MESSAGE block this analysis answers")
+
+
+class StreamlinedBatchAnalysis(BaseModel):
+    """Structured result of one OpenAI request analyzing several messages."""
+    results: List[StreamlinedBatchRow] = Field(..., description="One analysis per MESSAGE block")
+
+
 # Enhanced system prompt for OpenAI with structured output
 SYSTEM_PROMPT = """
 You are an AI assistant for a B2B food distributor processing WhatsApp orders in Spanish and English.
@@ -91,12 +334,193 @@ IMPORTANT: Always extract the exact product name as mentioned by the customer.
 
 # Initialize simple agent
 streamlined_agent = Agent(
-    model=OpenAIModel(settings.openai_model),
+    model=OpenAIModel(settings.openai_model, openai_client=get_openai_client()),
     system_prompt=SYSTEM_PROMPT,
     deps_type=StreamlinedAgentDeps,
+    result_type=StreamlinedAnalysis,
     retries=2
 )
 
+# Same instructions, answering several MESSAGE blocks in one request
+streamlined_batch_agent = Agent(
+    model=OpenAIModel(settings.openai_model, openai_client=get_openai_client()),
+    system_prompt=SYSTEM_PROMPT,
+    deps_type=StreamlinedAgentDeps,
+    result_type=StreamlinedBatchAnalysis,
+    retries=2
+)
+
+
+def _build_batch_analysis_prompt(prompts: List[str]) -> str:
+    """Combine per-message analysis prompts into one request answered row by row."""
+    blocks = "\n\n".join(
+        f"=== MESSAGE {i} ===\n{prompt.strip()}" for i, prompt in enumerate(prompts, 1)
+    )
+    return f"""Each MESSAGE block below is a separate analysis request. Follow each block's
+instructions independently, using only that block's context.
+
+Return exactly one analysis per block in results, with "message" set to that
+block's MESSAGE number.
+
+{blocks}"""
+
+
+class AnalysisBatcher(RequestBatcher):
+    """
+    Coalesces concurrent message analyses into batched OpenAI requests.
+    
+    Callers await analyze() with their usual single-message prompt; prompts
+    queued within the batch window are sent as one request that returns an
+    analysis per message, saving a round-trip and the repeated system prompt
+    for every extra message. If the batched response does not cover every
+    message, each one is re-sent on its own. One batcher per processor keeps
+    batches within a single distributor.
+    
+    A message analyzed on its own is streamed when the caller asks for its
+    products, so each product is reported as soon as the model finishes it.
+    """
+    
+    def __init__(
+        self,
+        deps: StreamlinedAgentDeps,
+        max_batch_size: int = _ANALYSIS_BATCH_SIZE,
+        max_wait_seconds: float = _ANALYSIS_BATCH_WAIT_SECONDS
+    ):
+        """
+        Initialize the batcher.
+        
+        Args:
+            deps: Dependencies passed to the streamlined agents
+            max_batch_size: Maximum messages per OpenAI request
+            max_wait_seconds: How long the first queued message waits for company
+        """
+        super().__init__(max_batch_size, max_wait_seconds)
+        self.deps = deps
+    
+    async def analyze(
+        self, prompt: str, on_product: Optional[Callable[[AnalyzedProduct], None]] = None
+    ) -> StreamlinedAnalysis:
+        """
+        Queue a single-message analysis prompt and wait for its analysis.
+        
+        Args:
+            prompt: Analysis prompt for one message
+            on_product: Called with each product completed while the analysis
+                streams; only used when the message is analyzed on its own
+            
+        Returns:
+            StreamlinedAnalysis: Validated analysis for this message
+        """
+        return await self._enqueue((prompt, on_product))
+    
+    async def _run_batch(
+        self, batch: List[Tuple[Tuple[str, Optional[Callable[[AnalyzedProduct], None]]], asyncio.Future]]
+    ) -> None:
+        """Analyze a batch and resolve each caller's future with its own analysis."""
+        prompts = [prompt for (prompt, _), _ in batch]
+        
+        try:
+            if len(prompts) == 1:
+                (_, on_product), _ = batch[0]
+                results: List[Union[StreamlinedAnalysis, BaseException]] = [
+                    await self._run_streamed(prompts[0], on_product) if on_product
+                    else await self._run_single(prompts[0])
+                ]
+            else:
+                results = await self._run_combined(prompts)
+        except Exception as e:
+            results = [e] * len(batch)
+        
+        for (_, future), result in zip(batch, results):
+            self._resolve(future, result)
+    
+    async def _run_single(self, prompt: str) -> StreamlinedAnalysis:
+        """Run one prompt through the streamlined agent."""
+        result = await streamlined_agent.run(prompt, deps=self.deps)
+        return result.data
+    
+    async def _run_streamed(
+        self, prompt: str, on_product: Callable[[AnalyzedProduct], None]
+    ) -> StreamlinedAnalysis:
+        """
+        Stream one prompt, reporting each product once the model has moved past it.
+        
+        Partial responses are validated leniently and skipped until they parse.
+        A final response that fails validation is re-run without streaming, where
+        pydantic-ai asks the model to correct it.
+        """
+        reported = 0
+        analysis = None
+        async with streamlined_agent.run_stream(prompt, deps=self.deps) as stream:
+            async for message, is_last in stream.stream_structured(
+                debounce_by=_ANALYSIS_STREAM_DEBOUNCE_SECONDS
+            ):
+                if is_last:
+                    try:
+                        analysis = await stream.validate_structured_result(message)
+                    except (ValidationError, UnexpectedModelBehavior) as e:
+                        logger.warning(f"Streamed analysis invalid, re-running it: {e}")
+                    break
+                try:
+                    partial = await stream.validate_structured_result(message, allow_partial=True)
+                except (ValidationError, UnexpectedModelBehavior):
+                    continue
+                # Every product but the last is complete; the last may still be streaming
+                completed = partial.products[:-1]
+                for product in completed[reported:]:
+                    on_product(product)
+                reported = max(reported, len(completed))
+        
+        if analysis is None:
+            return await self._run_single(prompt)
+        for product in analysis.products[reported:]:
+            on_product(product)
+        return analysis
+    
+    async def _run_combined(
+        self, prompts: List[str]
+    ) -> List[Union[StreamlinedAnalysis, BaseException]]:
+        """Run several prompts as one request, re-sending them singly if the rows don't map back by id."""
+        rows = None
+        try:
+            result = await streamlined_batch_agent.run(
+                _build_batch_analysis_prompt(prompts), deps=self.deps
+            )
+            rows = {row.message: row for row in result.data.results}
+            # Reason: a missing, repeated or unknown id means some row can't be trusted
+            # to belong to the message it claims, so none of them are used
+            if len(rows) != len(result.data.results) or set(rows) != set(range(1, len(prompts) + 1)):
+                logger.warning(
+                    f"Batched analysis ids {sorted(row.message for row in result.data.results)} "
+                    f"don't match messages 1..{len(prompts)}"
+                )
+                rows = None
+        except Exception as e:
+            logger.warning(f"Batched analysis of {len(prompts)} messages failed: {e}")
+        
+        if rows is not None:
+            logger.info(f"✅ Analyzed {len(prompts)} messages in one OpenAI request")
+            return [
+                StreamlinedAnalysis.model_validate(rows[i].model_dump(exclude={"message"}))
+                for i in range(1, len(prompts) + 1)
+            ]
+        
+        logger.warning(f"🔄 Batched analysis unusable, analyzing {len(prompts)} messages individually")
+        return await asyncio.gather(
+            *(self._run_single(prompt) for prompt in prompts), return_exceptions=True
+        )
+
+
+async def _no_rows() -> List[Dict[str, Any]]:
+    """Stand-in for a context query that has nothing to look up."""
+    return []
+
+
+def _consume_task_result(task: asyncio.Future) -> None:
+    """Mark a prefetch task's failure as seen; an awaiting caller still gets the exception."""
+    if not task.cancelled():
+        task.exception()
+
 
 class StreamlinedOrderProcessor:
     """
@@ -109,12 +533,9 @@ class StreamlinedOrderProcessor:
         """Initialize the streamlined processor with intelligent product matching."""
         self.database = database
         self.distributor_id = distributor_id
-        self.product_matcher = ProductMatcher()
-        self.deps = StreamlinedAgentDeps(
-            database=database,
-            distributor_id=distributor_id,
-            product_matcher=self.product_matcher
-        )
+        self.deps = _get_agent_deps(database, distributor_id)
+        self.product_matcher = self.deps.product_matcher
+        self._analysis_batcher = AnalysisBatcher(self.deps)
         logger.info(f"Initialized StreamlinedOrderProcessor with intelligent product matching for distributor {distributor_id}")
     
     async def process_message(self, message_data: Dict[str, Any]) -> Optional[MessageAnalysis]:
@@ -132,15 +553,29 @@ class StreamlinedOrderProcessor:
         content = message_data.get('content', '').strip()
         customer_id = message_data.get('customer_id', '')
         conversation_id = message_data.get('conversation_id', '')
+        # Lowercased once here and shared by every keyword parse of the message
+        content_norm = _normalize_content(content)
         
         logger.info(f"🔄 Processing message {message_id}: '{content[:50]}...'")
+        # Catalog matches started while the analysis streams, by product name
+        prefetched: Dict[str, Tuple[Tuple[Dict[str, Any], ...], asyncio.Future]] = {}
         
         try:
-            # STEP 1: Get conversation context (simplified)
-            context = await self._get_simple_context(conversation_id, customer_id)
+            analysis_result = None
+            if settings.enable_fastpath_intent:
+                fast_intent = self._fast_path_intent(content, content_norm)
+                if fast_intent is not None:
+                    logger.info(f"⚡ Keyword rules classified message {message_id} as {fast_intent.intent}, skipping OpenAI")
+                    analysis_result = fast_intent, []
             
-            # STEP 2: Analyze message with OpenAI (intent + products)
-            analysis_result = await self._analyze_with_openai(content, context)
+            if analysis_result is None:
+                # STEP 1: Get conversation context (simplified)
+                context = await self._get_simple_context(conversation_id, customer_id)
+                
+                # STEP 2: Analyze message with OpenAI (intent + products)
+                analysis_result = await self._analyze_with_openai(
+                    content, context, content_norm, prefetched
+                )
             if not analysis_result:
                 logger.error(f"❌ Failed to analyze message {message_id}")
                 return None
@@ -160,7 +595,7 @@ class StreamlinedOrderProcessor:
             # STEP 4: Intelligent product validation with catalog matching
             if products and intent.intent == "BUY":
                 validation_result = await self._intelligent_product_validation(
-                    products, content, conversation_id
+                    products, content, conversation_id, prefetched
                 )
                 analysis.extracted_products = validation_result.get('validated_products', [])
                 analysis.requires_clarification = validation_result.get('requires_clarification', False)
@@ -207,6 +642,28 @@ class StreamlinedOrderProcessor:
         except Exception as e:
             logger.error(f"❌ Failed to process message {message_id}: {e}")
             return None
+        
+        finally:
+            # Matches for products the final analysis dropped are no longer needed
+            for _, task in prefetched.values():
+                task.cancel()
+    
+    async def process_messages_batch(
+        self, messages: List[Dict[str, Any]]
+    ) -> List[Optional[MessageAnalysis]]:
+        """
+        Process several messages concurrently.
+        
+        Their OpenAI analyses are queued together, so messages that reach the
+        analysis step within the batch window share one request.
+        
+        Args:
+            messages: Messages from webhooks, as accepted by process_message
+            
+        Returns:
+            One MessageAnalysis (or None if failed) per message, in message order
+        """
+        return list(await asyncio.gather(*(self.process_message(m) for m in messages)))
     
     async def _get_simple_context(
         self, conversation_id: str, customer_id: str
@@ -216,123 +673,127 @@ class StreamlinedOrderProcessor:
         
         Much simpler than complex conversation memory system.
         """
+        # Get recent messages (last 10) and recent orders (last 24 hours) concurrently
+        recent_messages, recent_orders = await asyncio.gather(
+            get_recent_messages_for_context(
+                self.database, conversation_id, self.distributor_id, limit=10
+            ) if conversation_id else _no_rows(),
+            get_recent_orders(
+                self.database, customer_id, self.distributor_id, hours=24
+            ) if customer_id else _no_rows(),
+            return_exceptions=True
+        )
+        
         context_parts = []
         
-        try:
-            # Get recent messages (last 10)
-            if conversation_id:
-                recent_messages = await get_recent_messages_for_context(
-                    self.database, conversation_id, self.distributor_id, limit=10
-                )
-                if recent_messages:
-                    context_parts.append("Recent messages:")
-                    for msg in recent_messages[-5:]:  # Last 5 messages
-                        content = msg.get('content', '')[:100]  # First 100 chars
-                        context_parts.append(f"- {content}")
-            
-            # Get recent orders (last 24 hours)
-            if customer_id:
-                recent_orders = await get_recent_orders(
-                    self.database, customer_id, self.distributor_id, hours=24
-                )
-                if recent_orders:
-                    context_parts.append("Recent orders:")
-                    for order in recent_orders[:3]:  # Last 3 orders
-                        context_parts.append(f"- Order {order.get('order_number', 'N/A')}")
+        if isinstance(recent_messages, Exception):
+            logger.warning(f"Failed to get recent messages for context: {recent_messages}")
+        elif recent_messages:
+            context_parts.append("Recent messages:")
+            for msg in recent_messages[-5:]:  # Last 5 messages
+                content = msg.get('content', '')[:100]  # First 100 chars
+                context_parts.append(f"- {content}")
         
-        except Exception as e:
-            logger.warning(f"Failed to get context: {e}")
+        if isinstance(recent_orders, Exception):
+            logger.warning(f"Failed to get recent orders for context: {recent_orders}")
+        elif recent_orders:
+            context_parts.append("Recent orders:")
+            for order in recent_orders[:3]:  # Last 3 orders
+                context_parts.append(f"- Order {order.get('order_number', 'N/A')}")
         
         return "\n".join(context_parts) if context_parts else "No previous context"
     
     async def _analyze_with_openai(
-        self, content: str, context: str
+        self,
+        content: str,
+        context: str,
+        content_norm: Optional[str] = None,
+        prefetched: Optional[Dict[str, Tuple[Tuple[Dict[str, Any], ...], asyncio.Future]]] = None
     ) -> Optional[tuple[MessageIntent, List[ExtractedProduct]]]:
         """
         Analyze message with OpenAI to get intent and products using structured JSON output.
         
         Let OpenAI handle all the language understanding and extraction.
+        
+        Args:
+            content: Raw message content
+            context: Conversation context for the prompt
+            content_norm: Normalized content for the keyword fallback, built there if not given
+            prefetched: Filled with a catalog match started for each product as the
+                analysis streams in, keyed by product name, for _intelligent_product_validation
         """
         try:
             # Give product catalog context if available
             catalog_context = ""
+            catalog = None
             try:
-                catalog = await fetch_product_catalog(self.database, self.distributor_id)
+                catalog = await self._get_catalog()
                 if catalog:
-                    product_names = [p.product_name for p in catalog[:10]]  # Top 10 products
+                    product_names = [p['name'] for p in catalog[:10]]  # Top 10 products
                     catalog_context = f"\n\nAVAILABLE PRODUCTS (sample): {', '.join(product_names)}"
             except:
                 pass
             
+            # Reason: the fixed instructions come first, then the catalog sample (stable
+            # per catalog load), and the per-message parts last, so consecutive requests
+            # share a long common prefix that OpenAI's prompt caching can reuse
             prompt = f"""
-            Analyze this customer message and return a JSON response:
-            
-            MESSAGE: "{content}"
-            
-            CONTEXT: {context}{catalog_context}
-            
-            Return ONLY valid JSON in this exact format:
-            {{
-              "intent": "BUY",
-              "confidence": 0.85,
-              "reasoning": "Customer expressing purchase intent",
-              "products": [
-                {{
-                  "name": "aceite de canola",
-                  "quantity": 1,
-                  "unit": "litro",
-                  "original_text": "un litro de aceite de canola"
-                }}
-              ]
-            }}
+            Analyze the customer MESSAGE at the end and return the structured analysis.
             
             IMPORTANT:
             - For Spanish numbers like "un/una" use quantity: 1
             - Extract the exact product name as mentioned
             - Include unit if mentioned (litro, botella, kilo, etc)
-            - If no products for BUY intent, use empty products array
+            - If no products for BUY intent, use empty products array{catalog_context}
+            
+            CONTEXT: {context}
+            
+            MESSAGE: "{content}"
             """
             
-            result = await streamlined_agent.run(prompt, deps=self.deps)
-            response_text = str(result.data)
+            # Reason: result_type makes pydantic-ai validate (and retry) the model's
+            # answer, so the analysis arrives as an object instead of text to re-parse.
+            # Concurrent messages share one OpenAI request through the batcher
+            on_product = None
+            if prefetched is not None and catalog:
+                match_products = self.product_matcher.match_products
+                
+                # Reason: catalog matching of the products the model has finished
+                # overlaps with the generation of the rest of the analysis
+                def on_product(product: AnalyzedProduct) -> None:
+                    if product.name not in prefetched:
+                        task = asyncio.ensure_future(match_products(product.name, catalog))
+                        task.add_done_callback(_consume_task_result)
+                        prefetched[product.name] = (catalog, task)
             
-            # Try to parse as JSON first (OpenAI should return valid JSON)
             try:
-                import json
-                # Find JSON in response (handle cases where there's extra text)
-                json_start = response_text.find('{')
-                json_end = response_text.rfind('}') + 1
-                if json_start >= 0 and json_end > json_start:
-                    json_str = response_text[json_start:json_end]
-                    data = json.loads(json_str)
-                    
-                    # Create intent from JSON
-                    intent = MessageIntent(
-                        intent=data.get('intent', 'OTHER'),
-                        confidence=float(data.get('confidence', 0.5)),
-                        reasoning=data.get('reasoning', 'AI analysis')
-                    )
-                    
-                    # Create products from JSON
-                    products = []
-                    if data.get('products'):
-                        for p in data['products']:
-                            products.append(ExtractedProduct(
-                                product_name=p.get('name', ''),
-                                quantity=int(p.get('quantity', 1)),
-                                unit=p.get('unit'),
-                                original_text=p.get('original_text', content),
-                                confidence=float(p.get('confidence', intent.confidence))
-                            ))
-                    
-                    return intent, products
-                    
-            except (json.JSONDecodeError, ValueError) as e:
-                logger.warning(f"Failed to parse JSON response, falling back to simple parsing: {e}")
+                data = await self._analysis_batcher.analyze(prompt, on_product)
+            except UnexpectedModelBehavior as e:
+                logger.warning(f"Invalid structured response, falling back to simple parsing: {e}")
+                data = None
+            
+            if data is None:
+                intent = self._parse_intent(content, content_norm)
+                products = (
+                    self._parse_products_simple(content, content_norm) if intent.intent == "BUY" else []
+                )
+                return intent, products
             
-            # Fallback to simple parsing if JSON fails
-            intent = self._parse_intent(response_text, content)
-            products = self._parse_products_simple(content) if intent.intent == "BUY" else []
+            intent = MessageIntent(
+                intent=data.intent,
+                confidence=data.confidence,
+                reasoning=data.reasoning
+            )
+            products = [
+                ExtractedProduct(
+                    product_name=p.name,
+                    quantity=p.quantity,
+                    unit=p.unit,
+                    original_text=p.original_text or content,
+                    confidence=p.confidence if p.confidence is not None else intent.confidence
+                )
+                for p in data.products
+            ]
             
             return intent, products
             
@@ -340,364 +801,102 @@ class StreamlinedOrderProcessor:
             logger.error(f"OpenAI analysis failed: {e}")
             return None
     
-    def _parse_products_simple(self, content: str) -> List[ExtractedProduct]:
+    def _parse_products_simple(
+        self, content: str, content_norm: Optional[str] = None
+    ) -> List[ExtractedProduct]:
         """
         Simple fallback product extraction - minimal, reliable parsing.
         Let OpenAI do the heavy lifting, this is just a safety net.
-        """
-        products = []
-        content_lower = content.lower()
-        
-        # Basic product keywords (just essentials)
-        basic_products = {
-            'aceite': 'aceite',
-            'agua': 'agua embotellada',
-            'leche': 'leche',
-            'cerveza': 'cerveza',
-            'coca cola': 'coca cola',
-            'queso': 'queso',
-            'pan': 'pan',
-            'arroz': 'arroz',
-            'frijoles': 'frijoles',
-            'huevos': 'huevos'
-        }
-        
-        # Simple Spanish numbers
-        spanish_numbers = {
-            'un': 1, 'una': 1, 'uno': 1,
-            'dos': 2, 'tres': 3, 'cuatro': 4, 'cinco': 5,
-            'seis': 6, 'siete': 7, 'ocho': 8, 'nueve': 9, 'diez': 10,
-            'media docena': 6, 'docena': 12
-        }
-        
-        # Simple units
-        units = ['litro', 'litros', 'botella', 'botellas', 'kilo', 'kilos', 'paquete', 'paquetes']
-        
-        # Try to find basic products
-        for keyword, product_name in basic_products.items():
-            if keyword in content_lower:
-                quantity = 1
-                unit = None
-                
-                # Look for quantity before the product
-                words = content_lower.split()
-                for i, word in enumerate(words):
-                    if keyword in word:
-                        # Check 3 words before for quantity
-                        for j in range(max(0, i-3), i):
-                            # Check for Spanish numbers
-                            if words[j] in spanish_numbers:
-                                quantity = spanish_numbers[words[j]]
-                                break
-                            # Check for numeric
-                            try:
-                                quantity = int(words[j])
-                                break
-                            except ValueError:
-                                continue
-                        
-                        # Check for unit after product
-                        for j in range(i+1, min(i+3, len(words))):
-                            if words[j] in units:
-                                unit = words[j].rstrip('s')  # Remove plural
-                                break
-                        break
-                
-                products.append(ExtractedProduct(
-                    product_name=product_name,
-                    quantity=quantity,
-                    unit=unit,
-                    original_text=content,
-                    confidence=0.7  # Lower confidence for simple parsing
-                ))
-        
-        return products
-    
-    def _parse_intent(self, response: str, content: str) -> MessageIntent:
-        """Parse intent from OpenAI response with improved Spanish greeting detection."""
-        
-        content_lower = content.lower().strip()
-        
-        # FIRST: Check for greetings (most common case)
-        greeting_words = [
-            "hola", "buenos días", "buenas tardes", "buenas noches", 
-            "buen día", "hi", "hello", "hey", "saludos", "que tal",
-            "como estas", "como está", "good morning", "good afternoon",
-            "buendia", "buenosdias"
-        ]
-        
-        if any(greeting in content_lower for greeting in greeting_words):
-            return MessageIntent(
-                intent="OTHER",
-                confidence=0.75,
-                reasoning="Customer greeting or general conversation"
-            )
         
-        # SECOND: Check for clear purchase intent  
-        buy_words = ["quiero", "necesito", "pedido", "order", "comprar", "me das", "vendeme"]
-        if any(word in content_lower for word in buy_words):
-            return MessageIntent(
-                intent="BUY",
-                confidence=0.85,
-                reasoning="Customer expressing purchase intent"
-            )
-        
-        # THIRD: Check for questions about products/prices
-        question_words = ["precio", "catalogo", "cuanto", "cuesta", "tienes", "hay", "menu", "lista"]
-        if any(word in content_lower for word in question_words) or content.endswith('?'):
-            return MessageIntent(
-                intent="QUESTION", 
-                confidence=0.8,
-                reasoning="Customer asking about products/services"
-            )
-        
-        # FOURTH: Check for complaints
-        complaint_words = ["problema", "queja", "mal", "error", "equivocado", "reclamo"]
-        if any(word in content_lower for word in complaint_words):
-            return MessageIntent(
-                intent="COMPLAINT",
-                confidence=0.8, 
-                reasoning="Customer expressing dissatisfaction"
-            )
-        
-        # DEFAULT: General conversation
-        return MessageIntent(
-            intent="OTHER",
-            confidence=0.6,
-            reasoning="General conversation or unclear intent"
-        )
-    
-    def _parse_products_complex_DEPRECATED(self, response: str, content: str) -> List[ExtractedProduct]:
-        """DEPRECATED: Complex Spanish product extraction - replaced by OpenAI-first approach."""
-        
-        products = []
-        
-        # Comprehensive product keywords based on our catalog
-        product_keywords = {
-            # Beverages
-            'agua embotellada': 'agua embotellada',
-            'agua': 'agua embotellada',
-            'water': 'agua embotellada',
-            'coca cola': 'coca cola',
-            'coca': 'coca cola',
-            'cola': 'coca cola',
-            'coke': 'coca cola',
-            'pepsi': 'pepsi',
-            'jugo de naranja': 'jugo de naranja',
-            'jugo naranja': 'jugo de naranja',
-            'zumo naranja': 'jugo de naranja', 
-            'orange juice': 'jugo de naranja',
-            'red bull': 'red bull',
-            'energética': 'red bull',
-            'energy drink': 'red bull',
-            'cerveza': 'cerveza corona',
-            'corona': 'cerveza corona',
-            'beer': 'cerveza corona',
-            'café molido': 'café molido',
-            'café': 'café molido',
-            'coffee': 'café molido',
-            
-            # Cooking & Oils
-            'aceite de canola': 'aceite de canola',
-            'aceite canola': 'aceite de canola',
-            'canola oil': 'aceite de canola',
-            'aceite de oliva': 'aceite de oliva',
-            'aceite oliva': 'aceite de oliva',
-            'olive oil': 'aceite de oliva',
-            'aceite extra virgen': 'aceite de oliva',
-            'aceite': 'aceite',  # Generic fallback
-            
-            # Dairy Products
-            'leche entera': 'leche entera',
-            'leche': 'leche entera',
-            'milk': 'leche entera',
-            'queso fresco': 'queso fresco',
-            'queso': 'queso fresco',
-            'cheese': 'queso fresco',
-            'yogurt natural': 'yogurt natural',
-            'yogurt': 'yogurt natural',
-            'mantequilla': 'mantequilla',
-            'butter': 'mantequilla',
-            'huevos': 'huevos',
-            'eggs': 'huevos',
-            
-            # Snacks
-            'papas fritas': 'papas fritas',
-            'papas': 'papas fritas',
-            'chips': 'papas fritas',
-            'frituras': 'papas fritas',
-            'galletas de chocolate': 'galletas de chocolate',
-            'galletas': 'galletas de chocolate',
-            'cookies': 'galletas de chocolate',
-            'nueces mixtas': 'nueces mixtas',
-            'nueces': 'nueces mixtas',
-            'nuts': 'nueces mixtas',
-            'crackers': 'crackers',
-            'galletas saladas': 'crackers',
-            
-            # Frozen Foods
-            'helado de vainilla': 'helado de vainilla',
-            'helado': 'helado de vainilla',
-            'ice cream': 'helado de vainilla',
-            'verduras congeladas': 'verduras congeladas',
-            'verduras': 'verduras congeladas',
-            'vegetables': 'verduras congeladas',
-            'pizza congelada': 'pizza congelada',
-            'pizza': 'pizza congelada',
-            'fresas congeladas': 'fresas congeladas',
-            'fresas': 'fresas congeladas',
-            'strawberries': 'fresas congeladas',
-            
-            # Bakery & Grains
-            'pan integral': 'pan integral',
-            'pan': 'pan integral',
-            'bread': 'pan integral',
-            'arroz blanco': 'arroz blanco',
-            'arroz': 'arroz blanco',
-            'rice': 'arroz blanco',
-            
-            # Canned & Others
-            'atún': 'atún',
-            'tuna': 'atún',
-            'frijoles negros': 'frijoles negros',
-            'frijoles': 'frijoles negros',
-            'beans': 'frijoles negros',
-            'detergente líquido': 'detergente líquido',
-            'detergente': 'detergente líquido',
-            'detergent': 'detergente líquido',
-            'azúcar': 'azúcar blanca',
-            'sugar': 'azúcar blanca'
-        }
-        
-        # Spanish number recognition
-        spanish_numbers = {
-            'un': 1, 'una': 1, 'uno': 1,
-            'dos': 2, 'tres': 3, 'cuatro': 4, 'cinco': 5,
-            'seis': 6, 'siete': 7, 'ocho': 8, 'nueve': 9, 'diez': 10,
-            'once': 11, 'doce': 12, 'trece': 13, 'catorce': 14, 'quince': 15,
-            'veinte': 20, 'treinta': 30, 'cuarenta': 40, 'cincuenta': 50
-        }
-        
-        # Spanish unit recognition
-        spanish_units = {
-            'litro': 'litro', 'litros': 'litro', 'l': 'litro',
-            'botella': 'botella', 'botellas': 'botella',
-            'lata': 'lata', 'latas': 'lata',
-            'paquete': 'paquete', 'paquetes': 'paquete',
-            'envase': 'envase', 'envases': 'envase',
-            'bolsa': 'bolsa', 'bolsas': 'bolsa',
-            'caja': 'caja', 'cajas': 'caja',
-            'barra': 'barra', 'barras': 'barra',
-            'docena': 'docena', 'docenas': 'docena',
-            'kilo': 'kg', 'kilos': 'kg', 'kg': 'kg', 'kilogramo': 'kg', 'kilogramos': 'kg',
-            'gramo': 'g', 'gramos': 'g', 'g': 'g',
-            'pieza': 'pieza', 'piezas': 'pieza', 'unidad': 'unidad', 'unidades': 'unidad'
-        }
-        
-        content_lower = content.lower()
-        words = content_lower.split()
-        
-        # Enhanced product matching with compound names
-        found_products = []
-        
-        # Sort keywords by length (longest first) to match compound names first
-        sorted_keywords = sorted(product_keywords.keys(), key=len, reverse=True)
-        
-        for keyword in sorted_keywords:
-            if keyword in content_lower:
-                # Avoid duplicate shorter matches within longer ones
-                overlaps = False
-                for found in found_products:
-                    if keyword in found['keyword'] or found['keyword'] in keyword:
-                        overlaps = True
-                        break
-                
-                if not overlaps:
-                    found_products.append({
-                        'keyword': keyword,
-                        'product_name': product_keywords[keyword],
-                        'start_pos': content_lower.find(keyword)
-                    })
-        
-        # Extract quantity and unit for each found product
-        for found in found_products:
-            keyword = found['keyword']
-            product_name = found['product_name']
-            start_pos = found['start_pos']
-            
-            # Find quantity and unit near the product
-            quantity = 1
-            unit = None
-            
-            # Look for quantity in the text around the product
-            keyword_words = keyword.split()
-            for i, word in enumerate(words):
-                if any(kw in word for kw in keyword_words):
-                    # Search for quantity in the 3 words before the product
-                    search_range = range(max(0, i-3), i)
-                    for j in search_range:
-                        search_word = words[j]
-                        
-                        # Check Spanish numbers
-                        if search_word in spanish_numbers:
-                            quantity = spanish_numbers[search_word]
-                            break
-                        
-                        # Check numeric digits
-                        try:
-                            potential_qty = int(search_word)
-                            if 1 <= potential_qty <= 100:  # Reasonable quantity range
-                                quantity = potential_qty
-                                break
-                        except ValueError:
-                            continue
-                    
-                    # Search for unit in the 2 words before and after the product
-                    unit_search_range = list(range(max(0, i-2), i)) + list(range(i+1, min(len(words), i+3)))
-                    for j in unit_search_range:
-                        search_word = words[j]
-                        if search_word in spanish_units:
-                            unit = spanish_units[search_word]
-                            break
-                    
-                    break
-            
-            # Create the extracted product
-            product = ExtractedProduct(
+        Args:
+            content: Raw message content
+            content_norm: Normalized content, built here if not given
+        """
+        return [
+            ExtractedProduct(
                 product_name=product_name,
                 quantity=quantity,
                 unit=unit,
                 original_text=content,
-                confidence=0.85  # Higher confidence for enhanced extraction
+                confidence=0.7  # Lower confidence for simple parsing
             )
-            products.append(product)
+            for product_name, quantity, unit in _parse_products_cached(
+                content_norm if content_norm is not None else _normalize_content(content)
+            )
+        ]
+    
+    def _parse_intent(self, content: str, content_norm: Optional[str] = None) -> MessageIntent:
+        """Classify a message with the keyword rules, with improved Spanish greeting detection."""
+        intent, confidence, reasoning = _parse_intent_cached(
+            content_norm if content_norm is not None else _normalize_content(content)
+        )
+        return MessageIntent(intent=intent, confidence=confidence, reasoning=reasoning)
+    
+    def _fast_path_intent(
+        self, content: str, content_norm: Optional[str] = None
+    ) -> Optional[MessageIntent]:
+        """
+        Classify a message without OpenAI when the keyword rules settle it.
+        
+        Only confident non-order intents qualify, and only for messages with no
+        buy keyword, product keyword or number anywhere in them, since a
+        greeting is reported first even when an order follows it.
         
-        return products
+        Args:
+            content: Message content
+            content_norm: Normalized content, built here if not given
+            
+        Returns:
+            MessageIntent from the keyword rules, or None if OpenAI analysis is needed
+        """
+        if content_norm is None:
+            content_norm = _normalize_content(content)
+        intent = self._parse_intent(content, content_norm)
+        if intent.intent not in _FAST_PATH_INTENTS or intent.confidence < _FAST_PATH_MIN_CONFIDENCE:
+            return None
+        
+        if (any(match.lastgroup == 'buy' for match in _INTENT_RE.finditer(content_norm))
+                or _PRODUCT_RE.search(content_norm)
+                or any(char.isdigit() for char in content_norm)):
+            return None
+        return intent
     
     async def _intelligent_product_validation(
-        self, products: List[ExtractedProduct], original_message: str, conversation_id: str
+        self,
+        products: List[ExtractedProduct],
+        original_message: str,
+        conversation_id: str,
+        prefetched: Optional[Dict[str, Tuple[Tuple[Dict[str, Any], ...], asyncio.Future]]] = None
     ) -> Dict[str, Any]:
         """
         Intelligent product validation using status-based workflow.
         
         Products start as "draft", move to "pending" if clarification needed,
-        and become "confirmed" when matched with high confidence.
+        and become "confirmed" when matched with high confidence. Products that
+        are already confirmed (e.g. re-sent in a clarification flow) are kept
+        as they are without matching them again.
         
         Args:
             products: List of extracted products to validate
             original_message: Original customer message
             conversation_id: Conversation ID for context
+            prefetched: Catalog matches already started while the analysis streamed
             
         Returns:
             Dict with validated_products, requires_clarification, suggested_question
         """
         try:
-            # Get product catalog from database
-            catalog_models = await fetch_product_catalog(
-                self.database, self.distributor_id, active_only=True
-            )
+            if all(p.status == "confirmed" for p in products):
+                return {
+                    'validated_products': products,
+                    'requires_clarification': False,
+                    'suggested_question': None
+                }
+            
+            # Get product catalog (cached per TTL)
+            catalog_dicts = await self._get_catalog()
             
-            if not catalog_models:
+            if not catalog_dicts:
                 logger.warning("No catalog available for validation")
                 # Keep products as draft without catalog
                 return {
@@ -706,40 +905,42 @@ class StreamlinedOrderProcessor:
                     'suggested_question': None
                 }
             
-            # Convert catalog models to dictionaries for the matcher
-            catalog_dicts = []
-            for product in catalog_models:
-                catalog_dicts.append({
-                    'id': product.id,
-                    'name': product.name,
-                    'sku': product.sku,
-                    'unit': product.unit,
-                    'unit_price': float(product.unit_price),
-                    'stock_quantity': product.stock_quantity,
-                    'in_stock': product.in_stock,
-                    'minimum_order_quantity': product.minimum_order_quantity,
-                    'active': product.active,
-                    'brand': product.brand,
-                    'category': product.category,
-                    'size_variants': product.size_variants,
-                    'aliases': product.aliases,
-                    'keywords': product.keywords,
-                    'ai_training_examples': product.ai_training_examples,
-                    'common_misspellings': product.common_misspellings,
-                    'seasonal_patterns': product.seasonal_patterns
-                })
-            
             validated_products = []
             overall_requires_clarification = False
             suggested_questions = []
+            match_products = self.product_matcher.match_products
             
-            # Process each extracted product with status-based workflow
-            for extracted_product in products:
+            async def _match_one(
+                extracted_product: ExtractedProduct
+            ) -> Tuple[ExtractedProduct, MatchResult]:
+                # Reuse a match started during the analysis if it ran on this catalog
+                started = (prefetched or {}).get(extracted_product.product_name)
+                if started is not None and started[0] is catalog_dicts:
+                    return extracted_product, await started[1]
+                
                 # Use our intelligent matcher to find matches
-                match_result = self.product_matcher.match_products(
+                match_result = await match_products(
                     extracted_product.product_name, 
                     catalog_dicts
                 )
+                return extracted_product, match_result
+            
+            # Reason: products are matched concurrently in bounded chunks; gather keeps
+            # message order, so the results below are applied in the original order
+            to_check = [p for p in products if p.status != "confirmed"]
+            match_results = []
+            for start in range(0, len(to_check), _MATCH_CHUNK_SIZE):
+                match_results.extend(await asyncio.gather(
+                    *(_match_one(p) for p in to_check[start:start + _MATCH_CHUNK_SIZE])
+                ))
+            pending_results = iter(match_results)
+            
+            # Process each extracted product with status-based workflow
+            for product in products:
+                if product.status == "confirmed":
+                    validated_products.append(product)
+                    continue
+                extracted_product, match_result = next(pending_results)
                 
                 logger.info(
                     f"Product matching result for '{extracted_product.product_name}': "
@@ -757,7 +958,6 @@ class StreamlinedOrderProcessor:
                     # Update unit if catalog has better info
                     if best_match.unit and not extracted_product.unit:
                         extracted_product.unit = best_match.unit
-                    validated_products.append(extracted_product)
                     
                 elif match_result.confidence_level in ["MEDIUM", "LOW"]:
                     # Medium/Low confidence - mark as pending and ask for clarification
@@ -772,8 +972,6 @@ class StreamlinedOrderProcessor:
                     if match_result.suggested_question:
                         extracted_product.clarification_asked = match_result.suggested_question
                         suggested_questions.append(match_result.suggested_question)
-                    
-                    validated_products.append(extracted_product)
                 
                 else:  # NONE
                     # No matches found - mark as pending and need clarification
@@ -784,8 +982,8 @@ class StreamlinedOrderProcessor:
                     if match_result.suggested_question:
                         extracted_product.clarification_asked = match_result.suggested_question
                         suggested_questions.append(match_result.suggested_question)
-                    
-                    validated_products.append(extracted_product)
+                
+                validated_products.append(extracted_product)
             
             # Combine multiple questions into one coherent message
             combined_question = None
@@ -812,6 +1010,15 @@ class StreamlinedOrderProcessor:
                 'suggested_question': None
             }
     
+    async def _get_catalog(self) -> Tuple[Dict[str, Any], ...]:
+        """
+        Get the distributor catalog from the shared cache.
+        
+        Returns:
+            Tuple of catalog product dictionaries shared by all callers
+        """
+        return await catalog_cache.get(self.database, self.distributor_id)
+    
     async def _send_clarifying_question(
         self, message_data: Dict[str, Any], question: str
     ) -> bool:
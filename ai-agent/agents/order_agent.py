@@ -15,16 +15,30 @@ Added: Simple OpenAI calls, linear workflow, easier debugging.
 
 from __future__ import annotations as _annotations
 
+import asyncio
+import hashlib
+import json
 import logging
+import re
 import time
-from typing import Dict, Any, Optional, List
+from bisect import bisect_right
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Any, Optional, List, Sequence, Set, Tuple, Union
 from dataclasses import dataclass
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # Reason: orjson is an optional speed-up; the stdlib parser behaves the same
+    _json_loads = json.loads
 from pydantic_ai import Agent
 from pydantic_ai.models.openai import OpenAIModel
 
 from config.settings import settings
+from services.catalog_cache import catalog_cache
 from services.database import DatabaseService
+from services.openai_client import get_openai_client
+from services.request_batcher import RequestBatcher
 from services.product_matcher import ProductMatcher, ProductMatch, MatchResult
 from services.continuation_detector import ContinuationDetector, ContinuationResult
 from schemas.message import MessageAnalysis, MessageIntent, ExtractedProduct
@@ -32,15 +46,141 @@ from schemas.order import OrderCreation, OrderProduct
 from tools.supabase_tools import (
     get_recent_messages_for_context,
     get_recent_orders,
+    build_message_ai_update,
     update_message_ai_data,
+    update_messages_ai_data_batch,
     create_order,
-    fetch_product_catalog
+    create_order_and_update_message,
+    get_order_id_for_source_message,
+    is_missing_function_error
 )
 
+if TYPE_CHECKING:
+    from agents.autonomous_order_agent import FallbackContext
+
 logger = logging.getLogger(__name__)
 
+# Keywords for the rule-based intent fallback, by intent category
+_FALLBACK_INTENT_KEYWORDS = {
+    'greeting': (
+        "hola", "buenos días", "buenas tardes", "buenas noches",
+        "buen día", "hi", "hello", "hey", "saludos", "que tal",
+        "como estas", "como está", "good morning", "good afternoon",
+        "buendia", "buenosdias"
+    ),
+    'buy': ("quiero", "necesito", "pedido", "order", "comprar", "me das", "vendeme"),
+    'question': ("precio", "catalogo", "cuanto", "cuesta", "tienes", "hay", "menu", "lista"),
+    'complaint': ("problema", "queja", "mal", "error", "equivocado", "reclamo"),
+}
+# Reason: one case-insensitive lookahead scan finds every category's whole-word
+# keywords, and lastgroup names the category without a reverse lookup. Keywords
+# also match their plurals ("precios", "catalogos"); two-letter ones don't, so
+# "his" is not read as "hi"
+_FALLBACK_INTENT_RE = re.compile(
+    '(?=' + '|'.join(
+        f"(?P<{category}>\\b(?:"
+        + '|'.join(
+            re.escape(k) + ('(?:s|es)?' if len(k) > 2 else '')
+            for k in sorted(keywords, key=len, reverse=True)
+        )
+        + ")\\b)"
+        for category, keywords in _FALLBACK_INTENT_KEYWORDS.items()
+    ) + ')',
+    re.IGNORECASE
+)
+
+# Basic product keywords for the fallback parser (just essentials)
+_FALLBACK_PRODUCTS = {
+    'aceite': 'aceite',
+    'agua': 'agua embotellada',
+    'leche': 'leche',
+    'cerveza': 'cerveza',
+    'coca cola': 'coca cola',
+    'queso': 'queso',
+    'pan': 'pan',
+    'arroz': 'arroz',
+    'frijoles': 'frijoles',
+    'huevos': 'huevos'
+}
+# Reason: same lookahead scan as the intent keywords, so one pass finds every product
+_FALLBACK_PRODUCT_RE = re.compile(
+    '(?=(' + '|'.join(re.escape(k) for k in sorted(_FALLBACK_PRODUCTS, key=len, reverse=True)) + '))'
+)
+# Simple Spanish numbers
+_FALLBACK_NUMBERS = {
+    'un': 1, 'una': 1, 'uno': 1,
+    'dos': 2, 'tres': 3, 'cuatro': 4, 'cinco': 5,
+    'seis': 6, 'siete': 7, 'ocho': 8, 'nueve': 9, 'diez': 10,
+    'media docena': 6, 'docena': 12
+}
+# Simple units, mapped to their singular form
+_FALLBACK_UNITS = {
+    unit: unit.rstrip('s')
+    for unit in ('litro', 'litros', 'botella', 'botellas', 'kilo', 'kilos', 'paquete', 'paquetes')
+}
+_WORD_RE = re.compile(r'\S+')
+
+# Short greetings/complaints are classified locally instead of by OpenAI
+_TRIVIAL_MESSAGE_MAX_WORDS = 6
+_TRIVIAL_MESSAGE_CONFIDENCE = 0.8
+_TRIVIAL_INTENTS = {'greeting': "OTHER", 'complaint': "COMPLAINT"}
+
+
+@lru_cache(maxsize=4096)
+def _word_quantity(word: str) -> Optional[int]:
+    """
+    Quantity a message word stands for in the fallback parser.
+    
+    Cached because the same short words recur across messages and a failed
+    int() parse costs an exception each time.
+    
+    Args:
+        word: Lowercased message word
+        
+    Returns:
+        Spanish number or numeric value of the word, or None
+    """
+    quantity = _FALLBACK_NUMBERS.get(word)
+    if quantity is not None:
+        return quantity
+    try:
+        return int(word)
+    except ValueError:
+        return None
+
+
+@dataclass(frozen=True, slots=True)
+class MessageView:
+    """
+    Message content lowercased and tokenized once for the fallback parsers.
+    """
+    raw: str
+    lower: str
+    words: Tuple[str, ...]
+    word_starts: Tuple[int, ...]
+    
+    @classmethod
+    def from_content(cls, content: str) -> MessageView:
+        """
+        Lowercase and tokenize message content.
+        
+        Args:
+            content: Raw message content
+            
+        Returns:
+            MessageView: Lowercased content with its words and their start offsets
+        """
+        lower = content.lower()
+        word_matches = list(_WORD_RE.finditer(lower))
+        return cls(
+            raw=content,
+            lower=lower,
+            words=tuple(m.group() for m in word_matches),
+            word_starts=tuple(m.start() for m in word_matches)
+        )
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class StreamlinedAgentDeps:
     """Enhanced dependencies with intelligent product matching and continuation detection."""
     database: DatabaseService
@@ -123,12 +263,272 @@ IMPORTANT:
 
 # Initialize simple agent
 streamlined_agent = Agent(
-    model=OpenAIModel(settings.openai_model),
+    model=OpenAIModel(settings.openai_model, openai_client=get_openai_client()),
     system_prompt=SYSTEM_PROMPT,
     deps_type=StreamlinedAgentDeps,
     retries=2
 )
 
+# Catalog products named in the analysis prompt
+_CATALOG_PROMPT_SAMPLE_SIZE = 10
+
+# How long a conversation's recent context is reused across a burst of messages
+_CONTEXT_TTL_SECONDS = 15.0
+# Conversations whose context is kept at once; the oldest entry is dropped beyond this
+_CONTEXT_CACHE_MAX_ENTRIES = 1000
+
+# How long an analysis response is reused for an identical prompt (double sends, webhook retries)
+_ANALYSIS_CACHE_TTL_SECONDS = 60.0
+_ANALYSIS_CACHE_MAX_ENTRIES = 1024
+
+# Message analyses queued within this window share one OpenAI request
+_ANALYSIS_BATCH_SIZE = 16
+_ANALYSIS_BATCH_WAIT_SECONDS = 0.1
+# AI-data writes queued within this window share one database request (settings.enable_batched_writes)
+_MESSAGE_UPDATE_BATCH_SIZE = 32
+_MESSAGE_UPDATE_BATCH_WAIT_SECONDS = 0.05
+
+
+def _build_batch_analysis_prompt(prompts: List[str]) -> str:
+    """Combine per-message analysis prompts into one request answered row by row."""
+    blocks = "\n\n".join(
+        f"=== MESSAGE {i} ===\n{prompt.strip()}" for i, prompt in enumerate(prompts, 1)
+    )
+    return f"""Each MESSAGE block below is a separate analysis request. Follow each block's
+instructions independently, using only that block's context.
+
+Return ONLY valid JSON in this format, with exactly one analysis object per block. Add a
+"message" field to each analysis set to its block's MESSAGE number:
+{{"results": [{{"message": 1, <analysis for MESSAGE 1>}}, {{"message": 2, <analysis for MESSAGE 2>}}, ...]}}
+
+{blocks}"""
+
+
+def _load_json_object(response_text: str) -> Dict[str, Any]:
+    """
+    Parse the JSON object in a model response.
+    
+    The whole response is tried first, since the model normally returns bare
+    JSON; the outermost braces are only searched for when it adds extra text.
+    
+    Args:
+        response_text: Raw model response
+        
+    Returns:
+        Parsed JSON object
+        
+    Raises:
+        ValueError: If the response contains no JSON object
+    """
+    try:
+        data = _json_loads(response_text)
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        return data
+    
+    json_start = response_text.find('{')
+    json_end = response_text.rfind('}') + 1
+    if json_start < 0 or json_end <= json_start:
+        raise ValueError("No JSON object in response")
+    data = _json_loads(response_text[json_start:json_end])
+    if not isinstance(data, dict):
+        raise ValueError("Response JSON is not an object")
+    return data
+
+
+def _parse_batch_analysis_rows(response_text: str, expected: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Extract the per-message analysis objects from a batched response.
+    
+    Rows are ordered by their "message" number rather than their position,
+    so a reordered response still maps back to the right messages.
+    
+    Args:
+        response_text: Raw model response
+        expected: Number of messages in the batch
+        
+    Returns:
+        One analysis dict per message, in message order without the "message"
+        field, or None unless the message numbers are exactly 1..expected
+    """
+    try:
+        rows = _load_json_object(response_text).get('results')
+    except ValueError:
+        return None
+    
+    if not isinstance(rows, list) or len(rows) != expected or not all(isinstance(row, dict) for row in rows):
+        return None
+    
+    by_message = {}
+    for row in rows:
+        message = row.get('message')
+        # Reason: bool is an int subclass, so reject it explicitly
+        if isinstance(message, bool) or not isinstance(message, int):
+            return None
+        by_message[message] = {key: value for key, value in row.items() if key != 'message'}
+    
+    if set(by_message) != set(range(1, expected + 1)):
+        return None
+    return [by_message[message] for message in range(1, expected + 1)]
+
+
+class AnalysisBatcher(RequestBatcher):
+    """
+    Coalesces concurrent message analyses into batched OpenAI requests.
+    
+    Callers await analyze() with their usual single-message prompt; prompts
+    queued within the batch window are sent as one request that returns an
+    analysis per message, saving a round-trip and the repeated system prompt
+    for every extra message. If the batched response cannot be matched to the
+    messages, each one is re-sent on its own. One batcher per processor keeps
+    batches within a single distributor.
+    """
+    
+    def __init__(
+        self,
+        deps: StreamlinedAgentDeps,
+        max_batch_size: int = _ANALYSIS_BATCH_SIZE,
+        max_wait_seconds: float = _ANALYSIS_BATCH_WAIT_SECONDS
+    ):
+        """
+        Initialize the batcher.
+        
+        Args:
+            deps: Dependencies passed to the streamlined agent
+            max_batch_size: Maximum messages per OpenAI request
+            max_wait_seconds: How long the first queued message waits for company
+        """
+        super().__init__(max_batch_size, max_wait_seconds)
+        self.deps = deps
+    
+    async def analyze(self, prompt: str) -> str:
+        """
+        Queue a single-message analysis prompt and wait for its response text.
+        
+        Args:
+            prompt: Analysis prompt for one message
+            
+        Returns:
+            str: Model response for this message (a JSON analysis when batched)
+        """
+        return await self._enqueue(prompt)
+    
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """Analyze a batch and resolve each caller's future with its own response."""
+        prompts = [prompt for prompt, _ in batch]
+        
+        try:
+            if len(prompts) == 1:
+                results: List[Union[str, BaseException]] = [await self._run_single(prompts[0])]
+            else:
+                results = await self._run_combined(prompts)
+        except Exception as e:
+            results = [e] * len(batch)
+        
+        for (_, future), result in zip(batch, results):
+            self._resolve(future, result)
+    
+    async def _run_single(self, prompt: str) -> str:
+        """Run one prompt through the streamlined agent."""
+        result = await streamlined_agent.run(prompt, deps=self.deps)
+        return str(result.data)
+    
+    async def _run_combined(self, prompts: List[str]) -> List[Union[str, BaseException]]:
+        """Run several prompts as one request, re-sending them singly if the rows don't line up."""
+        rows = None
+        try:
+            response_text = await self._run_single(_build_batch_analysis_prompt(prompts))
+            rows = _parse_batch_analysis_rows(response_text, len(prompts))
+        except Exception as e:
+            logger.warning(f"Batched analysis of {len(prompts)} messages failed: {e}")
+        
+        if rows is not None:
+            logger.info(f"✅ Analyzed {len(prompts)} messages in one OpenAI request")
+            return [json.dumps(row) for row in rows]
+        
+        logger.warning(f"🔄 Batched analysis unusable, analyzing {len(prompts)} messages individually")
+        return await asyncio.gather(
+            *(self._run_single(prompt) for prompt in prompts), return_exceptions=True
+        )
+
+
+class MessageUpdateBatcher(RequestBatcher):
+    """
+    Coalesces concurrent message AI-data writes into one database request.
+    
+    Callers await update() exactly as they would a direct write and get back
+    whether their own message was updated. Writes queued within the batch
+    window are applied by the update_messages_ai_data database function in a
+    single RPC call; if that call fails, each message is written on its own.
+    """
+    
+    def __init__(
+        self,
+        database: DatabaseService,
+        max_batch_size: int = _MESSAGE_UPDATE_BATCH_SIZE,
+        max_wait_seconds: float = _MESSAGE_UPDATE_BATCH_WAIT_SECONDS
+    ):
+        """
+        Initialize the batcher.
+        
+        Args:
+            database: Database service used for the writes
+            max_batch_size: Maximum messages per request
+            max_wait_seconds: How long the first queued write waits for company
+        """
+        super().__init__(max_batch_size, max_wait_seconds)
+        self.database = database
+    
+    async def update(self, message_id: str, data: Dict[str, Any]) -> bool:
+        """
+        Queue a message's AI-data columns and wait for them to be written.
+        
+        Args:
+            message_id: Message to update
+            data: Columns to set on the message
+            
+        Returns:
+            bool: True if the message was updated
+        """
+        return await self._enqueue((message_id, data))
+    
+    async def _run_batch(self, batch: List[Tuple[Tuple[str, Dict[str, Any]], asyncio.Future]]) -> None:
+        """Write a batch and resolve each caller's future with its own outcome."""
+        # Later updates to the same message win, as they would have sequentially
+        merged: Dict[str, Dict[str, Any]] = {}
+        for (message_id, data), _ in batch:
+            merged.setdefault(message_id, {}).update(data)
+        
+        try:
+            updated = await update_messages_ai_data_batch(self.database, list(merged.items()))
+        except Exception as e:
+            logger.warning(f"🔄 Batched update of {len(merged)} messages failed, writing individually: {e}")
+            updated = await self._run_single(merged)
+        
+        for (message_id, _), future in batch:
+            self._resolve(future, message_id in updated)
+    
+    async def _run_single(self, merged: Dict[str, Dict[str, Any]]) -> Set[str]:
+        """Write each message with its own request, returning the IDs that were updated."""
+        async def _update(message_id: str, data: Dict[str, Any]) -> bool:
+            try:
+                result = await self.database.update_single(
+                    table='messages', data=data, filters={'id': message_id}, distributor_id=None
+                )
+                return result is not None
+            except Exception as e:
+                logger.error(f"Failed to update message AI data for {message_id}: {e}")
+                return False
+        
+        results = await asyncio.gather(*(_update(message_id, data) for message_id, data in merged.items()))
+        return {message_id for message_id, ok in zip(merged, results) if ok}
+
+
+async def _no_rows() -> List[Dict[str, Any]]:
+    """Stand-in for a context query that has nothing to look up."""
+    return []
+
 
 class StreamlinedOrderProcessor:
     """
@@ -136,6 +536,9 @@ class StreamlinedOrderProcessor:
     
     """
     
+    # (catalog_dicts, catalog_prompt) for the last loaded catalog
+    _catalog_prompt: Optional[tuple] = None
+    
     def __init__(self, database: DatabaseService, distributor_id: str):
         """Initialize the streamlined processor with intelligent product matching and continuation detection."""
         self.database = database
@@ -148,32 +551,53 @@ class StreamlinedOrderProcessor:
             product_matcher=self.product_matcher,
             continuation_detector=self.continuation_detector
         )
+        self._analysis_batcher = AnalysisBatcher(self.deps)
+        self._message_update_batcher = MessageUpdateBatcher(database)
+        # conversation_id -> (expires_at, context string)
+        self._context_cache: Dict[str, Tuple[float, str]] = {}
+        # prompt key -> (expires_at, analysis response), and the in-flight request per key
+        self._analysis_cache: Dict[str, Tuple[float, str]] = {}
+        self._analysis_inflight: Dict[str, asyncio.Future] = {}
         logger.info(f"Initialized StreamlinedOrderProcessor with intelligent product matching and continuation detection for distributor {distributor_id}")
     
-    async def process_message(self, message_data: Dict[str, Any]) -> Optional[MessageAnalysis]:
+    async def process_message(
+        self,
+        message_data: Dict[str, Any],
+        precomputed: Optional[FallbackContext] = None
+    ) -> Optional[MessageAnalysis]:
         """
         Process message through streamlined 6-step workflow.
         
         Args:
             message_data: Message from webhook with id, content, customer_id, etc.
+            precomputed: Work already done by the autonomous agent when falling back
             
         Returns:
             MessageAnalysis if successful, None if failed
         """
         start_time = time.time()
         message_id = message_data.get('id', '')
-        content = message_data.get('content', '').strip()
+        if precomputed and precomputed.message:
+            content = precomputed.message.raw
+        else:
+            content = message_data.get('content', '').strip()
         customer_id = message_data.get('customer_id', '')
         conversation_id = message_data.get('conversation_id', '')
         
         logger.info(f"🔄 Processing message {message_id}: '{content[:50]}...'")
         
         try:
-            # STEP 1: Get conversation context (simplified)
-            context = await self._get_simple_context(conversation_id, customer_id)
-            
-            # STEP 2: Analyze message with OpenAI (intent + products)
-            analysis_result = await self._analyze_with_openai(content, context, message_data)
+            # Reason: a confident "not an order" from the autonomous classifier means no
+            # products to extract, so the context fetch and OpenAI analysis are skipped
+            analysis_result = self._analysis_from_precomputed(precomputed)
+            if analysis_result is None:
+                analysis_result = self._analysis_from_trivial_message(MessageView.from_content(content))
+            if analysis_result is None:
+                # STEP 1: Get conversation context (simplified)
+                context = await self._get_simple_context(conversation_id, customer_id)
+                
+                # STEP 2: Analyze message with OpenAI (intent + products)
+                analysis_result = await self._analyze_with_openai(content, context, message_data)
             if not analysis_result:
                 logger.error(f"❌ Failed to analyze message {message_id}")
                 return None
@@ -200,6 +624,8 @@ class StreamlinedOrderProcessor:
                 analysis.suggested_question = validation_result.get('suggested_question')
             
             # STEP 5: Check for continuation and create/modify order if confident BUY intent
+            # A new order written together with the step 6 message update, if any
+            pending_order: Optional[OrderCreation] = None
             if intent.intent == "BUY":
                 # DISABLED: Automatic clarifying questions to customers
                 # if analysis.requires_clarification and analysis.suggested_question:
@@ -233,6 +659,12 @@ class StreamlinedOrderProcessor:
                             order_created = await self._create_simple_order(message_data, analysis)
                             if order_created:
                                 logger.info(f"✅ Created new order (continuation failed) from message {message_id}")
+                    elif settings.enable_batched_writes:
+                        # Create new order (normal flow) in the same request as the message update
+                        try:
+                            pending_order = self._build_order_creation(message_data, analysis)
+                        except Exception as e:
+                            logger.error(f"Failed to create order: {e}")
                     else:
                         # Create new order (normal flow)
                         order_created = await self._create_simple_order(message_data, analysis)
@@ -245,9 +677,14 @@ class StreamlinedOrderProcessor:
             # STEP 6: Update message with AI analysis
             analysis.processing_time_ms = int((time.time() - start_time) * 1000)
             
-            await update_message_ai_data(
-                self.database, message_id, analysis, self.distributor_id
-            )
+            if pending_order is not None:
+                await self._create_order_and_write_ai_data(message_id, pending_order, analysis)
+            elif settings.enable_batched_writes:
+                await self._write_ai_data_batched(message_id, analysis)
+            else:
+                await update_message_ai_data(
+                    self.database, message_id, analysis, self.distributor_id
+                )
             
             logger.info(
                 f"✅ Completed message {message_id} "
@@ -262,42 +699,201 @@ class StreamlinedOrderProcessor:
             logger.error(f"❌ Failed to process message {message_id}: {e}")
             return None
     
+    async def _write_ai_data_batched(self, message_id: str, analysis: MessageAnalysis) -> bool:
+        """
+        Record a message's AI analysis through the shared write batcher.
+        
+        Like update_message_ai_data, failures are logged rather than raised.
+        
+        Returns:
+            True if the message was updated
+        """
+        try:
+            update_data = await build_message_ai_update(self.database, message_id, analysis)
+        except Exception as e:
+            logger.error(f"Failed to update message AI data: {e}")
+            return False
+        
+        updated = await self._message_update_batcher.update(message_id, update_data)
+        if not updated:
+            logger.error(f"❌ Failed to update message {message_id} with AI analysis")
+        return updated
+    
+    async def _create_order_and_write_ai_data(
+        self, message_id: str, order_creation: OrderCreation, analysis: MessageAnalysis
+    ) -> Optional[str]:
+        """
+        Create a new order and record the message's AI analysis in one database request.
+        
+        Falls back to the separate order and message writes if the combined
+        request fails. Only a missing database function is known to have
+        written nothing; after any other error (such as a timeout once the
+        transaction committed) the message's existing order is looked up first
+        so it is not created twice.
+        
+        Returns:
+            Order ID if the order was created, None otherwise
+        """
+        try:
+            update_data = await build_message_ai_update(self.database, message_id, analysis)
+            order_id = await create_order_and_update_message(
+                self.database, order_creation, message_id, update_data
+            )
+        except Exception as e:
+            if is_missing_function_error(e):
+                logger.warning(f"Combined order and message write unavailable, writing separately: {e}")
+                order_id = None
+            else:
+                logger.warning(f"Combined order and message write failed, checking for a committed order: {e}")
+                try:
+                    order_id = await get_order_id_for_source_message(
+                        self.database, message_id, self.distributor_id
+                    )
+                except Exception as lookup_error:
+                    # Reason: without the lookup a retry could duplicate the order, so write nothing
+                    logger.error(f"❌ Could not check for an existing order from message {message_id}: {lookup_error}")
+                    return None
+                if order_id is not None:
+                    # Reason: the order and message update commit together, so both already landed
+                    logger.info(f"Order {order_id} for message {message_id} was already committed")
+                    self.invalidate_context(order_creation.conversation_id)
+                    return order_id
+        
+        if order_id is None:
+            order_id = await self._insert_order(order_creation)
+            await self._write_ai_data_batched(message_id, analysis)
+        else:
+            self.invalidate_context(order_creation.conversation_id)
+        
+        if order_id is not None:
+            logger.info(f"✅ Created new order from message {message_id}")
+        return order_id
+    
+    def _analysis_from_precomputed(
+        self, precomputed: Optional[FallbackContext]
+    ) -> Optional[tuple[MessageIntent, List[ExtractedProduct], Optional[str]]]:
+        """
+        Reuse the autonomous agent's intent classification when it settles the message.
+        
+        Args:
+            precomputed: Work already done by the autonomous agent, if any
+            
+        Returns:
+            Same shape as _analyze_with_openai, or None if OpenAI analysis is still needed
+        """
+        intent_result = precomputed.intent_result if precomputed else None
+        if (intent_result is None or intent_result.is_order_related
+                or not intent_result.is_high_confidence):
+            return None
+        
+        intent = MessageIntent(
+            intent="OTHER",
+            confidence=intent_result.confidence,
+            reasoning=f"Autonomous classifier: not order-related ({intent_result.reasoning})"
+        )
+        return intent, [], None
+    
+    def _analysis_from_trivial_message(
+        self, view: MessageView
+    ) -> Optional[tuple[MessageIntent, List[ExtractedProduct], Optional[str]]]:
+        """
+        Classify empty messages and short, unambiguous greetings or complaints locally.
+        
+        A message qualifies only if it has few words, no question mark, no digits
+        and keywords from exactly one of the greeting/complaint categories, so
+        anything that could carry an order or question still goes to OpenAI.
+        
+        Args:
+            view: Lowercased, tokenized message content
+            
+        Returns:
+            Same shape as _analyze_with_openai, or None if OpenAI analysis is still needed
+        """
+        if not view.words:
+            intent = MessageIntent(
+                intent="OTHER",
+                confidence=_TRIVIAL_MESSAGE_CONFIDENCE,
+                reasoning="Empty message [PREFILTER]"
+            )
+            return intent, [], None
+        
+        if (len(view.words) > _TRIVIAL_MESSAGE_MAX_WORDS or '?' in view.lower
+                or any(char.isdigit() for char in view.lower)
+                or _FALLBACK_PRODUCT_RE.search(view.lower)):
+            return None
+        
+        categories = {match.lastgroup for match in _FALLBACK_INTENT_RE.finditer(view.lower)}
+        if len(categories) != 1:
+            return None
+        category = categories.pop()
+        if category not in _TRIVIAL_INTENTS:
+            return None
+        
+        intent = MessageIntent(
+            intent=_TRIVIAL_INTENTS[category],
+            confidence=_TRIVIAL_MESSAGE_CONFIDENCE,
+            reasoning=f"Short {category} message classified without OpenAI [PREFILTER]"
+        )
+        return intent, [], None
+    
     async def _get_simple_context(
         self, conversation_id: str, customer_id: str
     ) -> str:
         """
         Get simple conversation context (last 10 messages + recent orders).
         
-        Much simpler than complex conversation memory system.
+        Much simpler than complex conversation memory system. Messages arriving
+        in a burst reuse the same context for a few seconds instead of re-querying.
         """
+        if conversation_id:
+            cached = self._context_cache.get(conversation_id)
+            if cached is not None and cached[0] > time.monotonic():
+                return cached[1]
+        
+        # Get recent messages (last 10) and recent orders (last 24 hours) concurrently
+        recent_messages, recent_orders = await asyncio.gather(
+            get_recent_messages_for_context(
+                self.database, conversation_id, self.distributor_id, limit=10
+            ) if conversation_id else _no_rows(),
+            get_recent_orders(
+                self.database, customer_id, self.distributor_id, hours=24
+            ) if customer_id else _no_rows(),
+            return_exceptions=True
+        )
+        
         context_parts = []
+        complete = True
         
-        try:
-            # Get recent messages (last 10)
-            if conversation_id:
-                recent_messages = await get_recent_messages_for_context(
-                    self.database, conversation_id, self.distributor_id, limit=10
-                )
-                if recent_messages:
-                    context_parts.append("Recent messages:")
-                    for msg in recent_messages[-5:]:  # Last 5 messages
-                        content = msg.get('content', '')[:100]  # First 100 chars
-                        context_parts.append(f"- {content}")
-            
-            # Get recent orders (last 24 hours)
-            if customer_id:
-                recent_orders = await get_recent_orders(
-                    self.database, customer_id, self.distributor_id, hours=24
-                )
-                if recent_orders:
-                    context_parts.append("Recent orders:")
-                    for order in recent_orders[:3]:  # Last 3 orders
-                        context_parts.append(f"- Order {order.get('order_number', 'N/A')}")
+        if isinstance(recent_messages, Exception):
+            logger.warning(f"Failed to get recent messages for context: {recent_messages}")
+            complete = False
+        elif recent_messages:
+            context_parts.append("Recent messages:")
+            for msg in recent_messages[-5:]:  # Last 5 messages
+                content = msg.get('content', '')[:100]  # First 100 chars
+                context_parts.append(f"- {content}")
         
-        except Exception as e:
-            logger.warning(f"Failed to get context: {e}")
+        if isinstance(recent_orders, Exception):
+            logger.warning(f"Failed to get recent orders for context: {recent_orders}")
+            complete = False
+        elif recent_orders:
+            context_parts.append("Recent orders:")
+            for order in recent_orders[:3]:  # Last 3 orders
+                context_parts.append(f"- Order {order.get('order_number', 'N/A')}")
         
-        return "\n".join(context_parts) if context_parts else "No previous context"
+        context = "\n".join(context_parts) if context_parts else "No previous context"
+        # Reason: Don't cache a partial context from a failed read
+        if conversation_id and complete:
+            self._context_cache.pop(conversation_id, None)
+            if len(self._context_cache) >= _CONTEXT_CACHE_MAX_ENTRIES:
+                self._context_cache.pop(next(iter(self._context_cache)))
+            self._context_cache[conversation_id] = (time.monotonic() + _CONTEXT_TTL_SECONDS, context)
+        return context
+    
+    def invalidate_context(self, conversation_id: Optional[str]) -> None:
+        """Drop a conversation's cached context so the next message re-reads it."""
+        if conversation_id:
+            self._context_cache.pop(conversation_id, None)
     
     async def _analyze_with_openai(
         self, content: str, context: str, message_data: Dict[str, Any]
@@ -311,12 +907,9 @@ class StreamlinedOrderProcessor:
             # Give product catalog context if available
             catalog_context = ""
             try:
-                catalog = await fetch_product_catalog(self.database, self.distributor_id)
-                if catalog:
-                    product_names = [p.product_name for p in catalog[:10]]  # Top 10 products
-                    catalog_context = f"\n\nAVAILABLE PRODUCTS (sample): {', '.join(product_names)}"
-            except:
-                pass
+                _, catalog_context = await self._get_catalog()
+            except Exception as e:
+                logger.warning(f"Catalog context unavailable: {e}")
             
             # Get today's date for temporal context
             from datetime import datetime, timedelta
@@ -346,12 +939,11 @@ class StreamlinedOrderProcessor:
             except:
                 pass
             
+            # Reason: the instructions (which only change daily) come first, then the
+            # catalog sample, and the per-message parts last, so consecutive requests
+            # share a long common prefix that OpenAI's prompt caching can reuse
             prompt = f"""
-            Analyze this customer message and return a JSON response:
-            
-            MESSAGE: "{content}"
-            
-            CONTEXT: {context}{catalog_context}{continuation_context}
+            Analyze the customer MESSAGE at the end and return a JSON response.
             
             TODAY'S DATE: {today_str} ({today_weekday})
             
@@ -386,59 +978,62 @@ class StreamlinedOrderProcessor:
             - If no products for BUY intent, use empty products array
             - Set is_continuation to true if this should be added to a recent PENDING order
             - Use continuation_confidence (0.0-1.0) to indicate certainty about continuation
-            - Remember: "mañana" means {tomorrow_str}, NOT {today_str}!
+            - Remember: "mañana" means {tomorrow_str}, NOT {today_str}!{catalog_context}
+            
+            CONTEXT: {context}{continuation_context}
+            
+            MESSAGE: "{content}"
             """
             
-            result = await streamlined_agent.run(prompt, deps=self.deps)
-            response_text = str(result.data)
+            response_text = await self._analyze_prompt(prompt)
             
             # Try to parse as JSON first (OpenAI should return valid JSON)
+            intent: Optional[MessageIntent] = None
             try:
-                import json
-                # Find JSON in response (handle cases where there's extra text)
-                json_start = response_text.find('{')
-                json_end = response_text.rfind('}') + 1
-                if json_start >= 0 and json_end > json_start:
-                    json_str = response_text[json_start:json_end]
-                    data = json.loads(json_str)
-                    
-                    # Create intent from JSON
-                    intent = MessageIntent(
-                        intent=data.get('intent', 'OTHER'),
-                        confidence=float(data.get('confidence', 0.5)),
-                        reasoning=data.get('reasoning', 'AI analysis')
-                    )
-                    
-                    # Extract delivery date from JSON
-                    delivery_date = data.get('delivery_date')  # Will be None if not present or null
-                    
-                    # Create products from JSON
-                    products = []
-                    if data.get('products'):
-                        for p in data['products']:
-                            products.append(ExtractedProduct(
-                                product_name=p.get('name', ''),
-                                quantity=int(p.get('quantity', 1)),
-                                unit=p.get('unit'),
-                                original_text=p.get('original_text', content),
-                                confidence=float(p.get('confidence', intent.confidence))
-                            ))
-                    
-                    logger.info(f"✅ OpenAI JSON parsing successful - extracted {len(products)} products, delivery_date: {delivery_date}")
-                    
-                    # Additional debug for date issues
-                    if delivery_date:
-                        logger.info(f"🗓️ Delivery date extracted: {delivery_date} (from message: '{content}')")
-                    
-                    return intent, products, delivery_date
-                    
-            except (json.JSONDecodeError, ValueError) as e:
+                data = _load_json_object(response_text)
+                
+                # Create intent from JSON
+                intent = MessageIntent(
+                    intent=data.get('intent', 'OTHER'),
+                    confidence=float(data.get('confidence', 0.5)),
+                    reasoning=data.get('reasoning', 'AI analysis')
+                )
+                
+                # Extract delivery date from JSON
+                delivery_date = data.get('delivery_date')  # Will be None if not present or null
+                
+                # Create products from JSON
+                products = []
+                if data.get('products'):
+                    for p in data['products']:
+                        products.append(ExtractedProduct(
+                            product_name=p.get('name', ''),
+                            quantity=int(p.get('quantity', 1)),
+                            unit=p.get('unit'),
+                            original_text=p.get('original_text', content),
+                            confidence=float(p.get('confidence', intent.confidence))
+                        ))
+                
+                logger.info(f"✅ OpenAI JSON parsing successful - extracted {len(products)} products, delivery_date: {delivery_date}")
+                
+                # Additional debug for date issues
+                if delivery_date:
+                    logger.info(f"🗓️ Delivery date extracted: {delivery_date} (from message: '{content}')")
+                
+                return intent, products, delivery_date
+                
+            except ValueError as e:
                 logger.warning(f"🔄 JSON parsing failed, falling back to simple parsing: {e}")
             
-            # Fallback to simple parsing if JSON fails
+            # Fallback to simple parsing if JSON fails; keep the model's intent when only
+            # its products were malformed, so the keyword intent scan is skipped
             logger.info("🛠️ Using fallback parsing methods (OpenAI JSON failed)")
-            intent = self._parse_intent(response_text, content)
-            products = self._parse_products_simple(content) if intent.intent == "BUY" else []
+            view = None
+            if intent is None:
+                # Lowercase and tokenize once for both keyword scans
+                view = MessageView.from_content(content)
+                intent = self._parse_intent(response_text, content, view)
+            products = self._parse_products_simple(content, view) if intent.intent == "BUY" else []
             delivery_date = None  # Fallback doesn't extract delivery dates
             logger.info(f"🛠️ Fallback parsing extracted {len(products)} products, delivery_date: {delivery_date}")
             
@@ -448,93 +1043,116 @@ class StreamlinedOrderProcessor:
             logger.error(f"OpenAI analysis failed: {e}")
             return None
     
-    def _parse_products_simple(self, content: str) -> List[ExtractedProduct]:
+    async def _analyze_prompt(self, prompt: str) -> str:
+        """
+        Get the OpenAI analysis response for a prompt, reusing identical recent ones.
+        
+        The prompt holds the message together with its context, so only a repeat
+        of the same message in the same situation is served from the cache.
+        Concurrent identical prompts share one in-flight request.
+        
+        Args:
+            prompt: Complete analysis prompt
+            
+        Returns:
+            str: Raw analysis response text
+        """
+        key = hashlib.blake2b(
+            f"{self.distributor_id}\0{prompt}".encode(), digest_size=16
+        ).hexdigest()
+        cached = self._analysis_cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            logger.info("♻️ Reusing analysis for identical message")
+            return cached[1]
+        
+        inflight = self._analysis_inflight.get(key)
+        if inflight is None:
+            # Reason: concurrent messages share one OpenAI request; each caller still
+            # gets back the JSON analysis for its own message
+            inflight = asyncio.ensure_future(self._analysis_batcher.analyze(prompt))
+            self._analysis_inflight[key] = inflight
+            inflight.add_done_callback(lambda done: self._finish_analysis(key, done))
+        return await asyncio.shield(inflight)
+    
+    def _finish_analysis(self, key: str, done: asyncio.Future) -> None:
+        """Cache a finished analysis response and clear its in-flight slot."""
+        self._analysis_inflight.pop(key, None)
+        if done.cancelled() or done.exception() is not None:
+            return
+        self._analysis_cache.pop(key, None)
+        if len(self._analysis_cache) >= _ANALYSIS_CACHE_MAX_ENTRIES:
+            self._analysis_cache.pop(next(iter(self._analysis_cache)))
+        self._analysis_cache[key] = (time.monotonic() + _ANALYSIS_CACHE_TTL_SECONDS, done.result())
+    
+    def _parse_products_simple(
+        self, content: str, view: Optional[MessageView] = None
+    ) -> List[ExtractedProduct]:
         """
         Simple fallback product extraction - minimal, reliable parsing.
         Let OpenAI do the heavy lifting, this is just a safety net.
+        
+        Args:
+            content: Raw message content
+            view: Lowercased and tokenized content, built here if not given
         """
+        view = view or MessageView.from_content(content)
+        
+        # First position of each product keyword in the message, from a single scan
+        hits: Dict[str, int] = {}
+        for match in _FALLBACK_PRODUCT_RE.finditer(view.lower):
+            hits.setdefault(match.group(1), match.start())
+        if not hits:
+            return []
+        
+        # word_starts maps a hit position back to its word index
+        words, word_starts = view.words, view.word_starts
+        
         products = []
-        content_lower = content.lower()
-        
-        # Basic product keywords (just essentials)
-        basic_products = {
-            'aceite': 'aceite',
-            'agua': 'agua embotellada',
-            'leche': 'leche',
-            'cerveza': 'cerveza',
-            'coca cola': 'coca cola',
-            'queso': 'queso',
-            'pan': 'pan',
-            'arroz': 'arroz',
-            'frijoles': 'frijoles',
-            'huevos': 'huevos'
-        }
-        
-        # Simple Spanish numbers
-        spanish_numbers = {
-            'un': 1, 'una': 1, 'uno': 1,
-            'dos': 2, 'tres': 3, 'cuatro': 4, 'cinco': 5,
-            'seis': 6, 'siete': 7, 'ocho': 8, 'nueve': 9, 'diez': 10,
-            'media docena': 6, 'docena': 12
-        }
-        
-        # Simple units
-        units = ['litro', 'litros', 'botella', 'botellas', 'kilo', 'kilos', 'paquete', 'paquetes']
-        
-        # Try to find basic products
-        for keyword, product_name in basic_products.items():
-            if keyword in content_lower:
-                quantity = 1
-                unit = None
-                
-                # Look for quantity before the product
-                words = content_lower.split()
-                for i, word in enumerate(words):
-                    if keyword in word:
-                        # Check 3 words before for quantity
-                        for j in range(max(0, i-3), i):
-                            # Check for Spanish numbers
-                            if words[j] in spanish_numbers:
-                                quantity = spanish_numbers[words[j]]
-                                break
-                            # Check for numeric
-                            try:
-                                quantity = int(words[j])
-                                break
-                            except ValueError:
-                                continue
-                        
-                        # Check for unit after product
-                        for j in range(i+1, min(i+3, len(words))):
-                            if words[j] in units:
-                                unit = words[j].rstrip('s')  # Remove plural
-                                break
-                        break
-                
-                products.append(ExtractedProduct(
-                    product_name=product_name,
-                    quantity=quantity,
-                    unit=unit,
-                    original_text=content,
-                    confidence=0.33  # FALLBACK FINGERPRINT - Lower confidence for simple parsing
-                ))
+        for keyword, product_name in _FALLBACK_PRODUCTS.items():
+            if keyword not in hits:
+                continue
+            
+            quantity = 1
+            unit = None
+            i = bisect_right(word_starts, hits[keyword]) - 1
+            
+            # Check 3 words before for quantity (Spanish or numeric)
+            for j in range(max(0, i-3), i):
+                word_quantity = _word_quantity(words[j])
+                if word_quantity is not None:
+                    quantity = word_quantity
+                    break
+            
+            # Check for unit after product
+            for j in range(i+1, min(i+3, len(words))):
+                unit = _FALLBACK_UNITS.get(words[j])
+                if unit is not None:
+                    break
+            
+            products.append(ExtractedProduct(
+                product_name=product_name,
+                quantity=quantity,
+                unit=unit,
+                original_text=content,
+                confidence=0.33  # FALLBACK FINGERPRINT - Lower confidence for simple parsing
+            ))
         
         return products
     
-    def _parse_intent(self, response: str, content: str) -> MessageIntent:
+    def _parse_intent(
+        self, response: str, content: str, view: Optional[MessageView] = None
+    ) -> MessageIntent:
         """Parse intent from OpenAI response with improved Spanish greeting detection."""
         
-        content_lower = content.lower().strip()
+        matched = set()
+        for match in _FALLBACK_INTENT_RE.finditer(view.lower if view else content):
+            matched.add(match.lastgroup)
+            # Greetings win over every other category, so the scan can stop here
+            if match.lastgroup == 'greeting':
+                break
         
         # FIRST: Check for greetings (most common case)
-        greeting_words = [
-            "hola", "buenos días", "buenas tardes", "buenas noches", 
-            "buen día", "hi", "hello", "hey", "saludos", "que tal",
-            "como estas", "como está", "good morning", "good afternoon",
-            "buendia", "buenosdias"
-        ]
-        
-        if any(greeting in content_lower for greeting in greeting_words):
+        if 'greeting' in matched:
             return MessageIntent(
                 intent="OTHER",
                 confidence=0.33,  # FALLBACK FINGERPRINT
@@ -542,8 +1160,7 @@ class StreamlinedOrderProcessor:
             )
         
         # SECOND: Check for clear purchase intent  
-        buy_words = ["quiero", "necesito", "pedido", "order", "comprar", "me das", "vendeme"]
-        if any(word in content_lower for word in buy_words):
+        if 'buy' in matched:
             return MessageIntent(
                 intent="BUY",
                 confidence=0.33,  # FALLBACK FINGERPRINT
@@ -551,8 +1168,7 @@ class StreamlinedOrderProcessor:
             )
         
         # THIRD: Check for questions about products/prices
-        question_words = ["precio", "catalogo", "cuanto", "cuesta", "tienes", "hay", "menu", "lista"]
-        if any(word in content_lower for word in question_words) or content.endswith('?'):
+        if 'question' in matched or content.endswith('?'):
             return MessageIntent(
                 intent="QUESTION", 
                 confidence=0.33,  # FALLBACK FINGERPRINT
@@ -560,8 +1176,7 @@ class StreamlinedOrderProcessor:
             )
         
         # FOURTH: Check for complaints
-        complaint_words = ["problema", "queja", "mal", "error", "equivocado", "reclamo"]
-        if any(word in content_lower for word in complaint_words):
+        if 'complaint' in matched:
             return MessageIntent(
                 intent="COMPLAINT",
                 confidence=0.33,  # FALLBACK FINGERPRINT
@@ -575,6 +1190,27 @@ class StreamlinedOrderProcessor:
             reasoning="General conversation or unclear intent [FALLBACK]"
         )
     
+    async def _get_catalog(self) -> Tuple[Tuple[Dict[str, Any], ...], str]:
+        """
+        Get the distributor catalog from the shared cache with its prompt sample.
+        
+        The prompt sample is rebuilt only when a new catalog is loaded.
+        
+        Returns:
+            Tuple of (catalog product dictionaries, product sample for the analysis prompt)
+        """
+        catalog_dicts = await catalog_cache.get(self.database, self.distributor_id)
+        if self._catalog_prompt is not None and self._catalog_prompt[0] is catalog_dicts:
+            return self._catalog_prompt
+        
+        catalog_prompt = ""
+        if catalog_dicts:
+            product_names = [p['name'] for p in catalog_dicts[:_CATALOG_PROMPT_SAMPLE_SIZE]]
+            catalog_prompt = f"\n\nAVAILABLE PRODUCTS (sample): {', '.join(product_names)}"
+        
+        self._catalog_prompt = (catalog_dicts, catalog_prompt)
+        return self._catalog_prompt
+    
     async def _intelligent_product_validation(
         self, products: List[ExtractedProduct], original_message: str, conversation_id: str
     ) -> Dict[str, Any]:
@@ -593,12 +1229,10 @@ class StreamlinedOrderProcessor:
             Dict with validated_products, requires_clarification, suggested_question
         """
         try:
-            # Get product catalog from database
-            catalog_models = await fetch_product_catalog(
-                self.database, self.distributor_id, active_only=True
-            )
+            # Get product catalog (cached per processor)
+            catalog_dicts, _ = await self._get_catalog()
             
-            if not catalog_models:
+            if not catalog_dicts:
                 logger.warning("No catalog available for validation")
                 # Keep products as draft without catalog
                 return {
@@ -607,86 +1241,15 @@ class StreamlinedOrderProcessor:
                     'suggested_question': None
                 }
             
-            # Convert catalog models to dictionaries for the matcher
-            catalog_dicts = []
-            for product in catalog_models:
-                catalog_dicts.append({
-                    'id': product.id,
-                    'name': product.name,
-                    'sku': product.sku,
-                    'unit': product.unit,
-                    'unit_price': float(product.unit_price),
-                    'stock_quantity': product.stock_quantity,
-                    'in_stock': product.in_stock,
-                    'minimum_order_quantity': product.minimum_order_quantity,
-                    'active': product.active,
-                    'brand': product.brand,
-                    'category': product.category,
-                    'size_variants': product.size_variants,
-                    'aliases': product.aliases,
-                    'keywords': product.keywords,
-                    'ai_training_examples': product.ai_training_examples,
-                    'common_misspellings': product.common_misspellings,
-                    'seasonal_patterns': product.seasonal_patterns
-                })
-            
-            validated_products = []
-            overall_requires_clarification = False
-            suggested_questions = []
-            
-            # Process each extracted product with status-based workflow
-            for extracted_product in products:
-                # Use our intelligent matcher to find matches
-                match_result = await self.product_matcher.match_products(
-                    extracted_product.product_name, 
-                    catalog_dicts
-                )
-                
-                logger.info(
-                    f"Product matching result for '{extracted_product.product_name}': "
-                    f"confidence_level={match_result.confidence_level}, "
-                    f"matches={len(match_result.matches)}"
-                )
-                
-                if match_result.confidence_level == "HIGH":
-                    # High confidence - mark as confirmed
-                    best_match = match_result.best_match
-                    extracted_product.status = "confirmed"
-                    extracted_product.matched_product_id = best_match.product_id
-                    extracted_product.matched_product_name = best_match.product_name
-                    extracted_product.validation_notes = f"Matched with {best_match.confidence:.0%} confidence"
-                    # Update unit if catalog has better info
-                    if best_match.unit and not extracted_product.unit:
-                        extracted_product.unit = best_match.unit
-                    validated_products.append(extracted_product)
-                    
-                elif match_result.confidence_level in ["MEDIUM", "LOW"]:
-                    # Medium/Low confidence - mark as pending and ask for clarification
-                    extracted_product.status = "pending"
-                    overall_requires_clarification = True
-                    
-                    if match_result.best_match:
-                        extracted_product.matched_product_id = match_result.best_match.product_id
-                        extracted_product.matched_product_name = match_result.best_match.product_name
-                        extracted_product.validation_notes = f"Uncertain match ({match_result.best_match.confidence:.0%})"
-                    
-                    if match_result.suggested_question:
-                        extracted_product.clarification_asked = match_result.suggested_question
-                        suggested_questions.append(match_result.suggested_question)
-                    
-                    validated_products.append(extracted_product)
-                
-                else:  # NONE
-                    # No matches found - mark as pending and need clarification
-                    extracted_product.status = "pending"
-                    extracted_product.validation_notes = "No catalog match found"
-                    overall_requires_clarification = True
-                    
-                    if match_result.suggested_question:
-                        extracted_product.clarification_asked = match_result.suggested_question
-                        suggested_questions.append(match_result.suggested_question)
-                    
-                    validated_products.append(extracted_product)
+            # Match all products concurrently; gather keeps results in message order
+            results = await asyncio.gather(*(
+                self._validate_one(extracted_product, catalog_dicts)
+                for extracted_product in products
+            ))
+            
+            validated_products = [product for product, _, _ in results]
+            overall_requires_clarification = any(pending for _, pending, _ in results)
+            suggested_questions = [question for _, _, question in results if question]
             
             # Combine multiple questions into one coherent message
             combined_question = None
@@ -713,6 +1276,59 @@ class StreamlinedOrderProcessor:
                 'suggested_question': None
             }
     
+    async def _validate_one(
+        self, extracted_product: ExtractedProduct, catalog_dicts: Sequence[Dict[str, Any]]
+    ) -> Tuple[ExtractedProduct, bool, Optional[str]]:
+        """
+        Match one extracted product against the catalog and set its status.
+        
+        Args:
+            extracted_product: Product to validate (updated in place)
+            catalog_dicts: Catalog product dictionaries for the matcher
+            
+        Returns:
+            Tuple of (product, requires clarification, suggested question)
+        """
+        # Use our intelligent matcher to find matches
+        match_result = await self.product_matcher.match_products(
+            extracted_product.product_name, 
+            catalog_dicts
+        )
+        
+        logger.info(
+            f"Product matching result for '{extracted_product.product_name}': "
+            f"confidence_level={match_result.confidence_level}, "
+            f"matches={len(match_result.matches)}"
+        )
+        
+        if match_result.confidence_level == "HIGH":
+            # High confidence - mark as confirmed
+            best_match = match_result.best_match
+            extracted_product.status = "confirmed"
+            extracted_product.matched_product_id = best_match.product_id
+            extracted_product.matched_product_name = best_match.product_name
+            extracted_product.validation_notes = f"Matched with {best_match.confidence:.0%} confidence"
+            # Update unit if catalog has better info
+            if best_match.unit and not extracted_product.unit:
+                extracted_product.unit = best_match.unit
+            return extracted_product, False, None
+        
+        # Medium/Low/None confidence - mark as pending and ask for clarification
+        extracted_product.status = "pending"
+        
+        if match_result.confidence_level in ["MEDIUM", "LOW"]:
+            if match_result.best_match:
+                extracted_product.matched_product_id = match_result.best_match.product_id
+                extracted_product.matched_product_name = match_result.best_match.product_name
+                extracted_product.validation_notes = f"Uncertain match ({match_result.best_match.confidence:.0%})"
+        else:  # NONE
+            extracted_product.validation_notes = "No catalog match found"
+        
+        if match_result.suggested_question:
+            extracted_product.clarification_asked = match_result.suggested_question
+        
+        return extracted_product, True, match_result.suggested_question
+    
     async def _send_clarifying_question(
         self, message_data: Dict[str, Any], question: str
     ) -> bool:
@@ -762,53 +1378,77 @@ class StreamlinedOrderProcessor:
         Only products with status="confirmed" will be included in the order.
         """
         try:
-            customer_id = message_data.get('customer_id')
-            if not customer_id or not analysis.extracted_products:
-                return False
-            
-            # Filter for confirmed products only
-            confirmed_products = [p for p in analysis.extracted_products if p.status == "confirmed"]
-            
-            if not confirmed_products:
-                logger.info("No confirmed products to create order")
+            order_creation = self._build_order_creation(message_data, analysis)
+            if order_creation is None:
                 return False
-            
-            # Convert ExtractedProduct to OrderProduct
-            order_products = []
-            for extracted in confirmed_products:
-                order_product = OrderProduct(
-                    product_name=extracted.matched_product_name or extracted.product_name,
-                    quantity=extracted.quantity,
-                    unit=extracted.unit,
-                    unit_price=None,  # Pricing handled elsewhere
-                    line_price=None,
-                    ai_confidence=extracted.confidence,
-                    original_text=extracted.original_text,
-                    matched_product_id=extracted.matched_product_id,
-                    matching_confidence=extracted.confidence
-                )
-                order_products.append(order_product)
-            
-            # Create order
-            order_creation = OrderCreation(
-                customer_id=customer_id,
-                distributor_id=self.distributor_id,
-                conversation_id=message_data.get('conversation_id'),
-                channel=message_data.get('channel', 'WHATSAPP'),
-                products=order_products,
-                delivery_date=analysis.delivery_date,  # Use extracted delivery date from analysis
-                additional_comment=None,
-                ai_confidence=analysis.intent.confidence,
-                source_message_ids=[message_data.get('id', '')]
-            )
-            
-            order_id = await create_order(self.database, order_creation)
-            return order_id is not None
+            return await self._insert_order(order_creation) is not None
             
         except Exception as e:
             logger.error(f"Failed to create order: {e}")
             return False
     
+    async def _insert_order(self, order_creation: OrderCreation) -> Optional[str]:
+        """
+        Insert a built order and drop its conversation's cached context.
+        
+        Returns:
+            Order ID if successful, None otherwise
+        """
+        order_id = await create_order(self.database, order_creation)
+        if order_id is not None:
+            # The new order must show up in this conversation's next context read
+            self.invalidate_context(order_creation.conversation_id)
+        return order_id
+    
+    def _build_order_creation(
+        self, message_data: Dict[str, Any], analysis: MessageAnalysis
+    ) -> Optional[OrderCreation]:
+        """
+        Build the order for a message's confirmed products.
+        
+        Returns:
+            OrderCreation, or None if there is no customer or no confirmed product
+        """
+        customer_id = message_data.get('customer_id')
+        if not customer_id or not analysis.extracted_products:
+            return None
+        
+        # Filter for confirmed products only
+        confirmed_products = [p for p in analysis.extracted_products if p.status == "confirmed"]
+        
+        if not confirmed_products:
+            logger.info("No confirmed products to create order")
+            return None
+        
+        # Convert ExtractedProduct to OrderProduct
+        order_products = []
+        for extracted in confirmed_products:
+            order_product = OrderProduct(
+                product_name=extracted.matched_product_name or extracted.product_name,
+                quantity=extracted.quantity,
+                unit=extracted.unit,
+                unit_price=None,  # Pricing handled elsewhere
+                line_price=None,
+                ai_confidence=extracted.confidence,
+                original_text=extracted.original_text,
+                matched_product_id=extracted.matched_product_id,
+                matching_confidence=extracted.confidence
+            )
+            order_products.append(order_product)
+        
+        # Create order
+        return OrderCreation(
+            customer_id=customer_id,
+            distributor_id=self.distributor_id,
+            conversation_id=message_data.get('conversation_id'),
+            channel=message_data.get('channel', 'WHATSAPP'),
+            products=order_products,
+            delivery_date=analysis.delivery_date,  # Use extracted delivery date from analysis
+            additional_comment=None,
+            ai_confidence=analysis.intent.confidence,
+            source_message_ids=[message_data.get('id', '')]
+        )
+    
     async def _add_to_existing_order(
         self, target_order_id: str, products: List[ExtractedProduct], message_data: Dict[str, Any]
     ) -> bool:
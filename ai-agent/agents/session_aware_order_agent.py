@@ -21,6 +21,7 @@ from pydantic_ai.models.openai import OpenAIModel
 
 from config.settings import settings
 from services.database import DatabaseService
+from services.openai_client import get_openai_client
 from services.order_session_manager import OrderSessionManager, SessionStatus
 from services.pattern_detector import PatternDetector
 from services.product_matcher import ProductMatcher
@@ -98,7 +99,7 @@ IMPORTANT: Always extract the exact product name as mentioned by the customer.
 
 # Initialize session-aware agent
 session_aware_agent = Agent(
-    model=OpenAIModel(settings.openai_model),
+    model=OpenAIModel(settings.openai_model, openai_client=get_openai_client()),
     system_prompt=SESSION_AWARE_SYSTEM_PROMPT,
     deps_type=SessionAwareDeps,
     retries=2
@@ -23,7 +23,7 @@ import os
 import openai
 from config.settings import settings
 from services.database import DatabaseService
-from services.intent_classifier import intent_classifier, MessageIntent
+from services.intent_classifier import intent_batch_scheduler, intent_classifier, MessageIntent
 from schemas.message import MessageAnalysis, ExtractedProduct
 from tools.supabase_tools import update_message_ai_data
 from dotenv import load_dotenv
@@ -76,7 +76,8 @@ class SimplifiedAutonomousAgent:
         
         try:
             # STEP 1: Intent Classification - Is this ORDER_RELATED?
-            intent_result = await self.intent_classifier.classify_message_intent(content)
+            # Batched, cached and answered locally when the message is obvious
+            intent_result = await intent_batch_scheduler.classify(content)
             logger.info(f"🧠 Intent: {intent_result.intent} (confidence: {intent_result.confidence:.2f})")
             
             if not intent_result.is_order_related:
@@ -18,6 +18,7 @@ from pydantic import BaseModel, Field
 
 from config.settings import settings
 from services.database import DatabaseService, get_current_distributor_id
+from services.openai_client import close_openai_client, warm_openai_client
 from agents.agent_factory import create_agent_factory, AgentFactory
 
 logger = logging.getLogger(__name__)
@@ -84,10 +85,15 @@ async def lifespan(app: FastAPI):
             distributor_id
         )
         
+        # Build agents and open the OpenAI connection now so the first message
+        # doesn't pay their startup cost
+        agent_factory.warmup()
+        await warm_openai_client()
+        
         logger.info("🤖 Agent Factory initialized - will select best agent per request")
         
         # Log agent factory health status
-        health_status = await agent_factory.get_agent_health_status()
+        health_status = agent_factory.get_agent_health_status()
         logger.info(f"🔍 Agent Factory Status: {health_status['factory_status']}")
         
         # Handle both old and new configuration structures
@@ -104,6 +110,15 @@ async def lifespan(app: FastAPI):
     
     # Cleanup
     logger.info("🔄 Shutting down Order Agent API...")
+    try:
+        # Reason: agents drain queued message updates and learning events through the
+        # database, so they must finish before its client is closed
+        if agent_factory is not None:
+            await agent_factory.close()
+    finally:
+        if database_service is not None:
+            await database_service.close()
+        await close_openai_client()
 
 
 # Create FastAPI app with lifespan
@@ -137,7 +152,7 @@ async def health_check():
     # Add agent factory health details if available
     if agent_factory:
         try:
-            factory_health = await agent_factory.get_agent_health_status()
+            factory_health = agent_factory.get_agent_health_status()
             components["autonomous_agent"] = "enabled" if factory_health['feature_flags']['autonomous_enabled'] else "disabled"
         except:
             components["autonomous_agent"] = "error"
@@ -10,6 +10,7 @@ from __future__ import annotations as _annotations
 import os
 import logging
 import hashlib
+from functools import lru_cache
 from typing import Dict, Any, Optional, List
 from enum import Enum
 from pydantic import BaseModel, Field, field_validator
@@ -17,6 +18,18 @@ from pydantic import BaseModel, Field, field_validator
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=10_000)
+def _rollout_bucket(hash_input: str) -> float:
+    """
+    Get the deterministic rollout position (0-100) for a rollout hash input.
+    
+    Pure function of its argument, so it is safe to cache across flag changes;
+    the rollout percentage it is compared against is read fresh on every check.
+    """
+    hash_value = int(hashlib.md5(hash_input.encode()).hexdigest()[:8], 16)
+    return (hash_value % 10000) / 100.0  # Convert to 0-100 range
+
+
 class FeatureFlagStatus(str, Enum):
     """Status options for feature flags."""
     DISABLED = "disabled"
@@ -187,6 +200,39 @@ class FeatureFlagConfiguration(BaseModel):
         
         return False
     
+    def varies_by_customer(self, feature_name: str, distributor_id: str) -> bool:
+        """
+        Check if a feature's state for a distributor depends on the customer.
+        
+        Only percentage rollouts do; every other path in is_feature_enabled
+        ignores customer_id.
+        
+        Args:
+            feature_name: Name of the feature to check
+            distributor_id: Distributor ID
+            
+        Returns:
+            bool: True if is_feature_enabled must be called per customer
+        """
+        if not self.global_autonomous_enabled and feature_name != AutonomousAgentFeature.FALLBACK_TO_EXISTING:
+            return False
+        
+        flag = self.flags.get(feature_name)
+        if flag is None:
+            return False
+        
+        override = self.distributor_overrides.get(distributor_id, {}).get(feature_name)
+        if override is not None:
+            return False
+        
+        if distributor_id in flag.disabled_for_distributors or distributor_id in flag.enabled_for_distributors:
+            return False
+        
+        return (
+            flag.status in [FeatureFlagStatus.TESTING, FeatureFlagStatus.GRADUAL_ROLLOUT]
+            and 0 < flag.rollout_percentage < 100
+        )
+    
     def check_dependencies(
         self,
         feature_name: str,
@@ -247,8 +293,7 @@ class FeatureFlagConfiguration(BaseModel):
             hash_input += f":{customer_id}"
         
         # Use hash to determine eligibility (ensures consistency)
-        hash_value = int(hashlib.md5(hash_input.encode()).hexdigest()[:8], 16)
-        user_percentage = (hash_value % 10000) / 100.0  # Convert to 0-100 range
+        user_percentage = _rollout_bucket(hash_input)
         
         eligible = user_percentage < rollout_percentage
         logger.debug(f"Rollout calculation for {feature_name}: {user_percentage:.2f}% < {rollout_percentage}% = {eligible}")
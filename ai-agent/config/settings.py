@@ -30,6 +30,7 @@ class Settings(BaseModel):
     ai_confidence_threshold: float = Field(default=0.8, ge=0.0, le=1.0, description="Minimum confidence threshold for auto-processing orders")
     max_processing_time_seconds: int = Field(default=30, ge=1, le=300, description="Maximum time to process a single message")
     batch_size: int = Field(default=10, ge=1, le=100, description="Number of messages to process in one batch")
+    enable_fastpath_intent: bool = Field(default=False, description="Skip OpenAI analysis for messages the keyword rules confidently classify as non-orders")
     
     # AI Enhancement Configuration
     ai_enhancement_enabled: bool = Field(default=True, description="Enable AI enhancement for uncertain product matches")
@@ -41,7 +42,8 @@ class Settings(BaseModel):
     retry_delay_seconds: float = Field(default=1.0, ge=0.1, le=60.0, description="Base delay between retries")
     
     # Database Configuration
-    connection_pool_size: int = Field(default=5, ge=1, le=50, description="Database connection pool size")
+    connection_pool_size: int = Field(default=25, ge=1, le=50, description="Maximum concurrent database requests")
+    enable_batched_writes: bool = Field(default=False, description="Write message AI results, and new orders with them, in batched RPC calls (requires the update_messages_ai_data and create_order_and_update_message functions)")
     
     # HTTP API Configuration
     api_host: str = Field(default="0.0.0.0", description="Host for HTTP API server")
@@ -87,12 +89,14 @@ def get_settings() -> Settings:
             ai_confidence_threshold=float(os.getenv('AI_CONFIDENCE_THRESHOLD', '0.8')),
             max_processing_time_seconds=int(os.getenv('MAX_PROCESSING_TIME_SECONDS', '30')),
             batch_size=int(os.getenv('BATCH_SIZE', '10')),
+            enable_fastpath_intent=os.getenv('ENABLE_FASTPATH_INTENT', 'false').lower() == 'true',
             ai_enhancement_enabled=os.getenv('AI_ENHANCEMENT_ENABLED', 'true').lower() == 'true',
             ai_enhancement_threshold=float(os.getenv('AI_ENHANCEMENT_THRESHOLD', '0.85')),
             ai_enhancement_model=os.getenv('AI_ENHANCEMENT_MODEL', 'gpt-4o-mini'),
             max_retries=int(os.getenv('MAX_RETRIES', '3')),
             retry_delay_seconds=float(os.getenv('RETRY_DELAY_SECONDS', '1.0')),
-            connection_pool_size=int(os.getenv('CONNECTION_POOL_SIZE', '5')),
+            connection_pool_size=int(os.getenv('CONNECTION_POOL_SIZE', '25')),
+            enable_batched_writes=os.getenv('ENABLE_BATCHED_WRITES', 'false').lower() == 'true',
             api_host=os.getenv('API_HOST', '0.0.0.0'),
             api_port=int(os.getenv('API_PORT', '8001')),
             api_enabled=os.getenv('API_ENABLED', 'true').lower() == 'true',
@@ -119,7 +119,7 @@ class OrderAgentMain:
                 # Test simplified agent factory
                 from agents.agent_factory import create_agent_factory
                 factory = create_agent_factory(db, "health_check_distributor")
-                health_status = await factory.get_agent_health_status()
+                health_status = factory.get_agent_health_status()
                 
                 logger.info(f"Simplified agent factory health: {health_status['factory_status']}")
                 
@@ -143,7 +143,7 @@ class OrderAgentMain:
                 # Test agent factory
                 from agents.agent_factory import create_agent_factory
                 factory = create_agent_factory(db, "health_check_distributor")
-                health_status = await factory.get_agent_health_status()
+                health_status = factory.get_agent_health_status()
                 
                 logger.info(f"Agent factory health: {health_status['factory_status']}")
                 
@@ -26,7 +26,7 @@ from services.enhanced_product_validator import ValidationResult, ValidationFlag
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class OrderCreationResult:
     """Result of autonomous order creation."""
     success: bool
@@ -0,0 +1,124 @@
+"""
+Shared product catalog cache for Order Agent system.
+
+Every agent and validator matches products against the same distributor
+catalog, so one TTL cache keyed by distributor serves them all: each catalog
+is fetched and converted to matcher dictionaries at most once per TTL, and
+concurrent callers during a reload share the same in-flight fetch.
+"""
+
+from __future__ import annotations as _annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from services.database import DatabaseService
+from schemas.product import CatalogProduct
+from tools.supabase_tools import fetch_product_catalog
+
+logger = logging.getLogger(__name__)
+
+# How long a loaded catalog is reused before it is fetched again
+_CATALOG_TTL_SECONDS = 120.0
+
+
+def catalog_product_dict(product: CatalogProduct) -> Dict[str, Any]:
+    """
+    Convert a catalog product to the dictionary shape the product matcher expects.
+
+    Args:
+        product: Catalog product from fetch_product_catalog
+
+    Returns:
+        Dict[str, Any]: Matcher dictionary for the product
+    """
+    return {
+        'id': product.id,
+        'name': product.name,
+        'sku': product.sku,
+        'unit': product.unit,
+        'unit_price': float(product.unit_price),
+        'stock_quantity': product.stock_quantity,
+        'in_stock': product.in_stock,
+        'minimum_order_quantity': product.minimum_order_quantity,
+        'active': product.active,
+        'brand': product.brand,
+        'category': product.category,
+        'size_variants': product.size_variants,
+        'aliases': product.aliases,
+        'keywords': product.keywords,
+        'ai_training_examples': product.ai_training_examples,
+        'common_misspellings': product.common_misspellings,
+        'seasonal_patterns': product.seasonal_patterns
+    }
+
+
+class CatalogCache:
+    """
+    Single-flight TTL cache of each distributor's active catalog.
+
+    Catalogs are frozen tuples of matcher dictionaries shared by every caller,
+    so per-catalog preparation (name indexes, prompt samples) can be keyed on
+    the tuple's identity and rebuilt only when a new catalog is loaded.
+    """
+
+    def __init__(self, ttl_seconds: float = _CATALOG_TTL_SECONDS):
+        """
+        Initialize an empty cache.
+
+        Args:
+            ttl_seconds: How long a loaded catalog is reused
+        """
+        self.ttl_seconds = ttl_seconds
+        # distributor_id -> (expires_at, catalog_dicts)
+        self._entries: Dict[str, Tuple[float, Tuple[Dict[str, Any], ...]]] = {}
+        # distributor_id -> in-flight load
+        self._loads: Dict[str, asyncio.Future] = {}
+
+    async def get(self, database: DatabaseService, distributor_id: str) -> Tuple[Dict[str, Any], ...]:
+        """
+        Get a distributor's catalog, reloading it at most once per TTL.
+
+        Args:
+            database: Database service used if the catalog must be fetched
+            distributor_id: Distributor whose catalog is returned
+
+        Returns:
+            Tuple of catalog product dictionaries shared by all callers
+        """
+        entry = self._entries.get(distributor_id)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        load = self._loads.get(distributor_id)
+        if load is None:
+            load = asyncio.ensure_future(self._load(database, distributor_id))
+            self._loads[distributor_id] = load
+            load.add_done_callback(lambda _: self._loads.pop(distributor_id, None))
+        # Reason: a cancelled caller must not cancel the load other callers await
+        return await asyncio.shield(load)
+
+    async def _load(self, database: DatabaseService, distributor_id: str) -> Tuple[Dict[str, Any], ...]:
+        """Fetch a catalog and convert it to matcher dictionaries once per load."""
+        catalog_models = await fetch_product_catalog(database, distributor_id, active_only=True)
+        catalog_dicts = tuple(catalog_product_dict(product) for product in catalog_models or ())
+        self._entries[distributor_id] = (time.monotonic() + self.ttl_seconds, catalog_dicts)
+        return catalog_dicts
+
+    def invalidate(self, distributor_id: Optional[str] = None) -> None:
+        """
+        Drop cached catalogs so the next caller reloads them.
+
+        Args:
+            distributor_id: Distributor to drop, or None to drop every catalog
+        """
+        if distributor_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(distributor_id, None)
+
+
+# Global instance shared by every agent in the process
+catalog_cache = CatalogCache()
@@ -22,8 +22,30 @@ from schemas.message import ExtractedProduct
 
 logger = logging.getLogger(__name__)
 
+# Implicit continuation patterns, compiled once; each one that matches is counted
+_IMPLICIT_CONTINUATION_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'\by\s+\w+',  # "y algo" patterns
+    r'\bah\s+\w+',  # "ah algo" patterns  
+    r'\bponme\s+\w+',  # "ponme algo" patterns
+    r'\bdame\s+\w+',  # "dame algo" patterns
+))
 
-@dataclass
+# Reason: only whether any indicator matches matters, so one alternation scans once
+_PRODUCT_INDICATOR_RE = re.compile('|'.join((
+    r'\d+\s+\w+',  # Numbers + product (e.g., "2 pepsis", "43 panes")
+    r'\w+\s+\d+',  # Product + numbers (e.g., "pepsi 2")
+    r'quiero\s+\w+', r'dame\s+\w+', r'ponme\s+\w+',  # Want/give/put patterns
+    r'necesito\s+\w+', r'mandame\s+\w+',  # Need/send patterns
+)))
+
+# Explicit rejection phrases that would break a temporal continuation (substring match)
+_REJECTION_RE = re.compile('|'.join(re.escape(phrase) for phrase in (
+    "no", "nada más", "ya está", "eso es todo", "gracias",
+    "nuevo pedido", "otra orden", "cancelar", "cancel"
+)))
+
+
+@dataclass(slots=True)
 class ContinuationResult:
     """Result of continuation detection analysis."""
     
@@ -46,7 +68,7 @@ class ContinuationDetector:
     3. Order status boundaries (PENDING vs ACCEPTED/REJECTED)
     """
     
-    # Explicit continuation phrases in Spanish
+    # Explicit continuation phrases in Spanish (lowercase, matched against lowercased messages)
     CONTINUATION_PHRASES = [
         # Direct continuation
         "también", "tambien", "además", "ademas", 
@@ -193,10 +215,8 @@ class ContinuationDetector:
         message_lower = message_content.lower().strip()
         
         # Check for explicit continuation phrases
-        found_phrases = []
-        for phrase in self.CONTINUATION_PHRASES:
-            if phrase.lower() in message_lower:
-                found_phrases.append(phrase)
+        # CONTINUATION_PHRASES are already lowercase
+        found_phrases = [phrase for phrase in self.CONTINUATION_PHRASES if phrase in message_lower]
         
         if found_phrases:
             # High confidence - explicit continuation detected
@@ -218,18 +238,11 @@ class ContinuationDetector:
             )
         
         # Check for implicit continuation patterns
-        implicit_patterns = [
-            r'\by\s+\w+',  # "y algo" patterns
-            r'\bah\s+\w+',  # "ah algo" patterns  
-            r'\bponme\s+\w+',  # "ponme algo" patterns
-            r'\bdame\s+\w+',  # "dame algo" patterns
+        implicit_matches = [
+            pattern.pattern for pattern in _IMPLICIT_CONTINUATION_PATTERNS
+            if pattern.search(message_lower)
         ]
         
-        implicit_matches = []
-        for pattern in implicit_patterns:
-            if re.search(pattern, message_lower):
-                implicit_matches.append(pattern)
-        
         if implicit_matches:
             # Medium confidence - implicit patterns
             target_order = recent_orders[0]
@@ -268,21 +281,10 @@ class ContinuationDetector:
             # If order was created within continuation window
             if time_diff.total_seconds() / 60 <= self.CONTINUATION_TIME_WINDOW_MINUTES:
                 # Check if message looks like a product order (not greeting/question)
-                product_indicators = [
-                    r'\d+\s+\w+',  # Numbers + product (e.g., "2 pepsis", "43 panes")
-                    r'\w+\s+\d+',  # Product + numbers (e.g., "pepsi 2")
-                    r'quiero\s+\w+', r'dame\s+\w+', r'ponme\s+\w+',  # Want/give/put patterns
-                    r'necesito\s+\w+', r'mandame\s+\w+',  # Need/send patterns
-                ]
-                
-                has_product_pattern = any(re.search(pattern, message_lower) for pattern in product_indicators)
+                has_product_pattern = _PRODUCT_INDICATOR_RE.search(message_lower) is not None
                 
                 # Check for explicit rejection phrases that would break continuation
-                rejection_phrases = [
-                    "no", "nada más", "ya está", "eso es todo", "gracias",
-                    "nuevo pedido", "otra orden", "cancelar", "cancel"
-                ]
-                has_rejection = any(phrase in message_lower for phrase in rejection_phrases)
+                has_rejection = _REJECTION_RE.search(message_lower) is not None
                 
                 if has_product_pattern and not has_rejection:
                     return ContinuationResult(
@@ -7,9 +7,10 @@ interaction patterns to improve future autonomous decisions.
 
 from __future__ import annotations as _annotations
 
+import asyncio
 import logging
 import json
-from typing import Dict, List, Optional, Any, Tuple
+from typing import Dict, List, Optional, Any, Sequence, Tuple
 from datetime import datetime, timedelta
 from collections import defaultdict
 
@@ -23,6 +24,11 @@ from tools.supabase_tools import (
 
 logger = logging.getLogger(__name__)
 
+# Learning events are written in batches of up to this many, at most this long after queueing
+_LEARNING_QUEUE_MAXSIZE = 1000
+_LEARNING_BATCH_SIZE = 32
+_LEARNING_FLUSH_SECONDS = 2.0
+
 
 class ConversationMemory:
     """
@@ -42,6 +48,8 @@ class ConversationMemory:
         self.database = database
         self.preference_cache = {}  # In-memory cache for frequent lookups
         self.pattern_cache = {}     # Cache for successful patterns
+        self._learning_queue: asyncio.Queue = asyncio.Queue(maxsize=_LEARNING_QUEUE_MAXSIZE)
+        self._learning_flusher_task: Optional[asyncio.Task] = None
         logger.info("Initialized ConversationMemory service")
     
     async def build_agent_context(
@@ -197,22 +205,9 @@ class ConversationMemory:
             bool: True if event was recorded successfully
         """
         try:
-            event_data = {
-                'event_type': event.event_type,
-                'context_summary': event.context_summary,
-                'action_taken': event.action_taken,
-                'outcome': event.outcome,
-                'expected_outcome': event.expected_outcome,
-                'success_metrics': json.dumps(event.success_metrics),
-                'lesson_learned': event.lesson_learned,
-                'timestamp': event.timestamp,
-                'customer_id': event.customer_id,
-                'distributor_id': event.distributor_id
-            }
-            
             await self.database.insert_single(
                 table='learning_events',
-                data=event_data
+                data=self._learning_event_row(event)
             )
             
             logger.info(f"Recorded learning event: {event.event_type} for {event.customer_id}")
@@ -222,6 +217,104 @@ class ConversationMemory:
             logger.error(f"Failed to record learning event: {e}")
             return False
     
+    async def record_learning_events(self, events: Sequence[LearningEvent]) -> int:
+        """
+        Record a batch of learning events in a single insert.
+        
+        Args:
+            events: Learning events to record
+            
+        Returns:
+            int: Number of events recorded (0 if the insert failed)
+        """
+        if not events:
+            return 0
+        
+        try:
+            recorded = await self.database.insert_many(
+                'learning_events', [self._learning_event_row(event) for event in events]
+            )
+            logger.info(f"Recorded {recorded} learning events in one batch")
+            return recorded
+            
+        except Exception as e:
+            logger.error(f"Failed to record {len(events)} learning events: {e}")
+            return 0
+    
+    def queue_learning_event(self, event: LearningEvent) -> None:
+        """
+        Queue a learning event for the background batch writer.
+        
+        Events are best-effort: if the queue is full the event is dropped.
+        
+        Args:
+            event: Learning event to record
+        """
+        try:
+            self._learning_queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning(f"Learning event queue full, dropping {event.event_type} event")
+            return
+        
+        if self._learning_flusher_task is None or self._learning_flusher_task.done():
+            self._learning_flusher_task = asyncio.get_running_loop().create_task(
+                self._learning_event_flusher()
+            )
+    
+    async def _learning_event_flusher(self) -> None:
+        """Write queued learning events once a batch fills or its flush interval passes."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._learning_queue.get()]
+            deadline = loop.time() + _LEARNING_FLUSH_SECONDS
+            while len(batch) < _LEARNING_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._learning_queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self.record_learning_events(batch)
+            finally:
+                for _ in batch:
+                    self._learning_queue.task_done()
+    
+    def _drain_learning_events(self) -> List[LearningEvent]:
+        """Pop every queued learning event without waiting."""
+        events = []
+        while True:
+            try:
+                events.append(self._learning_queue.get_nowait())
+            except asyncio.QueueEmpty:
+                return events
+    
+    async def close(self) -> None:
+        """Write out queued learning events before shutdown."""
+        task = self._learning_flusher_task
+        if task is not None and not task.done():
+            await self._learning_queue.join()
+            task.cancel()
+        self._learning_flusher_task = None
+        await self.record_learning_events(self._drain_learning_events())
+    
+    @staticmethod
+    def _learning_event_row(event: LearningEvent) -> Dict[str, Any]:
+        """Convert a learning event to its learning_events table row."""
+        return {
+            'event_type': event.event_type,
+            'context_summary': event.context_summary,
+            'action_taken': event.action_taken,
+            'outcome': event.outcome,
+            'expected_outcome': event.expected_outcome,
+            'success_metrics': json.dumps(event.success_metrics),
+            'lesson_learned': event.lesson_learned,
+            'timestamp': event.timestamp,
+            'customer_id': event.customer_id,
+            'distributor_id': event.distributor_id
+        }
+    
     async def get_successful_patterns(
         self,
         distributor_id: str,
@@ -7,8 +7,10 @@ Follows the pattern from examples/example_pydantic_ai.py.
 
 from __future__ import annotations as _annotations
 
+import asyncio
+import json
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from contextlib import asynccontextmanager
 
 from supabase import acreate_client
@@ -30,28 +32,44 @@ class DatabaseService:
     def __init__(self):
         """Initialize the database service."""
         self._client: Optional[AsyncClient] = None
+        self._client_lock = asyncio.Lock()
         self._connection_pool_size = settings.connection_pool_size
+        # Reason: bounds in-flight queries on the client's keep-alive pool so bursts
+        # queue here instead of exhausting connections on the Supabase side
+        self._pool = asyncio.Semaphore(self._connection_pool_size)
     
     async def get_client(self) -> AsyncClient:
         """
         Get or create the Supabase client.
         
+        Concurrent first callers share one client (and one connection pool).
+        
         Returns:
             AsyncClient: Async Supabase client instance
         """
-        if self._client is None:
-            self._client = await acreate_client(
-                settings.supabase_url,
-                settings.supabase_key,
-                options=AsyncClientOptions(
-                    auto_refresh_token=True,
-                    persist_session=True
+        if self._client is not None:
+            return self._client
+        
+        async with self._client_lock:
+            if self._client is None:
+                self._client = await acreate_client(
+                    settings.supabase_url,
+                    settings.supabase_key,
+                    options=AsyncClientOptions(
+                        auto_refresh_token=True,
+                        persist_session=True
+                    )
                 )
-            )
-            logger.info("Supabase client initialized")
+                logger.info(f"Supabase client initialized (pool size {self._connection_pool_size})")
         
         return self._client
     
+    async def close(self) -> None:
+        """Close the client's pooled connections, e.g. on application shutdown."""
+        if self._client is not None:
+            await self._client.postgrest.aclose()
+            self._client = None
+    
     async def execute_query(
         self, 
         table: str, 
@@ -96,8 +114,6 @@ class DatabaseService:
                     for key, value in filters.items():
                         query = query.eq(key, value)
                 
-                result = await query.execute()
-                
             elif operation == 'insert':
                 if not data:
                     raise ValueError("Data is required for insert operations")
@@ -106,7 +122,7 @@ class DatabaseService:
                 if distributor_id and 'distributor_id' not in data and table != 'messages':
                     data['distributor_id'] = distributor_id
                 
-                result = await client.from_(table).insert(data).execute()
+                query = client.from_(table).insert(data)
                 
             elif operation == 'update':
                 if not data:
@@ -123,8 +139,6 @@ class DatabaseService:
                     for key, value in filters.items():
                         query = query.eq(key, value)
                 
-                result = await query.execute()
-                
             elif operation == 'delete':
                 query = client.from_(table).delete()
                 
@@ -137,11 +151,12 @@ class DatabaseService:
                     for key, value in filters.items():
                         query = query.eq(key, value)
                 
-                result = await query.execute()
-                
             else:
                 raise ValueError(f"Unsupported operation: {operation}")
             
+            async with self._pool:
+                result = await query.execute()
+            
             return result.data if hasattr(result, 'data') else result
             
         except Exception as e:
@@ -207,6 +222,62 @@ class DatabaseService:
             logger.warning(f"No records updated in {table} with filters {filters}")
             return None
     
+    async def update_many(
+        self,
+        table: str,
+        updates: Sequence[Tuple[Any, Dict[str, Any]]],
+        key: str = 'id',
+        distributor_id: Optional[str] = None
+    ) -> int:
+        """
+        Apply a batch of per-record updates with as few requests as possible.
+        
+        Records receiving identical data share one ``key IN (...)`` update; the
+        remaining distinct updates are sent concurrently over the client's pool.
+        
+        Args:
+            table: Table name
+            updates: (key value, data) pairs, one per record
+            key: Column identifying each record
+            distributor_id: Distributor ID for multi-tenant filtering
+            
+        Returns:
+            int: Number of records updated
+        """
+        grouped: Dict[str, Tuple[Dict[str, Any], List[Any]]] = {}
+        for key_value, data in updates:
+            signature = json.dumps(data, sort_keys=True, default=str)
+            grouped.setdefault(signature, (data, []))[1].append(key_value)
+        
+        client = await self.get_client()
+        
+        async def _update_group(data: Dict[str, Any], key_values: List[Any]) -> int:
+            query = client.from_(table).update(data)
+            if distributor_id and table != 'messages':
+                query = query.eq('distributor_id', distributor_id)
+            if len(key_values) == 1:
+                query = query.eq(key, key_values[0])
+            else:
+                query = query.in_(key, key_values)
+            async with self._pool:
+                result = await query.execute()
+            return len(result.data or [])
+        
+        results = await asyncio.gather(
+            *(_update_group(data, key_values) for data, key_values in grouped.values()),
+            return_exceptions=True
+        )
+        
+        updated = 0
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Batched update on {table} failed: {result}")
+            else:
+                updated += result
+        
+        logger.debug(f"Updated {updated} records in {table} with {len(grouped)} requests")
+        return updated
+    
     async def insert_single(
         self,
         table: str,
@@ -238,6 +309,56 @@ class DatabaseService:
             logger.error(f"Failed to insert record in {table}")
             return None
     
+    async def insert_many(
+        self,
+        table: str,
+        rows: Sequence[Dict[str, Any]],
+        distributor_id: Optional[str] = None
+    ) -> int:
+        """
+        Insert a batch of records in a single request.
+        
+        Args:
+            table: Table name
+            rows: Records to insert
+            distributor_id: Distributor ID added to rows that do not set one
+            
+        Returns:
+            int: Number of records inserted
+        """
+        if not rows:
+            return 0
+        
+        if distributor_id and table != 'messages':
+            rows = [
+                row if 'distributor_id' in row else {**row, 'distributor_id': distributor_id}
+                for row in rows
+            ]
+        
+        client = await self.get_client()
+        async with self._pool:
+            result = await client.from_(table).insert(list(rows)).execute()
+        
+        inserted = len(result.data or [])
+        logger.debug(f"Inserted {inserted} records in {table}")
+        return inserted
+    
+    async def call_function(self, function: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Call a Postgres function through PostgREST RPC.
+        
+        Args:
+            function: Database function name
+            params: Named arguments for the function
+            
+        Returns:
+            Any: The function's result data
+        """
+        client = await self.get_client()
+        async with self._pool:
+            result = await client.rpc(function, params or {}).execute()
+        return result.data
+    
     @asynccontextmanager
     async def transaction(self):
         """
@@ -292,9 +413,7 @@ async def get_distributor_settings(distributor_id: str) -> Dict[str, Any]:
     Returns:
         Dict[str, Any]: Distributor settings including ai_confidence_threshold
     """
-    db = DatabaseService()
-    
-    result = await db.execute_query(
+    result = await db_service.execute_query(
         table='distributors',
         operation='select',
         filters={'id': distributor_id}
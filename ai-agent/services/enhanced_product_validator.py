@@ -16,14 +16,14 @@ Key Features:
 from __future__ import annotations as _annotations
 
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, FrozenSet, List, Optional, Any, Sequence, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+from services.catalog_cache import catalog_cache
 from services.database import DatabaseService
 from services.product_matcher import ProductMatcher, MatchResult
 from schemas.message import ExtractedProduct
-from tools.supabase_tools import fetch_product_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -39,7 +39,7 @@ class ValidationFlag(Enum):
     MINIMUM_ORDER_NOT_MET = "minimum_order_not_met"
 
 
-@dataclass
+@dataclass(slots=True)
 class ValidationResult:
     """Result of enhanced product validation."""
     validated_products: List[ExtractedProduct]
@@ -50,7 +50,7 @@ class ValidationResult:
     confidence_score: float  # Overall validation confidence
 
 
-@dataclass
+@dataclass(slots=True)
 class ProductValidationIssue:
     """Detailed information about a product validation issue."""
     product_name: str
@@ -64,6 +64,50 @@ class ProductValidationIssue:
             self.catalog_alternatives = []
 
 
+@dataclass(frozen=True, slots=True)
+class CatalogNameIndex:
+    """
+    Catalog product names split into lowercase words once per catalog load.
+    
+    Similar-product suggestions only score products sharing a word with the
+    query, found through by_word, instead of re-splitting every catalog name.
+    """
+    catalog: Sequence[Dict[str, Any]]
+    name_words: Tuple[FrozenSet[str], ...]
+    by_word: Dict[str, Tuple[int, ...]]
+    by_id: Dict[Any, Dict[str, Any]]
+    
+    @classmethod
+    def build(cls, catalog_dicts: Sequence[Dict[str, Any]]) -> CatalogNameIndex:
+        """
+        Index catalog names by word and products by ID.
+        
+        Args:
+            catalog_dicts: Catalog product dictionaries
+            
+        Returns:
+            CatalogNameIndex for the catalog
+        """
+        name_words = tuple(
+            frozenset(item.get('name', '').lower().split()) for item in catalog_dicts
+        )
+        by_word: Dict[str, List[int]] = {}
+        for position, words in enumerate(name_words):
+            for word in words:
+                by_word.setdefault(word, []).append(position)
+        
+        by_id: Dict[Any, Dict[str, Any]] = {}
+        for item in catalog_dicts:
+            by_id.setdefault(item.get('id'), item)
+        
+        return cls(
+            catalog=catalog_dicts,
+            name_words=name_words,
+            by_word={word: tuple(positions) for word, positions in by_word.items()},
+            by_id=by_id
+        )
+
+
 class EnhancedProductValidator:
     """
     Enhanced product validation service with human validation flags.
@@ -72,6 +116,9 @@ class EnhancedProductValidator:
     for edge cases, unknown products, and situations requiring human review.
     """
     
+    # Name index of the last loaded catalog
+    _name_index: Optional[CatalogNameIndex] = None
+    
     def __init__(self, database: DatabaseService, distributor_id: str):
         self.database = database
         self.distributor_id = distributor_id  
@@ -115,16 +162,11 @@ class EnhancedProductValidator:
         
         try:
             # Get product catalog (same as order_agent.py)
-            catalog_models = await fetch_product_catalog(
-                self.database, self.distributor_id, active_only=True
-            )
+            catalog_dicts = await self._get_catalog()
             
-            if not catalog_models:
+            if not catalog_dicts:
                 return await self._handle_no_catalog_scenario(extracted_products)
             
-            # Convert catalog models to dictionaries (same as order_agent.py)
-            catalog_dicts = await self._convert_catalog_to_dicts(catalog_models)
-            
             # Validate each product with enhanced logic
             validated_products = []
             validation_issues = []
@@ -210,9 +252,7 @@ class EnhancedProductValidator:
                 product.unit = best_match.unit
                 
             # Check for additional validation requirements
-            catalog_product = next(
-                (p for p in catalog_dicts if p['id'] == best_match.product_id), None
-            )
+            catalog_product = self._name_index_for(catalog_dicts).by_id.get(best_match.product_id)
             if catalog_product:
                 await self._check_additional_requirements(
                     product, catalog_product, issues, flags, questions
@@ -291,16 +331,16 @@ class EnhancedProductValidator:
             flags.add(ValidationFlag.HUMAN_VALIDATION_REQUESTED)
             flags.add(ValidationFlag.NO_CATALOG_MATCH)
             
+            similar_products = await self._get_similar_products(product.product_name, catalog_dicts)
             issues.append(ProductValidationIssue(
                 product_name=product.product_name,
                 issue_type=ValidationFlag.NO_CATALOG_MATCH,
                 description="Product not found in catalog",
                 suggested_action="Human should identify correct product or add to catalog",
-                catalog_alternatives=await self._get_similar_products(product.product_name, catalog_dicts)
+                catalog_alternatives=list(similar_products)
             ))
             
             # Suggest similar products if available
-            similar_products = await self._get_similar_products(product.product_name, catalog_dicts)
             if similar_products:
                 questions.append(
                     f"No encuentro '{product.product_name}' en nuestro catálogo. "
@@ -386,17 +426,21 @@ class EnhancedProductValidator:
         try:
             # Simple similarity based on common words
             product_words = set(product_name.lower().split())
+            index = self._name_index_for(catalog_dicts)
             similarities = []
             
-            for catalog_item in catalog_dicts:
-                catalog_name = catalog_item.get('name', '').lower()
-                catalog_words = set(catalog_name.split())
+            # Only products sharing a word with the query can have any overlap
+            candidates = set()
+            for word in product_words:
+                candidates.update(index.by_word.get(word, ()))
+            
+            for position in sorted(candidates):
+                catalog_words = index.name_words[position]
                 
                 # Calculate simple word overlap similarity
                 common_words = product_words.intersection(catalog_words)
-                if common_words:
-                    similarity = len(common_words) / len(product_words.union(catalog_words))
-                    similarities.append((catalog_item['name'], similarity))
+                similarity = len(common_words) / len(product_words.union(catalog_words))
+                similarities.append((catalog_dicts[position]['name'], similarity))
             
             # Sort by similarity and return top matches
             similarities.sort(key=lambda x: x[1], reverse=True)
@@ -406,29 +450,21 @@ class EnhancedProductValidator:
             logger.warning(f"Could not find similar products: {e}")
             return []
     
-    async def _convert_catalog_to_dicts(self, catalog_models) -> List[Dict[str, Any]]:
-        """Convert catalog models to dictionaries (same as order_agent.py)."""
-        catalog_dicts = []
-        for product in catalog_models:
-            catalog_dicts.append({
-                'id': product.id,
-                'name': product.name,
-                'sku': product.sku,
-                'unit': product.unit,
-                'unit_price': float(product.unit_price),
-                'stock_quantity': product.stock_quantity,
-                'in_stock': product.in_stock,
-                'minimum_order_quantity': product.minimum_order_quantity,
-                'active': product.active,
-                'brand': product.brand,
-                'category': product.category,
-                'size_variants': product.size_variants,
-                'aliases': product.aliases,
-                'keywords': product.keywords,
-                'ai_training_examples': product.ai_training_examples,
-                'common_misspellings': product.common_misspellings,
-                'seasonal_patterns': product.seasonal_patterns
-            })
+    def _name_index_for(self, catalog_dicts: Sequence[Dict[str, Any]]) -> CatalogNameIndex:
+        """Get the name index of a catalog, rebuilding it only for a newly loaded catalog."""
+        if self._name_index is None or self._name_index.catalog is not catalog_dicts:
+            self._name_index = CatalogNameIndex.build(catalog_dicts)
+        return self._name_index
+    
+    async def _get_catalog(self) -> Tuple[Dict[str, Any], ...]:
+        """
+        Get the distributor catalog as matcher dictionaries from the shared cache.
+        
+        Returns:
+            Tuple of catalog product dictionaries shared by all callers
+        """
+        catalog_dicts = await catalog_cache.get(self.database, self.distributor_id)
+        self._name_index_for(catalog_dicts)
         return catalog_dicts
     
     async def _handle_no_catalog_scenario(self, products: List[ExtractedProduct]) -> ValidationResult:
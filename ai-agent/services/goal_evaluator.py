@@ -54,11 +54,15 @@ class GoalEvaluator:
             
             goal_scores = {}
             detailed_reasoning = []
+            overall_score = 0.0
             
-            # Score action against each business goal
+            # Score action against each business goal, accumulating the weighted overall score.
+            # Reason: scores are a few comparisons on action and context fields, so there is
+            # no cache per context fingerprint; building its key would cost as much as scoring
             for goal in goals:
                 score = await self._score_action_for_goal(action, goal, context)
                 goal_scores[goal.name] = score
+                overall_score += score * goal.weight
                 
                 # Add reasoning for this goal
                 goal_reasoning = await self._explain_goal_score(action, goal, context, score)
@@ -66,12 +70,6 @@ class GoalEvaluator:
                 
                 logger.debug(f"Goal {goal.name}: score={score:.3f}, weight={goal.weight}")
             
-            # Calculate weighted overall score
-            overall_score = sum(
-                goal_scores[goal.name] * goal.weight 
-                for goal in goals
-            )
-            
             # Calculate confidence based on score consistency and context
             confidence = await self._calculate_confidence(goal_scores, context, action)
             
@@ -7,17 +7,63 @@ with high accuracy and flexibility to handle any phrasing.
 
 from __future__ import annotations as _annotations
 
+import asyncio
+import json
 import logging
-from typing import Dict, Any, Optional
+import re
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional, Tuple
 from enum import Enum
 
-from openai import AsyncOpenAI
 from config.settings import settings
+from services.openai_client import get_openai_client
+from services.request_batcher import RequestBatcher
 
 logger = logging.getLogger(__name__)
 
-# Set up OpenAI client
-openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
+# Shared OpenAI client (pooled connections)
+openai_client = get_openai_client()
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_CLASSIFICATION_FAILED = "Classification failed"
+
+# Reason: static instructions live in the system message so every classification
+# request starts with the same prefix, which OpenAI can serve from its prompt cache
+_CLASSIFICATION_SYSTEM_PROMPT = """You are a precise intent classifier for a B2B food distributor. Always respond with valid JSON.
+
+You determine if customer messages are related to ordering products from a B2B food distributor.
+
+CLASSIFICATION RULES:
+- Return "ORDER_RELATED" if the message is about:
+  * Placing orders ("quiero 5 pepsi", "necesito leche")
+  * Product pricing ("cuánto cuesta la leche?", "precio del pan")
+  * Product availability ("tienes cerveza?", "hay stock de leche?")
+  * Product information ("qué tipos de leche tienen?", "productos disponibles")
+  * Order modifications ("cambia mi pedido", "agrega 2 más")
+  * Quantities ("cuántas cajas puedo pedir?")
+
+- Return "NOT_ORDER_RELATED" if the message is about:
+  * Greetings ("hola", "buenos días", "buenas buenas")
+  * Thanks/acknowledgments ("gracias", "perfecto", "ok")
+  * Personal conversation ("cómo estás?", "qué tal la familia?")
+  * General topics ("mi equipo ganó", "hace calor", "viste la serie?")
+  * Unrelated business ("horarios de atención", "dirección")
+
+Be conservative: when in doubt, classify as NOT_ORDER_RELATED."""
+
+# Reason: greetings/thanks are a large share of traffic and need no model; the pattern
+# is an anchored alternation with no nested quantifiers, so matching stays linear in
+# the message length
+_TRIVIAL_NON_ORDER_RE = re.compile(
+    r"^\s*(?:hola|buenas?|buen[oa]s\s+(?:d[ií]as|tardes|noches)|muchas\s+gracias|gracias"
+    r"|perfecto|ok|okay|vale|listo|chao|adi[oó]s)[\s\W]*$",
+    re.IGNORECASE
+)
+
+
+def normalize_message(message_content: str) -> str:
+    """Normalize a message for cache lookups (casefolded, trimmed, single spaces)."""
+    return _WHITESPACE_RE.sub(" ", message_content.strip().casefold())
 
 
 class MessageIntent(str, Enum):
@@ -45,6 +91,103 @@ class IntentClassificationResult:
         return self.confidence >= 0.8
 
 
+def quick_classify(message_content: str) -> Optional[IntentClassificationResult]:
+    """
+    Classify obvious messages locally without calling OpenAI.
+    
+    Args:
+        message_content: The customer message to classify
+        
+    Returns:
+        IntentClassificationResult for trivial greetings/thanks, otherwise None
+    """
+    if _TRIVIAL_NON_ORDER_RE.match(message_content):
+        return IntentClassificationResult(
+            intent=MessageIntent.NOT_ORDER_RELATED,
+            confidence=0.95,
+            reasoning="Greeting or acknowledgment (local rule)"
+        )
+    
+    return None
+
+
+class _RowObjectDecoder:
+    """
+    Incrementally extracts flat JSON objects from a streamed response.
+    
+    Rows in a batch response are objects with no nested objects, so an
+    object is emitted as soon as its closing brace arrives; enclosing
+    wrappers such as {"results": [...]} are skipped.
+    """
+    
+    def __init__(self):
+        """Initialize an empty decoder."""
+        self._buffer = ""
+        self._position = 0
+        self._in_string = False
+        self._escaped = False
+        # (start offset, has nested object) for every open brace
+        self._open: List[List[Any]] = []
+    
+    def feed(self, text: str) -> List[str]:
+        """
+        Add streamed text and return the row objects it completed.
+        
+        Args:
+            text: Next chunk of response text
+            
+        Returns:
+            List[str]: JSON text of each newly completed row object
+        """
+        self._buffer += text
+        completed = []
+        
+        for position in range(self._position, len(self._buffer)):
+            char = self._buffer[position]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                if self._open:
+                    self._open[-1][1] = True
+                self._open.append([position, False])
+            elif char == "}" and self._open:
+                start, has_nested = self._open.pop()
+                if not has_nested:
+                    completed.append(self._buffer[start:position + 1])
+        
+        self._position = len(self._buffer)
+        return completed
+
+
+def _row_number(row_json: str, count: int) -> Optional[int]:
+    """
+    Read the 1-based "row" number a batch result row claims to answer.
+    
+    Args:
+        row_json: JSON text of one result row
+        count: Number of messages in the batch
+        
+    Returns:
+        Optional[int]: The row number, or None when it is missing or out of range
+    """
+    try:
+        row = json.loads(row_json).get("row")
+    except (ValueError, AttributeError):
+        return None
+    
+    # Reason: bool is an int subclass, so reject it explicitly
+    if isinstance(row, bool) or not isinstance(row, int) or not 1 <= row <= count:
+        return None
+    return row
+
+
 class OrderIntentClassifier:
     """AI-powered classifier for order-related messages."""
     
@@ -86,67 +229,134 @@ class OrderIntentClassifier:
             return IntentClassificationResult(
                 intent=MessageIntent.NOT_ORDER_RELATED,
                 confidence=0.5,
-                reasoning=f"Classification failed: {str(e)}"
+                reasoning=f"{_CLASSIFICATION_FAILED}: {str(e)}"
             )
     
     def _build_classification_prompt(self, message_content: str, context: Optional[Dict[str, Any]]) -> str:
         """Build the AI prompt for intent classification."""
         
-        prompt = f"""You are an AI assistant that determines if customer messages are related to ordering products from a B2B food distributor.
-
-CLASSIFICATION RULES:
-- Return "ORDER_RELATED" if the message is about:
-  * Placing orders ("quiero 5 pepsi", "necesito leche")
-  * Product pricing ("cuánto cuesta la leche?", "precio del pan")
-  * Product availability ("tienes cerveza?", "hay stock de leche?")
-  * Product information ("qué tipos de leche tienen?", "productos disponibles")
-  * Order modifications ("cambia mi pedido", "agrega 2 más")
-  * Quantities ("cuántas cajas puedo pedir?")
-
-- Return "NOT_ORDER_RELATED" if the message is about:
-  * Greetings ("hola", "buenos días", "buenas buenas")
-  * Thanks/acknowledgments ("gracias", "perfecto", "ok")
-  * Personal conversation ("cómo estás?", "qué tal la familia?")
-  * General topics ("mi equipo ganó", "hace calor", "viste la serie?")
-  * Unrelated business ("horarios de atención", "dirección")
-
-CUSTOMER MESSAGE: "{message_content}"
-
-Respond in this exact JSON format:
+        # Reason: the message goes last so everything before it is a stable prefix
+        return f"""Respond in this exact JSON format:
 {{
     "intent": "ORDER_RELATED" or "NOT_ORDER_RELATED",
     "confidence": 0.0-1.0,
     "reasoning": "Brief explanation of classification"
 }}
 
-Be conservative: when in doubt, classify as NOT_ORDER_RELATED."""
-
-        return prompt
+CUSTOMER MESSAGE: "{message_content}\""""
     
-    async def _call_openai_classification(self, prompt: str) -> str:
+    async def _call_openai_classification(self, prompt: str, max_tokens: int = 150) -> str:
         """Call OpenAI API for classification."""
         
         response = await openai_client.chat.completions.create(
             model=self.model,
             messages=[
-                {
-                    "role": "system", 
-                    "content": "You are a precise intent classifier for a B2B food distributor. Always respond with valid JSON."
-                },
+                {"role": "system", "content": _CLASSIFICATION_SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.1,  # Low temperature for consistent classification
-            max_tokens=150,
+            max_tokens=max_tokens,
             timeout=10
         )
         
         return response.choices[0].message.content
     
+    async def _stream_openai_classification(self, prompt: str, max_tokens: int) -> AsyncIterator[str]:
+        """Call OpenAI API for classification, yielding response text as it is generated."""
+        
+        stream = await openai_client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": _CLASSIFICATION_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.1,  # Low temperature for consistent classification
+            max_tokens=max_tokens,
+            timeout=10,
+            stream=True
+        )
+        
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    async def classify_messages_batch(
+        self,
+        messages: List[str],
+        on_result: Optional[Callable[[int, IntentClassificationResult], None]] = None
+    ) -> List[IntentClassificationResult]:
+        """
+        Classify several messages with a single streamed OpenAI request.
+        
+        Each row is parsed as soon as its JSON object is complete, so on_result
+        fires for early rows while later rows are still being generated. Rows
+        are matched to messages by their "row" number, never by arrival order;
+        rows with a missing, out-of-range or repeated number are dropped, and
+        every message left without a row is classified individually.
+        
+        Args:
+            messages: Customer messages to classify
+            on_result: Optional callback receiving (row index, result) as each row is ready
+            
+        Returns:
+            List[IntentClassificationResult]: One result per message, in order
+        """
+        results: List[Optional[IntentClassificationResult]] = [None] * len(messages)
+        
+        def deliver(index: int, result: IntentClassificationResult) -> None:
+            results[index] = result
+            if on_result is not None:
+                on_result(index, result)
+        
+        try:
+            prompt = self._build_batch_classification_prompt(messages)
+            decoder = _RowObjectDecoder()
+            
+            async for text in self._stream_openai_classification(prompt, max_tokens=80 * len(messages)):
+                for row_json in decoder.feed(text):
+                    row = _row_number(row_json, len(messages))
+                    if row is None or results[row - 1] is not None:
+                        logger.warning(f"Dropping unmatched batch classification row: {row_json[:80]}")
+                        continue
+                    deliver(row - 1, self._parse_classification_response(row_json, messages[row - 1]))
+            
+        except Exception as e:
+            logger.warning(f"Batch intent classification incomplete, classifying remaining rows individually: {e}")
+        
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            fallback = await asyncio.gather(
+                *(self.classify_message_intent(messages[index]) for index in missing)
+            )
+            for index, result in zip(missing, fallback):
+                deliver(index, result)
+        
+        return results
+    
+    def _build_batch_classification_prompt(self, messages: List[str]) -> str:
+        """Build one AI prompt that classifies several messages, one result per row."""
+        
+        rows = "\n".join(f'ROW {i}: "{content}"' for i, content in enumerate(messages, 1))
+        
+        return f"""Respond in this exact JSON format, with one entry per row:
+{{
+    "results": [
+        {{
+            "row": ROW number being classified,
+            "intent": "ORDER_RELATED" or "NOT_ORDER_RELATED",
+            "confidence": 0.0-1.0,
+            "reasoning": "Brief explanation of classification"
+        }}
+    ]
+}}
+
+CUSTOMER MESSAGES (classify each row independently):
+{rows}"""
+    
     def _parse_classification_response(self, response: str, original_message: str) -> IntentClassificationResult:
         """Parse OpenAI response into classification result."""
         
         try:
-            import json
             parsed = json.loads(response.strip())
             
             intent_str = parsed.get("intent", "NOT_ORDER_RELATED")
@@ -185,10 +395,123 @@ Be conservative: when in doubt, classify as NOT_ORDER_RELATED."""
                 )
 
 
+class IntentBatchScheduler(RequestBatcher):
+    """
+    Coalesces concurrent intent classifications into batched OpenAI requests.
+    
+    Callers await classify() as usual; requests arriving within max_wait_ms of
+    each other share one OpenAI call of up to max_batch_size rows. Obvious
+    greetings and thanks are answered by quick_classify, and other
+    results are kept in an LRU keyed on normalized content, so repeated
+    messages skip OpenAI entirely. Identical messages queued at the same time
+    share one row instead of being classified twice.
+    """
+    
+    def __init__(
+        self,
+        classifier: OrderIntentClassifier,
+        max_batch_size: int = 16,
+        max_wait_ms: float = 20.0,
+        cache_size: int = 4096,
+        cache_ttl_seconds: float = 3600.0
+    ):
+        """
+        Initialize the batch scheduler.
+        
+        Args:
+            classifier: Classifier used to run each batch
+            max_batch_size: Maximum messages per OpenAI request
+            max_wait_ms: How long the first queued message waits for company
+            cache_size: Maximum classifications kept in the LRU cache
+            cache_ttl_seconds: How long a cached classification stays valid
+        """
+        super().__init__(max_batch_size, max_wait_ms / 1000)
+        self.classifier = classifier
+        self.cache_size = cache_size
+        self.cache_ttl_seconds = cache_ttl_seconds
+        # normalized content -> (expires_at, result)
+        self._cache: OrderedDict[str, Tuple[float, IntentClassificationResult]] = OrderedDict()
+        # normalized content -> future of the queued or running classification
+        self._inflight: Dict[str, asyncio.Future] = {}
+    
+    async def classify(self, message_content: str) -> IntentClassificationResult:
+        """
+        Queue a message for classification and wait for its result.
+        
+        Args:
+            message_content: The customer message to classify
+            
+        Returns:
+            IntentClassificationResult: Classification with confidence
+        """
+        quick = quick_classify(message_content)
+        if quick is not None:
+            return quick
+        
+        key = normalize_message(message_content)
+        loop = asyncio.get_running_loop()
+        cached = self._cache.get(key)
+        if cached is not None:
+            expires_at, result = cached
+            if expires_at > loop.time():
+                self._cache.move_to_end(key)
+                return result
+            del self._cache[key]
+        
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            # Reason: a cancelled waiter must not cancel the row other callers await
+            return await asyncio.shield(inflight)
+        
+        future = self._enqueue(message_content)
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        
+        # Reason: the row may be shared by duplicates queued later, so cancelling
+        # this caller must not cancel it either
+        return await asyncio.shield(future)
+    
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """Classify a batch and resolve each caller's future as its row arrives."""
+        messages = [content for content, _ in batch]
+        
+        def resolve(index: int, result: IntentClassificationResult) -> None:
+            content, future = batch[index]
+            self._remember(content, result)
+            self._resolve(future, result)
+        
+        try:
+            if len(messages) == 1:
+                resolve(0, await self.classifier.classify_message_intent(messages[0]))
+            else:
+                results = await self.classifier.classify_messages_batch(messages, on_result=resolve)
+                for index, result in enumerate(results):
+                    if not batch[index][1].done():
+                        resolve(index, result)
+                    
+        except Exception as e:
+            for _, future in batch:
+                self._resolve(future, e)
+    
+    def _remember(self, message_content: str, result: IntentClassificationResult) -> None:
+        """Cache a classification, skipping error defaults so they are retried."""
+        if result.reasoning.startswith(_CLASSIFICATION_FAILED):
+            return
+        
+        key = normalize_message(message_content)
+        expires_at = asyncio.get_running_loop().time() + self.cache_ttl_seconds
+        self._cache[key] = (expires_at, result)
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
 def create_intent_classifier() -> OrderIntentClassifier:
     """Factory function to create intent classifier."""
     return OrderIntentClassifier()
 
 
 # Global instance
-intent_classifier = create_intent_classifier()
\ No newline at end of file
+intent_classifier = create_intent_classifier()
+# Shared so concurrent messages across agents land in the same batch
+intent_batch_scheduler = IntentBatchScheduler(intent_classifier)
@@ -0,0 +1,78 @@
+"""
+Shared OpenAI client for Order Agent system.
+
+Provides one pooled AsyncOpenAI client (and its httpx connection pool) for every
+LLM-using service and Pydantic AI model in the process.
+"""
+
+from __future__ import annotations as _annotations
+
+import asyncio
+import importlib.util
+import logging
+from functools import lru_cache
+
+import httpx
+from openai import AsyncOpenAI
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 multiplexing needs the optional h2 package; fall back to HTTP/1.1 keep-alive without it
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+# Startup never waits longer than this for the warm-up request
+_WARMUP_TIMEOUT_SECONDS = 5.0
+
+
+@lru_cache(maxsize=1)
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared httpx client used for OpenAI requests.
+
+    Returns:
+        httpx.AsyncClient: Pooled client reused across all LLM calls
+    """
+    logger.info(f"Creating shared OpenAI HTTP client (http2={_HTTP2_AVAILABLE})")
+    return httpx.AsyncClient(
+        http2=_HTTP2_AVAILABLE,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        timeout=httpx.Timeout(30.0, connect=3.0)
+    )
+
+
+@lru_cache(maxsize=1)
+def get_openai_client() -> AsyncOpenAI:
+    """
+    Get the shared AsyncOpenAI client.
+
+    Returns:
+        AsyncOpenAI: Client backed by the shared connection pool
+    """
+    return AsyncOpenAI(api_key=settings.openai_api_key, http_client=get_http_client())
+
+
+async def warm_openai_client() -> bool:
+    """
+    Open a pooled connection to OpenAI before the first real request.
+    
+    Lists models rather than running a completion, so the TCP and TLS
+    handshakes are paid at startup without spending any tokens.
+    
+    Returns:
+        bool: True if the connection was established
+    """
+    try:
+        await asyncio.wait_for(get_openai_client().models.list(), timeout=_WARMUP_TIMEOUT_SECONDS)
+        logger.info("OpenAI connection pool warmed up")
+        return True
+    except Exception as e:
+        logger.warning(f"OpenAI warm-up failed, first request will open the connection: {e}")
+        return False
+
+
+async def close_openai_client() -> None:
+    """Close the shared connection pool, e.g. on application shutdown."""
+    if get_http_client.cache_info().currsize:
+        await get_http_client().aclose()
+        get_http_client.cache_clear()
+        get_openai_client.cache_clear()
@@ -17,18 +17,20 @@ from __future__ import annotations as _annotations
 import logging
 import re
 import json
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Sequence, Set, Tuple
 from dataclasses import dataclass
 from difflib import SequenceMatcher
+from functools import lru_cache
 import unicodedata
 
 from openai import AsyncOpenAI
 from config.settings import settings
+from services.openai_client import get_openai_client
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class ProductMatch:
     """Represents a product match with confidence scoring."""
     
@@ -60,7 +62,7 @@ class ProductMatch:
             self.aliases = []
 
 
-@dataclass
+@dataclass(slots=True)
 class MatchResult:
     """Result of product matching operation."""
     
@@ -73,6 +75,36 @@ class MatchResult:
     processing_time_ms: int = 0
 
 
+_NOISE_WORDS = frozenset(['de', 'del', 'la', 'el', 'un', 'una', 'por', 'para', 'con'])
+# Lower bound below which match_fuzzy discards a similarity
+_MIN_FUZZY_SIMILARITY = 0.45
+
+
+# Reason: catalog names, aliases and keywords are re-normalized for every query,
+# so memoizing turns that into a dict lookup after the first message
+@lru_cache(maxsize=16384)
+def _normalize_text(text: Optional[str]) -> str:
+    """Normalize text for matching; see ProductMatcher.normalize_text."""
+    if not text:
+        return ""
+        
+    # Convert to lowercase
+    text = text.lower().strip()
+    
+    # Remove accents and special characters
+    text = unicodedata.normalize('NFD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    
+    # Remove extra whitespace
+    text = re.sub(r'\s+', ' ', text)
+    
+    # Remove common noise words for product matching
+    words = text.split()
+    words = [w for w in words if w not in _NOISE_WORDS]
+    
+    return ' '.join(words)
+
+
 class ProductMatcher:
     """
     Intelligent product matching engine with multi-level algorithms.
@@ -104,6 +136,11 @@ class ProductMatcher:
         self.logger = logging.getLogger(f"{__name__}.{self.__class__.__name__}")
         # Initialize OpenAI client for AI enhancement (lazy loading)
         self._openai_client = None
+        # Fuzzy-match texts prepared per product of the last catalog seen, filled lazily
+        self._indexed_catalog: Optional[Sequence[Dict[str, Any]]] = None
+        self._catalog_text_matchers: List[Optional[List[Tuple[str, str, SequenceMatcher]]]] = []
+        # Normalized name/alias/misspelling/keyword -> positions of the products that have it
+        self._catalog_exact_index: Dict[str, Set[int]] = {}
         
     def normalize_text(self, text: str) -> str:
         """
@@ -115,25 +152,7 @@ class ProductMatcher:
         Returns:
             Normalized text suitable for matching
         """
-        if not text:
-            return ""
-            
-        # Convert to lowercase
-        text = text.lower().strip()
-        
-        # Remove accents and special characters
-        text = unicodedata.normalize('NFD', text)
-        text = ''.join(c for c in text if not unicodedata.combining(c))
-        
-        # Remove extra whitespace
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove common noise words for product matching
-        noise_words = ['de', 'del', 'la', 'el', 'un', 'una', 'por', 'para', 'con']
-        words = text.split()
-        words = [w for w in words if w not in noise_words]
-        
-        return ' '.join(words)
+        return _normalize_text(text)
     
     def extract_product_terms(self, query: str) -> List[str]:
         """
@@ -401,16 +420,16 @@ class ProductMatcher:
         
         return None
     
-    def match_fuzzy(self, query_terms: List[str], product: Dict[str, Any]) -> Optional[ProductMatch]:
+    @staticmethod
+    def _fuzzy_text_matchers(product: Dict[str, Any]) -> List[Tuple[str, str, SequenceMatcher]]:
         """
-        Try fuzzy matching against product name and aliases.
+        Build one SequenceMatcher per searchable text (name, aliases, brand) of a product.
         
         Args:
-            query_terms: Extracted terms from customer query
             product: Product dictionary from database
             
         Returns:
-            ProductMatch if found, None otherwise
+            List of (original text, normalized text, matcher) tuples
         """
         # Collect all searchable text for this product
         searchable_texts = [product['name']]
@@ -419,13 +438,111 @@ class ProductMatcher:
         if product.get('brand'):
             searchable_texts.append(product['brand'])
         
+        return [
+            (text, _normalize_text(text), SequenceMatcher(None, "", _normalize_text(text)))
+            for text in searchable_texts if text
+        ]
+    
+    @staticmethod
+    def _build_exact_index(product_catalog: Sequence[Dict[str, Any]]) -> Dict[str, Set[int]]:
+        """
+        Index every text the exact-match stages compare against by its normalized form.
+        
+        Args:
+            product_catalog: Catalog being matched
+            
+        Returns:
+            Dict mapping normalized texts to the positions of the products having them
+        """
+        index: Dict[str, Set[int]] = {}
+        for position, product in enumerate(product_catalog):
+            texts = [product['name']]
+            for field in ('aliases', 'common_misspellings', 'keywords'):
+                texts.extend(product.get(field) or ())
+            for text in texts:
+                index.setdefault(_normalize_text(text), set()).add(position)
+        return index
+    
+    def _prepare_catalog(self, product_catalog: Sequence[Dict[str, Any]]) -> None:
+        """
+        Reset the per-catalog data when a different catalog is passed in.
+        
+        The exact-match index is built right away; fuzzy matchers are filled in
+        lazily by _text_matchers_for.
+        """
+        if product_catalog is not self._indexed_catalog:
+            self._indexed_catalog = product_catalog
+            self._catalog_text_matchers = [None] * len(product_catalog)
+            self._catalog_exact_index = self._build_exact_index(product_catalog)
+    
+    def _text_matchers_for(
+        self, product_catalog: Sequence[Dict[str, Any]], index: int
+    ) -> List[Tuple[str, str, SequenceMatcher]]:
+        """
+        Get the fuzzy-match texts of a catalog product, prepared once per catalog.
+        
+        Callers that cache their catalog pass the same sequence on every query, so
+        the matchers are built on the first query that reaches the fuzzy stage and
+        reused until a different catalog is passed in.
+        
+        Args:
+            product_catalog: Catalog being matched
+            index: Position of the product in the catalog
+            
+        Returns:
+            List of (original text, normalized text, matcher) tuples
+        """
+        self._prepare_catalog(product_catalog)
+        
+        text_matchers = self._catalog_text_matchers[index]
+        if text_matchers is None:
+            text_matchers = self._fuzzy_text_matchers(product_catalog[index])
+            self._catalog_text_matchers[index] = text_matchers
+        return text_matchers
+    
+    def match_fuzzy(
+        self,
+        query_terms: List[str],
+        product: Dict[str, Any],
+        text_matchers: Optional[List[Tuple[str, str, SequenceMatcher]]] = None
+    ) -> Optional[ProductMatch]:
+        """
+        Try fuzzy matching against product name and aliases.
+        
+        Args:
+            query_terms: Extracted terms from customer query
+            product: Product dictionary from database
+            text_matchers: Prepared matchers for the product's texts, built if not given
+            
+        Returns:
+            ProductMatch if found, None otherwise
+        """
         best_similarity = 0.0
         best_matched_text = ""
         best_query_term = ""
         
+        # Reason: SequenceMatcher caches work on its second sequence, so one matcher
+        # per catalog text is built up front; the cheap upper bounds then skip pairs
+        # that cannot beat the current best (or reach the minimum), leaving results unchanged
+        if text_matchers is None:
+            text_matchers = self._fuzzy_text_matchers(product)
+        
         for term in query_terms:
-            for text in searchable_texts:
-                similarity = self.fuzzy_similarity(term, text)
+            if not term:
+                continue
+            norm_term = _normalize_text(term)
+            for text, norm_text, matcher in text_matchers:
+                if norm_term == norm_text:
+                    similarity = 1.0
+                else:
+                    matcher.set_seq1(norm_term)
+                    upper_bound = matcher.real_quick_ratio()
+                    if upper_bound <= best_similarity or upper_bound < _MIN_FUZZY_SIMILARITY:
+                        continue
+                    upper_bound = matcher.quick_ratio()
+                    if upper_bound <= best_similarity or upper_bound < _MIN_FUZZY_SIMILARITY:
+                        continue
+                    similarity = matcher.ratio()
                 if similarity > best_similarity:
                     best_similarity = similarity
                     best_matched_text = text
@@ -436,7 +553,7 @@ class ProductMatcher:
             match_type = 'FUZZY_HIGH'
         elif best_similarity >= 0.65:
             match_type = 'FUZZY_MEDIUM'
-        elif best_similarity >= 0.45:
+        elif best_similarity >= _MIN_FUZZY_SIMILARITY:
             match_type = 'FUZZY_LOW'
         else:
             return None  # Too low similarity
@@ -462,7 +579,7 @@ class ProductMatcher:
             aliases=product.get('aliases', [])
         )
     
-    def find_product_matches(self, query: str, product_catalog: List[Dict[str, Any]]) -> List[ProductMatch]:
+    def find_product_matches(self, query: str, product_catalog: Sequence[Dict[str, Any]]) -> List[ProductMatch]:
         """
         Find all possible product matches for a query.
         
@@ -481,7 +598,14 @@ class ProductMatcher:
         
         self.logger.debug(f"Matching query '{query}' with terms: {query_terms}")
         
-        for product in product_catalog:
+        # Reason: stages 1-4 are equality checks on normalized texts, so only products
+        # whose indexed texts equal a query term can match them; the rest skip to stage 5
+        self._prepare_catalog(product_catalog)
+        exact_candidates: Set[int] = set()
+        for term in query_terms:
+            exact_candidates.update(self._catalog_exact_index.get(term, ()))
+        
+        for index, product in enumerate(product_catalog):
             # Skip inactive or out-of-stock products
             if not product.get('active', True) or not product.get('in_stock', True):
                 continue
@@ -489,29 +613,30 @@ class ProductMatcher:
             # Try each matching algorithm in order of preference
             match = None
             
-            # 1. Exact name match (highest confidence)
-            match = self.match_exact_name(query_terms, product)
-            if match:
-                matches.append(match)
-                continue
-            
-            # 2. Alias match
-            match = self.match_aliases(query_terms, product)
-            if match:
-                matches.append(match)
-                continue
-            
-            # 3. Common misspellings
-            match = self.match_common_misspellings(query_terms, product)
-            if match:
-                matches.append(match)
-                continue
-            
-            # 4. Keyword match
-            match = self.match_keywords(query_terms, product)
-            if match:
-                matches.append(match)
-                continue
+            if index in exact_candidates:
+                # 1. Exact name match (highest confidence)
+                match = self.match_exact_name(query_terms, product)
+                if match:
+                    matches.append(match)
+                    continue
+                
+                # 2. Alias match
+                match = self.match_aliases(query_terms, product)
+                if match:
+                    matches.append(match)
+                    continue
+                
+                # 3. Common misspellings
+                match = self.match_common_misspellings(query_terms, product)
+                if match:
+                    matches.append(match)
+                    continue
+                
+                # 4. Keyword match
+                match = self.match_keywords(query_terms, product)
+                if match:
+                    matches.append(match)
+                    continue
             
             # 5. AI training examples
             match = self.match_ai_training_examples(query, product)
@@ -520,7 +645,9 @@ class ProductMatcher:
                 continue
             
             # 6. Fuzzy match (lowest confidence)
-            match = self.match_fuzzy(query_terms, product)
+            match = self.match_fuzzy(
+                query_terms, product, self._text_matchers_for(product_catalog, index)
+            )
             if match:
                 matches.append(match)
         
@@ -609,7 +736,7 @@ class ProductMatcher:
     def _get_openai_client(self) -> AsyncOpenAI:
         """Get or create OpenAI client (lazy loading)."""
         if self._openai_client is None:
-            self._openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
+            self._openai_client = get_openai_client()
         return self._openai_client
     
     async def _ai_enhanced_selection(
@@ -707,7 +834,7 @@ Which product best matches the customer's intent? Respond with only the number (
         # Return None if AI enhancement fails - fallback to original matching
         return None
     
-    async def match_products(self, query: str, product_catalog: List[Dict[str, Any]]) -> MatchResult:
+    async def match_products(self, query: str, product_catalog: Sequence[Dict[str, Any]]) -> MatchResult:
         """
         Main method to match products with comprehensive result.
         
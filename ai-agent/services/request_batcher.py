@@ -0,0 +1,82 @@
+"""
+Request batching core for Order Agent system.
+
+Intent classification, message analysis and message AI-data writes all
+coalesce concurrent requests the same way: callers queue a request with a
+future, the first queued request starts a short timer, and the queue is sent
+as one batch when the timer fires or the batch is full. RequestBatcher owns
+that queue and timer; subclasses only build the batched request and map its
+rows back to each caller's future.
+"""
+
+from __future__ import annotations as _annotations
+
+import asyncio
+from typing import Any, List, Optional, Tuple
+
+
+class RequestBatcher:
+    """
+    Queue of concurrent requests flushed as one batch.
+
+    Subclasses queue requests with _enqueue() and implement _run_batch(),
+    resolving each caller's future with _resolve().
+    """
+
+    def __init__(self, max_batch_size: int, max_wait_seconds: float):
+        """
+        Initialize the batcher.
+
+        Args:
+            max_batch_size: Maximum requests per batch
+            max_wait_seconds: How long the first queued request waits for company
+        """
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    def _enqueue(self, request: Any) -> asyncio.Future:
+        """
+        Queue a request for the next batch.
+
+        Args:
+            request: Request data passed back to _run_batch
+
+        Returns:
+            asyncio.Future: Resolved with this request's result once its batch has run
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((request, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait_seconds, self._flush)
+
+        return future
+
+    def _flush(self) -> None:
+        """Send everything queued so far as one batch."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            asyncio.get_running_loop().create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        """Run a batch of (request, future) pairs and resolve every future."""
+        raise NotImplementedError
+
+    @staticmethod
+    def _resolve(future: asyncio.Future, result: Any) -> None:
+        """Resolve a caller's future with a result or exception, unless it is already done."""
+        if future.done():
+            return
+        if isinstance(result, BaseException):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
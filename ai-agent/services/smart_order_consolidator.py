@@ -34,7 +34,7 @@ class ConsolidationDecision(Enum):
     ORDER_COMPLETE = "order_complete" # Current session is complete, create order
 
 
-@dataclass
+@dataclass(slots=True)
 class MessageTimingPattern:
     """Analysis of message timing patterns."""
     time_since_last_message: timedelta
@@ -44,7 +44,7 @@ class MessageTimingPattern:
     completion_signals: List[str]  # detected completion keywords/patterns
 
 
-@dataclass
+@dataclass(slots=True)
 class ConsolidationAnalysis:
     """Result of consolidation analysis."""
     decision: ConsolidationDecision
@@ -0,0 +1,326 @@
+"""
+Tests for AgentFactory
+
+Tests agent selection, cached environment configuration and fallback handling.
+
+Run with: python -m pytest tests/test_agent_factory.py -v
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import agent_factory as factory_module
+from agents.agent_factory import (
+    AgentFactory, AgentType, UsageRecord, get_cached_agent_factory, reset_env_cache
+)
+
+
+@pytest.fixture
+def restore_env_cache():
+    """Re-read the real environment after a test patches it."""
+    yield
+    reset_env_cache()
+
+
+class TestEnvCache:
+    """Test suite for the cached environment configuration."""
+
+    def test_reset_env_cache_reads_flags(self, monkeypatch, restore_env_cache):
+        """Test that truthy values enable the simplified agent."""
+        monkeypatch.setenv('USE_SIMPLIFIED_AGENT', 'YES')
+        monkeypatch.setenv('AUTONOMOUS_FALLBACK_ENABLED', 'false')
+        reset_env_cache()
+
+        assert factory_module._USE_SIMPLIFIED is True
+        assert factory_module._FALLBACK_ENABLED is False
+        assert factory_module._SIMPLIFIED_AGENT_SETTING == 'YES'
+
+    def test_env_is_not_reread_per_call(self, monkeypatch, restore_env_cache):
+        """Test that env changes only apply after reset_env_cache."""
+        monkeypatch.setenv('USE_SIMPLIFIED_AGENT', 'false')
+        reset_env_cache()
+        monkeypatch.setenv('USE_SIMPLIFIED_AGENT', 'true')
+
+        assert factory_module._USE_SIMPLIFIED is False
+
+    def test_unknown_value_is_false(self, monkeypatch, restore_env_cache):
+        """Test that unrecognised values disable the flag."""
+        monkeypatch.setenv('USE_SIMPLIFIED_AGENT', 'maybe')
+        reset_env_cache()
+
+        assert factory_module._USE_SIMPLIFIED is False
+
+
+class TestAgentSelection:
+    """Test suite for agent creation and selection."""
+
+    @pytest.fixture
+    def factory(self):
+        """Create AgentFactory with a mocked database."""
+        return AgentFactory(AsyncMock(), "test_distributor")
+
+    def test_agent_getters_are_synchronous_and_cached(self, factory):
+        """Test that agent getters return the same instance without awaiting."""
+        agent = factory._get_streamlined_agent()
+
+        assert agent.__class__.__name__ == "StreamlinedOrderProcessor"
+        assert factory._get_streamlined_agent() is agent
+
+    @pytest.mark.asyncio
+    async def test_forced_agent_type(self, factory):
+        """Test forcing a specific agent type."""
+        agent = await factory.create_agent(force_agent_type=AgentType.AUTONOMOUS)
+        assert agent.__class__.__name__ == "SimplifiedAutonomousAgent"
+
+        agent = await factory.create_agent(force_agent_type=AgentType.STREAMLINED)
+        assert agent.__class__.__name__ == "StreamlinedOrderProcessor"
+
+    def test_warmup_creates_configured_agents(self, monkeypatch, restore_env_cache):
+        """Test that warmup creates only the agents the configuration can use."""
+        monkeypatch.setenv('USE_SIMPLIFIED_AGENT', 'false')
+        reset_env_cache()
+        factory = AgentFactory(AsyncMock(), "test_distributor")
+        factory.warmup()
+
+        assert factory._streamlined_agent is not None
+        assert factory._autonomous_agent is None
+
+        monkeypatch.setenv('USE_SIMPLIFIED_AGENT', 'true')
+        reset_env_cache()
+        factory = AgentFactory(AsyncMock(), "test_distributor")
+        factory.warmup()
+
+        assert factory._autonomous_agent is not None
+        assert factory._streamlined_agent is not None
+
+    @pytest.mark.asyncio
+    async def test_default_agent_type_resolved_at_init(self, monkeypatch, restore_env_cache):
+        """Test that the default agent type follows the env at construction time."""
+        monkeypatch.setenv('USE_SIMPLIFIED_AGENT', 'true')
+        reset_env_cache()
+        factory = AgentFactory(AsyncMock(), "test_distributor")
+
+        agent = await factory.create_agent()
+
+        assert agent.__class__.__name__ == "SimplifiedAutonomousAgent"
+
+class TestFactoryCache:
+    """Test suite for the shared factory cache."""
+
+    @pytest.mark.asyncio
+    async def test_cached_factory_is_reused(self):
+        """Test that the same database/distributor pair reuses one factory."""
+        database = AsyncMock()
+        factory = get_cached_agent_factory(database, "dist_a")
+
+        assert get_cached_agent_factory(database, "dist_a") is factory
+        assert get_cached_agent_factory(database, "dist_b") is not factory
+
+        await factory.close()
+        await get_cached_agent_factory(database, "dist_b").close()
+
+    @pytest.mark.asyncio
+    async def test_close_evicts_factory(self):
+        """Test that closing a factory removes it from the cache."""
+        database = AsyncMock()
+        factory = get_cached_agent_factory(database, "dist_a")
+        await factory.close()
+
+        replacement = get_cached_agent_factory(database, "dist_a")
+        assert replacement is not factory
+        await replacement.close()
+
+    @pytest.mark.asyncio
+    async def test_close_drains_agents_before_release(self):
+        """Test that close awaits each agent's own close before dropping it."""
+        factory = AgentFactory(AsyncMock(), "test_distributor")
+        autonomous = MagicMock(close=AsyncMock())
+        factory._autonomous_agent = autonomous
+        factory._streamlined_agent = MagicMock(spec=[])
+
+        await factory.close()
+
+        autonomous.close.assert_awaited_once()
+        assert factory._autonomous_agent is None
+
+
+class TestUsageLogging:
+    """Test suite for batched agent usage logging."""
+
+    @pytest.mark.asyncio
+    async def test_usage_records_are_flushed_in_one_batch(self):
+        """Test that records queued together are written as a single batch."""
+        factory = AgentFactory(AsyncMock(), "test_distributor")
+        batches = []
+        factory._flush_usage_batch = batches.append
+
+        factory._log_agent_usage("msg_1", "streamlined", "cust_1", True)
+        factory._log_agent_usage("msg_2", "streamlined", "cust_1", False)
+        await asyncio.sleep(0)
+
+        assert len(batches) == 1
+        assert [record.message_id for record in batches[0]] == ["msg_1", "msg_2"]
+        await factory.close()
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_pending_records(self):
+        """Test that close writes out records still in the queue."""
+        factory = AgentFactory(AsyncMock(), "test_distributor")
+        batches = []
+        factory._flush_usage_batch = batches.append
+
+        factory._usage_queue.put_nowait({'message_id': 'msg_1'})
+        await factory.close()
+
+        assert batches == [[{'message_id': 'msg_1'}]]
+
+    def test_usage_record_to_dict(self):
+        """Test that usage records serialise to the logged dict shape."""
+        record = UsageRecord(
+            message_id="msg_1",
+            distributor_id="dist_1",
+            customer_id=None,
+            agent_type="streamlined",
+            success=True,
+            timestamp="2025-01-01T00:00:00",
+            environment_config={'simplified_agent_enabled': 'false'}
+        )
+
+        assert record.to_dict()['agent_type'] == "streamlined"
+        assert record.to_dict()['environment_config'] == {'simplified_agent_enabled': 'false'}
+        with pytest.raises(AttributeError):
+            record.success = False
+
+    def test_full_queue_drops_record(self):
+        """Test that a full queue drops records instead of raising."""
+        factory = AgentFactory(AsyncMock(), "test_distributor")
+        factory._usage_queue = asyncio.Queue(maxsize=1)
+        factory._usage_queue.put_nowait({'message_id': 'queued'})
+        factory._ensure_usage_flusher = lambda: None
+
+        factory._log_agent_usage("msg_2", "streamlined", None, True)
+
+        assert factory._usage_queue.qsize() == 1
+
+
+
+class TestAgentCapabilities:
+    """Test suite for agent capability descriptions."""
+
+    def test_capabilities_are_shared_and_read_only(self):
+        """Test that capabilities are returned from a shared read-only mapping."""
+        factory = AgentFactory(AsyncMock(), "test_distributor")
+        capabilities = factory.get_agent_capabilities(AgentType.AUTONOMOUS)
+
+        assert capabilities["name"] == "Autonomous Order Agent"
+        assert len(capabilities["features"]) == 6
+        assert factory.get_agent_capabilities(AgentType.AUTONOMOUS) is capabilities
+        with pytest.raises(TypeError):
+            capabilities["name"] = "changed"
+
+    def test_unknown_agent_type_has_no_capabilities(self):
+        """Test that agent types without a description return an empty mapping."""
+        factory = AgentFactory(AsyncMock(), "test_distributor")
+
+        assert dict(factory.get_agent_capabilities(AgentType.FALLBACK)) == {}
+
+
+class TestProcessMessage:
+    """Test suite for processing messages with the best agent."""
+
+    @pytest.fixture
+    def autonomous_factory(self, monkeypatch, restore_env_cache):
+        """Create a factory that defaults to the autonomous agent with mocked agents."""
+        monkeypatch.setenv('USE_SIMPLIFIED_AGENT', 'true')
+        monkeypatch.setenv('AUTONOMOUS_FALLBACK_ENABLED', 'true')
+        reset_env_cache()
+        factory = AgentFactory(AsyncMock(), "test_distributor")
+        factory._autonomous_agent = AsyncMock()
+        factory._streamlined_agent = AsyncMock()
+        factory.usage = []
+        factory._log_agent_usage = lambda *args: factory.usage.append(args)
+        return factory
+
+    @pytest.mark.asyncio
+    async def test_autonomous_success(self, autonomous_factory):
+        """Test that a successful autonomous result is returned directly."""
+        autonomous_factory._autonomous_agent.process_message.return_value = {'success': True}
+
+        result = await autonomous_factory.process_message_with_best_agent({'id': 'msg_1'})
+
+        assert result == {'success': True}
+        autonomous_factory._streamlined_agent.process_message.assert_not_called()
+        assert autonomous_factory.usage == [('msg_1', 'autonomous', None, True)]
+
+    @pytest.mark.asyncio
+    async def test_autonomous_none_falls_back(self, autonomous_factory):
+        """Test that an empty autonomous result falls back to the streamlined agent."""
+        autonomous_factory._autonomous_agent.process_message.return_value = None
+        autonomous_factory._streamlined_agent.process_message.return_value = {'success': True}
+
+        result = await autonomous_factory.process_message_with_best_agent(
+            {'id': 'msg_1', 'customer_id': 'cust_1'}
+        )
+
+        assert result == {'success': True}
+        assert autonomous_factory.usage == [('msg_1', 'autonomous_fallback', 'cust_1', True)]
+
+    @pytest.mark.asyncio
+    async def test_all_agents_fail(self, autonomous_factory):
+        """Test that None is returned and failure logged when no agent succeeds."""
+        autonomous_factory._autonomous_agent.process_message.side_effect = RuntimeError("boom")
+        autonomous_factory._streamlined_agent.process_message.return_value = None
+
+        result = await autonomous_factory.process_message_with_best_agent({'id': 'msg_1'})
+
+        assert result is None
+        assert autonomous_factory.usage == [('msg_1', 'failed', None, False)]
+
+    @pytest.mark.asyncio
+    async def test_error_uses_emergency_fallback(self, autonomous_factory):
+        """Test that an exception from the primary agent triggers the emergency fallback."""
+        autonomous_factory._autonomous_agent.process_message.side_effect = RuntimeError("boom")
+        autonomous_factory._streamlined_agent.process_message.return_value = {'success': True}
+
+        result = await autonomous_factory.process_message_with_best_agent({'id': 'msg_1'})
+
+        assert result == {'success': True}
+        assert autonomous_factory.usage == [('msg_1', 'emergency_fallback', None, True)]
+
+    @pytest.mark.asyncio
+    async def test_no_fallback_when_disabled(self, autonomous_factory, monkeypatch):
+        """Test that an empty result is final when fallback is disabled."""
+        monkeypatch.setattr(factory_module, '_FALLBACK_ENABLED', False)
+        autonomous_factory._autonomous_agent.process_message.return_value = None
+
+        result = await autonomous_factory.process_message_with_best_agent({'id': 'msg_1'})
+
+        assert result is None
+        autonomous_factory._streamlined_agent.process_message.assert_not_called()
+        assert autonomous_factory.usage == [('msg_1', 'autonomous', None, False)]
+
+
+class TestHealthStatus:
+    """Test suite for the factory health status."""
+
+    def test_health_status_reflects_initialized_agents(self):
+        """Test that health status is synchronous and tracks agent initialization."""
+        factory = AgentFactory(AsyncMock(), "test_distributor")
+
+        health = factory.get_agent_health_status()
+        assert health["factory_status"] == "healthy"
+        assert health["distributor_id"] == "test_distributor"
+        assert health["agents"]["streamlined"]["initialized"] is False
+
+        factory._get_streamlined_agent()
+        assert factory.get_agent_health_status()["agents"]["streamlined"]["initialized"] is True
+
+    def test_health_status_without_database(self):
+        """Test that a missing database is reported as disconnected."""
+        factory = AgentFactory(None, "test_distributor")
+
+        assert factory.get_agent_health_status()["database_status"] == "disconnected"
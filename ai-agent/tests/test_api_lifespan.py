@@ -0,0 +1,80 @@
+"""
+Tests for the API lifespan
+
+Tests that shutdown drains the agents' background writes before the
+database client is closed.
+
+Run with: python -m pytest tests/test_api_lifespan.py -v
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api
+from agents.autonomous_order_agent import AutonomousOrderAgent
+from schemas.autonomous_agent import LearningEvent
+from services.conversation_memory import ConversationMemory
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """Patch the lifespan's services so startup needs no network."""
+    database = MagicMock(close=AsyncMock())
+    monkeypatch.setattr(api, 'DatabaseService', lambda: database)
+    monkeypatch.setattr(api, 'get_current_distributor_id', lambda: "test_distributor")
+    monkeypatch.setattr(api, 'warm_openai_client', AsyncMock())
+    monkeypatch.setattr(api, 'close_openai_client', AsyncMock())
+    return database
+
+
+class TestLifespanShutdown:
+    """Test suite for draining background work on shutdown."""
+
+    @pytest.mark.asyncio
+    async def test_agents_are_closed_before_database(self, database):
+        """Test that the factory drains its agents before the database client closes."""
+        calls = []
+        agent = MagicMock(close=AsyncMock(side_effect=lambda: calls.append("agent")))
+        database.close.side_effect = lambda: calls.append("database")
+
+        async with api.lifespan(api.app):
+            api.agent_factory._autonomous_agent = agent
+
+        assert calls == ["agent", "database"]
+        api.close_openai_client.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_queued_learning_events_are_written_on_shutdown(self, database, monkeypatch):
+        """Test that learning events still queued at shutdown reach the database before it closes."""
+        from services import conversation_memory
+        monkeypatch.setattr(conversation_memory, '_LEARNING_FLUSH_SECONDS', 0.05)
+        calls = []
+        database.insert_many = AsyncMock(side_effect=lambda table, rows: calls.append((table, len(rows))) or len(rows))
+        database.close.side_effect = lambda: calls.append("database")
+
+        async with api.lifespan(api.app):
+            # Only the state close() drains is needed, as in the other agent tests
+            agent = AutonomousOrderAgent.__new__(AutonomousOrderAgent)
+            agent._pending_writes = set()
+            agent._msg_update_queue = asyncio.Queue()
+            agent._msg_flusher_task = None
+            agent.memory_service = ConversationMemory(database)
+            api.agent_factory._autonomous_agent = agent
+            for customer_id in ("customer_0", "customer_1"):
+                agent.memory_service.queue_learning_event(LearningEvent(
+                    event_type="successful_autonomous_action",
+                    context_summary="Action: create_order",
+                    action_taken="create_order",
+                    outcome="success",
+                    expected_outcome="positive_customer_interaction",
+                    success_metrics={"goal_score": 0.9},
+                    lesson_learned="Order created",
+                    customer_id=customer_id,
+                    distributor_id="test_distributor"
+                ))
+
+        assert calls == [("learning_events", 2), "database"]
@@ -0,0 +1,477 @@
+"""
+Tests for AutonomousOrderAgent order capture
+
+Tests the consolidation/validation/creation pipeline in _capture_order_autonomous,
+batched background message updates and duplicate coalescing in process_message, the
+fallback handoff to the streamlined agent, and the lazily built Pydantic AI agent.
+
+Run with: python -m pytest tests/test_autonomous_capture.py -v
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import autonomous_order_agent as agent_module
+from agents import order_agent as order_agent_module
+from agents.autonomous_order_agent import (
+    AutonomousOrderAgent, FallbackContext, IncomingMessage, NormalizedMessage
+)
+from agents.order_agent import StreamlinedOrderProcessor
+from services.intent_classifier import IntentClassificationResult, MessageIntent
+from schemas.message import ExtractedProduct
+from schemas.order import OrderProduct
+from services.smart_order_consolidator import ConsolidationDecision
+from config.feature_flags import AutonomousAgentFeature, FeatureFlagStatus, create_default_feature_flags
+
+
+def _consolidation(decision: ConsolidationDecision) -> SimpleNamespace:
+    """Build a consolidation analysis with the given decision."""
+    return SimpleNamespace(
+        decision=decision, confidence=0.9, reasoning="test", wait_duration_minutes=5
+    )
+
+
+@pytest.fixture
+def agent():
+    """Create agent with mocked consolidation, validation and order services."""
+    agent = AutonomousOrderAgent.__new__(AutonomousOrderAgent)
+    agent.consolidator = MagicMock()
+    agent.validator = MagicMock()
+    agent.order_creator = MagicMock()
+    agent.validator.validate_products_with_flags = AsyncMock(return_value=SimpleNamespace(
+        validated_products=[], confidence_score=0.9, requires_human_validation=False,
+        validation_summary="ok"
+    ))
+    agent.order_creator.create_autonomous_order = AsyncMock(return_value=SimpleNamespace(
+        success=True, order_id="order_1", created_products_count=1,
+        pending_products_count=0, human_validation_notes=[]
+    ))
+    return agent
+
+
+MESSAGE = {'id': 'msg_1', 'content': 'quiero dos leche', 'conversation_id': 'conv_1'}
+
+
+class TestCaptureOrderAutonomous:
+    """Test suite for _capture_order_autonomous."""
+
+    @pytest.mark.asyncio
+    async def test_consolidation_and_validation_overlap(self, agent):
+        """Test that validation runs while consolidation is still waiting on I/O."""
+        validation_started = asyncio.Event()
+
+        async def analyze(*args):
+            await asyncio.wait_for(validation_started.wait(), timeout=1)
+            return _consolidation(ConsolidationDecision.NEW_ORDER)
+
+        async def validate(*args):
+            validation_started.set()
+            return SimpleNamespace(
+                validated_products=[], confidence_score=0.9,
+                requires_human_validation=False, validation_summary="ok"
+            )
+
+        agent.consolidator.analyze_for_consolidation = analyze
+        agent.validator.validate_products_with_flags = validate
+
+        result = await agent._capture_order_autonomous(MESSAGE, None)
+
+        assert result['success'] is True
+        assert result['order_id'] == "order_1"
+
+    @pytest.mark.asyncio
+    async def test_wait_more_skips_order_creation(self, agent):
+        """Test that a WAIT_MORE decision returns without creating an order."""
+        agent.consolidator.analyze_for_consolidation = AsyncMock(
+            return_value=_consolidation(ConsolidationDecision.WAIT_MORE)
+        )
+
+        result = await agent._capture_order_autonomous(MESSAGE, None)
+
+        assert result['action'] == 'waiting_for_more_messages'
+        agent.order_creator.create_autonomous_order.assert_not_called()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("decision", [
+        ConsolidationDecision.NEW_ORDER,
+        ConsolidationDecision.CONSOLIDATE,
+        ConsolidationDecision.ORDER_COMPLETE,
+    ])
+    async def test_other_decisions_create_order(self, agent, decision):
+        """Test that decisions without an early handler go on to create the order."""
+        agent.consolidator.analyze_for_consolidation = AsyncMock(return_value=_consolidation(decision))
+
+        result = await agent._capture_order_autonomous(MESSAGE, None)
+
+        assert result['order_id'] == "order_1"
+        assert result['consolidation_info']['decision'] == decision.value
+
+    @pytest.mark.asyncio
+    async def test_order_uses_unpacked_message_fields(self, agent):
+        """Test that the order is created from the once-unpacked webhook fields."""
+        agent.consolidator.analyze_for_consolidation = AsyncMock(
+            return_value=_consolidation(ConsolidationDecision.NEW_ORDER)
+        )
+        incoming = IncomingMessage.from_dict(dict(MESSAGE, customer_id='cust_1', channel=None))
+
+        await agent._capture_order_autonomous(MESSAGE, None, incoming=incoming)
+
+        kwargs = agent.order_creator.create_autonomous_order.call_args.kwargs
+        assert kwargs['customer_id'] == 'cust_1'
+        assert kwargs['conversation_id'] == 'conv_1'
+        assert kwargs['source_message_ids'] == ['msg_1']
+        assert kwargs['channel'] == 'WHATSAPP'
+
+    @pytest.mark.asyncio
+    async def test_no_products_skips_analysis(self, agent):
+        """Test that messages without products stop before consolidation."""
+        agent.consolidator.analyze_for_consolidation = AsyncMock()
+
+        result = await agent._capture_order_autonomous({'content': 'hola'}, None)
+
+        assert result['success'] is False
+        agent.consolidator.analyze_for_consolidation.assert_not_called()
+
+
+class TestCreateOrderAutonomous:
+    """Test suite for _create_order_autonomous."""
+
+    @pytest.mark.asyncio
+    async def test_status_counts(self, agent, monkeypatch):
+        """Test that confirmed and pending products are counted while converting."""
+        created = []
+
+        async def create_order(database, order_creation):
+            created.append(order_creation)
+            return "order_1"
+
+        monkeypatch.setattr(agent_module, 'create_order', create_order)
+        agent.distributor_id = "dist_1"
+        agent.database = MagicMock()
+        products = [
+            ExtractedProduct(
+                product_name="leche", quantity=2, original_text="dos leche", confidence=0.9, status=status
+            )
+            for status in ("confirmed", "pending", "confirmed")
+        ]
+
+        result = await agent._create_order_autonomous(
+            dict(MESSAGE, customer_id='cust_1'), products, 0.9
+        )
+
+        assert result['products_processed'] == 3
+        assert result['products_confirmed'] == 2
+        assert result['products_pending_human_review'] == 1
+        assert [p.quantity for p in created[0].products] == [2, 2, 2]
+
+    @pytest.mark.asyncio
+    async def test_products_match_validated_construction(self, agent, monkeypatch):
+        """Test that unvalidated OrderProducts equal what full validation would build."""
+        created = []
+
+        async def create_order(database, order_creation):
+            created.append(order_creation)
+            return "order_1"
+
+        monkeypatch.setattr(agent_module, 'create_order', create_order)
+        agent.distributor_id = "dist_1"
+        agent.database = MagicMock()
+        extracted = ExtractedProduct(
+            product_name="Leche", quantity=2, unit=" Litros ", original_text=" dos leche ",
+            confidence=0.9, matched_product_id="prod_1", matched_product_name="Leche Entera "
+        )
+
+        await agent._create_order_autonomous(dict(MESSAGE, customer_id='cust_1'), [extracted], 0.9)
+
+        expected = OrderProduct(
+            product_name="Leche Entera ", quantity=2, unit=" Litros ", unit_price=None,
+            line_price=None, ai_confidence=0.9, original_text="dos leche",
+            matched_product_id="prod_1", matching_confidence=0.9
+        )
+        assert created[0].products[0].model_dump() == expected.model_dump()
+
+
+class TestAutonomousAgentFactory:
+    """Test suite for the lazily built Pydantic AI agent."""
+
+    def test_agent_is_built_once_with_tools(self):
+        """Test that the agent is cached and has both tools registered."""
+        from agents.autonomous_order_agent import get_autonomous_agent
+
+        agent = get_autonomous_agent()
+
+        assert get_autonomous_agent() is agent
+        assert set(agent._function_tools) == {
+            'analyze_customer_message', 'generate_possible_actions'
+        }
+
+
+class TestBackgroundMessageUpdate:
+    """Test suite for the batched, off-critical-path message update."""
+
+    @pytest.fixture
+    def queued_agent(self, agent, monkeypatch):
+        """Agent with a real update queue and a database that records batched updates."""
+        monkeypatch.setattr(agent_module, 'intent_batch_scheduler', MagicMock(classify=AsyncMock(
+            return_value=IntentClassificationResult(MessageIntent.ORDER_RELATED, 0.9, "order")
+        )))
+        agent._pending_writes = set()
+        agent._inflight = {}
+        agent._msg_update_queue = asyncio.Queue()
+        agent._msg_flusher_task = None
+        agent._flags = agent_module.FLAG_AUTONOMOUS
+        agent._capture_order_autonomous = AsyncMock(return_value={'success': True, 'order_id': 'order_1'})
+        agent.database = MagicMock(update_many=AsyncMock(return_value=1))
+        agent.memory_service = MagicMock(close=AsyncMock())
+        return agent
+
+    @pytest.mark.asyncio
+    async def test_result_returned_before_update_is_written(self, queued_agent):
+        """Test that process_message returns before the message update reaches the database."""
+        result = await queued_agent.process_message(MESSAGE)
+
+        assert result.created_order_id == 'order_1'
+        queued_agent.database.update_many.assert_not_called()
+
+        await queued_agent.close()
+
+        table, updates = queued_agent.database.update_many.call_args.args
+        assert table == 'messages'
+        assert [message_id for message_id, _ in updates] == ['msg_1']
+        assert updates[0][1]['ai_extracted_intent'] == 'AUTONOMOUS_PROCESSED'
+
+    @pytest.mark.asyncio
+    async def test_concurrent_updates_share_one_batch(self, queued_agent):
+        """Test that updates queued together are written in a single call."""
+        await asyncio.gather(*(
+            queued_agent.process_message(dict(MESSAGE, id=f'msg_{i}')) for i in range(3)
+        ))
+        await queued_agent.close()
+
+        queued_agent.database.update_many.assert_awaited_once()
+        updates = queued_agent.database.update_many.call_args.args[1]
+        assert [message_id for message_id, _ in updates] == ['msg_0', 'msg_1', 'msg_2']
+
+    @pytest.mark.asyncio
+    async def test_repeated_message_updates_are_merged(self, queued_agent):
+        """Test that later updates to the same message override earlier fields."""
+        await queued_agent._flush_message_updates([
+            ('msg_1', {'ai_confidence': 0.5, 'ai_processed': True}),
+            ('msg_1', {'ai_confidence': 0.9}),
+        ])
+
+        updates = queued_agent.database.update_many.call_args.args[1]
+        assert updates == [('msg_1', {'ai_confidence': 0.9, 'ai_processed': True})]
+
+
+class TestInflightCoalescing:
+    """Test suite for coalescing duplicate in-flight messages."""
+
+    @pytest.fixture
+    def coalescing_agent(self):
+        """Create agent whose pipeline blocks until released."""
+        agent = AutonomousOrderAgent.__new__(AutonomousOrderAgent)
+        agent._inflight = {}
+        agent.release = asyncio.Event()
+        agent.calls = []
+
+        async def inner(message_data):
+            agent.calls.append(message_data.get('id'))
+            await agent.release.wait()
+            return {'processed': message_data.get('content')}
+
+        agent._process_message_inner = inner
+        return agent
+
+    @pytest.mark.asyncio
+    async def test_duplicate_delivery_shares_result(self, coalescing_agent):
+        """Test that a retried delivery awaits the first run instead of re-running."""
+        first = asyncio.ensure_future(coalescing_agent.process_message(MESSAGE))
+        second = asyncio.ensure_future(coalescing_agent.process_message(dict(MESSAGE)))
+        await asyncio.sleep(0)
+        coalescing_agent.release.set()
+
+        assert await first == await second == {'processed': 'quiero dos leche'}
+        assert coalescing_agent.calls == ['msg_1']
+        assert coalescing_agent._inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_messages_without_id_key_on_content(self, coalescing_agent):
+        """Test that id-less messages coalesce only when customer and content match."""
+        coalescing_agent.release.set()
+        same = {'customer_id': 'c1', 'content': 'hola'}
+
+        await asyncio.gather(
+            coalescing_agent.process_message(same),
+            coalescing_agent.process_message(dict(same)),
+            coalescing_agent.process_message({'customer_id': 'c2', 'content': 'hola'})
+        )
+
+        assert len(coalescing_agent.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_shared_work(self, coalescing_agent):
+        """Test that cancelling one waiter leaves the other with a result."""
+        first = asyncio.ensure_future(coalescing_agent.process_message(MESSAGE))
+        second = asyncio.ensure_future(coalescing_agent.process_message(MESSAGE))
+        await asyncio.sleep(0)
+        first.cancel()
+        coalescing_agent.release.set()
+
+        assert await second == {'processed': 'quiero dos leche'}
+
+
+class TestFallbackHandoff:
+    """Test suite for handing precomputed work to the streamlined fallback."""
+
+    NOT_ORDER = IntentClassificationResult(MessageIntent.NOT_ORDER_RELATED, 0.95, "greeting")
+
+    @pytest.mark.asyncio
+    async def test_not_order_related_passes_intent_and_message(self, agent, monkeypatch):
+        """Test that the fallback receives the classification instead of redoing it."""
+        monkeypatch.setattr(agent_module, 'intent_batch_scheduler', MagicMock(
+            classify=AsyncMock(return_value=self.NOT_ORDER)
+        ))
+        agent._flags = agent_module.FLAG_AUTONOMOUS
+        agent._fallback_processor = MagicMock(process_message=AsyncMock(
+            return_value=SimpleNamespace(processing_time_ms=5)
+        ))
+
+        result = await agent._process_message_inner(MESSAGE)
+
+        assert result.fallback_used is True
+        precomputed = agent._fallback_processor.process_message.call_args.kwargs['precomputed']
+        assert precomputed.intent_result is self.NOT_ORDER
+        assert precomputed.message.raw == 'quiero dos leche'
+
+    @pytest.mark.asyncio
+    async def test_fallback_processor_is_built_once(self, agent, monkeypatch):
+        """Test that concurrent fallbacks share one lazily created processor."""
+        created = []
+
+        class FakeProcessor:
+            def __init__(self, database, distributor_id):
+                created.append(self)
+
+            async def process_message(self, message_data, precomputed=None):
+                return SimpleNamespace(processing_time_ms=1)
+
+        monkeypatch.setattr(order_agent_module, 'StreamlinedOrderProcessor', FakeProcessor)
+        agent.database = MagicMock()
+        agent.distributor_id = "dist_1"
+
+        results = await asyncio.gather(*(agent._fallback_to_existing_agent(MESSAGE) for _ in range(3)))
+
+        assert all(result.fallback_used for result in results)
+        assert len(created) == 1
+        assert agent._fallback_processor is created[0]
+
+    @pytest.fixture
+    def processor(self, monkeypatch):
+        """Create a streamlined processor with OpenAI analysis and DB writes mocked."""
+        monkeypatch.setattr(order_agent_module, 'update_message_ai_data', AsyncMock())
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+        processor._get_simple_context = AsyncMock(return_value="No previous context")
+        processor._analyze_with_openai = AsyncMock(return_value=None)
+        return processor
+
+    @pytest.mark.asyncio
+    async def test_confident_not_order_skips_openai_analysis(self, processor):
+        """Test that a confident non-order classification short-circuits the analysis."""
+        precomputed = FallbackContext(
+            message=NormalizedMessage.from_content(' hola '), intent_result=self.NOT_ORDER
+        )
+
+        analysis = await processor.process_message(MESSAGE, precomputed=precomputed)
+
+        assert analysis.intent.intent == "OTHER"
+        assert analysis.extracted_products == []
+        processor._analyze_with_openai.assert_not_called()
+        processor._get_simple_context.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_uncertain_intent_still_uses_openai(self, processor):
+        """Test that low-confidence or order-related results run the full analysis."""
+        for intent_result in (
+            IntentClassificationResult(MessageIntent.NOT_ORDER_RELATED, 0.5, "unsure"),
+            IntentClassificationResult(MessageIntent.ORDER_RELATED, 0.95, "order"),
+        ):
+            await processor.process_message(
+                MESSAGE, precomputed=FallbackContext(intent_result=intent_result)
+            )
+
+        assert processor._analyze_with_openai.await_count == 2
+        assert processor._analyze_with_openai.call_args.args[0] == 'quiero dos leche'
+
+    @pytest.mark.parametrize("content,expected", [
+        ("Hola, quiero leche", "OTHER"),
+        ("me das dos panes", "BUY"),
+        ("cuanto cuesta el arroz", "QUESTION"),
+        ("llegó?", "QUESTION"),
+        ("el pedido vino equivocado", "BUY"),
+        ("vino equivocado", "COMPLAINT"),
+        ("ok gracias", "OTHER"),
+        ("QUIERO unos chips", "BUY"),
+        ("todo normal, hay pan?", "QUESTION"),
+        ("precios por favor", "QUESTION"),
+        ("tienen catalogos", "QUESTION"),
+        ("dos problemas", "COMPLAINT"),
+    ])
+    def test_parse_intent_keyword_priority(self, processor, content, expected):
+        """Test that the fallback keeps greeting > buy > question > complaint on whole words."""
+        assert processor._parse_intent("", content).intent == expected
+
+
+class TestFeatureFlagBitmap:
+    """Test suite for the feature flag bitmap resolved at construction."""
+
+    @pytest.fixture
+    def flag_config(self, monkeypatch):
+        """Patch the agent module with a fresh default flag configuration."""
+        config = create_default_feature_flags()
+        monkeypatch.setattr(agent_module, 'feature_flags', config)
+        return config
+
+    def test_resolve_feature_flags(self, flag_config):
+        """Test that each flag state maps to the expected bits."""
+        assert agent_module.resolve_feature_flags("dist_1") == agent_module.FLAG_FALLBACK
+
+        flag_config.global_autonomous_enabled = True
+        flag_config.fallback_enabled = False
+        autonomous = flag_config.flags[AutonomousAgentFeature.AUTONOMOUS_AGENT_ENABLED]
+        autonomous.status = FeatureFlagStatus.ENABLED
+        assert agent_module.resolve_feature_flags("dist_1") == agent_module.FLAG_AUTONOMOUS
+
+        autonomous.status = FeatureFlagStatus.GRADUAL_ROLLOUT
+        autonomous.rollout_percentage = 50.0
+        assert agent_module.resolve_feature_flags("dist_1") == agent_module.FLAG_AUTONOMOUS_ROLLOUT
+
+    @pytest.mark.asyncio
+    async def test_disabled_agent_falls_back_without_flag_lookup(self, agent):
+        """Test that a cleared bitmap falls back without consulting the flag config."""
+        agent._flags = agent_module.FLAG_FALLBACK
+        agent._check_feature_flags = MagicMock()
+        agent._fallback_to_existing_agent = AsyncMock(return_value="fallback")
+
+        assert await agent._process_message_inner(MESSAGE) == "fallback"
+        agent._check_feature_flags.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_rollout_checks_customer(self, agent, monkeypatch):
+        """Test that percentage rollouts still decide per customer."""
+        monkeypatch.setattr(agent_module, 'intent_batch_scheduler', MagicMock(classify=AsyncMock(
+            side_effect=RuntimeError("boom")
+        )))
+        agent._flags = agent_module.FLAG_AUTONOMOUS_ROLLOUT
+        agent._check_feature_flags = MagicMock(return_value=True)
+        agent._fallback_to_existing_agent = AsyncMock(return_value="fallback")
+
+        # Reason: FLAG_FALLBACK is clear, so the classification error is not retried
+        assert await agent._process_message_inner(dict(MESSAGE, customer_id='cust_1')) is None
+        agent._check_feature_flags.assert_called_once_with('cust_1')
+        agent._fallback_to_existing_agent.assert_not_called()
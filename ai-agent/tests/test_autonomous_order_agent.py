@@ -18,11 +18,11 @@ from schemas.goals import (
 )
 from schemas.autonomous_agent import (
     AutonomousAction, AutonomousActionType, AutonomousAgentContext,
-    AutonomousDecision, AutonomousResult, CustomerPreference, create_simple_action
+    AutonomousDecision, AutonomousResult, CustomerPreference, LearningEvent, create_simple_action
 )
 from services.goal_evaluator import GoalEvaluator
 from services.conversation_memory import ConversationMemory
-from agents.autonomous_order_agent import AutonomousOrderAgent
+from agents.autonomous_order_agent import AutonomousOrderAgent, _has_variance, match_action_keywords
 from agents.agent_factory import AgentFactory, AgentType
 from config.feature_flags import (
     FeatureFlagConfiguration, FeatureFlag, FeatureFlagStatus,
@@ -272,6 +272,36 @@ class TestFeatureFlags:
         )
         
         assert result1 == result2  # Should be deterministic
+    
+    def test_varies_by_customer(self):
+        """Test that only percentage rollouts depend on the customer."""
+        config = create_default_feature_flags()
+        config.global_autonomous_enabled = True
+        flag = config.flags[AutonomousAgentFeature.AUTONOMOUS_AGENT_ENABLED]
+        
+        assert not config.varies_by_customer(AutonomousAgentFeature.AUTONOMOUS_AGENT_ENABLED, "test_distributor")
+        
+        flag.status = FeatureFlagStatus.GRADUAL_ROLLOUT
+        flag.rollout_percentage = 50.0
+        assert config.varies_by_customer(AutonomousAgentFeature.AUTONOMOUS_AGENT_ENABLED, "test_distributor")
+        
+        flag.enabled_for_distributors = ["test_distributor"]
+        assert not config.varies_by_customer(AutonomousAgentFeature.AUTONOMOUS_AGENT_ENABLED, "test_distributor")
+    
+    def test_rollout_reads_current_percentage(self):
+        """Test that cached rollout buckets still follow percentage changes."""
+        config = create_default_feature_flags()
+        config.global_autonomous_enabled = True
+        flag = config.flags[AutonomousAgentFeature.AUTONOMOUS_AGENT_ENABLED]
+        flag.status = FeatureFlagStatus.GRADUAL_ROLLOUT
+        
+        flag.rollout_percentage = 99.99
+        customers = [f"customer_{i}" for i in range(20)]
+        enabled = [c for c in customers if config.is_feature_enabled(flag.name, "test_distributor", c)]
+        assert enabled
+        
+        flag.rollout_percentage = 0.01
+        assert not any(config.is_feature_enabled(flag.name, "test_distributor", c) for c in enabled)
 
 
 class TestConversationMemory:
@@ -335,6 +365,52 @@ class TestConversationMemory:
         assert context.conversation_id == "conv_123"
         assert context.current_message == message_data
         assert len(context.business_goals) == len(business_goals)
+    
+    @staticmethod
+    def _learning_event(customer_id: str) -> LearningEvent:
+        """Build a successful-action learning event for a customer."""
+        return LearningEvent(
+            event_type="successful_autonomous_action",
+            context_summary="Action: create_order",
+            action_taken="create_order",
+            outcome="success",
+            expected_outcome="positive_customer_interaction",
+            success_metrics={"goal_score": 0.9},
+            lesson_learned="Order created",
+            customer_id=customer_id,
+            distributor_id="distributor_123"
+        )
+    
+    @pytest.mark.asyncio
+    async def test_queued_learning_events_flush_in_one_insert(self, memory_service, mock_database, monkeypatch):
+        """Test that queued learning events are written as one batch on close."""
+        from services import conversation_memory
+        monkeypatch.setattr(conversation_memory, '_LEARNING_FLUSH_SECONDS', 0.05)
+        mock_database.insert_many = AsyncMock(return_value=3)
+        
+        for i in range(3):
+            memory_service.queue_learning_event(self._learning_event(f"customer_{i}"))
+        await memory_service.close()
+        
+        mock_database.insert_many.assert_awaited_once()
+        table, rows = mock_database.insert_many.call_args.args
+        assert table == 'learning_events'
+        assert [row['customer_id'] for row in rows] == ["customer_0", "customer_1", "customer_2"]
+        mock_database.insert_single.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_full_batch_flushes_without_waiting(self, memory_service, mock_database, monkeypatch):
+        """Test that a full batch is written before the flush interval passes."""
+        from services import conversation_memory
+        monkeypatch.setattr(conversation_memory, '_LEARNING_BATCH_SIZE', 2)
+        mock_database.insert_many = AsyncMock(return_value=2)
+        
+        memory_service.queue_learning_event(self._learning_event("customer_0"))
+        memory_service.queue_learning_event(self._learning_event("customer_1"))
+        await asyncio.wait_for(memory_service._learning_queue.join(), timeout=1)
+        
+        mock_database.insert_many.assert_awaited_once()
+        await memory_service.close()
 
 
 class TestAutonomousOrderAgent:
@@ -403,6 +479,150 @@ class TestAutonomousOrderAgent:
         assert AutonomousActionType.CREATE_ORDER in action_types
 
 
+class TestActionKeywords:
+    """Test the single-pass action keyword matcher."""
+    
+    def test_matches_each_category(self):
+        """Test that keywords from every category are found in one scan."""
+        assert match_action_keywords("quiero saber el precio, tienes la lista?") == {
+            'buy', 'pricing', 'availability', 'catalog'
+        }
+    
+    def test_matches_substrings_like_the_original_scan(self):
+        """Test that multi-word and embedded keywords still match."""
+        assert match_action_keywords("me das 2 panes") == {'buy'}
+        assert match_action_keywords("que tienen hoy") == {'catalog'}
+        assert match_action_keywords("hola buenas") == frozenset()
+
+
+class TestAutonomousDecision:
+    """Test best-action selection in _make_autonomous_decision."""
+    
+    @pytest.fixture
+    def decision_agent(self):
+        """Create agent whose actions and evaluations are supplied by the test."""
+        agent = AutonomousOrderAgent.__new__(AutonomousOrderAgent)
+        agent.business_goals = []
+        agent.goal_evaluator = Mock()
+        agent._safe_goal_scores = {"customer_satisfaction": 0.5}
+        agent._error_goal_scores = {"customer_satisfaction": 0.3}
+        agent._do_nothing_evaluation = self._evaluation(
+            create_simple_action(AutonomousActionType.DO_NOTHING, {}, "Nothing"), 0.5
+        )
+        return agent
+    
+    @staticmethod
+    def _evaluation(action: AutonomousAction, score: float) -> ActionEvaluation:
+        """Build an evaluation with the given overall score."""
+        return ActionEvaluation(
+            action_name=action.action_type,
+            goal_scores={"customer_satisfaction": score},
+            overall_score=score,
+            reasoning="Test evaluation",
+            confidence=0.9
+        )
+    
+    @pytest.mark.asyncio
+    async def test_alternatives_exclude_best_action(self, decision_agent):
+        """Test that the best action is chosen and every other action is an alternative."""
+        actions = [
+            create_simple_action(AutonomousActionType.ASK_CLARIFICATION, {}, "Unclear"),
+            create_simple_action(AutonomousActionType.CREATE_ORDER, {}, "Order"),
+            create_simple_action(AutonomousActionType.DO_NOTHING, {}, "Nothing"),
+        ]
+        scores = {action.action_type: score for action, score in zip(actions, (0.4, 0.9, 0.2))}
+        decision_agent._generate_simple_actions = AsyncMock(return_value=actions)
+        decision_agent.goal_evaluator.evaluate_action = AsyncMock(
+            side_effect=lambda action, context, goals: self._evaluation(action, scores[action.action_type])
+        )
+        
+        decision = await decision_agent._make_autonomous_decision(Mock(conversation_history=[]))
+        
+        assert decision.chosen_action.action_type == AutonomousActionType.CREATE_ORDER
+        assert [a.action_type for a in decision.alternative_actions] == [
+            AutonomousActionType.ASK_CLARIFICATION, AutonomousActionType.DO_NOTHING
+        ]
+        assert [e.overall_score for e in decision.alternative_evaluations] == [0.4, 0.2]
+        assert "Goal scores consistent" in decision.uncertainty_factors
+    
+    @pytest.mark.asyncio
+    async def test_lone_do_nothing_skips_goal_evaluation(self, decision_agent):
+        """Test that a non-order message is decided without scoring it against goals."""
+        action = create_simple_action(AutonomousActionType.DO_NOTHING, {}, "Non-order message - greeting")
+        decision_agent._generate_simple_actions = AsyncMock(return_value=[action])
+        decision_agent.goal_evaluator.evaluate_action = AsyncMock()
+        
+        decision = await decision_agent._make_autonomous_decision(Mock(conversation_history=[]))
+        
+        decision_agent.goal_evaluator.evaluate_action.assert_not_called()
+        assert decision.chosen_action is action
+        assert decision.action_evaluation == decision_agent._do_nothing_evaluation
+        assert decision.alternative_actions == []
+    
+    @pytest.mark.asyncio
+    async def test_do_nothing_execution_skips_flags_and_learning(self, decision_agent, monkeypatch):
+        """Test that executing DO_NOTHING bypasses feature flags and learning events."""
+        from agents import autonomous_order_agent as agent_module
+        execute = AsyncMock(return_value={'success': True})
+        monkeypatch.setattr(agent_module, 'execute_autonomous_action', execute)
+        decision_agent.database = Mock()
+        decision_agent.memory_service = Mock()
+        decision_agent._record_successful_interaction = AsyncMock()
+        action = create_simple_action(AutonomousActionType.DO_NOTHING, {}, "Nothing")
+        decision = AutonomousDecision(
+            chosen_action=action,
+            action_evaluation=decision_agent._do_nothing_evaluation,
+            decision_reasoning="No action needed"
+        )
+        
+        result = await decision_agent._execute_decision(decision, Mock())
+        
+        assert result == {'success': True}
+        execute.assert_awaited_once()
+        decision_agent._record_successful_interaction.assert_not_called()
+    
+    def test_context_summary(self, decision_agent):
+        """Test that the context summary lists at most three preferences and the counts."""
+        preferences = [Mock(preference_type="brand", value=f"brand_{i}") for i in range(4)]
+        context = Mock(
+            customer_preferences=preferences, recent_orders=[{}, {}], conversation_history=[],
+            time_context=Mock(business_hours=True)
+        )
+        
+        summary = decision_agent._summarize_conversation_context(context)
+        
+        assert summary == (
+            "Customer preferences: brand: brand_0, brand: brand_1, brand: brand_2; "
+            "Recent orders: 2 orders; During business hours"
+        )
+        empty = Mock(
+            customer_preferences=[], recent_orders=[], conversation_history=[],
+            time_context=Mock(business_hours=False)
+        )
+        assert decision_agent._summarize_conversation_context(empty) == "Limited context available"
+    
+    def test_has_variance(self):
+        """Test the goal score variance check on empty, uniform and mixed scores."""
+        assert not _has_variance({})
+        assert not _has_variance({"a": 0.5, "b": 0.5})
+        assert _has_variance({"a": 0.5, "b": 0.5, "c": 0.7})
+    
+    @pytest.mark.asyncio
+    async def test_escalation_paths_use_prebuilt_goal_scores(self, decision_agent):
+        """Test that the no-action and error paths escalate with the prebuilt goal scores."""
+        decision_agent._generate_simple_actions = AsyncMock(return_value=[])
+        no_action = await decision_agent._make_autonomous_decision(Mock(conversation_history=[]))
+        
+        decision_agent._generate_simple_actions = AsyncMock(side_effect=RuntimeError("boom"))
+        error = await decision_agent._make_autonomous_decision(Mock(conversation_history=[]))
+        
+        assert no_action.chosen_action.action_type == AutonomousActionType.ESCALATE_TO_HUMAN
+        assert no_action.action_evaluation.goal_scores == {"customer_satisfaction": 0.5}
+        assert error.action_evaluation.goal_scores == {"customer_satisfaction": 0.3}
+        assert "boom" in error.decision_reasoning
+        assert error.action_evaluation.goal_scores is not decision_agent._error_goal_scores
+
+
 class TestAgentFactory:
     """Test agent factory for intelligent agent selection."""
     
@@ -457,7 +677,7 @@ class TestAgentFactory:
     @pytest.mark.asyncio
     async def test_agent_health_status(self, agent_factory):
         """Test agent factory health status."""
-        health_status = await agent_factory.get_agent_health_status()
+        health_status = agent_factory.get_agent_health_status()
         
         assert "factory_status" in health_status
         assert "distributor_id" in health_status
@@ -0,0 +1,194 @@
+"""
+Tests for AutonomousOrderAgent simple product extraction
+
+Tests keyword-based product and quantity extraction and the catalog scan
+index built from the shared catalog cache.
+
+Run with: python -m pytest tests/test_autonomous_product_extraction.py -v
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.autonomous_order_agent import AutonomousOrderAgent, CatalogIndex, NormalizedMessage
+from services import catalog_cache as catalog_cache_module
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    """Create agent without running __init__, with an empty catalog behind the fetch."""
+    monkeypatch.setattr(catalog_cache_module, 'fetch_product_catalog', AsyncMock(return_value=[]))
+    catalog_cache_module.catalog_cache.invalidate()
+    agent = AutonomousOrderAgent.__new__(AutonomousOrderAgent)
+    agent.database, agent.distributor_id = None, 'dist_1'
+    yield agent
+    catalog_cache_module.catalog_cache.invalidate()
+
+
+def _catalog_product(product_id, name):
+    """Create a catalog product as returned by the catalog fetch."""
+    product = MagicMock(id=product_id, unit_price=1.0)
+    product.name = name
+    return product
+
+
+class TestExtractProductsSimple:
+    """Test suite for _extract_products_simple."""
+
+    @pytest.mark.asyncio
+    async def test_extracts_product_with_spanish_quantity(self, agent):
+        """Test extracting a product with a Spanish number word."""
+        products = await agent._extract_products_simple("quiero dos leche por favor", {})
+
+        assert len(products) == 1
+        assert products[0].product_name == "leche"
+        assert products[0].quantity == 2
+
+    @pytest.mark.asyncio
+    async def test_extracts_digit_quantity_and_maps_name(self, agent):
+        """Test extracting a digit quantity and mapped product name."""
+        products = await agent._extract_products_simple("necesito 12 agua", {})
+
+        assert products[0].product_name == "agua embotellada"
+        assert products[0].quantity == 12
+
+    @pytest.mark.asyncio
+    async def test_no_products(self, agent):
+        """Test that messages without keywords return no products."""
+        assert await agent._extract_products_simple("hola buenos dias", {}) == []
+
+
+class TestCatalogIndex:
+    """Test suite for the tokenized catalog index."""
+
+    @pytest.fixture
+    def catalog(self):
+        """Sample catalog in the shape returned by the shared catalog cache."""
+        return [
+            {'id': 'p1', 'name': 'Yogur Natural'},
+            {'id': 'p2', 'name': 'Yogur'},
+            {'id': 'p3', 'name': 'Galletas de Avena'},
+            {'id': 'p4', 'name': ''}
+        ]
+
+    def test_scan_prefers_longest_name(self, catalog):
+        """Test that the longest catalog name starting at a token wins."""
+        index = CatalogIndex.build(catalog)
+
+        matches = index.scan("quiero yogur natural y galletas de avena".split())
+
+        assert [(pos, product['id']) for pos, product in matches] == [(1, 'p1'), (4, 'p3')]
+
+    def test_build_skips_unnamed_products(self, catalog):
+        """Test that products without a name are not indexed."""
+        index = CatalogIndex.build(catalog)
+
+        assert len(index.products) == 3
+
+    @pytest.mark.asyncio
+    async def test_extraction_falls_back_to_catalog(self, agent, monkeypatch):
+        """Test that the catalog is loaded and scanned when no basic keyword matches."""
+        fetch = AsyncMock(return_value=[_catalog_product('p1', 'Yogur Natural')])
+        monkeypatch.setattr(catalog_cache_module, 'fetch_product_catalog', fetch)
+
+        products = await agent._extract_products_simple("mándame 3 yogur natural", {})
+
+        assert products[0].product_name == "yogur natural"
+        assert products[0].quantity == 3
+        fetch.assert_awaited_once_with(None, 'dist_1', active_only=True)
+
+
+class TestCatalogCache:
+    """Test suite for the scan index built from the shared catalog."""
+
+    @pytest.fixture
+    def fetch_catalog(self, monkeypatch):
+        """Patch the catalog fetch with a single-product catalog."""
+        fetch = AsyncMock(return_value=[_catalog_product('p1', 'Leche Entera')])
+        monkeypatch.setattr(catalog_cache_module, 'fetch_product_catalog', fetch)
+        return fetch
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_fetch(self, agent, fetch_catalog):
+        """Test that concurrent callers await a single catalog fetch."""
+        first, second = await asyncio.gather(agent._get_catalog(), agent._get_catalog())
+
+        assert first is second
+        assert isinstance(first, tuple)
+        assert first[0]['name'] == 'Leche Entera'
+        assert agent._catalog_index.products[0]['id'] == 'p1'
+        fetch_catalog.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_index_is_rebuilt_only_for_a_new_catalog(self, agent, fetch_catalog):
+        """Test that the scan index is reused until the shared catalog is reloaded."""
+        await agent._get_catalog()
+        index = agent._catalog_index
+        await agent._get_catalog()
+        assert agent._catalog_index is index
+        assert fetch_catalog.await_count == 1
+
+        catalog_cache_module.catalog_cache.invalidate('dist_1')
+        await agent._get_catalog()
+        assert fetch_catalog.await_count == 2
+        assert agent._catalog_index is not index
+
+
+class TestQuantityLookup:
+    """Test suite for quantity detection and multi-product extraction."""
+
+    @pytest.mark.asyncio
+    async def test_extracts_every_product(self, agent):
+        """Test that all keywords in a message are captured with their own quantity."""
+        products = await agent._extract_products_simple("quiero 3 leche y dos pan", {})
+
+        assert [(p.product_name, p.quantity) for p in products] == [("leche", 3), ("pan", 2)]
+
+    @pytest.mark.asyncio
+    async def test_nearest_quantity_wins(self, agent):
+        """Test that the quantity closest to the product is used."""
+        products = await agent._extract_products_simple("5 y tres cerveza", {})
+
+        assert products[0].quantity == 3
+
+    @pytest.mark.asyncio
+    async def test_multiword_keyword_quantity(self, agent):
+        """Test that multi-word keywords pick up the quantity before them."""
+        products = await agent._extract_products_simple("mandame 4 coca cola", {})
+
+        assert products[0].product_name == "coca cola"
+        assert products[0].quantity == 4
+
+    @pytest.mark.asyncio
+    async def test_repeated_product_extracted_once(self, agent):
+        """Test that a product mentioned twice yields a single entry."""
+        products = await agent._extract_products_simple("2 leche, sí, leche", {})
+
+        assert len(products) == 1
+        assert products[0].quantity == 2
+
+
+class TestNormalizedMessage:
+    """Test suite for the once-per-message normalization."""
+
+    def test_from_content(self):
+        """Test that content is stripped, casefolded and tokenized once."""
+        message = NormalizedMessage.from_content("  Quiero 2 LECHE, Straße ")
+
+        assert message.raw == "Quiero 2 LECHE, Straße"
+        assert message.lower == "quiero 2 leche, strasse"
+        assert message.tokens == ("quiero", "2", "leche", "strasse")
+        assert message.token_starts == (0, 7, 9, 16)
+
+    @pytest.mark.asyncio
+    async def test_extraction_uses_given_normalization(self, agent):
+        """Test that a precomputed normalization is used instead of re-deriving it."""
+        message = NormalizedMessage.from_content("necesito tres pan")
+
+        products = await agent._extract_products_simple("ignored", {}, message)
+
+        assert [(p.product_name, p.quantity) for p in products] == [("pan", 3)]
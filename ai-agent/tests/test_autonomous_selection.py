@@ -117,7 +117,7 @@ async def test_message_processing_simulation():
             print("🎉 SUCCESS: Message would be processed by Autonomous Agent!")
             
             # Show agent health status
-            health = await factory.get_agent_health_status()
+            health = factory.get_agent_health_status()
             print(f"✅ Factory status: {health['factory_status']}")
             print(f"✅ Autonomous agent available: {health['agents']['autonomous']['available']}")
             
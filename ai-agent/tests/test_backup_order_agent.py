@@ -0,0 +1,580 @@
+"""
+Tests for the backup StreamlinedOrderProcessor
+
+Tests the structured, batched and streamed OpenAI analysis, the memoized keyword intent and
+product fallbacks, the keyword fast path,
+concurrent context reads,
+the cached product catalog and concurrent catalog matching in the
+intelligent product validation.
+
+Run with: python -m pytest tests/test_backup_order_agent.py -v
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import backup_order_agent as backup_module
+from agents.backup_order_agent import (
+    AnalysisBatcher, AnalyzedProduct, StreamlinedAnalysis, StreamlinedBatchAnalysis, StreamlinedBatchRow,
+    StreamlinedOrderProcessor
+)
+from pydantic_ai import UnexpectedModelBehavior
+from pydantic_ai.models.function import DeltaToolCall, FunctionModel
+from schemas.message import ExtractedProduct
+from services import catalog_cache as catalog_cache_module
+
+
+@pytest.fixture(autouse=True)
+def fresh_catalog_cache():
+    """Start and end every test with an empty shared catalog cache."""
+    catalog_cache_module.catalog_cache.invalidate()
+    yield
+    catalog_cache_module.catalog_cache.invalidate()
+
+
+def _extracted(name):
+    """Create an extracted product as the analysis step would."""
+    return ExtractedProduct(product_name=name, quantity=1, original_text=name, confidence=0.9)
+
+
+def _analysis(intent):
+    """Create a structured analysis as the model would return it."""
+    return StreamlinedAnalysis(intent=intent, confidence=0.9, reasoning="Classified by the model")
+
+
+def _row(message, intent):
+    """Create one batched analysis row tagged with its MESSAGE block number."""
+    return StreamlinedBatchRow(message=message, intent=intent, confidence=0.9, reasoning="Classified by the model")
+
+
+class TestAnalysisBatcher:
+    """Test suite for AnalysisBatcher."""
+
+    @pytest.fixture
+    def agent_runs(self, monkeypatch):
+        """Replace the single and batch agent runs with mocks."""
+        runs = SimpleNamespace(single=AsyncMock(), batch=AsyncMock())
+        monkeypatch.setattr(backup_module.streamlined_agent, 'run', runs.single)
+        monkeypatch.setattr(backup_module.streamlined_batch_agent, 'run', runs.batch)
+        return runs
+
+    @pytest.fixture
+    def batcher(self):
+        """Create a batcher with a short batch window."""
+        return AnalysisBatcher(MagicMock(), max_batch_size=3, max_wait_seconds=0.01)
+
+    @pytest.mark.asyncio
+    async def test_single_message_uses_its_own_prompt(self, batcher, agent_runs):
+        """Test that a message with no company is sent unchanged to the single agent."""
+        agent_runs.single.return_value = SimpleNamespace(data=_analysis("BUY"))
+
+        analysis = await batcher.analyze("MESSAGE: quiero leche")
+
+        assert analysis.intent == "BUY"
+        assert agent_runs.single.await_args.args[0] == "MESSAGE: quiero leche"
+        agent_runs.batch.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_messages_share_one_request(self, batcher, agent_runs):
+        """Test that queued messages are analyzed together and get their own rows back."""
+        agent_runs.batch.return_value = SimpleNamespace(
+            data=StreamlinedBatchAnalysis(results=[_row(1, "BUY"), _row(2, "OTHER")])
+        )
+
+        analyses = await asyncio.gather(batcher.analyze("quiero leche"), batcher.analyze("hola"))
+
+        prompt = agent_runs.batch.await_args.args[0]
+        assert agent_runs.batch.await_count == 1
+        assert "=== MESSAGE 1 ===\nquiero leche" in prompt and "=== MESSAGE 2 ===\nhola" in prompt
+        assert [a.intent for a in analyses] == ["BUY", "OTHER"]
+        agent_runs.single.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_rows_map_back_by_message_id(self, batcher, agent_runs):
+        """Test that rows returned out of order still reach their own message."""
+        agent_runs.batch.return_value = SimpleNamespace(
+            data=StreamlinedBatchAnalysis(results=[_row(2, "OTHER"), _row(1, "BUY")])
+        )
+
+        analyses = await asyncio.gather(batcher.analyze("quiero leche"), batcher.analyze("hola"))
+
+        assert [a.intent for a in analyses] == ["BUY", "OTHER"]
+        assert all(type(a) is StreamlinedAnalysis for a in analyses)
+        agent_runs.single.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_duplicate_message_ids_fall_back_to_single_calls(self, batcher, agent_runs):
+        """Test that ids other than exactly 1..N send every prompt individually."""
+        agent_runs.batch.return_value = SimpleNamespace(
+            data=StreamlinedBatchAnalysis(results=[_row(1, "BUY"), _row(1, "OTHER")])
+        )
+        agent_runs.single.return_value = SimpleNamespace(data=_analysis("QUESTION"))
+
+        analyses = await asyncio.gather(batcher.analyze("quiero leche"), batcher.analyze("hola"))
+
+        assert [a.intent for a in analyses] == ["QUESTION", "QUESTION"]
+        assert agent_runs.single.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_full_batch_is_sent_without_waiting(self, agent_runs):
+        """Test that reaching the batch size flushes before the window closes."""
+        batcher = AnalysisBatcher(MagicMock(), max_batch_size=2, max_wait_seconds=60)
+        agent_runs.batch.return_value = SimpleNamespace(
+            data=StreamlinedBatchAnalysis(results=[_row(1, "BUY"), _row(2, "BUY")])
+        )
+
+        analyses = await asyncio.wait_for(
+            asyncio.gather(batcher.analyze("a"), batcher.analyze("b")), timeout=1
+        )
+
+        assert len(analyses) == 2
+
+    @pytest.mark.asyncio
+    async def test_mismatched_rows_fall_back_to_single_calls(self, batcher, agent_runs):
+        """Test that a batch response missing rows is retried per message."""
+        agent_runs.batch.return_value = SimpleNamespace(
+            data=StreamlinedBatchAnalysis(results=[_row(1, "BUY")])
+        )
+        agent_runs.single.side_effect = [
+            SimpleNamespace(data=_analysis("BUY")), RuntimeError("rate limited")
+        ]
+
+        first, second = await asyncio.gather(
+            batcher.analyze("quiero leche"), batcher.analyze("hola"), return_exceptions=True
+        )
+
+        assert [call.args[0] for call in agent_runs.single.await_args_list] == ["quiero leche", "hola"]
+        assert first.intent == "BUY"
+        assert isinstance(second, RuntimeError)
+
+    @pytest.mark.asyncio
+    async def test_process_messages_batch_keeps_message_order(self):
+        """Test that batch processing returns one result per message, in order."""
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+
+        async def process_message(message):
+            await asyncio.sleep(0.01 if message['id'] == 'm1' else 0)
+            return message['id']
+
+        processor.process_message = process_message
+
+        assert await processor.process_messages_batch([{'id': 'm1'}, {'id': 'm2'}]) == ['m1', 'm2']
+
+
+
+class TestStreamedAnalysis:
+    """Test suite for streaming a lone analysis and matching its products early."""
+
+    PAYLOAD = json.dumps({
+        "intent": "BUY", "confidence": 0.9, "reasoning": "Customer orders products",
+        "products": [{"name": "leche", "quantity": 2}, {"name": "pan", "quantity": 3}]
+    })
+
+    @pytest.fixture
+    def streamed_model(self, monkeypatch):
+        """Stream PAYLOAD in small chunks from the single-message agent, recording what was sent."""
+        monkeypatch.setattr(backup_module, '_ANALYSIS_STREAM_DEBOUNCE_SECONDS', None)
+        sent = []
+
+        async def stream(messages, info):
+            for start in range(0, len(self.PAYLOAD), 10):
+                sent.append(self.PAYLOAD[start:start + 10])
+                yield {0: DeltaToolCall(
+                    name='final_result' if start == 0 else None, json_args=sent[-1]
+                )}
+
+        with backup_module.streamlined_agent.override(model=FunctionModel(stream_function=stream)):
+            yield sent
+
+    @pytest.mark.asyncio
+    async def test_products_are_reported_before_the_stream_ends(self, streamed_model):
+        """Test that a finished product is reported while later ones are still streaming."""
+        batcher = AnalysisBatcher(MagicMock(), max_wait_seconds=0.01)
+        reported = []
+
+        analysis = await batcher.analyze("x", lambda p: reported.append((p.name, len(streamed_model))))
+
+        assert [p.name for p in analysis.products] == ["leche", "pan"]
+        assert [name for name, _ in reported] == ["leche", "pan"]
+        assert reported[0][1] < len(streamed_model)
+
+    @pytest.mark.asyncio
+    async def test_validation_reuses_streamed_matches(self, streamed_model, monkeypatch):
+        """Test that products matched during the stream are not matched again."""
+        catalog_product = MagicMock(id="prod_1", unit_price=1.5)
+        catalog_product.name = "Leche Entera"
+        monkeypatch.setattr(
+            catalog_cache_module, 'fetch_product_catalog', AsyncMock(return_value=[catalog_product])
+        )
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+        processor._analysis_batcher.max_wait_seconds = 0.01
+        best = SimpleNamespace(product_id="prod_1", product_name="Leche Entera", confidence=0.95, unit=None)
+        processor.product_matcher = MagicMock(match_products=AsyncMock(return_value=SimpleNamespace(
+            confidence_level="HIGH", best_match=best, matches=[best], suggested_question=None
+        )))
+        prefetched = {}
+
+        _, products = await processor._analyze_with_openai("dos leches y tres panes", "", None, prefetched)
+        result = await processor._intelligent_product_validation(products, "mensaje", "conv_1", prefetched)
+
+        assert sorted(prefetched) == ["leche", "pan"]
+        assert [p.status for p in result['validated_products']] == ["confirmed", "confirmed"]
+        assert processor.product_matcher.match_products.await_count == 2
+
+
+class TestOpenAIAnalysis:
+    """Test suite for the structured OpenAI analysis."""
+
+    @pytest.fixture
+    def agent_run(self, monkeypatch):
+        """Replace the agent run with a mock and the catalog sample with an empty one."""
+        monkeypatch.setattr(catalog_cache_module, 'fetch_product_catalog', AsyncMock(return_value=[]))
+        run = AsyncMock()
+        monkeypatch.setattr(backup_module.streamlined_agent, 'run', run)
+        return run
+
+    @pytest.mark.asyncio
+    async def test_structured_result_is_used_directly(self, agent_run):
+        """Test that the validated result becomes the intent and products without re-parsing."""
+        agent_run.return_value = SimpleNamespace(data=StreamlinedAnalysis(
+            intent="BUY", confidence=0.9, reasoning="Customer orders milk",
+            products=[AnalyzedProduct(name="leche entera", quantity=2, unit="litro")]
+        ))
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+
+        intent, products = await processor._analyze_with_openai("dos litros de leche entera", "")
+
+        assert (intent.intent, intent.confidence) == ("BUY", 0.9)
+        assert [(p.product_name, p.quantity, p.unit, p.confidence) for p in products] == [
+            ("leche entera", 2, "litro", 0.9)
+        ]
+        assert products[0].original_text == "dos litros de leche entera"
+
+    @pytest.mark.asyncio
+    async def test_prompt_ends_with_per_message_parts(self, agent_run, monkeypatch):
+        """Test that the cached catalog sample precedes the context and the message comes last."""
+        product = MagicMock(id="prod_1", unit_price=1.5)
+        product.name = "Leche Entera"
+        monkeypatch.setattr(catalog_cache_module, 'fetch_product_catalog', AsyncMock(return_value=[product]))
+        agent_run.return_value = SimpleNamespace(data=None)
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+
+        await processor._analyze_with_openai("hola", "No previous context")
+
+        prompt = agent_run.await_args.args[0]
+        assert prompt.index("AVAILABLE PRODUCTS (sample): Leche Entera") < prompt.index("CONTEXT:")
+        assert prompt.rstrip().endswith('MESSAGE: "hola"')
+
+    def test_processors_share_deps_per_distributor(self):
+        """Test that processors for one distributor reuse the same deps and product matcher."""
+        database = AsyncMock()
+
+        first = StreamlinedOrderProcessor(database, "test_distributor")
+        second = backup_module.create_streamlined_order_agent_processor(database, "test_distributor")
+        other = StreamlinedOrderProcessor(database, "other_distributor")
+
+        assert first.deps is second.deps
+        assert first.product_matcher is second.product_matcher is first.deps.product_matcher
+        assert other.deps is not first.deps
+
+    @pytest.mark.asyncio
+    async def test_invalid_result_falls_back_to_keywords(self, agent_run):
+        """Test that the keyword parsers run when no valid structured result comes back."""
+        agent_run.side_effect = UnexpectedModelBehavior("Exceeded maximum retries")
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+
+        intent, products = await processor._analyze_with_openai("quiero dos leche", "")
+
+        assert intent.intent == "BUY"
+        assert [(p.product_name, p.quantity) for p in products] == [("leche", 2)]
+
+    @pytest.mark.asyncio
+    async def test_failed_request_returns_none(self, agent_run):
+        """Test that other OpenAI failures still report the analysis as failed."""
+        agent_run.side_effect = RuntimeError("connection reset")
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+
+        assert await processor._analyze_with_openai("quiero dos leche", "") is None
+
+
+class TestIntentParsing:
+    """Test suite for the keyword intent fallback."""
+
+    @pytest.mark.parametrize("content,expected", [
+        ("Hola, quiero pan", "OTHER"),
+        ("QUIERO dos leches", "BUY"),
+        ("cuanto cuesta el queso", "QUESTION"),
+        ("me llegó todo?", "QUESTION"),
+        ("hubo un problema con el pedido", "BUY"),
+        ("el queso llegó mal", "COMPLAINT"),
+        ("unos chips normales", "OTHER"),
+        ("precios por favor", "QUESTION"),
+        ("tienen catalogos", "QUESTION"),
+        ("his orders", "BUY"),
+    ])
+    def test_intent_priority(self, content, expected):
+        """Test that whole-word keywords are resolved greeting > buy > question > complaint."""
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+
+        assert processor._parse_intent(content).intent == expected
+
+    def test_repeats_are_cached_and_not_aliased(self):
+        """Test that normalized repeats hit the cache and each call gets its own intent."""
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+        backup_module._parse_intent_cached.cache_clear()
+
+        first = processor._parse_intent("Buenos  días ")
+        first.confidence = 0.1
+        second = processor._parse_intent("buenos días")
+
+        assert second is not first
+        assert (second.intent, second.confidence) == ("OTHER", 0.75)
+        assert backup_module._parse_intent_cached.cache_info().hits == 1
+
+
+class TestFastPath:
+    """Test suite for skipping OpenAI on confidently classified messages."""
+
+    @pytest.mark.parametrize("content,expected", [
+        ("hola", "OTHER"),
+        ("buenos días, que tal", "OTHER"),
+        ("cuanto cuesta el envio", "QUESTION"),
+        ("tengo un problema", "COMPLAINT"),
+        ("hola, quiero 2 leches", None),
+        ("hola, tienes queso?", None),
+        ("hola 3", None),
+        ("pedido de pan", None),
+        ("ok", None),
+    ])
+    def test_fast_path_intent(self, content, expected):
+        """Test that only confident non-order messages without product hints qualify."""
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+
+        intent = processor._fast_path_intent(content)
+
+        assert (intent.intent if intent else None) == expected
+
+    @pytest.mark.asyncio
+    async def test_flag_skips_context_and_openai(self, monkeypatch):
+        """Test that the fast path records a greeting without calling OpenAI."""
+        monkeypatch.setattr(backup_module.settings, 'enable_fastpath_intent', True)
+        monkeypatch.setattr(backup_module, 'update_message_ai_data', AsyncMock(return_value=True))
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+        processor._get_simple_context = AsyncMock(return_value="")
+        processor._analyze_with_openai = AsyncMock(return_value=None)
+
+        analysis = await processor.process_message({'id': 'msg_1', 'content': 'hola'})
+
+        assert analysis.intent.intent == "OTHER"
+        processor._get_simple_context.assert_not_called()
+        processor._analyze_with_openai.assert_not_called()
+        backup_module.update_message_ai_data.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_flag_off_always_calls_openai(self, monkeypatch):
+        """Test that OpenAI analysis still runs when the fast path is disabled."""
+        monkeypatch.setattr(backup_module.settings, 'enable_fastpath_intent', False)
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+        processor._get_simple_context = AsyncMock(return_value="")
+        processor._analyze_with_openai = AsyncMock(return_value=None)
+
+        assert await processor.process_message({'id': 'msg_1', 'content': 'hola'}) is None
+        processor._analyze_with_openai.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_normalized_content_is_reused(self, monkeypatch):
+        """Test that the fast path and keyword fallback reuse the content normalized by the caller."""
+        monkeypatch.setattr(catalog_cache_module, 'fetch_product_catalog', AsyncMock(return_value=[]))
+        monkeypatch.setattr(
+            backup_module.streamlined_agent, 'run',
+            AsyncMock(side_effect=UnexpectedModelBehavior("Exceeded maximum retries"))
+        )
+        normalize = MagicMock(side_effect=backup_module._normalize_content)
+        monkeypatch.setattr(backup_module, '_normalize_content', normalize)
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+        content, content_norm = "Quiero  dos leche", "quiero dos leche"
+
+        assert processor._fast_path_intent(content, content_norm) is None
+        intent, products = await processor._analyze_with_openai(content, "", content_norm)
+
+        assert intent.intent == "BUY"
+        assert [(p.product_name, p.quantity) for p in products] == [("leche", 2)]
+        normalize.assert_not_called()
+
+
+class TestProductParsing:
+    """Test suite for the fallback product parser."""
+
+    @pytest.mark.parametrize("content,expected", [
+        ("quiero dos leche y 3 panes", [("leche", 2, None), ("pan", 3, None)]),
+        ("necesito 2 agua litros", [("agua embotellada", 2, "litro")]),
+        ("dame dos coca cola", [("coca cola", 2, None)]),
+        ("3 panes, dos leche y mucha agua", [("agua embotellada", 1, None), ("leche", 2, None), ("pan", 3, None)]),
+        ("hola", []),
+    ])
+    def test_products_quantities_and_units(self, content, expected):
+        """Test that products are found with the quantity before and the unit after them."""
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+
+        products = processor._parse_products_simple(content)
+
+        assert [(p.product_name, p.quantity, p.unit) for p in products] == expected
+
+    def test_cached_products_keep_original_text(self):
+        """Test that cached parses are rebuilt with each message's own text."""
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+
+        first = processor._parse_products_simple("dos  Leche")
+        second = processor._parse_products_simple("dos leche")
+
+        assert first[0] is not second[0]
+        assert [(p.product_name, p.quantity) for p in first + second] == [("leche", 2)] * 2
+        assert [p.original_text for p in first + second] == ["dos  Leche", "dos leche"]
+
+
+class TestSimpleContext:
+    """Test suite for the conversation context read."""
+
+    @pytest.fixture
+    def context_queries(self, monkeypatch):
+        """Replace the context queries with mocks returning one message and one order."""
+        queries = SimpleNamespace(
+            messages=AsyncMock(return_value=[{'content': 'quiero leche'}]),
+            orders=AsyncMock(return_value=[{'order_number': 'ORD-1'}]),
+        )
+        monkeypatch.setattr(backup_module, 'get_recent_messages_for_context', queries.messages)
+        monkeypatch.setattr(backup_module, 'get_recent_orders', queries.orders)
+        return queries
+
+    @pytest.mark.asyncio
+    async def test_context_includes_messages_and_orders(self, context_queries):
+        """Test that both context queries are combined into one context."""
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+
+        context = await processor._get_simple_context("conv_1", "cust_1")
+
+        assert context == "Recent messages:\n- quiero leche\nRecent orders:\n- Order ORD-1"
+
+    @pytest.mark.asyncio
+    async def test_failed_query_keeps_other_half(self, context_queries):
+        """Test that a failed message query still returns the recent orders."""
+        context_queries.messages.side_effect = RuntimeError("timeout")
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+
+        context = await processor._get_simple_context("conv_1", "cust_1")
+
+        assert context == "Recent orders:\n- Order ORD-1"
+
+    @pytest.mark.asyncio
+    async def test_missing_ids_skip_queries(self, context_queries):
+        """Test that queries without an id to look up are not issued."""
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+
+        assert await processor._get_simple_context("", "") == "No previous context"
+        context_queries.messages.assert_not_called()
+        context_queries.orders.assert_not_called()
+
+
+class TestCatalogCache:
+    """Test suite for the processor's cached product catalog."""
+
+    @pytest.fixture
+    def catalog_fetch(self, monkeypatch):
+        """Replace the catalog fetch with a mock returning one product."""
+        product = MagicMock(id="prod_1", unit_price=1.5)
+        product.name = "Leche Entera"
+        fetch = AsyncMock(return_value=[product])
+        monkeypatch.setattr(catalog_cache_module, 'fetch_product_catalog', fetch)
+        return fetch
+
+    @pytest.mark.asyncio
+    async def test_catalog_is_shared_by_processors(self, catalog_fetch):
+        """Test that processors of a distributor share one fetch until the catalog is invalidated."""
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+        other = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+
+        first, second = await asyncio.gather(processor._get_catalog(), other._get_catalog())
+        third = await processor._get_catalog()
+
+        assert first is second is third
+        assert [(p['name'], p['unit_price']) for p in first] == [("Leche Entera", 1.5)]
+        assert catalog_fetch.await_count == 1
+
+        catalog_cache_module.catalog_cache.invalidate("test_distributor")
+        await processor._get_catalog()
+        assert catalog_fetch.await_count == 2
+
+
+class TestProductValidation:
+    """Test suite for matching extracted products against the catalog."""
+
+    @pytest.fixture
+    def processor(self, monkeypatch):
+        """Create a processor with a one-product catalog and a mocked matcher."""
+        catalog_product = MagicMock(id="prod_1", unit_price=1.5)
+        catalog_product.name = "Leche Entera"
+        monkeypatch.setattr(
+            catalog_cache_module, 'fetch_product_catalog', AsyncMock(return_value=[catalog_product])
+        )
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+
+        async def match_products(query, catalog):
+            if query.startswith("leche"):
+                best = SimpleNamespace(product_id="prod_1", product_name="Leche Entera", confidence=0.95, unit=None)
+                return SimpleNamespace(confidence_level="HIGH", best_match=best, matches=[best], suggested_question=None)
+            return SimpleNamespace(
+                confidence_level="NONE", best_match=None, matches=[], suggested_question=f"¿Qué es {query}?"
+            )
+
+        processor.product_matcher = MagicMock(match_products=AsyncMock(side_effect=match_products))
+        return processor
+
+    @pytest.mark.asyncio
+    async def test_products_are_matched_in_message_order(self, processor):
+        """Test that every product is matched and results keep the message order."""
+        names = [f"leche {i}" if i % 2 == 0 else f"otro {i}" for i in range(7)]
+
+        result = await processor._intelligent_product_validation(
+            [_extracted(name) for name in names], "mensaje", "conv_1"
+        )
+
+        assert [p.product_name for p in result['validated_products']] == names
+        assert [p.status for p in result['validated_products']][:2] == ["confirmed", "pending"]
+        assert processor.product_matcher.match_products.await_count == 7
+        assert result['requires_clarification'] is True
+        assert result['suggested_question'].startswith("Tengo algunas preguntas")
+
+    @pytest.mark.asyncio
+    async def test_confirmed_products_are_not_matched_again(self, processor):
+        """Test that products confirmed earlier keep their place and skip the matcher."""
+        confirmed = _extracted("pan blanco")
+        confirmed.status = "confirmed"
+        confirmed.matched_product_id = "prod_2"
+
+        result = await processor._intelligent_product_validation(
+            [_extracted("leche"), confirmed, _extracted("otro")], "mensaje", "conv_1"
+        )
+
+        assert [p.product_name for p in result['validated_products']] == ["leche", "pan blanco", "otro"]
+        assert [p.status for p in result['validated_products']] == ["confirmed", "confirmed", "pending"]
+        assert result['validated_products'][1].matched_product_id == "prod_2"
+        assert [c.args[0] for c in processor.product_matcher.match_products.await_args_list] == ["leche", "otro"]
+
+    @pytest.mark.asyncio
+    async def test_all_confirmed_skips_catalog(self, processor):
+        """Test that a fully confirmed product list needs no catalog or matching."""
+        confirmed = _extracted("leche")
+        confirmed.status = "confirmed"
+
+        result = await processor._intelligent_product_validation([confirmed], "mensaje", "conv_1")
+
+        assert result['validated_products'] == [confirmed]
+        assert result['requires_clarification'] is False
+        catalog_cache_module.fetch_product_catalog.assert_not_called()
+        processor.product_matcher.match_products.assert_not_called()
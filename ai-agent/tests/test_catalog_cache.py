@@ -0,0 +1,135 @@
+"""
+Tests for CatalogCache
+
+Tests that each distributor's catalog is fetched and converted once per TTL,
+that concurrent callers share one in-flight fetch, and that invalidation
+drops one or every distributor's catalog.
+
+Run with: python -m pytest tests/test_catalog_cache.py -v
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+from unittest.mock import AsyncMock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schemas.product import CatalogProduct
+from services import catalog_cache as catalog_cache_module
+from services.catalog_cache import CatalogCache, catalog_product_dict
+
+
+@pytest.fixture
+def catalog_fetch(monkeypatch):
+    """Replace the catalog fetch with a mock returning one product per distributor."""
+    async def fetch(database, distributor_id, active_only=True):
+        await asyncio.sleep(0)
+        return [CatalogProduct(id=f"{distributor_id}_1", name="Leche Entera", unit_price=1.5)]
+
+    fetch = AsyncMock(side_effect=fetch)
+    monkeypatch.setattr(catalog_cache_module, 'fetch_product_catalog', fetch)
+    return fetch
+
+
+@pytest.fixture
+def cache():
+    """Create an empty cache."""
+    return CatalogCache()
+
+
+class TestCatalogCache:
+    """Test suite for the distributor-keyed catalog cache."""
+
+    @pytest.mark.asyncio
+    async def test_catalog_is_reused_within_ttl(self, cache, catalog_fetch):
+        """Test that repeated lookups reuse one converted catalog."""
+        first = await cache.get(None, "dist_1")
+        second = await cache.get(None, "dist_1")
+
+        assert first is second
+        assert isinstance(first, tuple)
+        assert [(p['id'], p['unit_price']) for p in first] == [("dist_1_1", 1.5)]
+        catalog_fetch.assert_awaited_once_with(None, "dist_1", active_only=True)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_loads_share_one_fetch(self, cache, catalog_fetch):
+        """Test that callers arriving during a load wait for the same fetch."""
+        results = await asyncio.gather(*(cache.get(None, "dist_1") for _ in range(3)))
+
+        assert results[0] is results[1] is results[2]
+        assert catalog_fetch.await_count == 1
+        assert cache._loads == {}
+
+    @pytest.mark.asyncio
+    async def test_catalogs_are_keyed_by_distributor(self, cache, catalog_fetch):
+        """Test that each distributor gets its own catalog."""
+        first, second = await asyncio.gather(cache.get(None, "dist_1"), cache.get(None, "dist_2"))
+
+        assert first[0]['id'] == "dist_1_1"
+        assert second[0]['id'] == "dist_2_1"
+        assert catalog_fetch.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_catalog_reloads_after_expiry(self, catalog_fetch):
+        """Test that an expired catalog is fetched again."""
+        cache = CatalogCache(ttl_seconds=0.0)
+
+        first = await cache.get(None, "dist_1")
+        second = await cache.get(None, "dist_1")
+
+        assert first is not second
+        assert catalog_fetch.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidate_one_or_every_distributor(self, cache, catalog_fetch):
+        """Test that invalidation drops only the named distributor, or all of them without one."""
+        await cache.get(None, "dist_1")
+        await cache.get(None, "dist_2")
+
+        cache.invalidate("dist_1")
+        await cache.get(None, "dist_1")
+        await cache.get(None, "dist_2")
+        assert catalog_fetch.await_count == 3
+
+        cache.invalidate()
+        await cache.get(None, "dist_1")
+        await cache.get(None, "dist_2")
+        assert catalog_fetch.await_count == 5
+
+    @pytest.mark.asyncio
+    async def test_cancelled_caller_does_not_cancel_load(self, cache, catalog_fetch):
+        """Test that cancelling one waiting caller leaves the shared load running."""
+        first = asyncio.ensure_future(cache.get(None, "dist_1"))
+        second = asyncio.ensure_future(cache.get(None, "dist_1"))
+        await asyncio.sleep(0)
+
+        first.cancel()
+
+        assert (await second)[0]['id'] == "dist_1_1"
+        assert catalog_fetch.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_load_is_retried(self, cache, catalog_fetch):
+        """Test that a failed fetch is not cached and the next caller loads again."""
+        catalog_fetch.side_effect = [RuntimeError("database unavailable"), []]
+
+        with pytest.raises(RuntimeError):
+            await cache.get(None, "dist_1")
+
+        assert await cache.get(None, "dist_1") == ()
+        assert catalog_fetch.await_count == 2
+
+
+def test_catalog_product_dict_has_matcher_fields():
+    """Test that catalog products are converted with the fields the matcher reads."""
+    product = CatalogProduct(
+        id="prod_1", name="Leche Entera", unit_price=1.5, aliases=["leche"], keywords=["lacteo"]
+    )
+
+    product_dict = catalog_product_dict(product)
+
+    assert product_dict['unit_price'] == 1.5
+    assert product_dict['aliases'] == ["leche"]
+    assert product_dict['keywords'] == ["lacteo"]
+    assert len(product_dict) == 17
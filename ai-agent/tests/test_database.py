@@ -0,0 +1,170 @@
+"""
+Tests for DatabaseService
+
+Tests shared client creation, the bound on concurrent queries, batched
+updates issued through update_many, bulk inserts through insert_many and
+RPC calls through call_function.
+
+Run with: python -m pytest tests/test_database.py -v
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import database as database_module
+from services.database import DatabaseService
+
+
+@pytest.fixture
+def database():
+    """Create DatabaseService whose Supabase client records each update query."""
+    database = DatabaseService()
+    database.queries = []
+
+    def update(data):
+        query = MagicMock()
+        query.filters = []
+        query.eq.side_effect = lambda column, value: query.filters.append(('eq', column, value)) or query
+        query.in_.side_effect = lambda column, values: query.filters.append(('in', column, values)) or query
+        query.execute = AsyncMock(side_effect=lambda: SimpleNamespace(
+            data=[{}] * max(len(f[2]) if f[0] == 'in' else 1 for f in query.filters)
+        ))
+        database.queries.append((data, query))
+        return query
+
+    client = MagicMock()
+    client.from_.return_value.update.side_effect = update
+    database.get_client = AsyncMock(return_value=client)
+    return database
+
+
+class TestUpdateMany:
+    """Test suite for update_many."""
+
+    @pytest.mark.asyncio
+    async def test_identical_data_shares_one_request(self, database):
+        """Test that records receiving the same data are updated with one IN query."""
+        updated = await database.update_many('messages', [
+            ('msg_1', {'ai_processed': True}),
+            ('msg_2', {'ai_processed': True}),
+            ('msg_3', {'ai_processed': False}),
+        ])
+
+        assert updated == 3
+        assert len(database.queries) == 2
+        filters = {str(data): query.filters for data, query in database.queries}
+        assert filters[str({'ai_processed': True})] == [('in', 'id', ['msg_1', 'msg_2'])]
+        assert filters[str({'ai_processed': False})] == [('eq', 'id', 'msg_3')]
+
+    @pytest.mark.asyncio
+    async def test_failed_group_does_not_block_others(self, database):
+        """Test that one failing request is logged and the rest still count."""
+        original = database.get_client.return_value.from_.return_value.update.side_effect
+
+        def update(data):
+            query = original(data)
+            if data.get('fail'):
+                query.execute.side_effect = RuntimeError("boom")
+            return query
+
+        database.get_client.return_value.from_.return_value.update.side_effect = update
+
+        updated = await database.update_many('messages', [
+            ('msg_1', {'fail': True}),
+            ('msg_2', {'ai_processed': True}),
+        ])
+
+        assert updated == 1
+
+
+class TestInsertMany:
+    """Test suite for insert_many."""
+
+    @pytest.mark.asyncio
+    async def test_rows_are_inserted_in_one_request(self, database):
+        """Test that every row goes in one insert with the distributor filled in."""
+        insert = database.get_client.return_value.from_.return_value.insert
+        insert.return_value.execute = AsyncMock(return_value=SimpleNamespace(data=[{}, {}]))
+
+        inserted = await database.insert_many(
+            'learning_events', [{'event_type': 'a'}, {'event_type': 'b', 'distributor_id': 'other'}],
+            distributor_id='dist_1'
+        )
+
+        assert inserted == 2
+        insert.assert_called_once_with([
+            {'event_type': 'a', 'distributor_id': 'dist_1'},
+            {'event_type': 'b', 'distributor_id': 'other'},
+        ])
+
+    @pytest.mark.asyncio
+    async def test_empty_batch_skips_request(self, database):
+        """Test that an empty batch never reaches the client."""
+        assert await database.insert_many('learning_events', []) == 0
+        database.get_client.assert_not_called()
+
+
+class TestCallFunction:
+    """Test suite for call_function."""
+
+    @pytest.mark.asyncio
+    async def test_rpc_result_data_is_returned(self, database):
+        """Test that the function is called with its params and its data returned."""
+        rpc = database.get_client.return_value.rpc
+        rpc.return_value.execute = AsyncMock(return_value=SimpleNamespace(data=[{'message_id': 'm1'}]))
+
+        result = await database.call_function('update_messages_ai_data', {'updates': []})
+
+        assert result == [{'message_id': 'm1'}]
+        rpc.assert_called_once_with('update_messages_ai_data', {'updates': []})
+
+class TestConnectionPool:
+    """Test suite for client sharing and the query concurrency bound."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_first_calls_share_one_client(self, monkeypatch):
+        """Test that racing callers do not each create a Supabase client."""
+        created = []
+
+        async def acreate_client(*args, **kwargs):
+            await asyncio.sleep(0)
+            created.append(MagicMock())
+            return created[-1]
+
+        monkeypatch.setattr(database_module, 'acreate_client', acreate_client)
+        database = DatabaseService()
+
+        clients = await asyncio.gather(*(database.get_client() for _ in range(5)))
+
+        assert len(created) == 1
+        assert all(client is created[0] for client in clients)
+
+    @pytest.mark.asyncio
+    async def test_queries_are_bounded_by_pool_size(self, database):
+        """Test that no more than the pool size of queries run at once."""
+        database._pool = asyncio.Semaphore(2)
+        running = []
+        peak = []
+
+        async def execute():
+            running.append(1)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.pop()
+            return SimpleNamespace(data=[{}])
+
+        query = MagicMock()
+        query.eq.return_value = query
+        query.execute = execute
+        database.get_client.return_value.from_.return_value.select.return_value = query
+
+        await asyncio.gather(*(
+            database.execute_query('messages', 'select', filters={'id': i}) for i in range(5)
+        ))
+
+        assert max(peak) == 2
@@ -0,0 +1,95 @@
+"""
+Tests for EnhancedProductValidator
+
+Tests that validation uses the shared catalog cache instead of fetching on
+every validation, and that similar-product suggestions use a catalog name
+index built once per loaded catalog.
+
+Run with: python -m pytest tests/test_enhanced_product_validator.py -v
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import catalog_cache as catalog_cache_module
+from services.enhanced_product_validator import CatalogNameIndex, EnhancedProductValidator
+
+
+@pytest.fixture
+def catalog_fetch(monkeypatch):
+    """Replace the catalog fetch with a mock returning one product."""
+    product = MagicMock(id="prod_1", unit_price=1.5)
+    product.name = "Leche Entera"
+    fetch = AsyncMock(return_value=[product])
+    monkeypatch.setattr(catalog_cache_module, 'fetch_product_catalog', fetch)
+    catalog_cache_module.catalog_cache.invalidate()
+    yield fetch
+    catalog_cache_module.catalog_cache.invalidate()
+
+
+@pytest.fixture
+def validator():
+    """Create a validator with a mocked database."""
+    return EnhancedProductValidator(AsyncMock(), "test_distributor")
+
+
+class TestCatalogCache:
+    """Test suite for the validator's use of the shared product catalog."""
+
+    @pytest.mark.asyncio
+    async def test_catalog_is_shared_with_other_validators(self, validator, catalog_fetch):
+        """Test that validators of a distributor reuse one converted catalog until invalidated."""
+        first = await validator._get_catalog()
+        second = await EnhancedProductValidator(AsyncMock(), "test_distributor")._get_catalog()
+
+        assert first is second
+        assert [(p['name'], p['unit_price']) for p in first] == [("Leche Entera", 1.5)]
+        assert catalog_fetch.await_count == 1
+
+        catalog_cache_module.catalog_cache.invalidate("test_distributor")
+        await validator._get_catalog()
+        assert catalog_fetch.await_count == 2
+
+
+class TestSimilarProducts:
+    """Test suite for similar-product suggestions from the name index."""
+
+    CATALOG = (
+        {'id': 'p1', 'name': 'Leche Entera'},
+        {'id': 'p2', 'name': 'Pan Blanco'},
+        {'id': 'p3', 'name': 'Leche Descremada Light'},
+        {'id': 'p4', 'name': 'Queso Blanco'},
+    )
+
+    def test_index_groups_names_by_word(self):
+        """Test that catalog names are lowercased and indexed by word and ID once."""
+        index = CatalogNameIndex.build(self.CATALOG)
+
+        assert index.name_words[0] == frozenset({'leche', 'entera'})
+        assert index.by_word['blanco'] == (1, 3)
+        assert index.by_id['p3']['name'] == 'Leche Descremada Light'
+
+    @pytest.mark.asyncio
+    async def test_suggestions_rank_word_overlap(self, validator):
+        """Test that only overlapping names are suggested, best overlap first."""
+        similar = await validator._get_similar_products("leche entera grande", self.CATALOG)
+
+        assert similar == ['Leche Entera', 'Leche Descremada Light']
+        assert await validator._get_similar_products("cerveza", self.CATALOG) == []
+
+    @pytest.mark.asyncio
+    async def test_loaded_catalog_index_is_reused(self, validator, catalog_fetch):
+        """Test that the index is built once per loaded catalog and rebuilt after a reload."""
+        catalog = await validator._get_catalog()
+        index = validator._name_index
+
+        assert await validator._get_similar_products("leche", catalog) == ['Leche Entera']
+        await validator._get_catalog()
+        assert validator._name_index is index
+
+        catalog_cache_module.catalog_cache.invalidate("test_distributor")
+        await validator._get_catalog()
+        assert validator._name_index is not index
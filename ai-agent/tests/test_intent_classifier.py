@@ -0,0 +1,386 @@
+"""
+Tests for batched intent classification
+
+Tests that concurrent classifications are coalesced into one OpenAI request.
+
+Run with: python -m pytest tests/test_intent_classifier.py -v
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+from unittest.mock import AsyncMock, MagicMock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.intent_classifier import (
+    IntentBatchScheduler, IntentClassificationResult, MessageIntent, OrderIntentClassifier,
+    _RowObjectDecoder, normalize_message, quick_classify
+)
+
+
+def _result(content: str) -> IntentClassificationResult:
+    """Build a classification result tagged with its message."""
+    return IntentClassificationResult(
+        intent=MessageIntent.ORDER_RELATED,
+        confidence=0.9,
+        reasoning=content
+    )
+
+
+class TestIntentBatchScheduler:
+    """Test suite for IntentBatchScheduler."""
+
+    @pytest.fixture
+    def classifier(self):
+        """Create a classifier mock that echoes each message back."""
+        classifier = MagicMock()
+        classifier.classify_message_intent = AsyncMock(side_effect=_result)
+        classifier.classify_messages_batch = AsyncMock(
+            side_effect=lambda messages, on_result=None: [_result(m) for m in messages]
+        )
+        return classifier
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_one_batch(self, classifier):
+        """Test that concurrent classifications become one batch call in order."""
+        scheduler = IntentBatchScheduler(classifier, max_wait_ms=5)
+
+        results = await asyncio.gather(
+            scheduler.classify("uno"), scheduler.classify("dos"), scheduler.classify("tres")
+        )
+
+        assert [r.reasoning for r in results] == ["uno", "dos", "tres"]
+        assert classifier.classify_messages_batch.await_args.args == (["uno", "dos", "tres"],)
+        classifier.classify_messages_batch.assert_awaited_once()
+        classifier.classify_message_intent.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_single_message_uses_single_request(self, classifier):
+        """Test that a lone message skips the batch prompt."""
+        scheduler = IntentBatchScheduler(classifier, max_wait_ms=1)
+
+        result = await scheduler.classify("tienes pan?")
+
+        assert result.reasoning == "tienes pan?"
+        classifier.classify_messages_batch.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_full_batch_flushes_immediately(self, classifier):
+        """Test that reaching max_batch_size sends the batch without waiting."""
+        scheduler = IntentBatchScheduler(classifier, max_batch_size=2, max_wait_ms=10_000)
+
+        results = await asyncio.wait_for(
+            asyncio.gather(scheduler.classify("a"), scheduler.classify("b")), timeout=1
+        )
+
+        assert [r.reasoning for r in results] == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_batch_error_reaches_every_caller(self, classifier):
+        """Test that a failed batch raises in each waiting caller."""
+        classifier.classify_messages_batch.side_effect = RuntimeError("boom")
+        scheduler = IntentBatchScheduler(classifier, max_wait_ms=1)
+
+        results = await asyncio.gather(
+            scheduler.classify("a"), scheduler.classify("b"), return_exceptions=True
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def _stream(*chunks):
+    """Build a fake streaming OpenAI call yielding the given text chunks."""
+    async def stream(prompt, max_tokens):
+        for chunk in chunks:
+            yield chunk
+    return stream
+
+
+ROWS = (
+    '{"results": [{"row": 1, "intent": "ORDER_RELATED", "confidence": 0.9, "reasoning": "order {x}"},'
+    ' {"row": 2, "intent": "NOT_ORDER_RELATED", "confidence": 0.8, "reasoning": "greeting \\" }"}]}'
+)
+
+
+def _row(row, reasoning):
+    """Build one streamed batch result row."""
+    return json.dumps({"row": row, "intent": "ORDER_RELATED", "confidence": 0.9, "reasoning": reasoning})
+FIRST_ROW_END = ROWS.index('"},') + 2
+
+
+class TestRowObjectDecoder:
+    """Test suite for incremental row decoding."""
+
+    def test_rows_emitted_as_they_complete(self):
+        """Test that each row is returned once its closing brace arrives."""
+        decoder = _RowObjectDecoder()
+
+        first = decoder.feed(ROWS[:FIRST_ROW_END])
+        second = decoder.feed(ROWS[FIRST_ROW_END:])
+
+        assert [json.loads(row)["reasoning"] for row in first] == ["order {x}"]
+        assert [json.loads(row)["reasoning"] for row in second] == ['greeting " }']
+
+
+class TestClassifyMessagesBatch:
+    """Test suite for the streamed batch OpenAI classification request."""
+
+    @pytest.mark.asyncio
+    async def test_rows_are_parsed_in_order(self):
+        """Test that each result row maps back to its message."""
+        classifier = OrderIntentClassifier()
+        classifier._stream_openai_classification = _stream(*[ROWS[i:i + 7] for i in range(0, len(ROWS), 7)])
+
+        results = await classifier.classify_messages_batch(["quiero 2 leches", "hola"])
+
+        assert [r.intent for r in results] == [
+            MessageIntent.ORDER_RELATED, MessageIntent.NOT_ORDER_RELATED
+        ]
+
+    @pytest.mark.asyncio
+    async def test_first_row_delivered_before_stream_ends(self):
+        """Test that on_result fires for a row while later rows are still streaming."""
+        classifier = OrderIntentClassifier()
+        delivered = []
+
+        async def stream(prompt, max_tokens):
+            yield ROWS[:FIRST_ROW_END]
+            assert delivered == [0]
+            yield ROWS[FIRST_ROW_END:]
+
+        classifier._stream_openai_classification = stream
+
+        await classifier.classify_messages_batch(
+            ["a", "b"], on_result=lambda index, result: delivered.append(index)
+        )
+
+        assert delivered == [0, 1]
+
+    @pytest.mark.asyncio
+    async def test_missing_rows_fall_back(self):
+        """Test that rows absent from a short response are classified individually."""
+        classifier = OrderIntentClassifier()
+        classifier._stream_openai_classification = _stream(ROWS[:FIRST_ROW_END])
+        classifier.classify_message_intent = AsyncMock(side_effect=_result)
+
+        results = await classifier.classify_messages_batch(["a", "b"])
+
+        assert results[0].reasoning == "order {x}"
+        assert results[1].reasoning == "b"
+        classifier.classify_message_intent.assert_awaited_once_with("b")
+
+    @pytest.mark.asyncio
+    async def test_rows_are_matched_by_row_number(self):
+        """Test that rows arriving out of order still map to their own message."""
+        classifier = OrderIntentClassifier()
+        classifier._stream_openai_classification = _stream(_row(2, "second"), _row(1, "first"))
+
+        results = await classifier.classify_messages_batch(["a", "b"])
+
+        assert [r.reasoning for r in results] == ["first", "second"]
+
+    @pytest.mark.asyncio
+    async def test_skipped_row_does_not_shift_later_rows(self):
+        """Test that a skipped row is reclassified without moving the rows after it."""
+        classifier = OrderIntentClassifier()
+        classifier._stream_openai_classification = _stream(_row(1, "first"), _row(3, "third"))
+        classifier.classify_message_intent = AsyncMock(side_effect=_result)
+
+        results = await classifier.classify_messages_batch(["a", "b", "c"])
+
+        assert [r.reasoning for r in results] == ["first", "b", "third"]
+        classifier.classify_message_intent.assert_awaited_once_with("b")
+
+    @pytest.mark.asyncio
+    async def test_repeated_and_out_of_range_rows_are_dropped(self):
+        """Test that only the first row per number, within range, is used."""
+        classifier = OrderIntentClassifier()
+        classifier._stream_openai_classification = _stream(
+            _row(1, "first"), _row(1, "again"), _row(3, "extra"), _row(True, "bool"),
+            '{"intent": "ORDER_RELATED"}'
+        )
+        classifier.classify_message_intent = AsyncMock(side_effect=_result)
+        delivered = []
+
+        results = await classifier.classify_messages_batch(
+            ["a", "b"], on_result=lambda index, result: delivered.append((index, result.reasoning))
+        )
+
+        assert [r.reasoning for r in results] == ["first", "b"]
+        assert delivered == [(0, "first"), (1, "b")]
+
+    @pytest.mark.asyncio
+    async def test_scheduler_caches_rows_under_their_own_message(self):
+        """Test that a reordered response is remembered against the right messages."""
+        classifier = OrderIntentClassifier()
+        classifier._stream_openai_classification = _stream(_row(2, "dos"), _row(1, "uno"))
+        scheduler = IntentBatchScheduler(classifier, max_wait_ms=1)
+
+        await asyncio.gather(scheduler.classify("uno"), scheduler.classify("dos"))
+
+        assert {key: result.reasoning for key, (_, result) in scheduler._cache.items()} == {
+            "uno": "uno", "dos": "dos"
+        }
+
+
+class TestIntentCache:
+    """Test suite for the normalized-content classification cache."""
+
+    @pytest.fixture
+    def classifier(self):
+        """Create a classifier mock that echoes each message back."""
+        classifier = MagicMock()
+        classifier.classify_message_intent = AsyncMock(side_effect=_result)
+        return classifier
+
+    def test_normalize_message(self):
+        """Test that case and whitespace differences normalize away."""
+        assert normalize_message("  Buenos   Días \n") == "buenos días"
+
+    @pytest.mark.asyncio
+    async def test_repeated_message_hits_cache(self, classifier):
+        """Test that a normalized repeat is answered without calling OpenAI."""
+        scheduler = IntentBatchScheduler(classifier, max_wait_ms=1)
+
+        first = await scheduler.classify("Tienes PAN?")
+        second = await scheduler.classify("  tienes   pan? ")
+
+        assert second is first
+        classifier.classify_message_intent.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_cache_evicts_least_recently_used(self, classifier):
+        """Test that the cache is bounded by cache_size."""
+        scheduler = IntentBatchScheduler(classifier, max_wait_ms=1, cache_size=2)
+
+        await scheduler.classify("a")
+        await scheduler.classify("b")
+        await scheduler.classify("a")
+        await scheduler.classify("c")
+
+        assert list(scheduler._cache) == ["a", "c"]
+
+    @pytest.mark.asyncio
+    async def test_expired_entry_is_reclassified(self, classifier):
+        """Test that cached classifications expire after cache_ttl_seconds."""
+        scheduler = IntentBatchScheduler(classifier, max_wait_ms=1, cache_ttl_seconds=0)
+
+        await scheduler.classify("tienes pan?")
+        await scheduler.classify("tienes pan?")
+
+        assert classifier.classify_message_intent.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_misses_share_one_row(self, classifier):
+        """Test that identical messages queued together are classified once."""
+        scheduler = IntentBatchScheduler(classifier, max_wait_ms=1)
+
+        results = await asyncio.gather(
+            scheduler.classify("tienes pan?"),
+            scheduler.classify("Tienes  pan?"),
+            scheduler.classify("tienes pan?")
+        )
+
+        assert results[0] is results[1] is results[2]
+        classifier.classify_message_intent.assert_awaited_once()
+        assert scheduler._inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_cancelled_first_caller_does_not_cancel_shared_row(self, classifier):
+        """Test that duplicates still get the row when the caller that queued it is cancelled."""
+        scheduler = IntentBatchScheduler(classifier, max_wait_ms=5)
+
+        first = asyncio.ensure_future(scheduler.classify("tienes pan?"))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(scheduler.classify("Tienes pan?"))
+        await asyncio.sleep(0)
+        first.cancel()
+
+        result = await second
+
+        assert first.cancelled()
+        assert result.reasoning == "tienes pan?"
+        classifier.classify_message_intent.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_failed_classification_is_not_cached(self, classifier):
+        """Test that error defaults are retried on the next message."""
+        classifier.classify_message_intent.side_effect = lambda content: IntentClassificationResult(
+            MessageIntent.NOT_ORDER_RELATED, 0.5, "Classification failed: timeout"
+        )
+        scheduler = IntentBatchScheduler(classifier, max_wait_ms=1)
+
+        await scheduler.classify("tienes pan?")
+        await scheduler.classify("tienes pan?")
+
+        assert classifier.classify_message_intent.await_count == 2
+
+
+class TestClassificationPrompt:
+    """Test suite for the cache-friendly prompt layout."""
+
+    def test_message_comes_last(self):
+        """Test that only the tail of each prompt depends on the message."""
+        classifier = OrderIntentClassifier()
+
+        single_a = classifier._build_classification_prompt("hola", None)
+        single_b = classifier._build_classification_prompt("quiero leche", None)
+        batch = classifier._build_batch_classification_prompt(["hola", "quiero leche"])
+
+        assert single_a.endswith('CUSTOMER MESSAGE: "hola"')
+        assert single_a[:-len('hola"')] == single_b[:-len('quiero leche"')]
+        assert batch.endswith('ROW 1: "hola"\nROW 2: "quiero leche"')
+
+    @pytest.mark.asyncio
+    async def test_rules_are_sent_as_static_system_message(self, monkeypatch):
+        """Test that every request shares the same system message."""
+        from services import intent_classifier as classifier_module
+        create = AsyncMock(return_value=MagicMock(
+            choices=[MagicMock(message=MagicMock(content="{}"))]
+        ))
+        monkeypatch.setattr(classifier_module.openai_client.chat.completions, "create", create)
+        classifier = OrderIntentClassifier()
+
+        await classifier._call_openai_classification("first")
+        await classifier._call_openai_classification("second")
+
+        system_messages = [call.kwargs["messages"][0] for call in create.await_args_list]
+        assert system_messages[0] == system_messages[1]
+        assert "CLASSIFICATION RULES" in system_messages[0]["content"]
+
+
+class TestQuickClassify:
+    """Test suite for the local fast path."""
+
+    @pytest.mark.parametrize("message", ["hola", "  Buenos días!! ", "gracias", "OK.", "muchas gracias 🙏"])
+    def test_trivial_messages_are_not_order_related(self, message):
+        """Test that greetings and acknowledgments are classified locally."""
+        result = quick_classify(message)
+
+        assert result.intent == MessageIntent.NOT_ORDER_RELATED
+
+    @pytest.mark.parametrize("message", [
+        "¿Dónde está mi pedido 123?", "quiero cancelar el pedido 45", "necesito hablar con alguien a las 5"
+    ])
+    def test_order_status_questions_go_to_model(self, message):
+        """Test that order verbs with a number are not classified locally."""
+        assert quick_classify(message) is None
+
+    @pytest.mark.parametrize("message", ["hola, quiero leche", "quiero saber el horario", "tienes pan?"])
+    def test_ambiguous_messages_go_to_model(self, message):
+        """Test that anything else is left to the model."""
+        assert quick_classify(message) is None
+
+    @pytest.mark.asyncio
+    async def test_scheduler_skips_classifier_for_trivial_messages(self):
+        """Test that the scheduler answers trivial messages without the classifier."""
+        classifier = MagicMock()
+        classifier.classify_message_intent = AsyncMock(side_effect=_result)
+        scheduler = IntentBatchScheduler(classifier, max_wait_ms=1)
+
+        result = await scheduler.classify("gracias")
+
+        assert result.intent == MessageIntent.NOT_ORDER_RELATED
+        classifier.classify_message_intent.assert_not_called()
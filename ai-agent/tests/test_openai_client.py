@@ -0,0 +1,59 @@
+"""
+Tests for the shared OpenAI client
+
+Tests that LLM-using services share one pooled client, that it can be warmed
+up at startup and that it can be closed.
+
+Run with: python -m pytest tests/test_openai_client.py -v
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import AsyncMock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.openai_client import (
+    close_openai_client, get_http_client, get_openai_client, warm_openai_client
+)
+from services.product_matcher import ProductMatcher
+from services import intent_classifier
+
+
+class TestSharedOpenAIClient:
+    """Test suite for the shared OpenAI client."""
+
+    def test_services_share_one_client(self):
+        """Test that the matcher and classifier use the same pooled client."""
+        client = get_openai_client()
+
+        assert get_openai_client() is client
+        assert ProductMatcher()._get_openai_client() is client
+        assert intent_classifier.openai_client is client
+
+    @pytest.mark.asyncio
+    async def test_close_releases_pool(self):
+        """Test that closing discards the pool so a fresh one is created next time."""
+        http_client = get_http_client()
+
+        await close_openai_client()
+
+        assert http_client.is_closed
+        assert get_http_client() is not http_client
+
+    @pytest.mark.asyncio
+    async def test_warm_up_lists_models(self, monkeypatch):
+        """Test that warm-up makes one token-free request on the shared client."""
+        client = get_openai_client()
+        monkeypatch.setattr(client.models, 'list', AsyncMock(return_value=[]))
+
+        assert await warm_openai_client() is True
+        client.models.list.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_warm_up_failure_does_not_raise(self, monkeypatch):
+        """Test that an unreachable API only logs a warning."""
+        client = get_openai_client()
+        monkeypatch.setattr(client.models, 'list', AsyncMock(side_effect=ConnectionError("down")))
+
+        assert await warm_openai_client() is False
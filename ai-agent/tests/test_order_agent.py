@@ -0,0 +1,687 @@
+"""
+Tests for StreamlinedOrderProcessor
+
+Tests batching of concurrent OpenAI message analyses, catalog caching,
+conversation context caching, product validation, response parsing and
+batched message updates.
+
+Run with: python -m pytest tests/test_order_agent.py -v
+"""
+
+import asyncio
+import json
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import order_agent as order_agent_module
+from agents.order_agent import (
+    AnalysisBatcher, MessageUpdateBatcher, MessageView, StreamlinedOrderProcessor,
+    _load_json_object, _parse_batch_analysis_rows, _word_quantity
+)
+from postgrest.exceptions import APIError
+from schemas.message import ExtractedProduct
+from services import catalog_cache as catalog_cache_module
+
+
+@pytest.fixture
+def agent_runs(monkeypatch):
+    """Replace the streamlined agent with one whose responses are set per test."""
+    runs = SimpleNamespace(prompts=[], responses=[])
+
+    async def run(prompt, deps=None):
+        runs.prompts.append(prompt)
+        response = runs.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return SimpleNamespace(data=response)
+
+    monkeypatch.setattr(order_agent_module, 'streamlined_agent', SimpleNamespace(run=run))
+    return runs
+
+
+class TestMessageUpdateBatcher:
+    """Test suite for MessageUpdateBatcher."""
+
+    @pytest.fixture
+    def database(self):
+        """Create a database whose RPC reports every batched message as updated."""
+        database = MagicMock()
+        database.call_function = AsyncMock(
+            side_effect=lambda name, params: [{'message_id': row['id']} for row in params['updates']]
+        )
+        database.update_single = AsyncMock(return_value={'id': 'm1'})
+        return database
+
+    @pytest.mark.asyncio
+    async def test_concurrent_updates_share_one_rpc(self, database):
+        """Test that queued writes go out as one RPC and each caller gets its own result."""
+        batcher = MessageUpdateBatcher(database, max_batch_size=10, max_wait_seconds=0.01)
+
+        results = await asyncio.gather(
+            batcher.update("m1", {'ai_processed': True}),
+            batcher.update("m2", {'ai_processed': True}),
+            batcher.update("m1", {'ai_confidence': 0.9}),
+        )
+
+        assert results == [True, True, True]
+        database.call_function.assert_awaited_once()
+        name, params = database.call_function.await_args.args
+        assert name == 'update_messages_ai_data'
+        assert params['updates'] == [
+            {'id': 'm1', 'data': {'ai_processed': True, 'ai_confidence': 0.9}},
+            {'id': 'm2', 'data': {'ai_processed': True}},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_missing_row_reports_false(self, database):
+        """Test that a message the RPC did not update resolves to False."""
+        database.call_function.side_effect = None
+        database.call_function.return_value = [{'message_id': 'm1'}]
+        batcher = MessageUpdateBatcher(database, max_batch_size=2, max_wait_seconds=60)
+
+        results = await asyncio.gather(batcher.update("m1", {}), batcher.update("m2", {}))
+
+        assert results == [True, False]
+
+    @pytest.mark.asyncio
+    async def test_rpc_failure_writes_individually(self, database):
+        """Test that a failed RPC falls back to one update per message."""
+        database.call_function.side_effect = RuntimeError("function does not exist")
+        batcher = MessageUpdateBatcher(database, max_batch_size=10, max_wait_seconds=0.01)
+
+        assert await batcher.update("m1", {'ai_processed': True}) is True
+        database.update_single.assert_awaited_once_with(
+            table='messages', data={'ai_processed': True}, filters={'id': 'm1'}, distributor_id=None
+        )
+
+class TestLoadJsonObject:
+    """Test suite for parsing the JSON object in a model response."""
+
+    @pytest.mark.parametrize("response_text", [
+        '{"intent": "BUY"}',
+        'Here is the analysis:\n```json\n{"intent": "BUY"}\n```',
+    ])
+    def test_bare_and_wrapped_json(self, response_text):
+        """Test that bare JSON and JSON surrounded by text both parse."""
+        assert _load_json_object(response_text) == {"intent": "BUY"}
+
+    @pytest.mark.parametrize("response_text", ["no json here", '["BUY"]', '{"intent": '])
+    def test_missing_object_raises_value_error(self, response_text):
+        """Test that responses without a JSON object raise ValueError."""
+        with pytest.raises(ValueError):
+            _load_json_object(response_text)
+
+
+class TestAnalysisBatcher:
+    """Test suite for AnalysisBatcher."""
+
+    @pytest.fixture
+    def batcher(self):
+        """Create a batcher with a short batch window."""
+        return AnalysisBatcher(MagicMock(), max_batch_size=3, max_wait_seconds=0.01)
+
+    @pytest.mark.asyncio
+    async def test_single_message_uses_its_own_prompt(self, batcher, agent_runs):
+        """Test that a message with no company is sent unchanged."""
+        agent_runs.responses.append('{"intent": "BUY"}')
+
+        response = await batcher.analyze("MESSAGE: quiero leche")
+
+        assert response == '{"intent": "BUY"}'
+        assert agent_runs.prompts == ["MESSAGE: quiero leche"]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_messages_share_one_request(self, batcher, agent_runs):
+        """Test that queued messages are analyzed together and get their own rows back."""
+        agent_runs.responses.append(json.dumps({"results": [{"message": 1, "intent": "BUY"}, {"message": 2, "intent": "OTHER"}]}))
+
+        responses = await asyncio.gather(batcher.analyze("quiero leche"), batcher.analyze("hola"))
+
+        assert len(agent_runs.prompts) == 1
+        assert "=== MESSAGE 1 ===\nquiero leche" in agent_runs.prompts[0]
+        assert "=== MESSAGE 2 ===\nhola" in agent_runs.prompts[0]
+        assert [json.loads(r)["intent"] for r in responses] == ["BUY", "OTHER"]
+
+    @pytest.mark.asyncio
+    async def test_rows_are_ordered_by_message_number(self, batcher, agent_runs):
+        """Test that a reordered response still maps each row to its own message."""
+        agent_runs.responses.append(
+            json.dumps({"results": [{"message": 2, "intent": "OTHER"}, {"message": 1, "intent": "BUY"}]})
+        )
+
+        responses = await asyncio.gather(batcher.analyze("quiero leche"), batcher.analyze("hola"))
+
+        assert [json.loads(r) for r in responses] == [{"intent": "BUY"}, {"intent": "OTHER"}]
+
+    @pytest.mark.parametrize("messages", [[1, 1], [1, 3], [1, None], [True, 2]])
+    def test_unmatched_message_numbers_are_rejected(self, messages):
+        """Test that rows are only used when their numbers are exactly 1..N."""
+        response = json.dumps({"results": [{"message": m, "intent": "BUY"} for m in messages]})
+
+        assert _parse_batch_analysis_rows(response, 2) is None
+
+    @pytest.mark.asyncio
+    async def test_full_batch_is_sent_without_waiting(self, agent_runs):
+        """Test that reaching the batch size flushes before the window closes."""
+        batcher = AnalysisBatcher(MagicMock(), max_batch_size=2, max_wait_seconds=60)
+        agent_runs.responses.append(json.dumps({"results": [{"message": 1, "intent": "BUY"}, {"message": 2, "intent": "BUY"}]}))
+
+        responses = await asyncio.wait_for(
+            asyncio.gather(batcher.analyze("a"), batcher.analyze("b")), timeout=1
+        )
+
+        assert len(responses) == 2
+
+    @pytest.mark.asyncio
+    async def test_mismatched_rows_fall_back_to_single_calls(self, batcher, agent_runs):
+        """Test that a batch response missing rows is retried per message."""
+        agent_runs.responses.extend([
+            json.dumps({"results": [{"message": 1, "intent": "BUY"}]}),
+            '{"intent": "BUY"}',
+            RuntimeError("rate limited"),
+        ])
+
+        first, second = await asyncio.gather(
+            batcher.analyze("quiero leche"), batcher.analyze("hola"), return_exceptions=True
+        )
+
+        assert agent_runs.prompts[1:] == ["quiero leche", "hola"]
+        assert first == '{"intent": "BUY"}'
+        assert isinstance(second, RuntimeError)
+
+
+class TestAnalysisPrompt:
+    """Test suite for the cache-friendly analysis prompt layout."""
+
+    @pytest.mark.asyncio
+    async def test_message_parts_come_last(self):
+        """Test that prompts for different messages differ only after a shared prefix."""
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+        processor._get_catalog = AsyncMock(return_value=((), "\n\nAVAILABLE PRODUCTS (sample): Leche"))
+        processor.continuation_detector = MagicMock(_get_recent_pending_orders=AsyncMock(return_value=[]))
+        processor._analysis_batcher = MagicMock(analyze=AsyncMock(return_value='{"intent": "OTHER"}'))
+
+        await processor._analyze_with_openai("quiero leche", "No previous context", {'customer_id': 'c1'})
+        await processor._analyze_with_openai("hola", "Recent orders:", {'customer_id': 'c2'})
+
+        first, second = (call.args[0] for call in processor._analysis_batcher.analyze.await_args_list)
+        prefix = first[:first.index("CONTEXT:")]
+        assert second.startswith(prefix)
+        assert "AVAILABLE PRODUCTS (sample): Leche" in prefix
+        assert first.rstrip().endswith('MESSAGE: "quiero leche"')
+
+
+class TestAnalysisFallback:
+    """Test suite for the fallback when the analysis JSON cannot be used."""
+
+    @pytest.fixture
+    def processor(self):
+        """Create a processor whose analysis response is set per test."""
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+        processor._get_catalog = AsyncMock(return_value=((), ""))
+        processor.continuation_detector = MagicMock(_get_recent_pending_orders=AsyncMock(return_value=[]))
+        processor._analysis_batcher = MagicMock(analyze=AsyncMock())
+        processor._parse_intent = MagicMock(wraps=processor._parse_intent)
+        return processor
+
+    @pytest.mark.asyncio
+    async def test_malformed_products_keep_model_intent(self, processor):
+        """Test that only the product scan runs when the model's intent is usable."""
+        processor._analysis_batcher.analyze.return_value = json.dumps({
+            "intent": "BUY", "confidence": 0.9, "products": [{"name": "leche", "quantity": 0}]
+        })
+
+        intent, products, _ = await processor._analyze_with_openai("quiero dos leche", "", {})
+
+        processor._parse_intent.assert_not_called()
+        assert (intent.intent, intent.confidence) == ("BUY", 0.9)
+        assert [(p.product_name, p.quantity) for p in products] == [("leche", 2)]
+
+    @pytest.mark.asyncio
+    async def test_unreadable_response_uses_keyword_intent(self, processor):
+        """Test that the keyword intent scan runs when no JSON can be read."""
+        processor._analysis_batcher.analyze.return_value = "Lo siento, no puedo ayudar"
+
+        intent, products, _ = await processor._analyze_with_openai("hola", "", {})
+
+        processor._parse_intent.assert_called_once()
+        assert intent.intent == "OTHER"
+        assert products == []
+
+
+class TestAnalysisCache:
+    """Test suite for reusing analysis responses for identical prompts."""
+
+    @pytest.fixture
+    def processor(self):
+        """Create a processor whose analysis batcher is mocked."""
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+        processor._analysis_batcher = MagicMock(analyze=AsyncMock(return_value='{"intent": "OTHER"}'))
+        return processor
+
+    @pytest.mark.asyncio
+    async def test_identical_prompts_share_one_request(self, processor):
+        """Test that concurrent and repeated identical prompts make one OpenAI request."""
+        results = await asyncio.gather(
+            processor._analyze_prompt("hola"), processor._analyze_prompt("hola")
+        )
+        results.append(await processor._analyze_prompt("hola"))
+
+        assert results == ['{"intent": "OTHER"}'] * 3
+        processor._analysis_batcher.analyze.assert_awaited_once_with("hola")
+        assert processor._analysis_inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_different_prompts_are_not_shared(self, processor):
+        """Test that each distinct prompt gets its own request."""
+        await processor._analyze_prompt("hola")
+        await processor._analyze_prompt("quiero pan")
+
+        assert processor._analysis_batcher.analyze.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failures_and_expired_entries_are_retried(self, processor, monkeypatch):
+        """Test that failed requests are not cached and entries expire after the TTL."""
+        processor._analysis_batcher.analyze.side_effect = [RuntimeError("boom"), "first", "second"]
+
+        with pytest.raises(RuntimeError):
+            await processor._analyze_prompt("hola")
+        monkeypatch.setattr(order_agent_module, "_ANALYSIS_CACHE_TTL_SECONDS", -1.0)
+
+        assert await processor._analyze_prompt("hola") == "first"
+        assert await processor._analyze_prompt("hola") == "second"
+
+
+class TestTrivialMessages:
+    """Test suite for classifying trivial messages without OpenAI."""
+
+    @pytest.fixture
+    def processor(self):
+        """Create a processor whose context and analysis steps are mocked."""
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+        processor._get_simple_context = AsyncMock(return_value="")
+        processor._analyze_with_openai = AsyncMock(return_value=None)
+        return processor
+
+    @pytest.mark.parametrize("content,expected", [
+        ("", "OTHER"),
+        ("hola", "OTHER"),
+        ("Buenos días, que tal", "OTHER"),
+        ("tengo un problema", "COMPLAINT"),
+    ])
+    def test_trivial_messages_are_classified(self, processor, content, expected):
+        """Test that empty messages and short greetings/complaints are classified locally."""
+        intent, products, delivery_date = processor._analysis_from_trivial_message(
+            MessageView.from_content(content)
+        )
+
+        assert (intent.intent, products, delivery_date) == (expected, [], None)
+        assert intent.confidence >= 0.75
+
+    @pytest.mark.parametrize("content", [
+        "hola, quiero dos leches",
+        "hola tienes pan",
+        "hola?",
+        "hola 3",
+        "hola, necesito agua",
+        "hola hay un problema con el pedido de ayer por favor",
+        "gracias",
+    ])
+    def test_other_messages_need_openai(self, processor, content):
+        """Test that anything that might carry an order or question is not prefiltered."""
+        assert processor._analysis_from_trivial_message(MessageView.from_content(content)) is None
+
+    @pytest.mark.asyncio
+    async def test_greeting_skips_context_and_openai(self, processor):
+        """Test that a greeting is recorded without fetching context or calling OpenAI."""
+        processor._write_ai_data_batched = AsyncMock(return_value=True)
+        with patch("agents.order_agent.update_message_ai_data", AsyncMock()) as update:
+            analysis = await processor.process_message({'id': 'msg_1', 'content': ' hola '})
+
+        assert analysis.intent.intent == "OTHER"
+        processor._get_simple_context.assert_not_called()
+        processor._analyze_with_openai.assert_not_called()
+        assert update.await_count + processor._write_ai_data_batched.await_count == 1
+
+
+class TestStreamlinedAgentDeps:
+    """Test suite for the agent dependencies."""
+
+    def test_deps_are_frozen(self):
+        """Test that the agent dependencies cannot be swapped after construction."""
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+
+        with pytest.raises(AttributeError):
+            processor.deps.distributor_id = "other"
+        assert not hasattr(processor.deps, '__dict__')
+
+class TestCatalogCache:
+    """Test suite for the processor's cached product catalog."""
+
+    @pytest.fixture
+    def catalog_fetch(self, monkeypatch):
+        """Replace the catalog fetch with a mock returning two products."""
+        products = []
+        for name in ("Leche Entera", "Pan Blanco"):
+            product = MagicMock(unit_price=1.5)
+            product.name = name
+            products.append(product)
+        fetch = AsyncMock(return_value=products)
+        monkeypatch.setattr(catalog_cache_module, 'fetch_product_catalog', fetch)
+        catalog_cache_module.catalog_cache.invalidate()
+        yield fetch
+        catalog_cache_module.catalog_cache.invalidate()
+
+    @pytest.fixture
+    def processor(self):
+        """Create a processor with a mocked database."""
+        return StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+
+    @pytest.mark.asyncio
+    async def test_catalog_is_shared_by_processors(self, processor, catalog_fetch):
+        """Test that processors of a distributor reuse one shared catalog and prompt sample."""
+        other = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+
+        first = await processor._get_catalog()
+        second = await processor._get_catalog()
+        third = await other._get_catalog()
+
+        assert first is second
+        assert first[0] is third[0]
+        assert [p['name'] for p in first[0]] == ["Leche Entera", "Pan Blanco"]
+        assert catalog_fetch.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_prompt_sample_follows_reloaded_catalog(self, processor, catalog_fetch):
+        """Test that the prompt sample is rebuilt once the shared catalog is reloaded."""
+        first = await processor._get_catalog()
+        catalog_fetch.return_value = catalog_fetch.return_value[1:]
+
+        catalog_cache_module.catalog_cache.invalidate("test_distributor")
+        second = await processor._get_catalog()
+
+        assert catalog_fetch.await_count == 2
+        assert first[0] is not second[0]
+        assert second[1] == "\n\nAVAILABLE PRODUCTS (sample): Pan Blanco"
+
+    @pytest.mark.asyncio
+    async def test_prompt_sample_uses_product_names(self, processor, catalog_fetch):
+        """Test that the analysis prompt sample lists catalog product names."""
+        _, catalog_prompt = await processor._get_catalog()
+
+        assert catalog_prompt == "\n\nAVAILABLE PRODUCTS (sample): Leche Entera, Pan Blanco"
+
+
+class TestContextCache:
+    """Test suite for the per-conversation context cache."""
+
+    @pytest.fixture
+    def context_queries(self, monkeypatch):
+        """Replace the context queries with mocks returning one message and one order."""
+        queries = SimpleNamespace(
+            messages=AsyncMock(return_value=[{'content': 'quiero leche'}]),
+            orders=AsyncMock(return_value=[{'order_number': 'ORD-1'}]),
+        )
+        monkeypatch.setattr(order_agent_module, 'get_recent_messages_for_context', queries.messages)
+        monkeypatch.setattr(order_agent_module, 'get_recent_orders', queries.orders)
+        return queries
+
+    @pytest.fixture
+    def processor(self):
+        """Create a processor with a mocked database."""
+        return StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+
+    @pytest.mark.asyncio
+    async def test_burst_reuses_context(self, processor, context_queries):
+        """Test that messages in the same conversation share one context read."""
+        first = await processor._get_simple_context("conv_1", "cust_1")
+        second = await processor._get_simple_context("conv_1", "cust_1")
+
+        assert first == second == "Recent messages:\n- quiero leche\nRecent orders:\n- Order ORD-1"
+        assert context_queries.messages.await_count == 1
+        assert context_queries.orders.await_count == 1
+
+        processor.invalidate_context("conv_1")
+        await processor._get_simple_context("conv_1", "cust_1")
+        assert context_queries.messages.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_query_keeps_partial_context_uncached(self, processor, context_queries):
+        """Test that a failed query still returns the other half but is not cached."""
+        context_queries.orders.side_effect = RuntimeError("timeout")
+
+        context = await processor._get_simple_context("conv_1", "cust_1")
+
+        assert context == "Recent messages:\n- quiero leche"
+        assert "conv_1" not in processor._context_cache
+
+    @pytest.mark.asyncio
+    async def test_order_creation_invalidates_context(self, processor, context_queries, monkeypatch):
+        """Test that creating an order drops the conversation's cached context."""
+        monkeypatch.setattr(order_agent_module, 'create_order', AsyncMock(return_value="order_1"))
+        await processor._get_simple_context("conv_1", "cust_1")
+        product = ExtractedProduct(
+            product_name="leche", quantity=2, original_text="2 leches", confidence=0.9, status="confirmed"
+        )
+        analysis = MagicMock(extracted_products=[product], delivery_date=None)
+        analysis.intent.confidence = 0.9
+
+        created = await processor._create_simple_order(
+            {'id': 'msg_1', 'customer_id': 'cust_1', 'conversation_id': 'conv_1'}, analysis
+        )
+
+        assert created is True
+        assert "conv_1" not in processor._context_cache
+
+
+class TestCombinedOrderWrite:
+    """Test suite for creating an order and recording the message analysis in one request."""
+
+    @pytest.fixture
+    def processor(self, monkeypatch):
+        """Create a processor whose database writes are mocked."""
+        monkeypatch.setattr(order_agent_module, 'build_message_ai_update', AsyncMock(return_value={'ai_processed': True}))
+        monkeypatch.setattr(order_agent_module, 'create_order', AsyncMock(return_value="order_2"))
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+        processor._write_ai_data_batched = AsyncMock(return_value=True)
+        processor._context_cache["conv_1"] = (float("inf"), "cached")
+        return processor
+
+    @pytest.fixture
+    def order_creation(self, processor):
+        """Build the order for one confirmed product."""
+        product = ExtractedProduct(
+            product_name="leche", quantity=2, original_text="2 leches", confidence=0.9, status="confirmed"
+        )
+        analysis = MagicMock(extracted_products=[product], delivery_date=None)
+        analysis.intent.confidence = 0.9
+        return processor._build_order_creation(
+            {'id': 'msg_1', 'customer_id': 'cust_1', 'conversation_id': 'conv_1'}, analysis
+        )
+
+    @pytest.mark.asyncio
+    async def test_one_request_creates_order_and_updates_message(self, processor, order_creation, monkeypatch):
+        """Test that the order and message update go out in a single call."""
+        combined = AsyncMock(return_value="order_1")
+        monkeypatch.setattr(order_agent_module, 'create_order_and_update_message', combined)
+
+        order_id = await processor._create_order_and_write_ai_data("msg_1", order_creation, MagicMock())
+
+        assert order_id == "order_1"
+        combined.assert_awaited_once_with(processor.database, order_creation, "msg_1", {'ai_processed': True})
+        order_agent_module.create_order.assert_not_called()
+        processor._write_ai_data_batched.assert_not_called()
+        assert "conv_1" not in processor._context_cache
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("code", ["PGRST202", "42883"])
+    async def test_missing_function_falls_back_to_separate_writes(self, processor, order_creation, monkeypatch, code):
+        """Test that a missing database function still creates the order and updates the message."""
+        monkeypatch.setattr(
+            order_agent_module, 'create_order_and_update_message',
+            AsyncMock(side_effect=APIError({'code': code, 'message': 'function not found'}))
+        )
+        lookup = AsyncMock()
+        monkeypatch.setattr(order_agent_module, 'get_order_id_for_source_message', lookup)
+
+        order_id = await processor._create_order_and_write_ai_data("msg_1", order_creation, MagicMock())
+
+        assert order_id == "order_2"
+        lookup.assert_not_called()
+        processor._write_ai_data_batched.assert_awaited_once()
+        assert "conv_1" not in processor._context_cache
+
+    @pytest.mark.asyncio
+    async def test_error_after_commit_does_not_duplicate_order(self, processor, order_creation, monkeypatch):
+        """Test that a timeout after the transaction committed reuses the committed order."""
+        committed = {}
+
+        async def create_then_time_out(db, order_data, message_id, message_update):
+            committed[message_id] = "order_1"
+            raise TimeoutError("read timed out")
+
+        monkeypatch.setattr(order_agent_module, 'create_order_and_update_message', create_then_time_out)
+        monkeypatch.setattr(
+            order_agent_module, 'get_order_id_for_source_message',
+            AsyncMock(side_effect=lambda db, message_id, distributor_id: committed.get(message_id))
+        )
+
+        order_id = await processor._create_order_and_write_ai_data("msg_1", order_creation, MagicMock())
+
+        assert order_id == "order_1"
+        order_agent_module.get_order_id_for_source_message.assert_awaited_once_with(
+            processor.database, "msg_1", "test_distributor"
+        )
+        order_agent_module.create_order.assert_not_called()
+        processor._write_ai_data_batched.assert_not_called()
+        assert "conv_1" not in processor._context_cache
+
+    @pytest.mark.asyncio
+    async def test_error_before_commit_writes_separately(self, processor, order_creation, monkeypatch):
+        """Test that an error with no committed order falls back to the separate writes."""
+        monkeypatch.setattr(
+            order_agent_module, 'create_order_and_update_message', AsyncMock(side_effect=TimeoutError("connect"))
+        )
+        monkeypatch.setattr(order_agent_module, 'get_order_id_for_source_message', AsyncMock(return_value=None))
+
+        order_id = await processor._create_order_and_write_ai_data("msg_1", order_creation, MagicMock())
+
+        assert order_id == "order_2"
+        processor._write_ai_data_batched.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_failed_lookup_writes_nothing(self, processor, order_creation, monkeypatch):
+        """Test that an order is not inserted when the committed-order check itself fails."""
+        monkeypatch.setattr(
+            order_agent_module, 'create_order_and_update_message', AsyncMock(side_effect=TimeoutError("read"))
+        )
+        monkeypatch.setattr(
+            order_agent_module, 'get_order_id_for_source_message', AsyncMock(side_effect=TimeoutError("read"))
+        )
+
+        order_id = await processor._create_order_and_write_ai_data("msg_1", order_creation, MagicMock())
+
+        assert order_id is None
+        order_agent_module.create_order.assert_not_called()
+        processor._write_ai_data_batched.assert_not_called()
+
+    def test_order_needs_customer_and_confirmed_products(self, processor):
+        """Test that no order is built without a customer or confirmed products."""
+        product = ExtractedProduct(
+            product_name="leche", quantity=2, original_text="2 leches", confidence=0.9, status="pending"
+        )
+        analysis = MagicMock(extracted_products=[product])
+
+        assert processor._build_order_creation({'customer_id': 'cust_1'}, analysis) is None
+        assert processor._build_order_creation({}, analysis) is None
+
+
+class TestProductValidation:
+    """Test suite for concurrent product validation."""
+
+    @pytest.fixture
+    def processor(self, monkeypatch):
+        """Create a processor with a one-product catalog and a controllable matcher."""
+        processor = StreamlinedOrderProcessor(AsyncMock(), "test_distributor")
+        monkeypatch.setattr(
+            processor, '_get_catalog', AsyncMock(return_value=(({'name': 'Leche'},), ""))
+        )
+        return processor
+
+    @staticmethod
+    def _product(name):
+        """Build a draft extracted product."""
+        return ExtractedProduct(product_name=name, quantity=1, original_text=name, confidence=0.8)
+
+    @pytest.mark.asyncio
+    async def test_products_are_matched_concurrently_in_order(self, processor):
+        """Test that all products are matched at once and keep their message order."""
+        in_flight = SimpleNamespace(now=0, peak=0)
+
+        async def match_products(query, catalog):
+            in_flight.now += 1
+            in_flight.peak = max(in_flight.peak, in_flight.now)
+            await asyncio.sleep(0.01 if query == "leche" else 0)
+            in_flight.now -= 1
+            if query == "leche":
+                best = SimpleNamespace(product_id="p1", product_name="Leche", confidence=0.95, unit="litro")
+                return SimpleNamespace(confidence_level="HIGH", best_match=best, matches=[best])
+            return SimpleNamespace(
+                confidence_level="NONE", best_match=None, matches=[],
+                suggested_question=f"¿Qué es {query}?"
+            )
+
+        processor.product_matcher = SimpleNamespace(match_products=match_products)
+
+        result = await processor._intelligent_product_validation(
+            [self._product("leche"), self._product("xyz")], "leche y xyz", "conv_1"
+        )
+
+        assert in_flight.peak == 2
+        assert [p.product_name for p in result['validated_products']] == ["leche", "xyz"]
+        assert [p.status for p in result['validated_products']] == ["confirmed", "pending"]
+        assert result['validated_products'][0].unit == "litro"
+        assert result['requires_clarification'] is True
+        assert result['suggested_question'] == "¿Qué es xyz?"
+
+
+class TestFallbackProductParsing:
+    """Test suite for the keyword-based fallback product parser."""
+
+    @pytest.fixture
+    def processor(self):
+        """Create a processor without running its initializer."""
+        return StreamlinedOrderProcessor.__new__(StreamlinedOrderProcessor)
+
+    @pytest.mark.parametrize("content,expected", [
+        ("Quiero dos leche litros y 3 panes", [("leche", 2, "litro"), ("pan", 3, None)]),
+        ("pan y una coca cola botellas", [("coca cola", 1, "botella"), ("pan", 1, None)]),
+        ("tres coca cola", [("coca cola", 3, None)]),
+        ("hola, buenos días", []),
+    ])
+    def test_products_quantities_and_units(self, processor, content, expected):
+        """Test that keywords, quantities before them and units after them are found."""
+        products = processor._parse_products_simple(content)
+
+        assert [(p.product_name, p.quantity, p.unit) for p in products] == expected
+        assert all(p.original_text == content for p in products)
+
+    def test_shared_view_matches_raw_content(self, processor):
+        """Test that both parsers give the same results from a prebuilt view."""
+        content = "HOLA, quiero 2 Leche litros"
+        view = MessageView.from_content(content)
+
+        assert view.words == ("hola,", "quiero", "2", "leche", "litros")
+        assert processor._parse_intent("", content, view) == processor._parse_intent("", content)
+        assert processor._parse_products_simple(content, view) == processor._parse_products_simple(content)
+
+    @pytest.mark.parametrize("word,expected", [
+        ("dos", 2), ("docena", 12), ("15", 15), ("leche", None), ("2x", None),
+    ])
+    def test_word_quantity(self, word, expected):
+        """Test that Spanish numbers and digits resolve to quantities."""
+        assert _word_quantity(word) == expected
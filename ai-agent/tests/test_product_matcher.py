@@ -166,6 +166,40 @@ class TestProductMatcher:
         assert matcher.fuzzy_similarity("", "agua") == 0.0
         assert matcher.fuzzy_similarity(None, "agua") == 0.0
     
+    def test_fuzzy_match_pruning_keeps_best_similarity(self, matcher, sample_products):
+        """Test that pruned fuzzy matching finds the same best pair as a full scan."""
+        query_terms = matcher.extract_product_terms("quiero agua embotellda y coca")
+        
+        for product in sample_products:
+            texts = [product['name']] + product.get('aliases', []) + [product.get('brand') or '']
+            best = max(
+                (matcher.fuzzy_similarity(term, text) for term in query_terms for text in texts),
+                default=0.0
+            )
+            match = matcher.match_fuzzy(query_terms, product)
+            
+            if best < 0.45:
+                assert match is None
+            else:
+                assert match is not None
+                assert match.confidence == pytest.approx(
+                    matcher.MATCH_CONFIDENCE_SCORES[match.match_type] * best
+                )
+    
+    def test_fuzzy_match_tolerates_joined_words(self, matcher, sample_products):
+        """Test that a typo like 'cocacola' fuzzy-matches its product."""
+        match = matcher.match_fuzzy(matcher.extract_product_terms("cocacola"), sample_products[1])
+        
+        assert match is not None
+        assert match.match_type == 'FUZZY_HIGH'
+        assert matcher.match_fuzzy(["zzzzzz"], sample_products[1]) is None
+    
+    def test_fuzzy_similarity_scores_are_pinned(self, matcher):
+        """Test the difflib scores the fuzzy thresholds were tuned against."""
+        assert matcher.fuzzy_similarity("corona", "chocolate") == pytest.approx(0.40)
+        assert matcher.fuzzy_similarity("cocacola", "coca cola") == pytest.approx(16 / 17)
+        assert matcher.match_fuzzy(["corona"], {'id': 'p1', 'name': 'Chocolate'}) is None
+    
     def test_exact_name_matching(self, matcher, sample_products):
         """Test exact name matching."""
         query_terms = ["agua embotellada 500ml"]
@@ -176,6 +210,7 @@ class TestProductMatcher:
         assert match.match_type == 'EXACT'
         assert match.confidence == 1.0
         assert match.product_name == 'Agua Embotellada 500ml'
+        assert not hasattr(match, '__dict__')  # slotted: one is built per candidate
         
         # Should not match different product
         match = matcher.match_exact_name(query_terms, sample_products[1])
@@ -244,6 +279,36 @@ class TestProductMatcher:
         assert match.match_type in ['FUZZY_HIGH', 'FUZZY_MEDIUM', 'FUZZY_LOW']
         assert 0.4 <= match.confidence <= 1.0
     
+    def test_fuzzy_matchers_prepared_once_per_catalog(self, matcher, sample_products):
+        """Test that fuzzy-match texts are reused for the same catalog and rebuilt for a new one."""
+        catalog = tuple(sample_products)
+        first = matcher.find_product_matches("kokakola", catalog)
+        prepared = list(matcher._catalog_text_matchers)
+        
+        second = matcher.find_product_matches("kokakola", catalog)
+        
+        assert [m.product_id for m in first] == [m.product_id for m in second]
+        assert any(text_matchers is not None for text_matchers in prepared)
+        assert all(a is b for a, b in zip(prepared, matcher._catalog_text_matchers))
+        
+        matcher.find_product_matches("kokakola", list(sample_products))
+        assert all(
+            a is not b for a, b in zip(prepared, matcher._catalog_text_matchers) if a is not None
+        )
+    
+    def test_exact_stages_only_run_for_indexed_candidates(self, matcher, sample_products):
+        """Test that exact-match stages are skipped for products no query term can equal."""
+        calls = []
+        match_exact_name = matcher.match_exact_name
+        matcher.match_exact_name = lambda terms, product: calls.append(product['id']) or match_exact_name(terms, product)
+        
+        matches = matcher.find_product_matches("koka", sample_products)
+        
+        assert calls == ['2']
+        assert matches[0].product_id == '2'
+        assert matches[0].match_type == 'MISSPELLING'
+        assert matcher._catalog_exact_index['koka'] == {1}
+    
     def test_skip_inactive_products(self, matcher, sample_products):
         """Test that inactive/out-of-stock products are skipped."""
         query_terms = ["papas"]
@@ -0,0 +1,76 @@
+"""
+Tests for RequestBatcher
+
+Tests that queued requests are flushed as one batch when the wait window
+ends or the batch is full, and that futures already done are left alone.
+
+Run with: python -m pytest tests/test_request_batcher.py -v
+"""
+
+import asyncio
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.request_batcher import RequestBatcher
+
+
+class EchoBatcher(RequestBatcher):
+    """Batcher answering each request with itself, recording every batch."""
+
+    def __init__(self, max_batch_size, max_wait_seconds):
+        super().__init__(max_batch_size, max_wait_seconds)
+        self.batches = []
+
+    async def echo(self, request):
+        return await self._enqueue(request)
+
+    async def _run_batch(self, batch):
+        self.batches.append([request for request, _ in batch])
+        for request, future in batch:
+            self._resolve(future, ValueError(request) if request == "bad" else request)
+
+
+class TestRequestBatcher:
+    """Test suite for the shared queue and flush timer."""
+
+    @pytest.mark.asyncio
+    async def test_requests_in_window_share_a_batch(self):
+        """Test that requests queued within the wait window are run together."""
+        batcher = EchoBatcher(max_batch_size=10, max_wait_seconds=0.01)
+
+        results = await asyncio.gather(*(batcher.echo(i) for i in range(3)))
+
+        assert results == [0, 1, 2]
+        assert batcher.batches == [[0, 1, 2]]
+
+    @pytest.mark.asyncio
+    async def test_full_batch_flushes_without_waiting(self):
+        """Test that reaching max_batch_size sends the batch before the timer fires."""
+        batcher = EchoBatcher(max_batch_size=2, max_wait_seconds=60)
+
+        results = await asyncio.wait_for(asyncio.gather(batcher.echo("a"), batcher.echo("b")), timeout=1)
+
+        assert results == ["a", "b"]
+        assert batcher._flush_handle is None
+
+    @pytest.mark.asyncio
+    async def test_exceptions_reach_only_their_caller(self):
+        """Test that an exception result is raised by its own caller only."""
+        batcher = EchoBatcher(max_batch_size=10, max_wait_seconds=0.01)
+
+        results = await asyncio.gather(batcher.echo("ok"), batcher.echo("bad"), return_exceptions=True)
+
+        assert results[0] == "ok"
+        assert isinstance(results[1], ValueError)
+
+    @pytest.mark.asyncio
+    async def test_resolve_skips_done_futures(self):
+        """Test that a cancelled caller's future is not resolved again."""
+        future = asyncio.get_running_loop().create_future()
+        future.cancel()
+
+        RequestBatcher._resolve(future, "late")
+
+        assert future.cancelled()
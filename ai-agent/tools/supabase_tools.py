@@ -12,7 +12,7 @@ CRITICAL: Use database transactions for atomic operations
 from __future__ import annotations as _annotations
 
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple
 from datetime import datetime
 from decimal import Decimal
 
@@ -174,6 +174,59 @@ async def fetch_unprocessed_messages(
         raise
 
 
+async def build_message_ai_update(
+    db: DatabaseService,
+    message_id: str,
+    analysis: MessageAnalysis
+) -> Dict[str, Any]:
+    """
+    Build the columns that record a message's AI analysis.
+    
+    Args:
+        db: Database service instance
+        message_id: Message ID being updated (for logging)
+        analysis: Complete message analysis
+        
+    Returns:
+        Dict[str, Any]: Column values for the messages row
+    """
+    # Create update data directly with the fields we know exist
+    # Use model_dump() for Pydantic v2 compatibility and add better logging
+    products_json = None
+    if analysis.extracted_products:
+        try:
+            # Use model_dump() for Pydantic v2 compatibility
+            products_json = [p.model_dump() if hasattr(p, 'model_dump') else p.dict() for p in analysis.extracted_products]
+            logger.info(f"Serializing {len(products_json)} products: {[p.get('product_name') for p in products_json]}")
+        except Exception as e:
+            logger.error(f"Failed to serialize products: {e}")
+            products_json = None
+    
+    update_data = {
+        'ai_processed': True,
+        'ai_confidence': analysis.intent.confidence,
+        'ai_extracted_intent': analysis.intent.intent,
+        'ai_extracted_products': products_json,
+        'ai_processing_time_ms': analysis.processing_time_ms,
+        'updated_at': datetime.now().isoformat()
+    }
+    
+    # CRITICAL: If this is a continuation message, link it using explicit columns
+    if analysis.is_continuation and analysis.continuation_order_id:
+        update_data['is_continuation'] = True
+        update_data['parent_order_id'] = analysis.continuation_order_id
+        # Set continuation sequence based on existing messages for this order
+        continuation_sequence = await _get_next_continuation_sequence(db, analysis.continuation_order_id)
+        update_data['continuation_sequence'] = continuation_sequence
+        logger.info(f"🔗 Linking message {message_id} to order {analysis.continuation_order_id} (continuation #{continuation_sequence})")
+    else:
+        # Explicitly mark as non-continuation for clarity
+        update_data['is_continuation'] = False
+    
+    logger.debug(f"Update data for message {message_id}: {update_data}")
+    return update_data
+
+
 async def update_message_ai_data(
     db: DatabaseService,
     message_id: str,
@@ -197,41 +250,7 @@ async def update_message_ai_data(
     """
     try:
         logger.debug(f"Updating message {message_id} with AI analysis")
-        
-        # Create update data directly with the fields we know exist
-        # Use model_dump() for Pydantic v2 compatibility and add better logging
-        products_json = None
-        if analysis.extracted_products:
-            try:
-                # Use model_dump() for Pydantic v2 compatibility
-                products_json = [p.model_dump() if hasattr(p, 'model_dump') else p.dict() for p in analysis.extracted_products]
-                logger.info(f"Serializing {len(products_json)} products: {[p.get('product_name') for p in products_json]}")
-            except Exception as e:
-                logger.error(f"Failed to serialize products: {e}")
-                products_json = None
-        
-        update_data = {
-            'ai_processed': True,
-            'ai_confidence': analysis.intent.confidence,
-            'ai_extracted_intent': analysis.intent.intent,
-            'ai_extracted_products': products_json,
-            'ai_processing_time_ms': analysis.processing_time_ms,
-            'updated_at': datetime.now().isoformat()
-        }
-        
-        # CRITICAL: If this is a continuation message, link it using explicit columns
-        if analysis.is_continuation and analysis.continuation_order_id:
-            update_data['is_continuation'] = True
-            update_data['parent_order_id'] = analysis.continuation_order_id
-            # Set continuation sequence based on existing messages for this order
-            continuation_sequence = await _get_next_continuation_sequence(db, analysis.continuation_order_id)
-            update_data['continuation_sequence'] = continuation_sequence
-            logger.info(f"🔗 Linking message {message_id} to order {analysis.continuation_order_id} (continuation #{continuation_sequence})")
-        else:
-            # Explicitly mark as non-continuation for clarity
-            update_data['is_continuation'] = False
-        
-        logger.debug(f"Update data for message {message_id}: {update_data}")
+        update_data = await build_message_ai_update(db, message_id, analysis)
         
         # Update message by ID only (no distributor_id needed - message IDs are unique)
         result = await db.update_single(
@@ -247,8 +266,8 @@ async def update_message_ai_data(
             if analysis.is_continuation and analysis.continuation_order_id:
                 continuation_seq = update_data.get('continuation_sequence', '?')
                 logger.info(f"   🔗 Linked to order {analysis.continuation_order_id} (continuation #{continuation_seq})")
-            if products_json:
-                logger.info(f"   📦 Products saved: {[p.get('product_name') for p in products_json]}")
+            if update_data['ai_extracted_products']:
+                logger.info(f"   📦 Products saved: {[p.get('product_name') for p in update_data['ai_extracted_products']]}")
         else:
             logger.error(f"❌ Failed to update message {message_id} - no rows affected. Check if message exists in database.")
             
@@ -259,6 +278,136 @@ async def update_message_ai_data(
         return False
 
 
+async def update_messages_ai_data_batch(
+    db: DatabaseService,
+    updates: List[Tuple[str, Dict[str, Any]]]
+) -> Set[str]:
+    """
+    Write several messages' AI analysis columns in a single request.
+    
+    Calls the update_messages_ai_data database function, which applies every
+    row in one statement; columns missing from a row's data are left unchanged.
+    
+    Args:
+        db: Database service instance
+        updates: (message_id, data from build_message_ai_update) pairs
+        
+    Returns:
+        Set[str]: IDs of the messages that were updated
+    """
+    if not updates:
+        return set()
+    
+    rows = await db.call_function(
+        'update_messages_ai_data',
+        {'updates': [{'id': message_id, 'data': data} for message_id, data in updates]}
+    )
+    updated = {row['message_id'] for row in rows or []}
+    logger.info(f"✅ Updated {len(updated)}/{len(updates)} messages with AI analysis in one request")
+    return updated
+
+
+async def create_order_and_update_message(
+    db: DatabaseService,
+    order_data: OrderCreation,
+    message_id: str,
+    message_update: Dict[str, Any]
+) -> Optional[str]:
+    """
+    Create an order and record the source message's AI analysis in a single request.
+    
+    Calls the create_order_and_update_message database function, which inserts
+    the order and its products (filling catalog prices for matched products, as
+    _populate_catalog_prices does) and applies the message update in one
+    transaction, replacing the separate order, price and message round-trips.
+    
+    Args:
+        db: Database service instance
+        order_data: Complete order creation data
+        message_id: Message whose analysis is recorded
+        message_update: Column values from build_message_ai_update
+        
+    Returns:
+        Optional[str]: Order ID if successful, None if failed
+    """
+    order_insert = OrderDatabaseInsert.from_order_creation(
+        order_data, order_data.total_amount or Decimal('0')
+    )
+    order_dict = order_insert.dict()
+    order_dict['total_amount'] = float(order_dict['total_amount'])
+    
+    # The database function assigns order_id to every product row
+    products = []
+    for line_order, product in enumerate(order_data.products, 1):
+        product_dict = OrderProductDatabaseInsert.from_order_product(
+            product, "", line_order
+        ).dict(exclude={'order_id'})
+        product_dict['unit_price'] = float(product_dict['unit_price'])
+        product_dict['line_price'] = float(product_dict['line_price'])
+        products.append(product_dict)
+    
+    order_id = await db.call_function('create_order_and_update_message', {
+        'order_data': order_dict,
+        'order_products': products,
+        'message_id': message_id,
+        'message_data': message_update
+    })
+    if not order_id:
+        logger.error(f"Failed to create order for message {message_id}")
+        return None
+    
+    logger.info(f"Successfully created order {order_id} with {len(products)} products and updated message {message_id}")
+    return str(order_id)
+
+
+# PostgREST and Postgres error codes for a database function that does not exist
+_MISSING_FUNCTION_CODES = {'PGRST202', '42883'}
+
+
+def is_missing_function_error(error: BaseException) -> bool:
+    """
+    Check whether an RPC failed because the database function is not installed.
+    
+    Only this failure is known to have written nothing; any other error (a
+    timeout, a dropped connection) may arrive after the function committed.
+    
+    Args:
+        error: Exception raised by DatabaseService.call_function
+        
+    Returns:
+        bool: True if PostgREST or Postgres reported the function as missing
+    """
+    return getattr(error, 'code', None) in _MISSING_FUNCTION_CODES
+
+
+async def get_order_id_for_source_message(
+    db: DatabaseService,
+    message_id: str,
+    distributor_id: str
+) -> Optional[str]:
+    """
+    Find the order already created from a message, if any.
+    
+    Unlike the context lookups, failures are raised: callers use this to
+    decide whether inserting an order would create a duplicate.
+    
+    Args:
+        db: Database service instance
+        message_id: Message recorded as the order's ai_source_message_id
+        distributor_id: Distributor ID for multi-tenant filtering
+        
+    Returns:
+        Optional[str]: Order ID if an order exists for the message, None otherwise
+    """
+    orders = await db.execute_query(
+        table='orders',
+        operation='select',
+        filters={'ai_source_message_id': message_id},
+        distributor_id=distributor_id
+    )
+    return str(orders[0]['id']) if orders else None
+
+
 async def create_order(
     db: DatabaseService,
     order_data: OrderCreation
@@ -0,0 +1,45 @@
+-- Batch update of message AI analysis columns
+-- Lets the AI agent record the analysis of many messages in a single RPC call
+-- instead of one PATCH request per message
+
+-- Continuation columns written by the AI agent alongside its analysis
+ALTER TABLE messages ADD COLUMN IF NOT EXISTS is_continuation BOOLEAN DEFAULT FALSE;
+ALTER TABLE messages ADD COLUMN IF NOT EXISTS parent_order_id UUID;
+ALTER TABLE messages ADD COLUMN IF NOT EXISTS continuation_sequence INTEGER;
+
+-- Apply [{"id": <message id>, "data": {<column>: <value>, ...}}, ...] in one statement.
+-- Columns missing from a row's data keep their current value.
+CREATE OR REPLACE FUNCTION update_messages_ai_data(updates JSONB)
+RETURNS TABLE (message_id UUID) AS $$
+BEGIN
+    RETURN QUERY
+    WITH batch AS (
+        SELECT (item->>'id')::UUID AS id, item->'data' AS data
+        FROM jsonb_array_elements(updates) AS item
+    )
+    UPDATE messages AS m
+    SET ai_processed = CASE WHEN b.data ? 'ai_processed'
+            THEN (b.data->>'ai_processed')::BOOLEAN ELSE m.ai_processed END,
+        ai_confidence = CASE WHEN b.data ? 'ai_confidence'
+            THEN (b.data->>'ai_confidence')::DECIMAL(3,2) ELSE m.ai_confidence END,
+        ai_extracted_intent = CASE WHEN b.data ? 'ai_extracted_intent'
+            THEN b.data->>'ai_extracted_intent' ELSE m.ai_extracted_intent END,
+        ai_extracted_products = CASE WHEN b.data ? 'ai_extracted_products'
+            THEN NULLIF(b.data->'ai_extracted_products', 'null'::JSONB) ELSE m.ai_extracted_products END,
+        ai_processing_time_ms = CASE WHEN b.data ? 'ai_processing_time_ms'
+            THEN (b.data->>'ai_processing_time_ms')::INTEGER ELSE m.ai_processing_time_ms END,
+        is_continuation = CASE WHEN b.data ? 'is_continuation'
+            THEN (b.data->>'is_continuation')::BOOLEAN ELSE m.is_continuation END,
+        parent_order_id = CASE WHEN b.data ? 'parent_order_id'
+            THEN (b.data->>'parent_order_id')::UUID ELSE m.parent_order_id END,
+        continuation_sequence = CASE WHEN b.data ? 'continuation_sequence'
+            THEN (b.data->>'continuation_sequence')::INTEGER ELSE m.continuation_sequence END,
+        updated_at = CASE WHEN b.data ? 'updated_at'
+            THEN (b.data->>'updated_at')::TIMESTAMPTZ ELSE NOW() END
+    FROM batch AS b
+    WHERE m.id = b.id
+    RETURNING m.id;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION update_messages_ai_data IS 'Applies AI analysis results to a batch of messages in one statement and returns the updated message IDs';
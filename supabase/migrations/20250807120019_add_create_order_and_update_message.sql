@@ -0,0 +1,60 @@
+-- Create an AI order and record its source message's analysis in one RPC call
+-- Replaces the separate order insert, catalog price lookups, order products
+-- insert and message update the AI agent otherwise issues per order message
+
+-- order_data:     orders columns (as sent for a direct insert)
+-- order_products: [{order_products columns except order_id}, ...]
+-- message_data:   messages columns, as accepted by update_messages_ai_data
+-- Matched products without a price take the catalog price and unit, like the
+-- agent's own price lookup. Returns the new order ID.
+CREATE OR REPLACE FUNCTION create_order_and_update_message(
+    order_data JSONB,
+    order_products JSONB,
+    message_id UUID,
+    message_data JSONB
+)
+RETURNS UUID AS $$
+DECLARE
+    new_order_id UUID;
+BEGIN
+    INSERT INTO orders (
+        customer_id, distributor_id, conversation_id, channel, status,
+        received_date, received_time, delivery_date, total_amount,
+        additional_comment, ai_generated, ai_confidence, ai_source_message_id,
+        requires_review, is_consolidated, order_session_id
+    )
+    SELECT o.customer_id, o.distributor_id, o.conversation_id, o.channel, o.status,
+           o.received_date, o.received_time, o.delivery_date, o.total_amount,
+           o.additional_comment, o.ai_generated, o.ai_confidence, o.ai_source_message_id,
+           o.requires_review, o.is_consolidated, o.order_session_id
+    FROM jsonb_populate_record(NULL::orders, order_data) AS o
+    RETURNING id INTO new_order_id;
+
+    INSERT INTO order_products (
+        order_id, product_name, quantity, product_unit, unit_price, line_price,
+        ai_extracted, ai_confidence, ai_original_text, matched_product_id,
+        matching_confidence, line_order
+    )
+    SELECT new_order_id, p.product_name, p.quantity,
+           CASE WHEN c.id IS NULL THEN p.product_unit
+                ELSE COALESCE(NULLIF(c.unit, ''), NULLIF(p.product_unit, ''), 'unidad') END,
+           CASE WHEN c.unit_price IS NULL THEN p.unit_price ELSE c.unit_price END,
+           CASE WHEN c.unit_price IS NULL THEN p.line_price ELSE c.unit_price * p.quantity END,
+           p.ai_extracted, p.ai_confidence, p.ai_original_text, p.matched_product_id,
+           p.matching_confidence, p.line_order
+    FROM jsonb_populate_recordset(NULL::order_products, order_products) AS p
+    LEFT JOIN products AS c
+        ON c.id = p.matched_product_id
+       AND COALESCE(p.unit_price, 0) = 0
+       AND c.distributor_id::TEXT = order_data->>'distributor_id'
+    ORDER BY p.line_order;
+
+    PERFORM update_messages_ai_data(
+        jsonb_build_array(jsonb_build_object('id', message_id, 'data', message_data))
+    );
+
+    RETURN new_order_id;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION create_order_and_update_message IS 'Creates an AI order with its products and applies the source message AI analysis in one transaction; returns the order ID';